@@ -0,0 +1,10 @@
+"""
+Build what Studio's unit editor needs that only depends on the installed
+XBlocks, so that the first unit opened doesn't pay for it.
+"""
+from contentstore.views.component import get_component_templates
+
+
+def run():
+    """Build the component templates shown in the unit editor"""
+    get_component_templates()
@@ -6,6 +6,7 @@ Unit tests for the asset upload endpoint.
 #pylint: disable=W0621
 #pylint: disable=W0212
 
+import json
 from datetime import datetime
 from io import BytesIO
 from pytz import UTC
@@ -40,17 +41,57 @@ class AssetsTestCase(CourseTestCase):
 
 class AssetsToyCourseTestCase(CourseTestCase):
     """
-    Tests the assets returned from asset_index for the toy test course.
+    Tests the assets returned from asset_page for the toy test course.
     """
-    def test_toy_assets(self):
+    def setUp(self):
+        super(AssetsToyCourseTestCase, self).setUp()
         module_store = modulestore('direct')
         import_from_xml(module_store, 'common/test/data/', ['toy'], static_content_store=contentstore(), verbose=True)
-        url = reverse("asset_index", kwargs={'org': 'edX', 'course': 'toy', 'name': '2012_Fall'})
+        self.url = reverse("asset_page", kwargs={'org': 'edX', 'course': 'toy', 'name': '2012_Fall'})
 
-        resp = self.client.get(url)
-        # Test a small portion of the asset data passed to the client.
-        self.assertContains(resp, "new CMS.Models.AssetCollection([{")
-        self.assertContains(resp, "/c4x/edX/toy/asset/handouts_sample_handout.txt")
+    def get_page(self, **params):
+        resp = self.client.get(self.url, params)
+        self.assertEquals(resp.status_code, 200)
+        return json.loads(resp.content)
+
+    def test_toy_assets(self):
+        page = self.get_page()
+        self.assertEquals(len(page['assets']), 3)
+        self.assertIsNone(page['next'])
+        self.assertIn("/c4x/edX/toy/asset/handouts_sample_handout.txt",
+                      [asset['url'] for asset in page['assets']])
+
+        # The index page loads them, rather than embedding them.
+        resp = self.client.get(reverse("asset_index", kwargs={'org': 'edX', 'course': 'toy', 'name': '2012_Fall'}))
+        self.assertContains(resp, self.url)
+        self.assertNotContains(resp, "handouts_sample_handout.txt")
+
+    def test_pages(self):
+        for sort in ('display_name', 'date_added'):
+            for direction in ('asc', 'desc'):
+                names = []
+                page = self.get_page(sort=sort, direction=direction, limit=2)
+                names.extend(asset['display_name'] for asset in page['assets'])
+                self.assertIsNotNone(page['next'])
+                page = self.get_page(sort=sort, direction=direction, limit=2, after=page['next'])
+                names.extend(asset['display_name'] for asset in page['assets'])
+                self.assertIsNone(page['next'])
+
+                self.assertEquals(len(set(names)), 3)
+                if sort == 'display_name':
+                    self.assertEquals(names, sorted(names, reverse=(direction == 'desc')))
+
+    def test_filters(self):
+        page = self.get_page(text='STATIC', sort='display_name')
+        self.assertEquals([asset['display_name'] for asset in page['assets']],
+                          ['another_static.txt', 'sample_static.txt'])
+        self.assertEquals(len(self.get_page(type='text/')['assets']), 3)
+        self.assertEquals(self.get_page(type='image/')['assets'], [])
+
+    def test_bad_parameters(self):
+        for params in ({'sort': 'size'}, {'direction': 'up'}, {'limit': 'all'}, {'limit': 0}, {'after': 'junk'}):
+            resp = self.client.get(self.url, params)
+            self.assertEquals(resp.status_code, 400)
 
 
 class UploadTestCase(CourseTestCase):
@@ -103,3 +144,16 @@ class AssetToJsonTestCase(TestCase):
 
         output = assets._get_asset_json("name", upload_date, location, None)
         self.assertIsNone(output["thumbnail"])
+
+
+class AssetCursorTestCase(TestCase):
+    """
+    Unit tests for the cursors that asset pages are linked by.
+    """
+    def test_round_trip(self):
+        upload_date = datetime(2013, 6, 1, 10, 30, 5, 123000)
+        cursor = assets._encode_asset_cursor('uploadDate', (upload_date, u'my_file.jpg'))
+        self.assertEquals(assets._decode_asset_cursor('uploadDate', cursor), (upload_date, u'my_file.jpg'))
+
+        cursor = assets._encode_asset_cursor('displayname', (u'My File', u'my_file.jpg'))
+        self.assertEquals(assets._decode_asset_cursor('displayname', cursor), (u'My File', u'my_file.jpg'))
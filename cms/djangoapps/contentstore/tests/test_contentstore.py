@@ -161,6 +161,27 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         resp = self.client.get(reverse('edit_unit', kwargs={'location': location.url()}))
         self.assertEqual(resp.status_code, 400)
 
+    def test_edit_unit_after_moving_unit(self):
+        course = CourseFactory.create(org='MITx', course='999', display_name='Robot Super Course')
+        chapter = ItemFactory.create(parent_location=course.location, category='chapter')
+        first = ItemFactory.create(parent_location=chapter.location, category='sequential', display_name='First Subsection')
+        second = ItemFactory.create(parent_location=chapter.location, category='sequential', display_name='Second Subsection')
+        unit = ItemFactory.create(parent_location=first.location, category='vertical')
+        url = reverse('edit_unit', kwargs={'location': unit.location.url()})
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('First Subsection', resp.content)
+
+        # the unit's cached parents are no longer used once it has moved
+        store = modulestore('direct')
+        store.update_children(first.location, [])
+        store.update_children(second.location, [unit.location.url()])
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('Second Subsection', resp.content)
+        self.assertNotIn('First Subsection', resp.content)
+
     def check_edit_unit(self, test_course_name):
         import_from_xml(modulestore('direct'), 'common/test/data/', [test_course_name])
 
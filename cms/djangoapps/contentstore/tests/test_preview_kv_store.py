@@ -0,0 +1,93 @@
+"""
+Tests of the store of the student state of Studio previews
+"""
+from django.core.cache import get_cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import patch
+from xblock.fields import Scope
+from xblock.runtime import KeyValueStore
+
+from contentstore.views import preview_kv_store
+from contentstore.views.preview_kv_store import PreviewKeyValueStore, PreviewCounterStore
+
+LOCATION = 'i4x://MITx/999/problem/Problem_1'
+
+
+def user_state_key(field_name):
+    """ The key of the user_state field `field_name` of the problem at LOCATION """
+    return KeyValueStore.Key(Scope.user_state, 'student', LOCATION, field_name)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PreviewKeyValueStoreTest(TestCase):
+    """
+    Tests of PreviewKeyValueStore
+    """
+    def setUp(self):
+        get_cache('default').clear()
+        self.kvs = PreviewKeyValueStore(1, '0')
+
+    def test_set_get_delete(self):
+        key = user_state_key('attempts')
+        self.assertFalse(self.kvs.has(key))
+        self.assertRaises(KeyError, self.kvs.get, key)
+
+        self.kvs.set(key, None)
+        self.assertTrue(self.kvs.has(key))
+        self.assertIsNone(self.kvs.get(key))
+
+        self.kvs.delete(key)
+        self.assertFalse(self.kvs.has(key))
+        self.assertRaises(KeyError, self.kvs.delete, key)
+
+    def test_state_per_user_and_preview(self):
+        key = user_state_key('attempts')
+        self.kvs.set(key, 1)
+        PreviewKeyValueStore(2, '0').set(key, 2)
+        PreviewKeyValueStore(1, '1').set(key, 3)
+        self.assertEqual(1, self.kvs.get(key))
+        self.assertEqual(2, PreviewKeyValueStore(2, '0').get(key))
+        self.assertEqual(3, PreviewKeyValueStore(1, '1').get(key))
+
+    def test_large_value_not_kept(self):
+        key = user_state_key('student_answers')
+        self.kvs.set(key, {'a': 'small'})
+        self.kvs.set(key, {'a': 'x' * (preview_kv_store.MAX_VALUE_SIZE + 1)})
+        self.assertFalse(self.kvs.has(key))
+
+    @patch.object(preview_kv_store, 'MAX_ENTRIES', 2)
+    def test_least_recently_written_evicted(self):
+        self.kvs.set_many({user_state_key('attempts'): 1, user_state_key('done'): True})
+        self.kvs.set(user_state_key('attempts'), 2)
+        self.kvs.set(user_state_key('seed'), 3)
+
+        self.assertFalse(self.kvs.has(user_state_key('done')))
+        self.assertEqual(2, self.kvs.get(user_state_key('attempts')))
+        self.assertEqual(3, self.kvs.get(user_state_key('seed')))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PreviewCounterStoreTest(TestCase):
+    """
+    Tests of PreviewCounterStore
+    """
+    def setUp(self):
+        get_cache('default').clear()
+
+    def test_counts_kept_across_stores(self):
+        PreviewCounterStore(1, '0').incr(LOCATION, 'poll', 'yes')
+        PreviewCounterStore(1, '0').incr(LOCATION, 'poll', 'yes')
+        PreviewCounterStore(1, '0').incr(LOCATION, 'poll', 'no')
+        PreviewCounterStore(2, '0').incr(LOCATION, 'poll', 'no')
+
+        counters = PreviewCounterStore(1, '0')
+        self.assertEqual({'yes': 2, 'no': 1}, counters.get_counts(LOCATION, 'poll'))
+        self.assertEqual({'yes': 2}, counters.get_top_counts(LOCATION, 'poll', 1))
+        self.assertEqual(3, counters.get_total(LOCATION, 'poll'))
+        self.assertEqual({'no': 1}, PreviewCounterStore(2, '0').get_counts(LOCATION, 'poll'))
+
+        counters.reset(LOCATION, 'poll', ['yes'])
+        self.assertEqual({'no': 1}, counters.get_counts(LOCATION, 'poll'))
+        counters.reset(LOCATION, 'poll')
+        self.assertEqual({}, counters.get_counts(LOCATION, 'poll'))
@@ -1,4 +1,7 @@
+import base64
+import calendar
 import logging
+from datetime import datetime, timedelta
 from functools import partial
 
 from django.http import HttpResponseBadRequest
@@ -25,14 +28,24 @@ import json
 from django.utils.translation import ugettext as _
 
 
-__all__ = ['asset_index', 'upload_asset']
+__all__ = ['asset_index', 'asset_page', 'upload_asset']
+
+# How asset_page can sort assets, and the asset fields each sorts by
+ASSET_SORTS = {
+    'date_added': 'uploadDate',
+    'display_name': 'displayname',
+}
+
+ASSET_PAGE_SIZE = 50
+MAX_ASSET_PAGE_SIZE = 200
 
 
 @login_required
 @ensure_csrf_cookie
 def asset_index(request, org, course, name):
     """
-    Display an editable asset library
+    Display an editable asset library.  The assets are loaded a page at a
+    time from asset_page.
 
     org, course, name: Attributes of the Location for the item to edit
     """
@@ -46,25 +59,13 @@ def asset_index(request, org, course, name):
 
     course_module = modulestore().get_item(location)
 
-    course_reference = StaticContent.compute_location(org, course, name)
-    assets = contentstore().get_all_content_for_course(course_reference)
-
-    # sort in reverse upload date order
-    assets = sorted(assets, key=lambda asset: asset['uploadDate'], reverse=True)
-
-    asset_json = []
-    for asset in assets:
-        asset_id = asset['_id']
-        asset_location = StaticContent.compute_location(asset_id['org'], asset_id['course'], asset_id['name'])
-        # note, due to the schema change we may not have a 'thumbnail_location' in the result set
-        _thumbnail_location = asset.get('thumbnail_location', None)
-        thumbnail_location = Location(_thumbnail_location) if _thumbnail_location is not None else None
-
-        asset_json.append(_get_asset_json(asset['displayname'], asset['uploadDate'], asset_location, thumbnail_location))
-
     return render_to_response('asset_index.html', {
         'context_course': course_module,
-        'asset_list': json.dumps(asset_json),
+        'asset_page_url': reverse('asset_page', kwargs={
+            'org': org,
+            'course': course,
+            'name': name
+        }),
         'upload_asset_callback_url': upload_asset_callback_url,
         'update_asset_callback_url': reverse('update_asset', kwargs={
             'org': org,
@@ -74,6 +75,61 @@ def asset_index(request, org, course, name):
     })
 
 
+@require_http_methods(("GET",))
+@login_required
+def asset_page(request, org, course, name):
+    """
+    Returns a page of the course's assets, as JSON:
+
+        {"assets": [asset, ...], "next": cursor}
+
+    where each asset is formatted as by _get_asset_json, and cursor is what
+    to pass as `after` to get the next page, or null after the last page.
+
+    GET parameters, all optional:
+    sort: 'date_added' (the default) or 'display_name'
+    direction: 'asc' or 'desc'.  Defaults to newest first, or A to Z.
+    text: only return assets whose name contains this, ignoring case
+    type: only return assets whose content type starts with this (e.g. 'image/')
+    limit: how many assets to return, at most MAX_ASSET_PAGE_SIZE
+    after: the `next` of the previous page
+
+    org, course, name: Attributes of the Location for the course
+    """
+    get_location_and_verify_access(request, org, course, name)
+
+    sort = request.GET.get('sort', 'date_added')
+    if sort not in ASSET_SORTS:
+        return JsonResponse({"error": "Unknown sort: {0}".format(sort)}, status=400)
+    sort_field = ASSET_SORTS[sort]
+
+    direction = request.GET.get('direction', 'desc' if sort == 'date_added' else 'asc')
+    if direction not in ('asc', 'desc'):
+        return JsonResponse({"error": "Unknown direction: {0}".format(direction)}, status=400)
+
+    try:
+        limit = int(request.GET.get('limit', ASSET_PAGE_SIZE))
+        after = request.GET.get('after')
+        if after:
+            after = _decode_asset_cursor(sort_field, after)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "Invalid limit or after"}, status=400)
+    if limit < 1:
+        return JsonResponse({"error": "Invalid limit or after"}, status=400)
+
+    course_reference = StaticContent.compute_location(org, course, name)
+    assets, next_after = contentstore().get_content_page_for_course(
+        course_reference, sort_field, ascending=(direction == 'asc'), after=after or None,
+        limit=min(limit, MAX_ASSET_PAGE_SIZE),
+        name=request.GET.get('text'), content_type=request.GET.get('type')
+    )
+
+    return JsonResponse({
+        'assets': [_get_asset_document_json(asset) for asset in assets],
+        'next': _encode_asset_cursor(sort_field, next_after) if next_after is not None else None,
+    })
+
+
 @require_POST
 @ensure_csrf_cookie
 @login_required
@@ -206,3 +262,40 @@ def _get_asset_json(display_name, date, location, thumbnail_location):
         # Needed for Backbone delete/update.
         'id': asset_url
     }
+
+
+def _get_asset_document_json(asset):
+    """
+    Helper method for formatting an asset, as returned by the contentstore,
+    to send to the client.
+    """
+    asset_id = asset['_id']
+    asset_location = StaticContent.compute_location(asset_id['org'], asset_id['course'], asset_id['name'])
+    # note, due to the schema change we may not have a 'thumbnail_location' in the result set
+    _thumbnail_location = asset.get('thumbnail_location', None)
+    thumbnail_location = Location(_thumbnail_location) if _thumbnail_location is not None else None
+
+    return _get_asset_json(asset['displayname'], asset['uploadDate'], asset_location, thumbnail_location)
+
+
+def _encode_asset_cursor(sort_field, after):
+    """
+    Encode `after`, the (sort field value, name) of the last asset of a page,
+    as an opaque string for the client.  Upload dates are sent as
+    milliseconds since the epoch, which is what MongoDB keeps.
+    """
+    value, asset_name = after
+    if sort_field == 'uploadDate':
+        value = calendar.timegm(value.utctimetuple()) * 1000 + value.microsecond // 1000
+    return base64.urlsafe_b64encode(json.dumps([value, asset_name]))
+
+
+def _decode_asset_cursor(sort_field, cursor):
+    """
+    Decode a cursor made by _encode_asset_cursor.  Raises ValueError or
+    TypeError if it is malformed.
+    """
+    value, asset_name = json.loads(base64.urlsafe_b64decode(str(cursor)))
+    if sort_field == 'uploadDate':
+        value = datetime(1970, 1, 1) + timedelta(milliseconds=int(value))
+    return value, asset_name
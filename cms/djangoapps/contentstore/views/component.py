@@ -1,6 +1,5 @@
 import json
 import logging
-from collections import defaultdict
 
 from django.http import (HttpResponse, HttpResponseBadRequest,
         HttpResponseForbidden)
@@ -9,6 +8,7 @@ from django.views.decorators.http import require_http_methods
 from django.core.exceptions import PermissionDenied
 from django_future.csrf import ensure_csrf_cookie
 from django.conf import settings
+from django.core.cache import cache
 from xmodule.modulestore.exceptions import (ItemNotFoundError,
         InvalidLocationError)
 from mitxmako.shortcuts import render_to_response
@@ -148,6 +148,122 @@ def load_mixed_class(category):
     return mixologist.mix(component_class)
 
 
+# The templates of COMPONENT_TYPES, and of the advanced components that have
+# been asked for, which only depend on the installed XBlocks, so are built
+# once per process (see get_component_templates).
+_COMPONENT_TEMPLATES = None
+_ADVANCED_COMPONENT_TEMPLATES = {}
+
+
+def _build_component_templates():
+    """
+    Returns the templates of the COMPONENT_TYPES, as a dict from category to
+    a tuple of (display_name, category, has_markdown, boilerplate) tuples.
+    """
+    component_templates = {}
+    for category in COMPONENT_TYPES:
+        component_class = load_mixed_class(category)
+        # add the default template
+        # TODO: Once mixins are defined per-application, rather than per-runtime,
+        # this should use a cms mixed-in class. (cpennington)
+        if hasattr(component_class, 'display_name'):
+            display_name = component_class.display_name.default or 'Blank'
+        else:
+            display_name = 'Blank'
+        templates = [(
+            display_name,
+            category,
+            False,  # No defaults have markdown (hardcoded current default)
+            None  # no boilerplate for overrides
+        )]
+        # add boilerplates
+        if hasattr(component_class, 'templates'):
+            for template in component_class.templates():
+                templates.append((
+                    template['metadata'].get('display_name'),
+                    category,
+                    template['metadata'].get('markdown') is not None,
+                    template.get('template_id')
+                ))
+        component_templates[category] = tuple(templates)
+    return component_templates
+
+
+def get_component_templates():
+    """
+    Returns the templates of the COMPONENT_TYPES (see
+    _build_component_templates), building them the first time.  The result
+    is shared, so must not be changed.
+    """
+    global _COMPONENT_TEMPLATES
+    if _COMPONENT_TEMPLATES is None:
+        _COMPONENT_TEMPLATES = _build_component_templates()
+    return _COMPONENT_TEMPLATES
+
+
+def _advanced_component_template(category):
+    """
+    Returns the template of the advanced component `category`, or None if
+    there is no such XBlock on the server.
+    """
+    if category not in _ADVANCED_COMPONENT_TEMPLATES:
+        # Do I need to allow for boilerplates or just defaults on the
+        # class? i.e., can an advanced have more than one entry in the
+        # menu? one for default and others for prefilled boilerplates?
+        try:
+            component_class = load_mixed_class(category)
+        except PluginMissingError:
+            # dhm: I got this once but it can happen any time the
+            # course author configures an advanced component which does
+            # not exist on the server.
+            template = None
+        else:
+            template = (
+                component_class.display_name.default or category,
+                category,
+                False,
+                None  # don't override default data
+            )
+        _ADVANCED_COMPONENT_TEMPLATES[category] = template
+    return _ADVANCED_COMPONENT_TEMPLATES[category]
+
+
+def _unit_parents_key(location):
+    """ The cache key of the locations of the parents of the unit at `location` """
+    return u'contentstore.unit_parents.{0}'.format(location.url())
+
+
+def _get_unit_parents(location):
+    """
+    Returns the subsection and section that contain the unit at `location`.
+
+    Their locations are cached, since finding parents scans the modulestore;
+    a cached pair is only used if the subsection still lists the unit among
+    its children, and the section the subsection, so moving units around
+    doesn't show them under their old parents.
+    """
+    store = modulestore()
+    location = Location(location).replace(revision=None)
+    key = _unit_parents_key(location)
+
+    cached = cache.get(key)
+    if cached is not None:
+        subsection_loc, section_loc = cached
+        try:
+            subsection = store.get_item(subsection_loc)
+            section = store.get_item(section_loc)
+        except ItemNotFoundError:
+            pass
+        else:
+            if location.url() in subsection.children and subsection_loc in section.children:
+                return subsection, section
+
+    subsection = store.get_item(store.get_parent_locations(location, None)[0])
+    section = store.get_item(store.get_parent_locations(subsection.location, None)[0])
+    cache.set(key, (subsection.location.url(), section.location.url()))
+    return subsection, section
+
+
 @login_required
 def edit_unit(request, location):
     """
@@ -174,31 +290,7 @@ def edit_unit(request, location):
             course_id=course.location.course_id
     )
 
-    component_templates = defaultdict(list)
-    for category in COMPONENT_TYPES:
-        component_class = load_mixed_class(category)
-        # add the default template
-        # TODO: Once mixins are defined per-application, rather than per-runtime,
-        # this should use a cms mixed-in class. (cpennington)
-        if hasattr(component_class, 'display_name'):
-            display_name = component_class.display_name.default or 'Blank'
-        else:
-            display_name = 'Blank'
-        component_templates[category].append((
-            display_name,
-            category,
-            False,  # No defaults have markdown (hardcoded current default)
-            None  # no boilerplate for overrides
-        ))
-        # add boilerplates
-        if hasattr(component_class, 'templates'):
-            for template in component_class.templates():
-                component_templates[category].append((
-                    template['metadata'].get('display_name'),
-                    category,
-                    template['metadata'].get('markdown') is not None,
-                    template.get('template_id')
-                ))
+    component_templates = dict(get_component_templates())
 
     # Check if there are any advanced modules specified in the course policy.
     # These modules should be specified as a list of strings, where the strings
@@ -208,27 +300,16 @@ def edit_unit(request, location):
 
     # Set component types according to course policy file
     if isinstance(course_advanced_keys, list):
-        for category in course_advanced_keys:
-            if category in ADVANCED_COMPONENT_TYPES:
-                # Do I need to allow for boilerplates or just defaults on the
-                # class? i.e., can an advanced have more than one entry in the
-                # menu? one for default and others for prefilled boilerplates?
-                try:
-                    component_class = load_mixed_class(category)
-
-                    component_templates['advanced'].append((
-                        component_class.display_name.default or category,
-                        category,
-                        False,
-                        None  # don't override default data
-                        ))
-                except PluginMissingError:
-                    # dhm: I got this once but it can happen any time the
-                    # course author configures an advanced component which does
-                    # not exist on the server. This code here merely
-                    # prevents any authors from trying to instantiate the
-                    # non-existent component type by not showing it in the menu
-                    pass
+        advanced_templates = [
+            _advanced_component_template(category)
+            for category in course_advanced_keys
+            if category in ADVANCED_COMPONENT_TYPES
+        ]
+        # Categories that don't exist on the server have no template, which
+        # keeps authors from trying to instantiate them.
+        advanced_templates = [template for template in advanced_templates if template is not None]
+        if advanced_templates:
+            component_templates[ADVANCED_COMPONENT_CATEGORY] = advanced_templates
     else:
         log.error(
             "Improper format for course advanced keys! %",
@@ -244,26 +325,17 @@ def edit_unit(request, location):
     # TODO (cpennington): If we share units between courses,
     # this will need to change to check permissions correctly so as
     # to pick the correct parent subsection
-
-    containing_subsection_locs = modulestore().get_parent_locations(
-            location, None
-    )
-    containing_subsection = modulestore().get_item(containing_subsection_locs[0])
-    containing_section_locs = modulestore().get_parent_locations(
-            containing_subsection.location, None
-    )
-    containing_section = modulestore().get_item(containing_section_locs[0])
+    containing_subsection, containing_section = _get_unit_parents(item.location)
 
     # cdodge hack. We're having trouble previewing drafts via jump_to redirect
     # so let's generate the link url here
 
     # need to figure out where this item is in the list of children as the
     # preview will need this
-    index = 1
-    for child in containing_subsection.get_children():
-        if child.location == item.location:
-            break
-        index = index + 1
+    try:
+        index = containing_subsection.children.index(item.location.url()) + 1
+    except ValueError:
+        index = len(containing_subsection.children) + 1
 
     preview_lms_base = settings.MITX_FEATURES.get('PREVIEW_LMS_BASE')
 
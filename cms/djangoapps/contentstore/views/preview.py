@@ -21,7 +21,7 @@ from lms.xblock.field_data import lms_field_data
 from util.sandboxing import can_execute_unsafe_code
 
 import static_replace
-from .session_kv_store import SessionKeyValueStore
+from .preview_kv_store import PreviewKeyValueStore, PreviewCounterStore
 from .requests import render_from_lms
 from .access import has_access
 from ..utils import get_course_for_item
@@ -74,6 +74,7 @@ def preview_component(request, location):
     if not has_access(request.user, location):
         return HttpResponseForbidden()
 
+    _drop_session_preview_state(request)
     component = modulestore().get_item(location)
 
     component.get_html = wrap_xmodule(
@@ -87,6 +88,28 @@ def preview_component(request, location):
     })
 
 
+def _drop_session_preview_state(request):
+    """
+    Remove the preview state that used to be kept in the session (under
+    tuple keys) before PreviewKeyValueStore, so that old sessions shrink.
+    """
+    for key in [key for key in request.session.keys() if isinstance(key, tuple)]:
+        del request.session[key]
+
+
+def _preview_course_id(request, location):
+    """
+    Returns the id of the course of the item at `location`, looking the
+    course up once per request, as a module system is made for each module
+    of a preview.
+    """
+    course_ids = request.__dict__.setdefault('_preview_course_ids', {})
+    key = (location.org, location.course)
+    if key not in course_ids:
+        course_ids[key] = get_course_for_item(location).location.course_id
+    return course_ids[key]
+
+
 def preview_module_system(request, preview_id, descriptor):
     """
     Returns a ModuleSystem for the specified descriptor that is specialized for
@@ -99,10 +122,10 @@ def preview_module_system(request, preview_id, descriptor):
 
     def preview_field_data(descriptor):
         "Helper method to create a DbModel from a descriptor"
-        student_data = DbModel(SessionKeyValueStore(request))
+        student_data = DbModel(PreviewKeyValueStore(request.user.id, preview_id))
         return lms_field_data(descriptor._field_data, student_data)
 
-    course_id = get_course_for_item(descriptor.location).location.course_id
+    course_id = _preview_course_id(request, descriptor.location)
     return ModuleSystem(
         ajax_url=reverse('preview_dispatch', args=[preview_id, descriptor.location.url(), '']).rstrip('/'),
         # TODO (cpennington): Do we want to track how instructors are using the preview problems?
@@ -117,7 +140,8 @@ def preview_module_system(request, preview_id, descriptor):
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         mixins=settings.XBLOCK_MIXINS,
         course_id=course_id,
-        anonymous_student_id='student'
+        anonymous_student_id='student',
+        counters=PreviewCounterStore(request.user.id, preview_id),
     )
 
 
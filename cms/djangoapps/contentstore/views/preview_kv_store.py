@@ -0,0 +1,188 @@
+"""
+An :class:`~xblock.runtime.KeyValueStore` for the student state of Studio
+previews, kept in the django cache with an entry per field rather than in the
+session, so that previewing components doesn't grow the session that every
+Studio request loads and saves.
+
+Entries expire STATE_TIMEOUT seconds after they were last written.  Each user
+keeps at most MAX_ENTRIES of them, evicting the least recently written first,
+and values that pickle to more than MAX_VALUE_SIZE bytes aren't kept, so the
+previews that set them start over from their defaults.
+
+The counters of previews (see xmodule.x_module.DictCounterStore), such as
+poll and word cloud tallies, are kept the same way by PreviewCounterStore,
+with an entry per counter name, so that they add up across requests.
+
+The list of a user's entries is updated without a lock, so concurrent
+previews can lose track of an entry, which then only goes away when it
+expires.
+"""
+import cPickle as pickle
+import hashlib
+import logging
+
+from django.core.cache import get_cache, InvalidCacheBackendError
+from xblock.runtime import KeyValueStore
+
+log = logging.getLogger(__name__)
+
+STATE_TIMEOUT = 24 * 60 * 60
+
+# How many fields of previews are kept per user
+MAX_ENTRIES = 200
+
+MAX_VALUE_SIZE = 64 * 1024
+
+_MISSING = object()
+
+
+def _get_cache():
+    """
+    Return the cache that preview state is kept in.
+    """
+    try:
+        return get_cache('preview_state')
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+
+def _entries_key(user_id):
+    """ The cache key of the list of keys of a user's entries, oldest first """
+    return u'preview_state.entries.{0}'.format(user_id)
+
+
+def _track_entries(cache, user_id, cache_keys):
+    """
+    Move `cache_keys` to the end of the list of entries of the user with id
+    `user_id`, and evict the oldest entries if there are more than
+    MAX_ENTRIES.
+    """
+    entries_key = _entries_key(user_id)
+    written = set(cache_keys)
+    entries = [entry for entry in cache.get(entries_key) or [] if entry not in written]
+    entries.extend(cache_keys)
+
+    if len(entries) > MAX_ENTRIES:
+        cache.delete_many(entries[:-MAX_ENTRIES])
+        entries = entries[-MAX_ENTRIES:]
+    cache.set(entries_key, entries, STATE_TIMEOUT)
+
+
+class PreviewKeyValueStore(KeyValueStore):
+    """
+    Stores the fields of the previews with id `preview_id` seen by the user
+    with id `user_id`.
+    """
+    def __init__(self, user_id, preview_id):
+        self._user_id = user_id
+        self._preview_id = preview_id
+        self._cache = _get_cache()
+
+    def _cache_key(self, key):
+        """ The cache key of the entry of `key` """
+        digest = hashlib.md5(repr(tuple(key))).hexdigest()
+        return u'preview_state.{0}.{1}.{2}'.format(self._user_id, self._preview_id, digest)
+
+    def get(self, key):
+        value = self._cache.get(self._cache_key(key), _MISSING)
+        if value is _MISSING:
+            raise KeyError(key.field_name)
+        return value
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def set_many(self, update_dict):
+        entries = {}
+        dropped = []
+        for key, value in update_dict.iteritems():
+            cache_key = self._cache_key(key)
+            if len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) > MAX_VALUE_SIZE:
+                log.warning("Not keeping %s of preview %s of %s, as its value is too large",
+                            key.field_name, self._preview_id, key.block_scope_id)
+                dropped.append(cache_key)
+            else:
+                entries[cache_key] = value
+
+        if dropped:
+            self._cache.delete_many(dropped)
+        if entries:
+            self._cache.set_many(entries, STATE_TIMEOUT)
+            self._track(entries.keys())
+
+    def _track(self, cache_keys):
+        """
+        Move `cache_keys` to the end of the user's list of entries.
+        """
+        _track_entries(self._cache, self._user_id, cache_keys)
+
+    def delete(self, key):
+        cache_key = self._cache_key(key)
+        if self._cache.get(cache_key, _MISSING) is _MISSING:
+            raise KeyError(key.field_name)
+        self._cache.delete(cache_key)
+
+    def has(self, key):
+        return self._cache.get(self._cache_key(key), _MISSING) is not _MISSING
+
+
+class PreviewCounterStore(object):
+    """
+    Keeps the counters of the previews with id `preview_id` seen by the user
+    with id `user_id`, with the interface of
+    xmodule.x_module.DictCounterStore.
+
+    Increments read and rewrite the counters of a name, which is fine as
+    only the one user updates them.
+    """
+    def __init__(self, user_id, preview_id):
+        self._user_id = user_id
+        self._preview_id = preview_id
+        self._cache = _get_cache()
+
+    def _cache_key(self, usage_id, name):
+        """ The cache key of the entry of the counters `name` of `usage_id` """
+        digest = hashlib.md5(repr((usage_id, name))).hexdigest()
+        return u'preview_counters.{0}.{1}.{2}'.format(self._user_id, self._preview_id, digest)
+
+    def _get(self, usage_id, name):
+        """ The counters of `name`, by key """
+        return self._cache.get(self._cache_key(usage_id, name)) or {}
+
+    def _set(self, usage_id, name, counts):
+        """ Replace the counters of `name` with `counts` """
+        cache_key = self._cache_key(usage_id, name)
+        self._cache.set(cache_key, counts, STATE_TIMEOUT)
+        _track_entries(self._cache, self._user_id, [cache_key])
+
+    def incr(self, usage_id, name, key, delta=1):
+        """Add `delta` to counter `key` of `name`."""
+        counts = self._get(usage_id, name)
+        counts[key] = counts.get(key, 0) + delta
+        self._set(usage_id, name, counts)
+
+    def get_counts(self, usage_id, name, keys=None):
+        """Return a dict of the counters `keys` of `name`, or all of them, by key."""
+        counts = self._get(usage_id, name)
+        if keys is None:
+            return counts
+        return dict((key, counts[key]) for key in keys if key in counts)
+
+    def get_top_counts(self, usage_id, name, amount):
+        """Return a dict of the `amount` highest counters of `name`, by key."""
+        counts = self._get(usage_id, name)
+        return dict(sorted(counts.iteritems(), key=lambda item: (-item[1], item[0]))[:amount])
+
+    def get_total(self, usage_id, name):
+        """Return the sum of the counters of `name`."""
+        return sum(self._get(usage_id, name).itervalues())
+
+    def reset(self, usage_id, name, keys=None):
+        """Drop the counters `keys` of `name`, or all of them."""
+        if keys is None:
+            self._cache.delete(self._cache_key(usage_id, name))
+        else:
+            counts = self._get(usage_id, name)
+            for key in keys:
+                counts.pop(key, None)
+            self._set(usage_id, name, counts)
@@ -116,6 +116,10 @@ AUTHENTICATION_BACKENDS = (
 
 LMS_BASE = None
 
+# Seconds to cache each user's enrolled course ids, which locked assets are
+# checked against.  They are also dropped whenever the enrollments change.
+DASHBOARD_CACHE_TIMEOUT = 600
+
 #################### CAPA External Code Evaluation #############################
 XQUEUE_INTERFACE = {
     'url': 'http://localhost:8888',
@@ -143,13 +147,15 @@ MIDDLEWARE_CLASSES = (
     'request_cache.middleware.RequestCache',
     'django.middleware.cache.UpdateCacheMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # Serves /c4x/ assets; before the session and authentication middleware
+    # so that unlocked assets are served without loading either
+    'contentserver.middleware.StaticContentServer',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'method_override.middleware.MethodOverrideMiddleware',
 
     # Instead of AuthenticationMiddleware, we use a cache-backed version
     'cache_toolbox.middleware.CacheBackedAuthenticationMiddleware',
-    'contentserver.middleware.StaticContentServer',
 
     'django.contrib.messages.middleware.MessageMiddleware',
     'track.middleware.TrackMiddleware',
@@ -374,7 +380,10 @@ INSTALLED_APPS = (
     'django.contrib.admin',
 
     # for managing course modes
-    'course_modes'
+    'course_modes',
+
+    # invalidates the LMS's cached course summaries on course edits
+    'course_summaries',
 )
 
 
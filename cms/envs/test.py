@@ -121,6 +121,12 @@ CACHES = {
         'LOCATION': '/var/tmp/mongo_metadata_inheritance',
         'TIMEOUT': 300,
         'KEY_FUNCTION': 'util.memcache.safe_key',
+    },
+
+    # Enrolled course ids outlive the database, which is emptied between
+    # tests, so don't keep them.
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
     }
 }
 
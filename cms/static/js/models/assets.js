@@ -1,3 +1,63 @@
 CMS.Models.AssetCollection = Backbone.Collection.extend({
-    model : CMS.Models.Asset
+    model : CMS.Models.Asset,
+
+    // The url of the asset pages (see contentstore.views.asset_page)
+    pageUrl: null,
+
+    // The sort, direction, text and type of the assets being shown
+    query: {},
+
+    // What to pass as `after` to get the next page, or null after the last page
+    nextPage: null,
+
+    /**
+     * Replace the assets with the first page of those matching `query`, or
+     * with the first page of the current query if none is given.
+     */
+    fetchPage: function(query) {
+        if (query !== undefined) {
+            this.query = query;
+        }
+        return this._fetch(null);
+    },
+
+    /**
+     * Add the next page of assets, if there is one.  Triggers "page" with
+     * the added models.
+     */
+    fetchNextPage: function() {
+        if (!this.nextPage) {
+            return null;
+        }
+        return this._fetch(this.nextPage);
+    },
+
+    hasNextPage: function() {
+        return !!this.nextPage;
+    },
+
+    _fetch: function(after) {
+        var self = this;
+        var data = _.extend({}, this.query);
+        if (after) {
+            data.after = after;
+        }
+        return $.getJSON(this.pageUrl, data, function(response) {
+            // Ignore pages of a query that has since changed.
+            if (!_.isEqual(_.omit(data, 'after'), self.query)) {
+                return;
+            }
+            self.nextPage = response.next;
+            if (after) {
+                // Skip assets already shown, e.g. ones just uploaded.
+                var added = _.filter(response.assets, function(asset) {
+                    return self.get(asset.id) === undefined;
+                });
+                self.add(added, {silent: true});
+                self.trigger('page', _.map(added, function(asset) { return self.get(asset.id); }));
+            } else {
+                self.reset(response.assets);
+            }
+        });
+    }
 });
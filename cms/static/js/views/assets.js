@@ -4,8 +4,51 @@ $(document).ready(function() {
     $('.uploads .upload-button').bind('click', showUploadModal);
     $('.upload-modal .close-button').bind('click', hideModal);
     $('.upload-modal .choose-file-button').bind('click', showFileSelectionMenu);
+    $('.uploads .load-more-assets').bind('click', loadMoreAssets);
+    $('.uploads .asset-search-input').bind('keyup', _.debounce(filterAssets, 300));
+    $('.uploads .asset-type-filter').bind('change', filterAssets);
+    $('.uploads .asset-sort').bind('click', sortAssets);
 });
 
+var showLoadMoreAssets = function () {
+    $('.uploads .load-more-assets').toggle(window.assetsView.collection.hasNextPage());
+};
+
+var loadAssets = function (query) {
+    var request = window.assetsView.collection.fetchPage(query);
+    request.done(showLoadMoreAssets);
+};
+
+var loadMoreAssets = function (e) {
+    e.preventDefault();
+    var request = window.assetsView.collection.fetchNextPage();
+    if (request) {
+        request.done(showLoadMoreAssets);
+    }
+};
+
+var filterAssets = function () {
+    var query = _.extend({}, window.assetsView.collection.query, {
+        text: $('.uploads .asset-search-input').val(),
+        type: $('.uploads .asset-type-filter').val()
+    });
+    loadAssets(query);
+};
+
+var sortAssets = function (e) {
+    e.preventDefault();
+    var query = _.extend({}, window.assetsView.collection.query);
+    var sort = $(e.currentTarget).data('sort');
+    if (query.sort === sort) {
+        // Sorting by the same column again reverses the order.
+        query.direction = query.direction === 'asc' ? 'desc' : 'asc';
+    } else {
+        query.sort = sort;
+        query.direction = sort === 'display_name' ? 'asc' : 'desc';
+    }
+    loadAssets(query);
+};
+
 var showUploadModal = function (e) {
     e.preventDefault();
     resetUploadModal();
@@ -3,6 +3,8 @@ CMS.Views.Assets = Backbone.View.extend({
 
     initialize : function() {
         this.listenTo(this.collection, 'destroy', this.handleDestroy);
+        this.listenTo(this.collection, 'reset', this.render);
+        this.listenTo(this.collection, 'page', this.appendAssets);
         this.render();
     },
 
@@ -19,6 +21,14 @@ CMS.Views.Assets = Backbone.View.extend({
         return this;
     },
 
+    appendAssets: function(models) {
+        var self = this;
+        _.each(models, function(asset) {
+            var view = new CMS.Views.Asset({model: asset});
+            self.$el.append(view.render().el);
+        });
+    },
+
     handleDestroy: function(model, collection, options) {
         var index = options.index;
         this.$el.children().eq(index).remove();
@@ -1,3 +1,4 @@
+from django.contrib.sessions.middleware import SessionMiddleware
 from django.http import (HttpResponse, HttpResponseNotModified,
     HttpResponseForbidden)
 from student.models import CourseEnrollment
@@ -6,10 +7,34 @@ from xmodule.contentstore.django import contentstore
 from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from cache_toolbox.core import get_cached_content, set_cached_content
+from cache_toolbox.middleware import CacheBackedAuthenticationMiddleware
 from xmodule.exceptions import NotFoundError
 
+_session_middleware = SessionMiddleware()
+_authentication_middleware = CacheBackedAuthenticationMiddleware()
+
+
+def get_user(request):
+    """
+    Return the user making `request`, loading the session and the user the way
+    SessionMiddleware and CacheBackedAuthenticationMiddleware would if they
+    haven't already.
+    """
+    if not hasattr(request, 'user'):
+        if not hasattr(request, 'session'):
+            _session_middleware.process_request(request)
+        _authentication_middleware.process_request(request)
+    return request.user
+
 
 class StaticContentServer(object):
+    """
+    Serves /c4x/ assets from the contentstore.
+
+    This comes before the session and authentication middleware, so that
+    unlocked assets, which are most of them, are served without loading the
+    session or the user.  Those are only loaded for locked assets.
+    """
     def process_request(self, request):
         # look to see if the request is prefixed with 'c4x' tag
         if request.path.startswith('/' + XASSET_LOCATION_TAG + '/'):
@@ -45,11 +70,12 @@ class StaticContentServer(object):
 
             # Check that user has access to content
             if getattr(content, "locked", False):
-                if not hasattr(request, "user") or not request.user.is_authenticated():
+                user = get_user(request)
+                if not user.is_authenticated():
                     return HttpResponseForbidden('Unauthorized')
-                course_partial_id = "/".join([loc.org, loc.course])
-                if not request.user.is_staff and not CourseEnrollment.is_enrolled_by_partial(
-                        request.user, course_partial_id):
+                course_partial_id = "/".join([loc.org, loc.course, ''])
+                if not user.is_staff and not CourseEnrollment.is_enrolled_by_partial(
+                        user, course_partial_id):
                     return HttpResponseForbidden('Unauthorized')
 
             # convert over the DB persistent last modified timestamp to a HTTP compatible
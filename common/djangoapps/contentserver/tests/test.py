@@ -3,11 +3,13 @@ Tests for StaticContentServer
 """
 import copy
 import logging
+from mock import patch
 from uuid import uuid4
 from path import path
 from pymongo import MongoClient
 
 from django.contrib.auth.models import User
+from django.contrib.sessions.middleware import SessionMiddleware
 from django.conf import settings
 from django.test.client import Client
 from django.test.utils import override_settings
@@ -134,3 +136,41 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         resp = self.client.get(self.url_locked)
         self.assertEqual(resp.status_code, 200) #pylint: disable=E1103
 
+
+    def test_unlocked_asset_skips_session(self):
+        """
+        Test that unlocked assets are served without loading the session.
+        """
+        self.client.login(username=self.usr, password=self.pwd)
+        with patch.object(SessionMiddleware, 'process_request') as mock_process_request:
+            resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200) #pylint: disable=E1103
+        self.assertFalse(mock_process_request.called)
+
+    def test_locked_asset_enrollment_cached(self):
+        """
+        Test that the enrollment check for locked assets is cached until the
+        user's enrollments change.
+        """
+        course_id = "/".join([self.loc_locked.org, self.loc_locked.course, '2012_Fall'])
+        self.client.login(username=self.usr, password=self.pwd)
+        caches = dict(settings.CACHES, dashboard={
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'contentserver_tests',
+        })
+        with override_settings(CACHES=caches):
+            resp = self.client.get(self.url_locked)
+            self.assertEqual(resp.status_code, 403) #pylint: disable=E1103
+
+            CourseEnrollment.enroll(self.user, course_id)
+            resp = self.client.get(self.url_locked)
+            self.assertEqual(resp.status_code, 200) #pylint: disable=E1103
+
+            with patch.object(CourseEnrollment.objects, 'filter') as mock_filter:
+                resp = self.client.get(self.url_locked)
+            self.assertEqual(resp.status_code, 200) #pylint: disable=E1103
+            self.assertFalse(mock_filter.called)
+
+            CourseEnrollment.unenroll(self.user, course_id)
+            resp = self.client.get(self.url_locked)
+            self.assertEqual(resp.status_code, 403) #pylint: disable=E1103
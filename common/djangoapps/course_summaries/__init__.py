@@ -0,0 +1,87 @@
+"""
+Summaries of courses, for listing courses without loading their descriptors.
+
+The LMS builds the summaries of courses (see
+courseware.courses.get_course_summaries) and keeps them in the
+'course_summaries' cache.  Each summary is cached under its own key, next to
+a list of the course ids, so that no single cache entry grows with the size
+of the catalog.  A write to a course's course or about items drops only that
+course's summary, which is rebuilt on the next request; a write to a course
+that isn't listed yet (a new course) drops the list of ids.
+
+Studio drops the summaries it changes, so the LMS and Studio must share the
+'course_summaries' cache (e.g. the same memcached servers and key prefix).
+Without one, the default cache is used, which only works if it is shared.
+"""
+
+from django.conf import settings
+from django.core.cache import get_cache, InvalidCacheBackendError
+
+# The ids of all the courses, in the order their summaries were cached
+COURSE_IDS_KEY = 'course_summaries.course_ids'
+# Followed by a course id, the summary of that course
+SUMMARY_KEY_PREFIX = 'course_summaries.course.'
+
+
+def _summary_key(course_id):
+    """
+    Return the cache key of the summary of the course `course_id`.
+    """
+    return SUMMARY_KEY_PREFIX + course_id
+
+
+def _get_cache():
+    """
+    Return the cache that course summaries are kept in.
+    """
+    try:
+        return get_cache('course_summaries')
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+
+def get_cached_course_ids():
+    """
+    Return the cached list of the ids of all the courses, or None if it's not
+    cached.
+    """
+    return _get_cache().get(COURSE_IDS_KEY)
+
+
+def get_cached_course_summaries(course_ids):
+    """
+    Return a dict of the cached CourseSummary objects of `course_ids`, by
+    course id.  Summaries that have been dropped or evicted are missing.
+    """
+    summaries = _get_cache().get_many([_summary_key(course_id) for course_id in course_ids])
+    return dict((summary.id, summary) for summary in summaries.itervalues())
+
+
+def cache_course_summaries(summaries, course_ids):
+    """
+    Cache `summaries`, a list of CourseSummary objects, and `course_ids`, the
+    ids of all the courses (whose other summaries are already cached).
+    """
+    cache = _get_cache()
+    timeout = settings.COURSE_SUMMARY_CACHE_TIMEOUT
+    if summaries:
+        cache.set_many(dict((_summary_key(summary.id), summary) for summary in summaries), timeout)
+    # Set last, so the summaries are all there for anyone who finds the ids
+    cache.set(COURSE_IDS_KEY, list(course_ids), timeout)
+
+
+def invalidate_course_summaries(org_course=None):
+    """
+    Drop the cached summaries of the courses with the org and number in
+    `org_course` ("org/number"), so they are rebuilt when next needed, or
+    the list of all the courses if there are none (or `org_course` is None).
+    """
+    cache = _get_cache()
+    course_ids = cache.get(COURSE_IDS_KEY)
+    if org_course is not None and course_ids is not None:
+        prefix = org_course + '/'
+        keys = [_summary_key(course_id) for course_id in course_ids if course_id.startswith(prefix)]
+        if keys:
+            cache.delete_many(keys)
+            return
+    cache.delete(COURSE_IDS_KEY)
@@ -0,0 +1,20 @@
+"""
+Keeps cached course summaries fresh.  (There are no database models here.)
+"""
+from django.dispatch import receiver
+
+from xmodule.modulestore.django import modulestore_update_signal
+
+from course_summaries import invalidate_course_summaries
+
+# Categories of the items that course summaries are made from.
+SUMMARIZED_CATEGORIES = ('course', 'about')
+
+
+@receiver(modulestore_update_signal)
+def invalidate_summaries_on_update(sender, location=None, **kwargs):  # pylint: disable=W0613
+    """
+    Drop the summary of a course when it, or one of its about items, changes.
+    """
+    if location is not None and location.category in SUMMARIZED_CATEGORIES:
+        invalidate_course_summaries(u'{0}/{1}'.format(location.org, location.course))
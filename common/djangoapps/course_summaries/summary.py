@@ -0,0 +1,80 @@
+"""
+A summary of a course: what course listings, the student dashboard and their
+access checks need.
+"""
+from xmodule.course_module import CourseDescriptor
+
+
+class CourseSummary(object):
+    """
+    The parts of a CourseDescriptor that course listings and the student
+    dashboard use, copied out so that they can be cached and listed without
+    loading the course.
+
+    Has the same attribute names as CourseDescriptor, so that it can be
+    passed to has_access and to the course listing templates.  Anything
+    else needs the descriptor itself.
+    """
+
+    # The about sections that course listings show.
+    ABOUT_SECTIONS = ('title', 'university', 'short_description')
+
+    def __init__(self, course, about_sections, image_url):
+        """
+        Summarize `course`, a CourseDescriptor.
+
+        about_sections: dict mapping each of ABOUT_SECTIONS to its html
+        image_url: the url of the course image
+        """
+        self.id = course.id
+        self.location = course.location
+        self.display_name_with_default = course.display_name_with_default
+        self.display_number_with_default = course.display_number_with_default
+        self.display_org_with_default = course.display_org_with_default
+        self.start_date_text = course.start_date_text
+        self.end_date_text = course.end_date_text
+        self.lowest_passing_grade = course.lowest_passing_grade
+        self.end_of_course_survey_url = course.end_of_course_survey_url
+        # TestCenterExams can't be pickled, so keep what they're made from.
+        self._test_center_exams = [(exam.exam_name, exam.exam_info) for exam in course.test_center_exams]
+
+        # Used for sorting and access checks
+        self.start = course.start
+        self.end = course.end
+        self.enrollment_start = course.enrollment_start
+        self.enrollment_end = course.enrollment_end
+        self.advertised_start = course.advertised_start
+        self.announcement = course.announcement
+        self.is_new = course.is_new
+        self.days_early_for_beta = course.days_early_for_beta
+        self.enrollment_domain = course.enrollment_domain
+        self.ispublic = getattr(course, 'ispublic', None)
+
+        self.about_sections = dict(about_sections)
+        self.image_url = image_url
+
+    def __repr__(self):
+        return 'CourseSummary<%r>' % (self.id,)
+
+    @property
+    def org(self):
+        return self.location.org
+
+    @property
+    def number(self):
+        return self.location.course
+
+    @property
+    def test_center_exams(self):
+        return [
+            CourseDescriptor.TestCenterExam(self.id, exam_name, exam_info)
+            for exam_name, exam_info in self._test_center_exams
+        ]
+
+    # These depend only on the attributes above, so share CourseDescriptor's logic.
+    is_newish = property(CourseDescriptor.is_newish.fget)
+    sorting_score = property(CourseDescriptor.sorting_score.fget)
+    current_test_center_exam = property(CourseDescriptor.current_test_center_exam.fget)
+    has_started = CourseDescriptor.has_started.im_func
+    has_ended = CourseDescriptor.has_ended.im_func
+    _sorting_dates = CourseDescriptor._sorting_dates.im_func  # pylint: disable=W0212
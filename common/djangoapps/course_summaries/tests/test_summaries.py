@@ -0,0 +1,112 @@
+"""
+Tests for course summaries and their invalidation.
+"""
+import datetime
+from mock import patch
+from pytz import UTC
+
+from django.test.utils import override_settings
+
+from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
+from xmodule.modulestore.django import editable_modulestore
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+from course_summaries import (
+    get_cached_course_ids, get_cached_course_summaries, cache_course_summaries, invalidate_course_summaries
+)
+from course_summaries.summary import CourseSummary
+from courseware.courses import get_course_about_section, get_course_summaries
+
+SUMMARY_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'course_summaries_tests',
+    },
+}
+
+
+@override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE, CACHES=SUMMARY_CACHES)
+class CourseSummaryTest(ModuleStoreTestCase):
+    """
+    Tests for CourseSummary and the course summary cache.
+    """
+    def setUp(self):
+        self.course = CourseFactory.create(org='Me', number='19.002', display_name='Test Course')
+        self.summary = CourseSummary(self.course, {'title': 'Test Course'}, '/image.jpg')
+        invalidate_course_summaries()
+
+    def summarize(self, course):
+        """ Summarize `course` without rendering its about sections """
+        return CourseSummary(course, {'title': course.display_name}, '/image.jpg')
+
+    def test_summary_matches_course(self):
+        for attr in ('id', 'location', 'org', 'number', 'display_number_with_default',
+                     'start', 'enrollment_start', 'is_newish', 'start_date_text'):
+            self.assertEqual(getattr(self.summary, attr), getattr(self.course, attr))
+        self.assertAlmostEqual(self.summary.sorting_score, self.course.sorting_score)
+
+    def test_cache(self):
+        self.assertIsNone(get_cached_course_ids())
+        cache_course_summaries([self.summary], [self.course.id])
+        self.assertEqual(get_cached_course_ids(), [self.course.id])
+        self.assertEqual(get_cached_course_summaries([self.course.id]).keys(), [self.course.id])
+        invalidate_course_summaries()
+        self.assertIsNone(get_cached_course_ids())
+
+    def test_cached_per_course(self):
+        other_course = CourseFactory.create(org='Me', number='19.003', display_name='Other Course')
+        other_summary = CourseSummary(other_course, {'title': 'Other Course'}, '/image.jpg')
+        cache_course_summaries([self.summary, other_summary], [self.course.id, other_course.id])
+
+        invalidate_course_summaries('Me/19.003')
+        self.assertEqual(get_cached_course_ids(), [self.course.id, other_course.id])
+        self.assertEqual(
+            get_cached_course_summaries([self.course.id, other_course.id]).keys(),
+            [self.course.id]
+        )
+
+    def test_new_course_invalidates_list(self):
+        cache_course_summaries([self.summary], [self.course.id])
+        invalidate_course_summaries('Me/19.004')
+        self.assertIsNone(get_cached_course_ids())
+        self.assertEqual(get_cached_course_summaries([self.course.id]).keys(), [self.course.id])
+
+    def test_course_update_invalidates(self):
+        cache_course_summaries([self.summary], [self.course.id])
+        self.course.enrollment_start = datetime.datetime.now(UTC)
+        editable_modulestore().save_xmodule(self.course)
+        self.assertEqual(get_cached_course_summaries([self.course.id]), {})
+
+    def test_about_update_invalidates(self):
+        cache_course_summaries([self.summary], [self.course.id])
+        location = self.course.location.replace(category='about', name='short_description')
+        editable_modulestore().create_and_save_xmodule(location)
+        self.assertEqual(get_cached_course_summaries([self.course.id]), {})
+
+    def test_other_update_keeps_summaries(self):
+        cache_course_summaries([self.summary], [self.course.id])
+        location = self.course.location.replace(category='chapter', name='Overview')
+        editable_modulestore().create_and_save_xmodule(location)
+        self.assertEqual(get_cached_course_summaries([self.course.id]).keys(), [self.course.id])
+
+    def test_rebuilds_only_changed_course(self):
+        other_course = CourseFactory.create(org='Me', number='19.003', display_name='Other Course')
+        with patch('courseware.courses.summarize_course', side_effect=self.summarize) as summarize:
+            course_ids = [summary.id for summary in get_course_summaries()]
+            self.assertIn(self.course.id, course_ids)
+            self.assertIn(other_course.id, course_ids)
+
+            summarize.reset_mock()
+            invalidate_course_summaries('Me/19.003')
+            self.assertEqual([summary.id for summary in get_course_summaries()], course_ids)
+        self.assertEqual([call[0][0].id for call in summarize.call_args_list], [other_course.id])
+
+    def test_about_section_not_summarized(self):
+        with patch('courseware.courses.get_course_by_id', return_value=self.course) as get_course:
+            self.assertEqual(get_course_about_section(self.summary, 'title'), 'Test Course')
+            self.assertFalse(get_course.called)
+            # Other sections are read from the course itself
+            with self.assertRaises(KeyError):
+                get_course_about_section(self.summary, 'robot')
+            get_course.assert_called_with(self.course.id)
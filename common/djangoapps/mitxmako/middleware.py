@@ -12,14 +12,29 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import threading
+
 from django.template import RequestContext
 
-requestcontext = None
+_local = threading.local()
+
+
+def get_request_context():
+    """
+    Return the RequestContext of the request being handled by the current
+    thread, or None if there isn't one.
+    """
+    return getattr(_local, 'requestcontext', None)
+
 
 class MakoMiddleware(object):
 
     def process_request(self, request):
-        global requestcontext
         requestcontext = RequestContext(request)
         requestcontext['is_secure'] = request.is_secure()
         requestcontext['site'] = request.get_host()
+        _local.requestcontext = requestcontext
+
+    def process_response(self, request, response):
+        _local.requestcontext = None
+        return response
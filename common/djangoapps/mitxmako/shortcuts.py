@@ -81,8 +81,9 @@ def render_to_string(template_name, dictionary, context=None, namespace='main'):
     context_instance['marketing_link'] = marketing_link
 
     # In various testing contexts, there might not be a current request context.
-    if mitxmako.middleware.requestcontext is not None:
-        for d in mitxmako.middleware.requestcontext:
+    requestcontext = mitxmako.middleware.get_request_context()
+    if requestcontext is not None:
+        for d in requestcontext:
             context_dictionary.update(d)
     for d in context_instance:
         context_dictionary.update(d)
@@ -48,8 +48,9 @@ class Template(MakoTemplate):
         context_dictionary = {}
 
         # In various testing contexts, there might not be a current request context.
-        if mitxmako.middleware.requestcontext is not None:
-            for d in mitxmako.middleware.requestcontext:
+        requestcontext = mitxmako.middleware.get_request_context()
+        if requestcontext is not None:
+            for d in requestcontext:
                 context_dictionary.update(d)
         for d in context_instance:
             context_dictionary.update(d)
@@ -1,7 +1,16 @@
 import threading
 
-_request_cache_threadlocal = threading.local()
-_request_cache_threadlocal.data = {}
+
+class _RequestCacheLocal(threading.local):
+    """
+    The data cached for the request being handled by the current thread.
+    Each thread starts out with an empty `data` dict.
+    """
+    def __init__(self):
+        super(_RequestCacheLocal, self).__init__()
+        self.data = {}
+
+_request_cache_threadlocal = _RequestCacheLocal()
 
 class RequestCache(object):
     @classmethod
@@ -17,4 +26,4 @@ class RequestCache(object):
 
     def process_response(self, request, response):
         self.clear_request_cache()
-        return response
\ No newline at end of file
+        return response
@@ -0,0 +1,67 @@
+"""
+Gathers what the student dashboard shows about each of a student's courses,
+with a fixed number of queries however many courses the student is in.
+"""
+import logging
+
+from django.conf import settings
+
+from certificates.models import certificate_statuses_for_student
+from courseware.access import filter_has_access
+from courseware.courses import get_course_summaries
+from student.models import CourseEnrollment, dashboard_cache, dashboard_cache_key
+
+log = logging.getLogger(__name__)
+
+
+def get_enrollments_and_certificates(user):
+    """
+    Returns (enrollments, cert_statuses) for `user`: a list of their active
+    CourseEnrollments, and a dict mapping the id of each of those courses to
+    certificate_status_for_student for it.
+
+    These are cached per user, and dropped when an enrollment or certificate
+    of the user changes (see student.models.invalidate_dashboards).
+    """
+    key = dashboard_cache_key(user.id)
+    data = dashboard_cache().get(key)
+    if data is None:
+        enrollments = list(CourseEnrollment.enrollments_for_user(user))
+        cert_statuses = certificate_statuses_for_student(
+            user, [enrollment.course_id for enrollment in enrollments]
+        )
+        data = (enrollments, cert_statuses)
+        dashboard_cache().set(key, data, settings.DASHBOARD_CACHE_TIMEOUT)
+    return data
+
+
+def get_dashboard_courses(user):
+    """
+    Returns (courses, cert_statuses, show_courseware_links_for) for `user`.
+
+    courses: a list of (CourseSummary, CourseEnrollment) pairs, one per active
+        enrollment.  Courses that no longer exist are left out.
+    cert_statuses: maps course ids to certificate_status_for_student
+    show_courseware_links_for: a frozenset of the ids of the courses the user
+        can load
+    """
+    enrollments, cert_statuses = get_enrollments_and_certificates(user)
+    summaries = dict((summary.id, summary) for summary in get_course_summaries())
+
+    # Ignore any courses that no longer exist (because the course IDs have
+    # changed). Still, we don't delete those enrollments, because it could have
+    # been a data push snafu.
+    courses = []
+    for enrollment in enrollments:
+        course = summaries.get(enrollment.course_id)
+        if course is None:
+            log.error("User {0} enrolled in non-existent course {1}"
+                      .format(user.username, enrollment.course_id))
+        else:
+            courses.append((course, enrollment))
+
+    show_courseware_links_for = frozenset(
+        course.id for course in filter_has_access(user, [course for course, _enrollment in courses], 'load')
+    )
+
+    return courses, cert_statuses, show_courseware_links_for
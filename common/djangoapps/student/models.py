@@ -22,7 +22,8 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.db import models
-from django.db.models.signals import post_save
+from django.core.cache import get_cache, InvalidCacheBackendError
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.forms import ModelForm, forms
 
@@ -852,21 +853,39 @@ class CourseEnrollment(models.Model):
         Can be used to determine whether a student is enrolled in a course
         whose run name is unknown.
 
-        `user` is a Django User object. If it hasn't been saved yet (no `.id`
-               attribute), this method will automatically save it before
-               adding an enrollment for it.
+        `user` is a Django User object.
 
         `course_id_partial` is a starting substring for a fully qualified
                course_id (e.g. "edX/Test101/").
+
+        This reads the cached `enrolled_course_ids` of the user, so it is cheap
+        enough to call for every locked asset request.
         """
-        try:
-            return CourseEnrollment.objects.filter(
-                user=user,
-                course_id__startswith=course_id_partial,
-                is_active=1
-            ).exists()
-        except cls.DoesNotExist:
-            return False
+        return any(
+            course_id.startswith(course_id_partial)
+            for course_id in cls.enrolled_course_ids(user)
+        )
+
+    @classmethod
+    def enrolled_course_ids(cls, user):
+        """
+        Returns a frozenset of the ids of the courses that `user` is actively
+        enrolled in.
+
+        This is cached until the user's enrollments change (see
+        student.models.invalidate_dashboards).
+        """
+        if user.id is None:
+            return frozenset()
+
+        key = enrolled_course_ids_cache_key(user.id)
+        course_ids = dashboard_cache().get(key)
+        if course_ids is None:
+            course_ids = frozenset(
+                cls.objects.filter(user=user, is_active=1).values_list('course_id', flat=True)
+            )
+            dashboard_cache().set(key, course_ids, settings.DASHBOARD_CACHE_TIMEOUT)
+        return course_ids
 
     @classmethod
     def enrollment_mode_for_user(cls, user, course_id):
@@ -922,6 +941,47 @@ class CourseEnrollmentAllowed(models.Model):
     def __unicode__(self):
         return "[CourseEnrollmentAllowed] %s: %s (%s)" % (self.email, self.course_id, self.created)
 
+
+def dashboard_cache():
+    """
+    Return the cache that per-user dashboard and enrollment data is kept in
+    (see student.dashboard and CourseEnrollment.enrolled_course_ids).
+    """
+    try:
+        return get_cache('dashboard')
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+
+def dashboard_cache_key(user_id):
+    """Return the cache key of the dashboard data of the user with id `user_id`."""
+    return 'student.dashboard.{0}'.format(user_id)
+
+
+def enrolled_course_ids_cache_key(user_id):
+    """Return the cache key of the enrolled course ids of the user with id `user_id`."""
+    return 'student.enrolled_course_ids.{0}'.format(user_id)
+
+
+def invalidate_dashboards(user_ids):
+    """
+    Drop the cached dashboard data and enrolled course ids of the users with
+    ids `user_ids`.  Call this after changing their enrollments or
+    certificates without saving models one by one (e.g. with `update` or
+    `bulk_create`).
+    """
+    dashboard_cache().delete_many(
+        [dashboard_cache_key(user_id) for user_id in user_ids] +
+        [enrolled_course_ids_cache_key(user_id) for user_id in user_ids]
+    )
+
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def invalidate_dashboard_on_enrollment_change(sender, instance, **kwargs):  # pylint: disable=W0613
+    """Drop the cached dashboard of a user whose enrollment changed."""
+    invalidate_dashboards([instance.user_id])
+
 # cache_relation(User.profile)
 
 #### Helper methods for use from python manage.py shell and other classes.
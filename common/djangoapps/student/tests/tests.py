@@ -12,6 +12,7 @@ import unittest
 from django.conf import settings
 from django.test import TestCase
 from django.test.client import RequestFactory
+from django.test.utils import override_settings
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import UNUSABLE_PASSWORD
 from django.contrib.auth.tokens import default_token_generator
@@ -22,6 +23,8 @@ from mock import Mock, patch
 from textwrap import dedent
 
 from student.models import unique_id_for_user, CourseEnrollment
+from student.dashboard import get_enrollments_and_certificates
+from certificates.models import GeneratedCertificate, CertificateStatuses
 from student.views import process_survey_link, _cert_info, password_reset, password_reset_confirm_wrapper
 from student.tests.factories import UserFactory
 from student.tests.test_email import mock_render_to_string
@@ -207,6 +210,46 @@ class CourseEndingTest(TestCase):
                           })
 
 
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                       'LOCATION': 'dashboard_tests'}})
+class DashboardDataTest(TestCase):
+    """Tests the cached enrollments and certificates behind the dashboard."""
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        CourseEnrollment.enroll(self.user, COURSE_1)
+
+    def test_certificate_statuses(self):
+        CourseEnrollment.enroll(self.user, COURSE_2)
+        GeneratedCertificate.objects.create(user=self.user, course_id=COURSE_1, grade='0.9',
+                                            status=CertificateStatuses.generating)
+        enrollments, cert_statuses = get_enrollments_and_certificates(self.user)
+        self.assertEqual(set(enrollment.course_id for enrollment in enrollments), {COURSE_1, COURSE_2})
+        self.assertEqual(cert_statuses, {
+            COURSE_1: {'status': CertificateStatuses.generating, 'grade': '0.9'},
+            COURSE_2: {'status': CertificateStatuses.unavailable},
+        })
+
+    def test_enrollment_change_invalidates(self):
+        get_enrollments_and_certificates(self.user)
+        CourseEnrollment.unenroll(self.user, COURSE_1)
+        enrollments, cert_statuses = get_enrollments_and_certificates(self.user)
+        self.assertEqual(enrollments, [])
+        self.assertEqual(cert_statuses, {})
+
+    def test_certificate_change_invalidates(self):
+        get_enrollments_and_certificates(self.user)
+        GeneratedCertificate.objects.create(user=self.user, course_id=COURSE_1,
+                                            status=CertificateStatuses.notpassing)
+        _enrollments, cert_statuses = get_enrollments_and_certificates(self.user)
+        self.assertEqual(cert_statuses[COURSE_1]['status'], CertificateStatuses.notpassing)
+
+    def test_cached(self):
+        get_enrollments_and_certificates(self.user)
+        with self.assertNumQueries(0):
+            get_enrollments_and_certificates(self.user)
+
+
 class EnrollInCourseTest(TestCase):
     """Tests enrolling and unenrolling in courses."""
 
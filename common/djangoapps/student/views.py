@@ -52,6 +52,7 @@ from xmodule.modulestore.django import modulestore
 from collections import namedtuple
 
 from courseware.courses import get_courses, sort_by_announcement
+from student.dashboard import get_dashboard_courses
 from courseware.access import has_access
 
 from external_auth.models import ExternalAuthMap
@@ -148,10 +149,12 @@ def process_survey_link(survey_link, user):
     return survey_link.format(UNIQUE_ID=unique_id_for_user(user))
 
 
-def cert_info(user, course):
+def cert_info(user, course, cert_status=None):
     """
     Get the certificate info needed to render the dashboard section for the given
-    student and course.  Returns a dictionary with keys:
+    student and course.  `cert_status` is the student's
+    certificate_status_for_student for the course, if it has been fetched
+    already.  Returns a dictionary with keys:
 
     'status': one of 'generating', 'ready', 'notpassing', 'processing', 'restricted'
     'show_download_url': bool
@@ -164,7 +167,9 @@ def cert_info(user, course):
     if not course.has_ended():
         return {}
 
-    return _cert_info(user, course, certificate_status_for_student(user, course.id))
+    if cert_status is None:
+        cert_status = certificate_status_for_student(user, course.id)
+    return _cert_info(user, course, cert_status)
 
 
 def _cert_info(user, course, cert_status):
@@ -264,16 +269,9 @@ def register_user(request, extra_context=None):
 def dashboard(request):
     user = request.user
 
-    # Build our courses list for the user, but ignore any courses that no longer
-    # exist (because the course IDs have changed). Still, we don't delete those
-    # enrollments, because it could have been a data push snafu.
-    courses = []
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
-        try:
-            courses.append((course_from_id(enrollment.course_id), enrollment))
-        except ItemNotFoundError:
-            log.error("User {0} enrolled in non-existent course {1}"
-                      .format(user.username, enrollment.course_id))
+    # Build our courses list for the user from course summaries, with all the
+    # enrollments and certificates fetched at once.
+    courses, all_cert_statuses, show_courseware_links_for = get_dashboard_courses(user)
 
     course_optouts = Optout.objects.filter(user=user).values_list('course_id', flat=True)
 
@@ -289,10 +287,8 @@ def dashboard(request):
         staff_access = True
         errored_courses = modulestore().get_errored_courses()
 
-    show_courseware_links_for = frozenset(course.id for course, _enrollment in courses
-                                          if has_access(request.user, course, 'load'))
-
-    cert_statuses = {course.id: cert_info(request.user, course) for course, _enrollment in courses}
+    cert_statuses = {course.id: cert_info(request.user, course, all_cert_statuses.get(course.id))
+                     for course, _enrollment in courses}
 
     exam_registrations = {course.id: exam_registration_info(request.user, course) for course, _enrollment in courses}
 
@@ -1,4 +1,6 @@
 import sys
+import threading
+import time
 
 from django.conf import settings
 from django.core.urlresolvers import clear_url_caches, resolve
@@ -35,3 +37,59 @@ class UrlResetMixin(object):
         super(UrlResetMixin, self).setUp()
         self._reset_urls()
         self.addCleanup(self._reset_urls)
+
+
+class Rendezvous(object):
+    """
+    A point that `count` threads wait at until all of them have reached it.
+
+    Use it to make sure that concurrently run code is interleaved: whatever
+    threads do before calling `wait` happens before anything they do after.
+    """
+    def __init__(self, count):
+        self.count = count
+        self.arrived = 0
+        self.condition = threading.Condition()
+
+    def wait(self, timeout=10):
+        """Block until all `count` threads have called wait."""
+        with self.condition:
+            self.arrived += 1
+            self.condition.notify_all()
+            deadline = time.time() + timeout
+            while self.arrived < self.count:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise RuntimeError("Only {} of {} threads arrived".format(self.arrived, self.count))
+                self.condition.wait(remaining)
+
+
+def run_concurrently(functions):
+    """
+    Run each of `functions` in a thread of its own, as threaded workers
+    handling concurrent requests would, and return their results in order.
+
+    Each function is called with a Rendezvous for all of the threads, to
+    interleave them with.  If any of them raises an exception, the first
+    one is re-raised here.
+    """
+    rendezvous = Rendezvous(len(functions))
+    results = [None] * len(functions)
+    errors = []
+
+    def run(index, function):
+        """Run `function`, keeping its result or error."""
+        try:
+            results[index] = function(rendezvous)
+        except Exception:  # pylint: disable=W0703
+            errors.append(sys.exc_info())
+
+    threads = [threading.Thread(target=run, args=(index, function)) for index, function in enumerate(functions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0][0], errors[0][1], errors[0][2]
+    return results
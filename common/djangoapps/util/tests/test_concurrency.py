@@ -0,0 +1,50 @@
+"""
+Tests that per-request state is kept apart when requests are handled
+concurrently, by threaded workers.
+"""
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from mitxmako.middleware import MakoMiddleware, get_request_context
+from request_cache.middleware import RequestCache
+from util.testing import run_concurrently
+
+
+class ConcurrentRequestsTest(TestCase):
+    """
+    Run the middleware of several requests at once, and check that each one
+    only sees its own state.
+    """
+    THREADS = 4
+
+    def test_request_cache(self):
+        def handle_request(index):
+            """Cache a value for the request, and read it back once all the threads have."""
+            def run(rendezvous):
+                middleware = RequestCache()
+                middleware.process_request(None)
+                RequestCache.get_request_cache().data['value'] = index
+                rendezvous.wait()
+                value = RequestCache.get_request_cache().data['value']
+                middleware.process_response(None, None)
+                return value
+            return run
+
+        indexes = range(self.THREADS)
+        self.assertEqual(indexes, run_concurrently([handle_request(index) for index in indexes]))
+
+    def test_mako_request_context(self):
+        def handle_request(host):
+            """Render in the request context of a request for `host`, once all the threads have one."""
+            def run(rendezvous):
+                middleware = MakoMiddleware()
+                request = RequestFactory().get('/', HTTP_HOST=host)
+                middleware.process_request(request)
+                rendezvous.wait()
+                site = get_request_context()['site']
+                middleware.process_response(request, None)
+                return site
+            return run
+
+        hosts = ['host{}.example.com'.format(index) for index in range(self.THREADS)]
+        self.assertEqual(hosts, run_concurrently([handle_request(host) for host in hosts]))
@@ -96,23 +96,12 @@ def replace_static_urls(get_html, data_dir, course_id=None, static_asset_path=''
 def grade_histogram(module_id):
     ''' Print out a histogram of grades on a given problem.
         Part of staff member debug info.
+
+        Reads the incrementally maintained StudentModuleGradeHistogram rather
+        than aggregating over courseware_studentmodule on every render.
     '''
-    from django.db import connection
-    cursor = connection.cursor()
-
-    q = """SELECT courseware_studentmodule.grade,
-                  COUNT(courseware_studentmodule.student_id)
-    FROM courseware_studentmodule
-    WHERE courseware_studentmodule.module_id=%s
-    GROUP BY courseware_studentmodule.grade"""
-    # Passing module_id this way prevents sql-injection.
-    cursor.execute(q, [module_id])
-
-    grades = list(cursor.fetchall())
-    grades.sort(key=lambda x: x[0])  # Add ORDER BY to sql query?
-    if len(grades) >= 1 and grades[0][0] is None:
-        return []
-    return grades
+    from courseware.models import StudentModuleGradeHistogram
+    return StudentModuleGradeHistogram.histogram(module_id)
 
 
 def save_module(get_html, module):
@@ -7,9 +7,11 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+
 import numpy
 import scipy.constants
 import functions
+from lru_cache import LRUCache
 
 from pyparsing import (
     Word, Literal, CaselessLiteral, ZeroOrMore, MatchFirst, Optional, Forward,
@@ -216,46 +218,215 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
-def evaluator(variables, functions, math_expr, case_sensitive=False):
+def evaluator(variables, functions, math_expr, case_sensitive=False, cache=False):
     """
     Evaluate an expression; that is, take a string of math and return a float.
 
     -Variables are passed as a dictionary from string to value. They must be
      python numbers.
     -Unary functions are passed as a dictionary from string to function.
+    -If `cache` is true, keep the parsed expression for next time. Use it for
+     expressions that come back often, like instructor answers.
     """
     # No need to go further.
     if math_expr.strip() == "":
         return float('nan')
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    compiled = compile_expression(math_expr, case_sensitive, cache=cache)
+    return compiled.evaluate(variables, functions)
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False, cache=False):
+    """
+    Evaluate an expression for each of a list of variable dictionaries.
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+    Return a list with one result per dictionary, the same as calling
+    `evaluator` for each of them, but parsing the expression only once and
+    evaluating all the samples together with numpy when possible.
+    """
+    if math_expr.strip() == "":
+        return [float('nan')] * len(variables_list)
+
+    compiled = compile_expression(math_expr, case_sensitive, cache=cache)
+    return compiled.evaluate_samples(variables_list, functions)
+
+
+# Compiled expressions, keyed by the expression and its case sensitivity
+compiled_expression_cache = LRUCache()
+
+
+def compile_expression(math_expr, case_sensitive=False, cache=True):
+    """
+    Parse `math_expr` once, into a `CompiledExpression` to evaluate later.
+
+    If `cache` is true, look it up in (and add it to) the LRU cache of
+    compiled expressions first. Raises pyparsing's `ParseException` if the
+    expression is malformed.
+    """
+    if not cache:
+        return CompiledExpression(math_expr, case_sensitive)
+
+    key = (math_expr, case_sensitive)
+    compiled = compiled_expression_cache.get(key)
+    if compiled is None:
+        compiled = CompiledExpression(math_expr, case_sensitive)
+        compiled_expression_cache.set(key, compiled)
+    return compiled
+
+
+def eval_parallel_samples(values):
+    """
+    Like `eval_parallel`, for values which may be arrays of samples.
+    """
+    if not any(isinstance(value, numpy.ndarray) for value in values):
+        return eval_parallel(values)
+    if len(values) == 1:
+        return values[0]
+    has_zero = reduce(numpy.logical_or, [numpy.equal(value, 0) for value in values])
+    result = 1. / sum(1. / value for value in values)
+    return numpy.where(has_zero, float('nan'), result)
+
+
+class CompiledExpression(object):
+    """
+    A parsed expression, ready to be evaluated many times.
+
+    The parse tree is turned into nested Python closures once, so evaluating
+    it costs neither pyparsing nor a walk of the `ParseResults`. The closures
+    work on numbers and on numpy arrays alike, so `evaluate_samples` can
+    evaluate many samples at once.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+
+        self.parse_augmenter = ParseAugmenter(math_expr, case_sensitive)
+        self.parse_augmenter.parse_algebra()
+
+        if case_sensitive:
+            self.casify = lambda x: x
+        else:
+            self.casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        self.root = self._compile_node(self.parse_augmenter.tree)
+
+    def _compile_node(self, node):
+        """
+        Return a function of (variables, functions) that computes `node`.
+
+        Mirrors the evaluation actions used by `evaluator`.
+        """
+        node_name = node.getName()
+        kids = list(node)
+        subtrees = [self._compile_node(k) for k in kids if isinstance(k, ParseResults)]
+
+        if node_name == 'number':
+            value = eval_number(kids)
+            return lambda variables, functions: value
+
+        if node_name == 'variable':
+            name = self.casify(kids[0])
+            return lambda variables, functions: variables[name]
+
+        if node_name == 'function':
+            name = self.casify(kids[0])
+            argument = subtrees[0]
+            return lambda variables, functions: functions[name](argument(variables, functions))
+
+        if node_name == 'atom':
+            # Parentheses don't matter any more.
+            return subtrees[0]
+
+        if node_name == 'power':
+            def power(variables, functions):
+                """Exponentiate right to left, like `eval_power`."""
+                values = [subtree(variables, functions) for subtree in reversed(subtrees)]
+                return reduce(lambda a, b: b ** a, values)
+            return power
+
+        if node_name == 'parallel':
+            if len(subtrees) == 1:
+                return subtrees[0]
+            return lambda variables, functions: eval_parallel_samples(
+                [subtree(variables, functions) for subtree in subtrees]
+            )
+
+        if node_name in ('sum', 'product'):
+            if node_name == 'sum':
+                start, ops = 0.0, {'+': operator.add, '-': operator.sub}
+            else:
+                start, ops = 1.0, {'*': operator.mul, '/': operator.truediv}
+            # Pair each operand with the operator before it, like
+            # `eval_sum` and `eval_product`.
+            steps = []
+            current_op = operator.add if node_name == 'sum' else operator.mul
+            for kid in kids:
+                if isinstance(kid, ParseResults):
+                    steps.append((current_op, self._compile_node(kid)))
+                else:
+                    current_op = ops[kid]
+
+            def accumulate(variables, functions):
+                """Combine the operands from left to right."""
+                total = start
+                for step_op, subtree in steps:
+                    total = step_op(total, subtree(variables, functions))
+                return total
+            return accumulate
+
+        raise Exception(u"Unknown branch name '{}'".format(node_name))  # pragma: no cover
+
+    def _prepare(self, variables, functions):
+        """
+        Add the defaults to `variables` and `functions`, and check them.
+        """
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+        self.parse_augmenter.check_variables(all_variables, all_functions)
+        return all_variables, all_functions
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression for one set of variables, like `evaluator`.
+        """
+        all_variables, all_functions = self._prepare(variables, functions)
+        return self.root(all_variables, all_functions)
+
+    def evaluate_samples(self, variables_list, functions):
+        """
+        Evaluate the expression for each dictionary in `variables_list`.
+
+        Return a list of results, one per dictionary. All the samples are
+        evaluated at once, with the variables as numpy arrays. If that raises,
+        or gives anything but finite numbers, the samples are evaluated one at
+        a time instead, so that errors and special values come out exactly as
+        they would from `evaluator`. Custom `functions` must therefore either
+        work element-wise on arrays or raise on them.
+        """
+        num_samples = len(variables_list)
+        if num_samples < 2:
+            return [self.evaluate(sample, functions) for sample in variables_list]
+
+        all_variables, all_functions = self._prepare(variables_list[0], functions)
+        samples = [
+            {self.casify(name): value for name, value in sample.iteritems()}
+            for sample in variables_list
+        ]
+        defaults = add_defaults({}, {}, self.case_sensitive)[0]
+        try:
+            for name in set(self.casify(var) for var in self.parse_augmenter.variables_used):
+                all_variables[name] = numpy.array([
+                    sample[name] if name in sample else defaults[name]
+                    for sample in samples
+                ])
+            with numpy.errstate(all='ignore'):
+                results = self.root(all_variables, all_functions)
+                results = numpy.zeros(num_samples) + results
+            if results.shape == (num_samples,) and numpy.all(numpy.isfinite(results)):
+                return list(results)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+        return [self.evaluate(sample, functions) for sample in variables_list]
 
 
 class ParseAugmenter(object):
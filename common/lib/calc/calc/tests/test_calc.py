@@ -558,3 +558,93 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Run tests for calc.compile_expression and calc.evaluate_samples
+
+    Compiled expressions must give the same results, and raise the same
+    errors, as `evaluator`.
+    """
+
+    def setUp(self):
+        calc.compiled_expression_cache.clear()
+
+    def assert_samples_match_evaluator(self, math_expr, samples, functions=None):
+        """
+        Check `evaluate_samples` against `evaluator` for each sample.
+        """
+        functions = functions or {}
+        expected = [calc.evaluator(sample, functions, math_expr) for sample in samples]
+        actual = calc.evaluate_samples(samples, functions, math_expr)
+        self.assertEqual(len(actual), len(expected))
+        for act, exp in zip(actual, expected):
+            if numpy.isnan(exp):
+                self.assertTrue(numpy.isnan(act))
+            else:
+                self.assertAlmostEqual(act, exp)
+
+    def test_samples_match_evaluator(self):
+        samples = [{'x': 0.5 + i, 'y': 2.0 - i / 10.0} for i in range(10)]
+        for math_expr in ["x", "3", "-x^2 + 2*x - 1", "x^y^2", "x/y", "x || y",
+                          "sin(x) * cos(y) + sqrt(x)", "sec(x) + arccot(y)",
+                          "x*i + y", "5k*x - 3%", "e^x - pi", "2*(x + (y - 1))"]:
+            self.assert_samples_match_evaluator(math_expr, samples)
+
+    def test_samples_fall_back_on_special_values(self):
+        samples = [{'x': 0.0}, {'x': 1.0}, {'x': 2.0}]
+        # Parallel resistors with a zero.
+        self.assert_samples_match_evaluator("x || 1", samples)
+        # Division by zero raises, like it always has.
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples(samples, {}, "1/x")
+
+    def test_samples_with_scalar_only_functions(self):
+        samples = [{'x': 3.0}, {'x': 4.0}]
+        self.assertEqual(calc.evaluate_samples(samples, {}, "fact(x)"), [6, 24])
+        with self.assertRaisesRegexp(ValueError, 'factorial'):
+            calc.evaluate_samples([{'x': 1.5}, {'x': 2.0}], {}, "fact(x)")
+
+    def test_samples_errors(self):
+        with self.assertRaises(ParseException):
+            calc.evaluate_samples([{'x': 1.0}], {}, "x+")
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.evaluate_samples([{'x': 1.0}, {'x': 2.0}], {}, "x+z")
+        # A variable missing from one sample only.
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            calc.evaluate_samples([{'x': 1.0, 'y': 1.0}, {'x': 2.0}], {}, "x+y")
+
+    def test_samples_empty_expression(self):
+        results = calc.evaluate_samples([{}, {}], {}, " ")
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(numpy.isnan(result) for result in results))
+
+    def test_samples_case_sensitivity(self):
+        samples = [{'X': 1.0, 'x': 2.0}, {'X': 3.0, 'x': 4.0}]
+        self.assertEqual(
+            calc.evaluate_samples(samples, {}, "X - x", case_sensitive=True),
+            [-1.0, -1.0]
+        )
+
+    def test_compile_cache(self):
+        compiled = calc.compile_expression("x^2")
+        self.assertIs(calc.compile_expression("x^2"), compiled)
+        self.assertIsNot(calc.compile_expression("x^2", case_sensitive=True), compiled)
+        self.assertIsNot(calc.compile_expression("x^2", cache=False), compiled)
+        self.assertEqual(compiled.evaluate({'x': 3.0}, {}), 9.0)
+
+        calc.evaluator({}, {}, "1+1")
+        self.assertEqual(len(calc.compiled_expression_cache), 2)
+        calc.evaluator({}, {}, "2+2", cache=True)
+        self.assertEqual(len(calc.compiled_expression_cache), 3)
+
+    def test_compile_cache_eviction(self):
+        cache = calc.LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(len(cache), 2)
@@ -13,7 +13,9 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 '''
 
+from collections import namedtuple
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
@@ -25,7 +27,7 @@ from copy import deepcopy
 from capa.correctmap import CorrectMap
 import capa.inputtypes as inputtypes
 import capa.customrender as customrender
-from capa.util import contextualize_text, convert_files_to_filenames
+from capa.util import contextualize_text, convert_files_to_filenames, LRUCache
 import capa.xqueue_interface as xqueue_interface
 
 # to be replaced with auto-registering
@@ -63,6 +65,104 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+#-----------------------------------------------------------------------------
+# cache of compiled problems
+
+# The student-independent results of compiling a problem:
+#  - problem_text: the problem xml after startouttext/endouttext rewriting
+#  - tree: the parsed xml with includes processed, before _preprocess_problem
+#  - context: the script context produced by _extract_context
+#  - responder_answers: dict of response id -> responder.get_answers()
+CompiledProblem = namedtuple('CompiledProblem', 'problem_text tree context responder_answers')
+
+
+class CompiledProblemCache(LRUCache):
+    """
+    A thread-safe, process-local LRU cache of CompiledProblems.
+
+    Seeds are capped by the randomization bins, so each problem definition
+    only has a bounded number of variants. Entries must be treated as
+    immutable: LoncapaProblem deep copies what it takes from them.
+    """
+    pass
+
+
+# the cache shared by all problems in this process
+compiled_problem_cache = CompiledProblemCache()
+
+# (problem id, sha1 of the problem text) -> input config, see get_input_config
+input_config_cache = LRUCache()
+
+
+def assign_ids(tree, problem_id):
+    """
+    Assign IDs to the responses in `tree`, and to the inputs and solutions
+    of each response, in place.
+
+    Yields (response, inputfields) for each response, after giving it and
+    its inputfields their IDs.
+    """
+    response_id = 1
+    input_tags = inputtypes.registry.registered_tags()
+    for response in tree.xpath('//' + "|//".join(response_tag_dict)):
+        response_id_str = problem_id + "_" + str(response_id)
+        # create and save ID for this response
+        response.set('id', response_id_str)
+        response_id += 1
+
+        answer_id = 1
+        inputfields = tree.xpath(
+            "|".join(['//' + response.tag + '[@id=$id]//' + x for x in (input_tags + solution_tags)]),
+            id=response_id_str
+        )
+
+        # assign one answer_id for each input type or solution type
+        for entry in inputfields:
+            entry.attrib['response_id'] = str(response_id)
+            entry.attrib['answer_id'] = str(answer_id)
+            entry.attrib['id'] = "%s_%i_%i" % (problem_id, response_id, answer_id)
+            answer_id = answer_id + 1
+
+        yield response, inputfields
+
+
+def get_input_config(problem_text, problem_id):
+    """
+    Return the static configuration of a problem's inputs: a dict mapping
+    input id to the input's tag.
+
+    Works from the problem definition alone, without running scripts or
+    needing a ModuleSystem, so it is the same for every student. Returns None
+    if the inputs can't be known that way (the problem includes other files,
+    or doesn't parse). Cached per problem definition.
+    """
+    if isinstance(problem_text, unicode):
+        text_hash = hashlib.sha1(problem_text.encode('utf-8')).hexdigest()
+    else:
+        text_hash = hashlib.sha1(problem_text).hexdigest()
+    cache_key = (problem_id, text_hash)
+    config = input_config_cache.get(cache_key)
+    if config is not None:
+        return config
+
+    problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+    problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+    try:
+        tree = etree.XML(problem_text)
+    except etree.XMLSyntaxError:
+        return None
+    if tree.find('.//include') is not None:
+        return None
+
+    config = {}
+    input_tags = set(inputtypes.registry.registered_tags())
+    for _response, inputfields in assign_ids(tree, problem_id):
+        for entry in inputfields:
+            if entry.tag in input_tags:
+                config[entry.get('id')] = entry.tag
+    input_config_cache.set(cache_key, config)
+    return config
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -72,7 +172,7 @@ class LoncapaProblem(object):
     Main class for capa Problems.
     '''
 
-    def __init__(self, problem_text, id, state=None, seed=None, system=None):
+    def __init__(self, problem_text, id, state=None, seed=None, system=None, compiled_cache=None):
         '''
         Initializes capa Problem.
 
@@ -89,6 +189,9 @@ class LoncapaProblem(object):
                                 - 'input_state' - (dict) maps input_id to a dictionary that holds the state for that input
          - system       (ModuleSystem): ModuleSystem instance which provides OS,
                                         rendering, and user context
+         - compiled_cache (CompiledProblemCache): if given, the parsed xml, script
+                                        context and expected answers are shared with
+                                        other instances of the same problem and seed
 
         '''
 
@@ -113,25 +216,54 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
-
-        # construct script processor context (eg for customresponse problems)
-        self.context = self._extract_context(self.tree)
-
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
-        # transformations.  This also creates the dict (self.responders) of Response
-        # instances for each question in the problem. The dict has keys = xml subtree of
-        # Response, values = Response instance
-        self._preprocess_problem(self.tree)
+        compiled = None
+        if compiled_cache is not None:
+            cache_key = self._compiled_cache_key(problem_text)
+            compiled = compiled_cache.get(cache_key)
+
+        if compiled is None:
+            # Convert startouttext and endouttext to proper <text></text>
+            problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+            problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+            self.problem_text = problem_text
+
+            # parse problem XML file into an element tree
+            self.tree = etree.XML(problem_text)
+
+            # handle any <include file="foo"> tags
+            self._process_includes()
+
+            # construct script processor context (eg for customresponse problems)
+            self.context = self._extract_context(self.tree)
+
+            if compiled_cache is not None:
+                # copy before _preprocess_problem and the responders modify them
+                compiled_tree = deepcopy(self.tree)
+                compiled_context = deepcopy(self.context)
+
+            # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
+            # transformations.  This also creates the dict (self.responders) of Response
+            # instances for each question in the problem. The dict has keys = xml subtree of
+            # Response, values = Response instance
+            self._preprocess_problem(self.tree)
+
+            if compiled_cache is not None:
+                compiled_cache.set(cache_key, CompiledProblem(
+                    problem_text=self.problem_text,
+                    tree=compiled_tree,
+                    context=compiled_context,
+                    responder_answers=deepcopy(dict(
+                        (response.get('id'), answers)
+                        for response, answers in self.responder_answers.items()
+                    )),
+                ))
+        else:
+            # Clone the compiled problem. Responders hold this problem's system,
+            # so they are rebuilt, but the expected answers are reused.
+            self.problem_text = compiled.problem_text
+            self.tree = deepcopy(compiled.tree)
+            self.context = deepcopy(compiled.context)
+            self._preprocess_problem(self.tree, compiled.responder_answers)
 
         if not self.student_answers:  # True when student_answers is an empty dict
             self.set_initial_display()
@@ -142,6 +274,21 @@ class LoncapaProblem(object):
 
         self.extracted_tree = self._extract_html(self.tree)
 
+    def _compiled_cache_key(self, problem_text):
+        """
+        The key identifying this problem's CompiledProblem: everything other
+        than student state which compilation depends on.
+        """
+        if isinstance(problem_text, unicode):
+            problem_text = problem_text.encode('utf-8')
+        return (
+            hashlib.sha1(problem_text).hexdigest(),
+            self.problem_id,
+            self.seed,
+            getattr(self.system.filestore, 'root_path', None),
+            self.system.can_execute_unsafe_code(),
+        )
+
     def do_reset(self):
         '''
         Reset internal state to unfinished, with no answers
@@ -639,7 +786,7 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree):  # private
+    def _preprocess_problem(self, tree, responder_answers=None):  # private
         '''
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
@@ -648,30 +795,11 @@ class LoncapaProblem(object):
 
         Also create capa Response instances for each responsetype and save as self.responders
 
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        Obtain all responder answers and save as self.responder_answers dict (key = response),
+        or take them from `responder_answers` (dict of response id -> answers) if given.
         '''
-        response_id = 1
         self.responders = {}
-        for response in tree.xpath('//' + "|//".join(response_tag_dict)):
-            response_id_str = self.problem_id + "_" + str(response_id)
-            # create and save ID for this response
-            response.set('id', response_id_str)
-            response_id += 1
-
-            answer_id = 1
-            input_tags = inputtypes.registry.registered_tags()
-            inputfields = tree.xpath(
-                "|".join(['//' + response.tag + '[@id=$id]//' + x for x in (input_tags + solution_tags)]),
-                id=response_id_str
-            )
-
-            # assign one answer_id for each input type or solution type
-            for entry in inputfields:
-                entry.attrib['response_id'] = str(response_id)
-                entry.attrib['answer_id'] = str(answer_id)
-                entry.attrib['id'] = "%s_%i_%i" % (self.problem_id, response_id, answer_id)
-                answer_id = answer_id + 1
-
+        for response, inputfields in assign_ids(tree, self.problem_id):
             # instantiate capa Response
             responder = response_tag_dict[response.tag](response, inputfields,
                                                         self.context, self.system)
@@ -682,6 +810,9 @@ class LoncapaProblem(object):
         # eg with externalresponse)
         self.responder_answers = {}
         for response in self.responders.keys():
+            if responder_answers is not None:
+                self.responder_answers[response] = deepcopy(responder_answers[response.get('id')])
+                continue
             try:
                 self.responder_answers[response] = self.responders[response].get_answers()
             except:
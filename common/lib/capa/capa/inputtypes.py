@@ -48,6 +48,7 @@ import sys
 import pyparsing
 
 from .registry import TagRegistry
+from .util import LRUCache
 from chem import chemcalc
 from calc.preview import latex_preview
 import xqueue_interface
@@ -59,6 +60,23 @@ log = logging.getLogger(__name__)
 
 registry = TagRegistry()
 
+# (dispatch, formula) -> rendered preview, shared by all the inputs in this
+# process.  Live previews ask for the same few strings over and over.
+preview_cache = LRUCache(maxsize=2000)
+
+
+def cached_preview(dispatch, formula, render):
+    """
+    Return a copy of `render(formula)`, a dict, computing it only if it isn't
+    in `preview_cache` yet.
+    """
+    key = (dispatch, formula)
+    rendered = preview_cache.get(key)
+    if rendered is None:
+        rendered = render(formula)
+        preview_cache.set(key, rendered)
+    return dict(rendered)
+
 
 class Attribute(object):
     """
@@ -239,6 +257,24 @@ class InputTypeBase(object):
         """
         pass
 
+    # Dispatches whose result depends only on the data sent with the ajax
+    # call, not on the problem or the student.  Each names a classmethod
+    # taking that data.  See `handle_stateless_ajax`.
+    stateless_dispatches = ()
+
+    @classmethod
+    def handle_stateless_ajax(cls, dispatch, data):
+        """
+        Handle an ajax call without an instance of the input, and so without
+        loading the problem.
+
+        Returns the same as `handle_ajax`, or None if `dispatch` needs an
+        instance.
+        """
+        if dispatch not in cls.stateless_dispatches:
+            return None
+        return getattr(cls, dispatch)(data)
+
     def _get_render_context(self):
         """
         Should return a dictionary of keys needed to render the template for the input type.
@@ -1016,6 +1052,8 @@ class ChemicalEquationInput(InputTypeBase):
         """
         return {'previewer': '/static/js/capa/chemical_equation_preview.js', }
 
+    stateless_dispatches = ('preview_chemcalc',)
+
     def handle_ajax(self, dispatch, data):
         '''
         Since we only have chemcalc preview this input, check to see if it
@@ -1025,7 +1063,8 @@ class ChemicalEquationInput(InputTypeBase):
             return self.preview_chemcalc(data)
         return {}
 
-    def preview_chemcalc(self, data):
+    @classmethod
+    def preview_chemcalc(cls, data):
         """
         Render an html preview of a chemical formula or equation.  get should
         contain a key 'formula' and value 'some formula string'.
@@ -1034,6 +1073,7 @@ class ChemicalEquationInput(InputTypeBase):
         {
            'preview' : 'the-preview-html' or ''
            'error' : 'the-error' or ''
+           'request_start' : <time sent with request>, if one was sent
         }
         """
 
@@ -1045,17 +1085,28 @@ class ChemicalEquationInput(InputTypeBase):
             result['error'] = "No formula specified."
             return result
 
+        if 'request_start' in data:
+            result['request_start'] = int(data['request_start'])
+
+        result.update(cached_preview('preview_chemcalc', formula, cls._render_chemcalc))
+        return result
+
+    @staticmethod
+    def _render_chemcalc(formula):
+        """
+        Render `formula` for `preview_chemcalc`.
+        """
+        rendered = {}
         try:
-            result['preview'] = chemcalc.render_to_html(formula)
+            rendered['preview'] = chemcalc.render_to_html(formula)
         except pyparsing.ParseException as err:
-            result['error'] = u"Couldn't parse formula: {0}".format(err.msg)
+            rendered['error'] = u"Couldn't parse formula: {0}".format(err.msg)
         except Exception:
             # this is unexpected, so log
             log.warning(
                 "Error while previewing chemical formula", exc_info=True)
-            result['error'] = "Error while rendering preview"
-
-        return result
+            rendered['error'] = "Error while rendering preview"
+        return rendered
 
 registry.register(ChemicalEquationInput)
 
@@ -1099,6 +1150,8 @@ class FormulaEquationInput(InputTypeBase):
             'reported_status': reported_status
         }
 
+    stateless_dispatches = ('preview_formcalc',)
+
     def handle_ajax(self, dispatch, get):
         '''
         Since we only have formcalc preview this input, check to see if it
@@ -1108,7 +1161,8 @@ class FormulaEquationInput(InputTypeBase):
             return self.preview_formcalc(get)
         return {}
 
-    def preview_formcalc(self, get):
+    @classmethod
+    def preview_formcalc(cls, get):
         """
         Render an preview of a formula or equation. `get` should
         contain a key 'formula' with a math expression.
@@ -1132,22 +1186,30 @@ class FormulaEquationInput(InputTypeBase):
 
         result['request_start'] = int(get.get('request_start', 0))
 
+        result.update(cached_preview('preview_formcalc', formula, cls._render_formcalc))
+        return result
+
+    @staticmethod
+    def _render_formcalc(formula):
+        """
+        Render `formula` for `preview_formcalc`.
+        """
+        rendered = {}
         try:
             # TODO add references to valid variables and functions
             # At some point, we might want to mark invalid variables as red
             # or something, and this is where we would need to pass those in.
-            result['preview'] = latex_preview(formula)
+            rendered['preview'] = latex_preview(formula)
         except pyparsing.ParseException as err:
-            result['error'] = "Sorry, couldn't parse formula"
-            result['formula'] = formula
+            rendered['error'] = "Sorry, couldn't parse formula"
+            rendered['formula'] = formula
         except Exception:
             # this is unexpected, so log
             log.warning(
                 "Error while previewing formula", exc_info=True
             )
-            result['error'] = "Error while rendering preview"
-
-        return result
+            rendered['error'] = "Error while rendering preview"
+        return rendered
 
 registry.register(FormulaEquationInput)
 
@@ -31,7 +31,7 @@ from collections import namedtuple
 from shapely.geometry import Point, MultiPoint
 
 # specific library imports
-from calc import evaluator, UndefinedVariable
+from calc import evaluator, evaluate_samples, UndefinedVariable
 from . import correctmap
 from datetime import datetime
 from pytz import UTC
@@ -48,6 +48,13 @@ log = logging.getLogger(__name__)
 CorrectMap = correctmap.CorrectMap
 CORRECTMAP_PY = None
 
+# Answer buckets (see `answer_bucket`), by responder settings and answer.
+answer_bucket_cache = LRUCache(maxsize=10000)
+
+# Seeds the sample points at which formulas are evaluated to bucket them, so
+# that a given formula always lands in the same bucket.
+ANSWER_BUCKET_SEED = 1
+
 
 #-----------------------------------------------------------------------------
 # Exceptions
@@ -860,7 +867,7 @@ class NumericalResponse(LoncapaResponse):
             # `ValueError`. Then test if instead it is a math expression.
             # `complex` seems to only generate `ValueErrors`, only catch these.
             try:
-                correct_ans = evaluator({}, {}, self.correct_answer)
+                correct_ans = evaluator({}, {}, self.correct_answer, cache=True)
             except Exception:
                 log.debug("Content error--answer '%s' is not a valid number", self.correct_answer)
                 raise StudentInputError(
@@ -920,9 +927,11 @@ class NumericalResponse(LoncapaResponse):
         Outside-facing function that lets us compare two numerical answers,
         with this problem's tolerance.
         """
+        # The hinter compares each submission with every hinted answer, so
+        # keep the parsed answers around.
         return compare_with_tolerance(
-            evaluator({}, {}, ans1),
-            evaluator({}, {}, ans2),
+            evaluator({}, {}, ans1, cache=True),
+            evaluator({}, {}, ans2, cache=True),
             self.tolerance
         )
 
@@ -936,6 +945,23 @@ class NumericalResponse(LoncapaResponse):
         except (StudentInputError, UndefinedVariable):
             return False
 
+    def answer_bucket(self, answer):
+        """
+        Return the tolerance bucket of an answer, or None if it isn't valid.
+
+        Answers that `compare_answer` finds equal are in the same bucket or
+        in nearby ones, so the hinter can find them without comparing all.
+        """
+        cache_key = (self.response_tag, self.tolerance, answer)
+        bucket = answer_bucket_cache.get(cache_key)
+        if bucket is None:
+            try:
+                bucket = tolerance_bucket(evaluator({}, {}, answer, cache=True), self.tolerance)
+            except Exception:
+                return None
+            answer_bucket_cache.set(cache_key, bucket)
+        return bucket
+
     def get_answers(self):
         return {self.answer_id: self.correct_answer}
 
@@ -1797,58 +1823,60 @@ class FormulaResponse(LoncapaResponse):
             self.correct_answer, given, self.samples)
         return CorrectMap(self.answer_id, correctness)
 
-    def tupleize_answers(self, answer, var_dict_list):
+    def tupleize_answers(self, answer, var_dict_list, cache=False):
         """
         Takes in an answer and a list of dictionaries mapping variables to values.
         Each dictionary represents a test case for the answer.
         Returns a tuple of formula evaluation results.
+
+        The answer is parsed once and evaluated for all the test cases
+        together. If `cache` is true, the parsed answer is kept for next time.
         """
-        out = []
-        for var_dict in var_dict_list:
-            try:
-                out.append(evaluator(
-                    var_dict,
-                    dict(),
-                    answer,
-                    case_sensitive=self.case_sensitive,
-                ))
-            except UndefinedVariable as uv:
+        try:
+            out = evaluate_samples(
+                var_dict_list,
+                dict(),
+                answer,
+                case_sensitive=self.case_sensitive,
+                cache=cache,
+            )
+        except UndefinedVariable as uv:
+            log.debug(
+                'formularesponse: undefined variable in formula=%s' % answer)
+            raise StudentInputError(
+                "Invalid input: " + uv.message + " not permitted in answer"
+            )
+        except ValueError as ve:
+            if 'factorial' in ve.message:
+                # This is thrown when fact() or factorial() is used in a formularesponse answer
+                #   that tests on negative and/or non-integer inputs
+                # ve.message will be: `factorial() only accepts integral values` or
+                # `factorial() not defined for negative values`
                 log.debug(
-                    'formularesponse: undefined variable in formula=%s' % answer)
+                    ('formularesponse: factorial function used in response '
+                     'that tests negative and/or non-integer inputs. '
+                     'given={0}').format(answer)
+                )
                 raise StudentInputError(
-                    "Invalid input: " + uv.message + " not permitted in answer"
+                    ("factorial function not permitted in answer "
+                     "for this problem. Provided answer was: "
+                     "{0}").format(cgi.escape(answer))
                 )
-            except ValueError as ve:
-                if 'factorial' in ve.message:
-                    # This is thrown when fact() or factorial() is used in a formularesponse answer
-                    #   that tests on negative and/or non-integer inputs
-                    # ve.message will be: `factorial() only accepts integral values` or
-                    # `factorial() not defined for negative values`
-                    log.debug(
-                        ('formularesponse: factorial function used in response '
-                         'that tests negative and/or non-integer inputs. '
-                         'given={0}').format(given)
-                    )
-                    raise StudentInputError(
-                        ("factorial function not permitted in answer "
-                         "for this problem. Provided answer was: "
-                         "{0}").format(cgi.escape(given))
-                    )
-                # If non-factorial related ValueError thrown, handle it the same as any other Exception
-                log.debug('formularesponse: error {0} in formula'.format(ve))
-                raise StudentInputError("Invalid input: Could not parse '%s' as a formula" %
-                                        cgi.escape(answer))
-            except Exception as err:
-                # traceback.print_exc()
-                log.debug('formularesponse: error %s in formula', err)
-                raise StudentInputError("Invalid input: Could not parse '%s' as a formula" %
-                                        cgi.escape(answer))
+            # If non-factorial related ValueError thrown, handle it the same as any other Exception
+            log.debug('formularesponse: error {0} in formula'.format(ve))
+            raise StudentInputError("Invalid input: Could not parse '%s' as a formula" %
+                                    cgi.escape(answer))
+        except Exception as err:
+            # traceback.print_exc()
+            log.debug('formularesponse: error %s in formula', err)
+            raise StudentInputError("Invalid input: Could not parse '%s' as a formula" %
+                                    cgi.escape(answer))
         return out
 
-    def randomize_variables(self, samples):
+    def randomize_variables(self, samples, rng=random):
         """
         Returns a list of dictionaries mapping variables to random values in range,
-        as expected by tupleize_answers.
+        as expected by tupleize_answers. The values are drawn from `rng`.
         """
         variables = samples.split('@')[0].split(',')
         numsamples = int(samples.split('@')[1].split('#')[1])
@@ -1862,7 +1890,7 @@ class FormulaResponse(LoncapaResponse):
             # ranges give numerical ranges for testing
             for var in ranges:
                 # TODO: allow specified ranges (i.e. integers and complex numbers) for random variables
-                value = random.uniform(*ranges[var])
+                value = rng.uniform(*ranges[var])
                 var_dict[str(var)] = value
             out.append(var_dict)
         return out
@@ -1875,7 +1903,7 @@ class FormulaResponse(LoncapaResponse):
         """
         var_dict_list = self.randomize_variables(samples)
         student_result = self.tupleize_answers(given, var_dict_list)
-        instructor_result = self.tupleize_answers(expected, var_dict_list)
+        instructor_result = self.tupleize_answers(expected, var_dict_list, cache=True)
 
         correct = all(compare_with_tolerance(student, instructor, self.tolerance)
                       for student, instructor in zip(student_result, instructor_result))
@@ -1888,8 +1916,13 @@ class FormulaResponse(LoncapaResponse):
         """
         An external interface for comparing whether a and b are equal.
         """
-        internal_result = self.check_formula(ans1, ans2, self.samples)
-        return internal_result == "correct"
+        # The hinter compares each submission with every hinted answer, so
+        # keep the parsed answers around.
+        var_dict_list = self.randomize_variables(self.samples)
+        results1 = self.tupleize_answers(ans1, var_dict_list, cache=True)
+        results2 = self.tupleize_answers(ans2, var_dict_list, cache=True)
+        return all(compare_with_tolerance(result2, result1, self.tolerance)
+                   for result1, result2 in zip(results1, results2))
 
     def validate_answer(self, answer):
         """
@@ -1902,6 +1935,26 @@ class FormulaResponse(LoncapaResponse):
         except StudentInputError:
             return False
 
+    def answer_bucket(self, answer):
+        """
+        Return the tolerance bucket of an answer, or None if it isn't valid.
+
+        The answer is evaluated at a fixed sample point, so answers that
+        `compare_answer` finds equal are in the same bucket or in nearby ones,
+        and the hinter can find them without comparing all.
+        """
+        cache_key = (self.response_tag, self.tolerance, self.samples, self.case_sensitive, answer)
+        bucket = answer_bucket_cache.get(cache_key)
+        if bucket is None:
+            sample = self.randomize_variables(self.samples, random.Random(ANSWER_BUCKET_SEED))[:1]
+            try:
+                value = self.tupleize_answers(answer, sample, cache=True)[0]
+                bucket = tolerance_bucket(value, self.tolerance)
+            except Exception:
+                return None
+            answer_bucket_cache.set(cache_key, bucket)
+        return bucket
+
     def strip_dict(self, d):
         ''' Takes a dict. Returns an identical dict, with all non-word
         keys and all non-numeric values stripped out. All values also
@@ -0,0 +1,111 @@
+"""Compare the sandbox pool with starting a new jailed Python per execution.
+
+Run it with the sandboxed Python codejail should use::
+
+    $ python -m capa.safe_exec.benchmark --python-bin ~/venvs/edx-sandbox/bin/python --user sandbox
+
+It runs the same code through both paths, from several threads at once as a
+busy LMS process would, and prints the latency of each execution and the
+overall throughput.
+
+"""
+
+import argparse
+import threading
+import time
+
+from codejail import jail_code
+
+from . import pool
+from .safe_exec import safe_exec
+
+# What a typical customresponse check looks like: some numpy, some calc.
+BENCHMARK_CODE = """\
+ans = calc.evaluator({'x': random.uniform(1, 2)}, {}, '2*x^2 + sin(x)')
+roots = list(numpy.roots([1, -3, 2]))
+ok = abs(sum(roots) - 3) < 1e-9
+"""
+
+
+def percentile(sorted_values, fraction):
+    """The value `fraction` of the way through `sorted_values`."""
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_benchmark(jobs, concurrency, code=BENCHMARK_CODE):
+    """
+    Run `code` `jobs` times from `concurrency` threads.
+
+    Returns a dict of the latencies (in seconds) and the throughput (in
+    executions per second).
+
+    """
+    latencies = []
+    lock = threading.Lock()
+    remaining = [jobs]
+
+    def worker():
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+                seed = remaining[0]
+            start = time.time()
+            safe_exec(code, {}, random_seed=seed)
+            elapsed = time.time() - start
+            with lock:
+                latencies.append(elapsed)
+
+    start = time.time()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = time.time() - start
+
+    latencies.sort()
+    return {
+        'mean': sum(latencies) / len(latencies),
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+        'max': latencies[-1],
+        'throughput': len(latencies) / total,
+    }
+
+
+def report(name, results):
+    """Print one line of results."""
+    print "{:<8} mean {mean:7.1f}ms  p50 {p50:7.1f}ms  p95 {p95:7.1f}ms  max {max:7.1f}ms  {throughput:7.1f} execs/s".format(
+        name,
+        throughput=results['throughput'],
+        **dict((k, v * 1000) for k, v in results.items() if k != 'throughput')
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--python-bin', required=True, help="the sandboxed Python")
+    parser.add_argument('--user', default=None, help="the user to run the sandboxed Python as")
+    parser.add_argument('--jobs', type=int, default=200, help="executions per run")
+    parser.add_argument('--concurrency', type=int, default=4, help="threads running executions")
+    parser.add_argument('--pool-size', type=int, default=4, help="workers in the pool")
+    parser.add_argument('--max-jobs', type=int, default=100, help="jobs per worker before it is replaced")
+    args = parser.parse_args()
+
+    jail_code.configure("python", args.python_bin, user=args.user)
+
+    pool.configure(0)
+    report("spawn", run_benchmark(args.jobs, args.concurrency))
+
+    pool.configure(args.pool_size, max_jobs=args.max_jobs)
+    # Start the workers first, their startup is paid once per max_jobs jobs.
+    run_benchmark(args.pool_size, args.pool_size)
+    report("pool", run_benchmark(args.jobs, args.concurrency))
+    pool.reset()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+"""A pool of long-lived, pre-forked sandbox workers.
+
+Starting a jailed Python for every execution means paying for interpreter
+startup and for importing numpy, scipy and friends every time.  A
+`SandboxWorker` is a sandboxed Python that has done that once, and then forks a
+fresh child for each job (see pool_worker.py).  The child gets the job's
+resource limits and nothing else, so each job is as isolated as it was in its
+own process, and costs about as much as a fork.
+
+Workers are recycled after a number of jobs, and whenever a job breaks one of
+its limits or the worker misbehaves in any way.
+
+The pool knows nothing about codejail: callers give it the command line of the
+sandboxed Python and the limits to apply.
+
+"""
+
+import atexit
+import json
+import logging
+import os
+import os.path
+import select
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Read the worker's source now, it's handed to the sandboxed Python with -c.
+pool_worker_py_file = os.path.join(os.path.dirname(__file__), "pool_worker.py")
+pool_worker_py = open(pool_worker_py_file).read()
+
+# How long a new worker has to import its modules and report for duty.
+STARTUP_TIMEOUT = 30
+
+# How long the worker may take to report a job, beyond the job's own REALTIME
+# limit, before we give up on the worker.
+RESPONSE_GRACE = 5
+
+
+class SandboxPoolError(Exception):
+    """A worker couldn't be started or stopped responding properly."""
+    pass
+
+
+class JobFailed(Exception):
+    """The jailed code raised an exception, or broke one of its limits."""
+    pass
+
+
+def _worker_process_limits():
+    """Limits for the worker itself, applied before exec'ing it."""
+    import resource
+    # The worker writes no files.  The per-job limits are applied by the
+    # forked children, since the worker has to be able to fork.
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+
+
+class SandboxWorker(object):
+    """
+    One sandboxed Python process that runs jobs in forked children.
+
+    Not thread-safe: the pool hands each worker to one thread at a time.
+
+    """
+    def __init__(self, cmdline, preload=(), max_jobs=100):
+        self.max_jobs = max_jobs
+        self.jobs = 0
+        self.retired = False
+        self._buffer = ""
+        try:
+            with open(os.devnull, "w") as devnull:
+                self.process = subprocess.Popen(
+                    cmdline + ["-c", pool_worker_py],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=devnull,
+                    close_fds=True,
+                    preexec_fn=_worker_process_limits,
+                )
+        except OSError as e:
+            raise SandboxPoolError("Couldn't start sandbox worker: %s" % e)
+        self._send({"preload": list(preload)})
+        self._receive(time.time() + STARTUP_TIMEOUT)
+
+    @property
+    def exhausted(self):
+        """Should this worker be replaced instead of given another job?"""
+        return self.retired or self.jobs >= self.max_jobs
+
+    def run(self, code, globals_dict, limits, python_path=None, cwd=None):
+        """
+        Run `code` with `globals_dict`, and return the resulting JSON-able globals.
+
+        Raises `JobFailed` if the code raised an exception or broke its limits,
+        and `SandboxPoolError` if the worker itself failed.
+
+        """
+        self.jobs += 1
+        realtime = limits.get("REALTIME")
+        deadline = time.time() + realtime + RESPONSE_GRACE if realtime else None
+        self._send({
+            "code": code,
+            "globals": globals_dict,
+            "limits": limits,
+            "python_path": python_path or [],
+            "cwd": cwd,
+        })
+        response = self._receive(deadline)
+
+        if response["timed_out"]:
+            self.retired = True
+            raise JobFailed("Couldn't execute jailed code: timed out after %s seconds" % realtime)
+        if response["signal"] is not None:
+            # SIGXCPU, SIGKILL for memory, or something worse: start afresh.
+            self.retired = True
+            raise JobFailed("Couldn't execute jailed code: killed by signal %d" % response["signal"])
+        try:
+            output = json.loads(response["output"])
+        except ValueError:
+            self.retired = True
+            raise JobFailed("Couldn't execute jailed code: no results (exit code %r)" % response["exitcode"])
+        if "error" in output:
+            if "MemoryError" in output["error"]:
+                self.retired = True
+            raise JobFailed("Couldn't execute jailed code: %s" % output["error"])
+        return output["globals"]
+
+    def kill(self):
+        """Stop the worker process, and don't use it again."""
+        self.retired = True
+        if self.process.poll() is None:
+            try:
+                self.process.kill()
+            except OSError:
+                pass
+            self.process.wait()
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except IOError:
+                pass
+
+    def _send(self, message):
+        try:
+            self.process.stdin.write(json.dumps(message) + "\n")
+            self.process.stdin.flush()
+        except (IOError, OSError) as e:
+            self.kill()
+            raise SandboxPoolError("Couldn't send to sandbox worker: %s" % e)
+
+    def _receive(self, deadline):
+        """Read one message from the worker, waiting until `deadline` at most."""
+        fd = self.process.stdout.fileno()
+        while "\n" not in self._buffer:
+            timeout = max(0, deadline - time.time()) if deadline is not None else None
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if not ready:
+                self.kill()
+                raise SandboxPoolError("Sandbox worker didn't respond in time")
+            data = os.read(fd, 65536)
+            if not data:
+                self.kill()
+                raise SandboxPoolError("Sandbox worker exited unexpectedly")
+            self._buffer += data
+        line, self._buffer = self._buffer.split("\n", 1)
+        try:
+            return json.loads(line)
+        except ValueError:
+            self.kill()
+            raise SandboxPoolError("Sandbox worker sent garbage")
+
+
+class SandboxPool(object):
+    """
+    Up to `size` SandboxWorkers, shared by all threads of one process.
+
+    `cmdline` is the command line that starts the sandboxed Python, `preload`
+    the modules each worker imports when it starts, and `max_jobs` the number
+    of jobs a worker runs before it is replaced.
+
+    """
+    def __init__(self, cmdline, size, preload=(), max_jobs=100):
+        self.cmdline = list(cmdline)
+        self.size = size
+        self.preload = list(preload)
+        self.max_jobs = max_jobs
+        self.pid = os.getpid()
+        self._idle = []
+        self._busy = 0
+        self._cond = threading.Condition()
+
+    def run(self, code, globals_dict, limits, python_path=None, slug=None):
+        """
+        Run `code` in one of the pool's workers.
+
+        `python_path` directories (or zip files) are copied to a temporary
+        directory the sandbox can read, as codejail does, and added to the
+        path of the jailed code.  Returns the JSON-able globals.
+
+        """
+        tmpdir = None
+        python_path_names = []
+        if python_path:
+            tmpdir = tempfile.mkdtemp(prefix="codejail-")
+            os.chmod(tmpdir, 0775)
+            for pydir in python_path:
+                name = os.path.basename(pydir)
+                dest = os.path.join(tmpdir, name)
+                if os.path.isdir(pydir):
+                    shutil.copytree(pydir, dest)
+                else:
+                    shutil.copy(pydir, dest)
+                python_path_names.append(name)
+
+        worker = self._checkout()
+        try:
+            if slug:
+                log.debug("Running %s in sandbox worker %d", slug, worker.process.pid)
+            return worker.run(code, globals_dict, limits, python_path_names, tmpdir)
+        finally:
+            self._checkin(worker)
+            if tmpdir:
+                shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def close(self):
+        """Stop all the idle workers.  Busy ones are stopped when checked in."""
+        with self._cond:
+            self.size = 0
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.kill()
+
+    def _checkout(self):
+        """Get a worker for one job, starting a new one if there's room."""
+        with self._cond:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.process.poll() is None:
+                        self._busy += 1
+                        return worker
+                    worker.kill()
+                if self._busy < self.size:
+                    self._busy += 1
+                    break
+                self._cond.wait()
+        try:
+            return SandboxWorker(self.cmdline, self.preload, self.max_jobs)
+        except Exception:
+            with self._cond:
+                self._busy -= 1
+                self._cond.notify()
+            raise
+
+    def _checkin(self, worker):
+        """Take `worker` back, replacing it if it is exhausted."""
+        if worker.exhausted or self.size == 0:
+            worker.kill()
+            worker = None
+        with self._cond:
+            self._busy -= 1
+            if worker is not None:
+                self._idle.append(worker)
+            self._cond.notify()
+
+
+# Pool settings, changed by `configure`.
+POOL_SETTINGS = {
+    # How many workers each process may run.  0 means don't use a pool.
+    "size": 0,
+    # How many jobs a worker runs before it is replaced.
+    "max_jobs": 100,
+}
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def configure(size, max_jobs=100):
+    """
+    Configure the sandbox pool.  Workers are started on demand.
+
+    `size` is the number of workers each process may run, 0 to disable the
+    pool, and `max_jobs` the number of jobs a worker runs before it is replaced.
+
+    """
+    POOL_SETTINGS["size"] = size
+    POOL_SETTINGS["max_jobs"] = max_jobs
+    reset()
+
+
+def is_enabled():
+    """Has a pool been configured?"""
+    return POOL_SETTINGS["size"] > 0
+
+
+def get_pool(cmdline, preload=()):
+    """
+    Get the `SandboxPool` of this process, creating it if needed.
+
+    A pool inherited across a fork belongs to the parent, so the child process
+    starts its own.
+
+    """
+    global _POOL                # pylint: disable=W0603
+    with _POOL_LOCK:
+        pool = _POOL
+        if pool is None or pool.pid != os.getpid() or pool.cmdline != list(cmdline):
+            if pool is not None and pool.pid == os.getpid():
+                pool.close()
+            pool = _POOL = SandboxPool(
+                cmdline, POOL_SETTINGS["size"], preload, POOL_SETTINGS["max_jobs"],
+            )
+        return pool
+
+
+def reset():
+    """Stop this process's pool, if any.  The next `get_pool` starts a new one."""
+    global _POOL                # pylint: disable=W0603
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None and pool.pid == os.getpid():
+        pool.close()
+
+
+atexit.register(reset)
@@ -0,0 +1,186 @@
+"""The long-lived process at the other end of a `pool.SandboxWorker`.
+
+This file is not imported: its source is handed to the sandboxed Python with
+`-c`, so it only depends on the standard library.
+
+The worker imports the modules capa code expects once, then forks a fresh child
+for every job.  The child applies the per-job resource limits, executes the
+code and sends back the JSON-able globals over a private pipe, so no job can
+see or disturb anything left behind by another job.
+
+Requests arrive on stdin and responses leave on stdout, one line of JSON each.
+
+"""
+
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import time
+import traceback
+
+OK_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+BAD_KEYS = ("__builtins__",)
+
+# The worker is started with close_fds and only ever holds a few descriptors.
+MAXFD = 256
+
+
+class DevNull(object):
+    """A file-like object that swallows whatever the jailed code prints."""
+    def write(self, *args, **kwargs):
+        pass
+
+    def flush(self):
+        pass
+
+    def read(self, *args, **kwargs):
+        return ""
+
+    readline = read
+
+
+def jsonable(value):
+    """Can `value` be sent back to the calling process?"""
+    if not isinstance(value, OK_TYPES):
+        return False
+    try:
+        json.dumps(value)
+    except Exception:
+        return False
+    return True
+
+
+def preload(modnames):
+    """Import `modnames` now, so every forked child gets them for free."""
+    for modname in modnames:
+        try:
+            __import__(modname)
+        except Exception:
+            # The jailed code will get the ImportError when it uses the module.
+            pass
+
+
+def set_process_limits(limits):
+    """Apply the resource limits of one job to the current process."""
+    # No subprocesses, no files, no core dumps.
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    # CPU seconds, not wall clock time.  A forked child starts at zero.
+    cpu = limits.get("CPU")
+    if cpu:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+    # Total process virtual memory.
+    vmem = limits.get("VMEM")
+    if vmem:
+        resource.setrlimit(resource.RLIMIT_AS, (vmem, vmem))
+
+
+def run_job(job, result_fd):
+    """
+    Run `job` in this freshly forked child, and write the outcome to `result_fd`.
+
+    Never returns.
+
+    """
+    status = 1
+    try:
+        # Nothing the jailed code does may reach the worker's protocol streams.
+        os.closerange(0, 3)
+        os.closerange(3, result_fd)
+        os.closerange(result_fd + 1, MAXFD)
+        sys.stdin = sys.stdout = sys.stderr = DevNull()
+
+        set_process_limits(job["limits"])
+        if job.get("cwd"):
+            os.chdir(job["cwd"])
+        for pydir in job.get("python_path") or ():
+            sys.path.append(pydir)
+
+        g_dict = job["globals"]
+        exec job["code"] in g_dict
+
+        g_dict = dict(
+            (k, v)
+            for k, v in g_dict.iteritems()
+            if jsonable(v) and k not in BAD_KEYS
+        )
+        output = json.dumps({"globals": g_dict})
+        status = 0
+    except BaseException:
+        output = json.dumps({"error": traceback.format_exc()})
+
+    try:
+        while output:
+            written = os.write(result_fd, output)
+            output = output[written:]
+    finally:
+        os._exit(status)
+
+
+def wait_for_child(pid, deadline):
+    """Reap `pid`, killing it if it is still alive at `deadline`."""
+    while True:
+        finished, status = os.waitpid(pid, os.WNOHANG)
+        if finished:
+            return status
+        if deadline is not None and time.time() >= deadline:
+            os.kill(pid, signal.SIGKILL)
+            return os.waitpid(pid, 0)[1]
+        time.sleep(0.001)
+
+
+def run_forked(job):
+    """Run `job` in a forked child, and return the response for the pool."""
+    realtime = job["limits"].get("REALTIME")
+    deadline = time.time() + realtime if realtime else None
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        run_job(job, write_fd)
+    os.close(write_fd)
+
+    chunks = []
+    timed_out = False
+    while True:
+        timeout = max(0, deadline - time.time()) if deadline is not None else None
+        ready, _, _ = select.select([read_fd], [], [], timeout)
+        if not ready:
+            timed_out = True
+            os.kill(pid, signal.SIGKILL)
+            break
+        data = os.read(read_fd, 65536)
+        if not data:
+            break
+        chunks.append(data)
+    os.close(read_fd)
+
+    status = wait_for_child(pid, deadline)
+    return {
+        "output": "".join(chunks),
+        "exitcode": os.WEXITSTATUS(status) if os.WIFEXITED(status) else None,
+        "signal": os.WTERMSIG(status) if os.WIFSIGNALED(status) else None,
+        "timed_out": timed_out,
+    }
+
+
+def main():
+    stdin, stdout = sys.stdin, sys.stdout
+    config = json.loads(stdin.readline())
+    preload(config.get("preload", ()))
+    stdout.write(json.dumps({"ready": os.getpid()}) + "\n")
+    stdout.flush()
+
+    for line in iter(stdin.readline, ""):
+        response = run_forked(json.loads(line))
+        stdout.write(json.dumps(response) + "\n")
+        stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
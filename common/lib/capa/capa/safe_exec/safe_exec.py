@@ -3,10 +3,15 @@
 from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
+from codejail import jail_code
 from . import lazymod
+from . import pool
 from dogapi import dog_stats_api
 
 import hashlib
+import logging
+
+log = logging.getLogger(__name__)
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -47,6 +52,52 @@ for name, modname in ASSUMED_IMPORTS:
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
 
+def configure_pool(size, max_jobs=100):
+    """
+    Run sandboxed code in a pool of `size` pre-forked workers per process.
+
+    Each worker runs `max_jobs` jobs before it is replaced.  A `size` of 0
+    goes back to starting a new jailed Python for every execution.
+
+    """
+    pool.configure(size, max_jobs=max_jobs)
+
+
+def jailed_python_cmdline():
+    """The command line codejail uses to start the sandboxed Python."""
+    command = jail_code.COMMANDS["python"]
+    cmdline = []
+    if command['user']:
+        cmdline.extend(['sudo', '-u', command['user']])
+    cmdline.extend(command['cmdline_start'])
+    return cmdline
+
+
+def pooled_safe_exec(code, globals_dict, python_path=None, slug=None):
+    """
+    Like codejail's safe_exec, but run the code in a pre-forked sandbox worker.
+
+    Falls back to codejail's safe_exec if no worker can be had.
+
+    """
+    sandbox_pool = pool.get_pool(
+        jailed_python_cmdline(),
+        preload=[modname for _, modname in ASSUMED_IMPORTS],
+    )
+    try:
+        results = sandbox_pool.run(
+            code, json_safe(globals_dict), dict(jail_code.LIMITS),
+            python_path=python_path, slug=slug,
+        )
+    except pool.JobFailed as e:
+        raise SafeExecException(e.message)
+    except pool.SandboxPoolError:
+        log.exception("Sandbox pool failed, running %s in a new jail", slug)
+        codejail_safe_exec(code, globals_dict, python_path=python_path, slug=slug)
+    else:
+        globals_dict.update(results)
+
+
 def update_hash(hasher, obj):
     """
     Update a `hashlib` hasher with a nested object.
@@ -116,6 +167,8 @@ def safe_exec(code, globals_dict, random_seed=None, python_path=None, cache=None
     # Decide which code executor to use.
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif pool.is_enabled() and jail_code.is_configured("python"):
+        exec_fn = pooled_safe_exec
     else:
         exec_fn = codejail_safe_exec
 
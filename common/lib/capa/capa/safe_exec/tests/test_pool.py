@@ -0,0 +1,113 @@
+"""Test the pre-forked sandbox worker pool.
+
+These run the worker with the current Python, unsandboxed: the jail itself is
+codejail's business, here we check the pool's own machinery.
+
+"""
+
+import os.path
+import sys
+import unittest
+
+from capa.safe_exec import pool
+from capa.safe_exec.safe_exec import CODE_PROLOG, LAZY_IMPORTS
+
+CMDLINE = [sys.executable, "-E", "-B"]
+LIMITS = {"CPU": 1, "REALTIME": 2, "VMEM": 0}
+
+
+class TestSandboxPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = pool.SandboxPool(CMDLINE, size=2, preload=["math"], max_jobs=3)
+        self.addCleanup(self.pool.close)
+
+    def run_code(self, code, globals_dict=None, limits=LIMITS, **kwargs):
+        return self.pool.run(code, globals_dict or {}, limits, **kwargs)
+
+    def worker_pid(self):
+        """The pid of the worker the next job will run in."""
+        return self.run_code("import os; pid = os.getppid()")['pid']
+
+    def test_set_values(self):
+        results = self.run_code("b = a * 2\nf = lambda: 1", {'a': 17})
+        self.assertEqual(results, {'a': 17, 'b': 34})
+
+    def test_prolog_and_lazy_imports(self):
+        code = CODE_PROLOG % 17 + LAZY_IMPORTS + "a = 1/2\nb = int(math.pi)"
+        results = self.run_code(code)
+        self.assertEqual(results['a'], 0.5)
+        self.assertEqual(results['b'], 3)
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(pool.JobFailed) as cm:
+            self.run_code("1/0")
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_jobs_are_isolated(self):
+        self.run_code("import math; math.pi = 3")
+        results = self.run_code("import math; pi = math.pi")
+        self.assertNotEqual(results['pi'], 3)
+
+    def test_printing_doesnt_confuse_the_worker(self):
+        results = self.run_code(
+            "import os, sys\n"
+            "print 'hello'\n"
+            "try:\n"
+            "    os.write(1, '{}\\n')\n"
+            "except OSError:\n"
+            "    pass\n"
+            "a = 1\n"
+        )
+        self.assertEqual(results, {'a': 1})
+        self.assertEqual(self.run_code("a = 2"), {'a': 2})
+
+    def test_workers_are_reused_then_recycled(self):
+        first = self.worker_pid()
+        self.assertEqual(self.worker_pid(), first)
+        self.assertEqual(self.worker_pid(), first)
+        # That was max_jobs jobs, a new worker takes over.
+        self.assertNotEqual(self.worker_pid(), first)
+
+    def test_cpu_limit_recycles_worker(self):
+        first = self.worker_pid()
+        with self.assertRaises(pool.JobFailed):
+            self.run_code("while True: pass")
+        self.assertNotEqual(self.worker_pid(), first)
+
+    def test_realtime_limit(self):
+        with self.assertRaises(pool.JobFailed) as cm:
+            self.run_code("import time; time.sleep(10)", limits={"CPU": 1, "REALTIME": 0.5})
+        self.assertIn("timed out", cm.exception.message)
+
+    def test_python_path(self):
+        pylib = os.path.dirname(__file__) + "/test_files/pylib"
+        results = self.run_code("import constant; a = constant.THE_CONST", python_path=[pylib])
+        self.assertEqual(results['a'], 23)
+
+    def test_broken_command(self):
+        broken = pool.SandboxPool(["/no/such/python"], size=1)
+        with self.assertRaises(pool.SandboxPoolError):
+            broken.run("a = 1", {}, LIMITS)
+        # The failed start doesn't use up the pool.
+        with self.assertRaises(pool.SandboxPoolError):
+            broken.run("a = 1", {}, LIMITS)
+
+
+class TestGetPool(unittest.TestCase):
+    def tearDown(self):
+        pool.configure(0)
+
+    def test_configure(self):
+        self.assertFalse(pool.is_enabled())
+        pool.configure(2, max_jobs=10)
+        self.assertTrue(pool.is_enabled())
+        sandbox_pool = pool.get_pool(CMDLINE)
+        self.assertEqual(sandbox_pool.size, 2)
+        self.assertEqual(sandbox_pool.max_jobs, 10)
+        self.assertIs(pool.get_pool(CMDLINE), sandbox_pool)
+
+    def test_forked_process_gets_its_own_pool(self):
+        pool.configure(1)
+        sandbox_pool = pool.get_pool(CMDLINE)
+        sandbox_pool.pid = -1
+        self.assertIsNot(pool.get_pool(CMDLINE), sandbox_pool)
@@ -0,0 +1,123 @@
+"""
+Tests for the compiled problem cache used by LoncapaProblem, and for the
+static input configuration of a problem.
+"""
+import textwrap
+import unittest
+
+from mock import patch
+
+from capa.capa_problem import LoncapaProblem, CompiledProblemCache, get_input_config, input_config_cache
+from . import test_system
+
+
+class CompiledProblemCacheTest(unittest.TestCase):
+    """
+    Check that problems built from the cache behave like freshly compiled ones.
+    """
+    xml_str = textwrap.dedent("""
+        <problem>
+        <script type="loncapa/python">
+        answer = str(random.randint(1, 1000))
+        </script>
+        <startouttext/>What is $answer?<endouttext/>
+        <stringresponse answer="$answer">
+            <textline size="10"/>
+        </stringresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        self.system = test_system()
+        self.cache = CompiledProblemCache()
+
+    def new_problem(self, seed=723, state=None):
+        """ Build a problem using our cache. """
+        return LoncapaProblem(self.xml_str, id='1', seed=seed, state=state,
+                              system=self.system, compiled_cache=self.cache)
+
+    def test_cached_problem_matches_uncached(self):
+        uncached = LoncapaProblem(self.xml_str, id='1', seed=723, system=self.system)
+        self.new_problem()
+        with patch('capa.capa_problem.safe_exec') as mock_safe_exec:
+            cached = self.new_problem()
+            self.assertFalse(mock_safe_exec.called)
+
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(cached.get_html(), uncached.get_html())
+        self.assertEqual(cached.get_question_answers(), uncached.get_question_answers())
+        self.assertEqual(cached.context['answer'], uncached.context['answer'])
+
+    def test_seeds_are_cached_separately(self):
+        first = self.new_problem(seed=1)
+        second = self.new_problem(seed=2)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(first.context['seed'], 1)
+        self.assertEqual(second.context['seed'], 2)
+
+    def test_student_state_is_not_shared(self):
+        first = self.new_problem()
+        answer = first.context['answer']
+        first.grade_answers({'1_2_1': answer})
+        self.assertTrue(first.correct_map.is_correct('1_2_1'))
+
+        second = self.new_problem()
+        self.assertEqual(second.student_answers, {})
+        self.assertFalse(second.correct_map.is_correct('1_2_1'))
+
+        second.grade_answers({'1_2_1': 'wrong'})
+        self.assertFalse(second.correct_map.is_correct('1_2_1'))
+        self.assertTrue(first.correct_map.is_correct('1_2_1'))
+
+    def test_lru_eviction(self):
+        cache = CompiledProblemCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+
+class InputConfigTest(unittest.TestCase):
+    """
+    Check that get_input_config agrees with the ids LoncapaProblem assigns.
+    """
+    xml_str = textwrap.dedent("""
+        <problem>
+        <formularesponse answer="x^2" samples="x@1:2#3">
+            <formulaequationinput size="10"/>
+        </formularesponse>
+        <customresponse cfn="check">
+            <textline size="10"/>
+            <chemicalequationinput size="10"/>
+        </customresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        input_config_cache.clear()
+
+    def test_matches_problem_ids(self):
+        config = get_input_config(self.xml_str, '1')
+        problem = LoncapaProblem(self.xml_str, id='1', seed=1, system=test_system())
+        self.assertEqual(sorted(config), sorted(problem.inputs))
+        self.assertEqual(config['1_2_1'], 'formulaequationinput')
+        self.assertEqual(config['1_3_2'], 'chemicalequationinput')
+
+    def test_is_cached(self):
+        config = get_input_config(self.xml_str, '1')
+        with patch('capa.capa_problem.etree.XML') as xml:
+            self.assertEqual(get_input_config(self.xml_str, '1'), config)
+            self.assertFalse(xml.called)
+        # Another definition is a different entry.
+        self.assertEqual(get_input_config(self.xml_str, '2'), {
+            '2_2_1': 'formulaequationinput',
+            '2_3_1': 'textline',
+            '2_3_2': 'chemicalequationinput',
+        })
+
+    def test_unknown_configs(self):
+        self.assertEqual(get_input_config('<problem><include file="a.xml"/></problem>', '1'), None)
+        self.assertEqual(get_input_config('<problem>', '1'), None)
@@ -710,6 +710,7 @@ class ChemicalEquationTest(unittest.TestCase):
 
         state = {'value': 'H2OYeah', }
         self.the_input = lookup_tag('chemicalequationinput')(test_system(), element, state)
+        inputtypes.preview_cache.clear()
 
     def test_rendering(self):
         ''' Verify that the render context matches the expected render context'''
@@ -780,6 +781,28 @@ class ChemicalEquationTest(unittest.TestCase):
         self.assertIn('error', response)
         self.assertEqual(response['error'], "Error while rendering preview")
 
+    def test_ajax_request_start(self):
+        """
+        The time the request was sent comes back, so the page can ignore
+        responses which arrive out of order
+        """
+        response = self.the_input.handle_ajax("preview_chemcalc", {'formula': 'H', 'request_start': 17})
+        self.assertEqual(response['request_start'], 17)
+
+    def test_stateless_ajax(self):
+        """
+        Previews don't need an instance of the input, and are cached
+        """
+        input_class = lookup_tag('chemicalequationinput')
+        with patch('capa.inputtypes.chemcalc.render_to_html') as mock_render:
+            mock_render.return_value = 'rendered'
+            first = input_class.handle_stateless_ajax("preview_chemcalc", {'formula': 'H', 'request_start': 1})
+            second = input_class.handle_stateless_ajax("preview_chemcalc", {'formula': 'H', 'request_start': 2})
+        self.assertEqual(mock_render.call_count, 1)
+        self.assertEqual(first, {'preview': 'rendered', 'error': '', 'request_start': 1})
+        self.assertEqual(second, {'preview': 'rendered', 'error': '', 'request_start': 2})
+        self.assertIsNone(input_class.handle_stateless_ajax("obviously_not_real", {}))
+
 
 class FormulaEquationTest(unittest.TestCase):
     """
@@ -793,6 +816,7 @@ class FormulaEquationTest(unittest.TestCase):
 
         state = {'value': 'x^2+1/2'}
         self.the_input = lookup_tag('formulaequationinput')(test_system(), element, state)
+        inputtypes.preview_cache.clear()
 
     def test_rendering(self):
         """
@@ -891,6 +915,27 @@ class FormulaEquationTest(unittest.TestCase):
         self.assertIn('error', response)
         self.assertEqual(response['error'], "Error while rendering preview")
 
+    def test_stateless_ajax(self):
+        """
+        Previews don't need an instance of the input, and are cached
+        """
+        input_class = lookup_tag('formulaequationinput')
+        with patch('capa.inputtypes.latex_preview') as mock_preview:
+            mock_preview.side_effect = ParseException("Oopsie")
+            for request_start in (1, 2):
+                response = input_class.handle_stateless_ajax(
+                    "preview_formcalc",
+                    {'formula': 'x^', 'request_start': request_start}
+                )
+                self.assertEqual(response, {
+                    'preview': '',
+                    'error': "Sorry, couldn't parse formula",
+                    'formula': 'x^',
+                    'request_start': request_start,
+                })
+        self.assertEqual(mock_preview.call_count, 1)
+        self.assertIsNone(input_class.handle_stateless_ajax("obviously_not_real", {}))
+
 
 class DragAndDropTest(unittest.TestCase):
     '''
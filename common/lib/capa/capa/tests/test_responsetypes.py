@@ -18,7 +18,7 @@ import calc
 from capa.responsetypes import LoncapaProblemError, \
     StudentInputError, ResponseError
 from capa.correctmap import CorrectMap
-from capa.util import convert_files_to_filenames
+from capa.util import convert_files_to_filenames, nearby_buckets
 from capa.xqueue_interface import dateformat
 
 from pytz import UTC
@@ -494,6 +494,24 @@ class FormulaResponseTest(ResponseTest):
         self.assertTrue(problem.responders.values()[0].validate_answer('14*x'))
         self.assertFalse(problem.responders.values()[0].validate_answer('3*y+2*x'))
 
+    def test_answer_bucket(self):
+        """
+        Equivalent formulas are in nearby buckets, different ones aren't.
+        """
+        sample_dict = {'x': (1, 2)}
+        problem = self.build_problem(
+            sample_dict=sample_dict,
+            num_samples=10,
+            tolerance="1%",
+            answer="x"
+        )
+        responder = problem.responders.values()[0]
+        bucket = responder.answer_bucket('2*x')
+        self.assertIn(responder.answer_bucket('x+x'), nearby_buckets(bucket))
+        self.assertIn(responder.answer_bucket('2.01*x'), nearby_buckets(bucket))
+        self.assertNotIn(responder.answer_bucket('3*x'), nearby_buckets(bucket))
+        self.assertEqual(responder.answer_bucket('3*y+2*x'), None)
+
 
 class StringResponseTest(ResponseTest):
     from capa.tests.response_xml_factory import StringResponseXMLFactory
@@ -927,6 +945,16 @@ class NumericalResponseTest(ResponseTest):
         self.assertTrue(responder.validate_answer('23.5'))
         self.assertFalse(responder.validate_answer('fish'))
 
+    def test_answer_bucket(self):
+        """Answers equal with tolerance are in nearby buckets."""
+        problem = self.build_problem(answer="42", tolerance="0.1")
+        responder = problem.responders.values()[0]
+        bucket = responder.answer_bucket('48')
+        for answer in ('8*6', '48.09', '47.91'):
+            self.assertIn(responder.answer_bucket(answer), nearby_buckets(bucket))
+        self.assertNotIn(responder.answer_bucket('48.5'), nearby_buckets(bucket))
+        self.assertEqual(responder.answer_bucket('fish'), None)
+
 
 class CustomResponseTest(ResponseTest):
     from capa.tests.response_xml_factory import CustomResponseXMLFactory
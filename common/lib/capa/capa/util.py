@@ -1,5 +1,7 @@
 from calc import evaluator
+from calc.lru_cache import LRUCache  # pylint: disable=W0611
 from cmath import isinf
+import math
 
 #-----------------------------------------------------------------------------
 #
@@ -17,10 +19,10 @@ def compare_with_tolerance(v1, v2, tol):
     '''
     relative = tol.endswith('%')
     if relative:
-        tolerance_rel = evaluator(dict(), dict(), tol[:-1]) * 0.01
+        tolerance_rel = evaluator(dict(), dict(), tol[:-1], cache=True) * 0.01
         tolerance = tolerance_rel * max(abs(v1), abs(v2))
     else:
-        tolerance = evaluator(dict(), dict(), tol)
+        tolerance = evaluator(dict(), dict(), tol, cache=True)
 
     if isinf(v1) or isinf(v2):
         # If an input is infinite, we can end up with `abs(v1-v2)` and
@@ -31,6 +33,50 @@ def compare_with_tolerance(v1, v2, tol):
         return abs(v1 - v2) <= tolerance
 
 
+def tolerance_bucket(value, tol):
+    ''' Put a number in a bucket, such that any number that compare_with_tolerance
+    finds equal to it, with the same tol, is in the same bucket or in one of
+    its nearby_buckets. Lets answers be looked up by value without comparing
+    them all.
+
+     - value :  result (number, may be complex)
+     - tol   :  tolerance (string representing a number)
+
+    '''
+    modulus = abs(value)
+    if math.isinf(modulus) or math.isnan(modulus):
+        # Only equal to itself, or (nan) to nothing at all.
+        return repr(modulus)
+
+    # Both kinds of tolerance bound the difference of the moduli, so that is
+    # what we bucket.  The slack keeps rounding errors from pushing two equal
+    # numbers more than one bucket apart.
+    slack = 1 + 1e-9
+    if tol.endswith('%'):
+        tolerance_rel = evaluator(dict(), dict(), tol[:-1], cache=True) * 0.01
+        if tolerance_rel >= 1:
+            return 0
+        if modulus == 0:
+            return 'zero'
+        if tolerance_rel <= 0:
+            return repr(modulus)
+        # Relatively close numbers have close logarithms.
+        width = -math.log(1 - tolerance_rel) * slack
+        return int(math.floor(math.log(modulus) / width))
+    else:
+        tolerance = evaluator(dict(), dict(), tol, cache=True)
+        if tolerance <= 0:
+            return repr(modulus)
+        return int(math.floor(modulus / (tolerance * slack)))
+
+
+def nearby_buckets(bucket):
+    ''' The tolerance_buckets to search for numbers close to one in bucket. '''
+    if isinstance(bucket, (int, long)):
+        return [bucket - 1, bucket, bucket + 1]
+    return [bucket]
+
+
 def contextualize_text(text, context):  # private
     ''' Takes a string with variables. E.g. $a+$b.
     Does a substitution of those variables from the context '''
@@ -10,7 +10,8 @@ import sys
 
 from pkg_resources import resource_string
 
-from capa.capa_problem import LoncapaProblem
+from capa.capa_problem import LoncapaProblem, compiled_problem_cache, get_input_config
+from capa.inputtypes import registry as input_registry
 from capa.responsetypes import StudentInputError, \
     ResponseError, LoncapaProblemError
 from capa.util import convert_files_to_filenames
@@ -266,6 +267,7 @@ class CapaModule(CapaFields, XModule):
             state=state,
             seed=self.seed,
             system=self.system,
+            compiled_cache=compiled_problem_cache,
         )
 
     def get_state_for_lcp(self):
@@ -565,6 +567,7 @@ class CapaModule(CapaFields, XModule):
             'problem_show': self.get_answer,
             'score_update': self.update_score,
             'input_ajax': self.handle_input_ajax,
+            'input_preview': self.handle_input_preview,
             'ungraded_response': self.handle_ungraded_response
         }
 
@@ -734,6 +737,19 @@ class CapaModule(CapaFields, XModule):
         self.set_state_from_lcp()
         return response
 
+    def handle_input_preview(self, data):
+        """
+        Handle ajax calls, like live previews, which inputs can answer from
+        the data alone.  Falls back to `handle_input_ajax` for the rest.
+
+        The LMS answers these without loading the module at all, see
+        `CapaDescriptor.handle_input_preview`; this is for other runtimes.
+        """
+        response = self.descriptor.handle_input_preview(data)
+        if response is None:
+            response = self.handle_input_ajax(data)
+        return response
+
     def get_answer(self, data):
         """
         For the "show answer" button.
@@ -949,7 +965,7 @@ class CapaModule(CapaFields, XModule):
         self.system.track_function('problem_check', event_info)
 
         if hasattr(self.system, 'psychometrics_handler'):  # update PsychometricsData using callback
-            self.system.psychometrics_handler(self.get_state_for_lcp())
+            self.system.psychometrics_handler(dict(self.get_state_for_lcp(), attempts=self.attempts))
 
         # render problem into HTML
         html = self.get_problem_html(encapsulate=False)
@@ -1034,7 +1050,7 @@ class CapaModule(CapaFields, XModule):
 
         # psychometrics should be called on rescoring requests in the same way as check-problem
         if hasattr(self.system, 'psychometrics_handler'):  # update PsychometricsData using callback
-            self.system.psychometrics_handler(self.get_state_for_lcp())
+            self.system.psychometrics_handler(dict(self.get_state_for_lcp(), attempts=self.attempts))
 
         return {'success': success}
 
@@ -1158,6 +1174,26 @@ class CapaDescriptor(CapaFields, RawDescriptor):
                          'enable_markdown': self.markdown is not None})
         return _context
 
+    def handle_input_preview(self, data):
+        """
+        Handle an input ajax call that depends only on the data sent with it,
+        like a live preview, without building the problem for a student.
+
+        Only the inputs' static configuration is needed, which is computed
+        from the problem definition and cached.  `data` holds 'input_id' and
+        'dispatch' like for CapaModule's 'input_ajax'.
+
+        Returns the input's response, or None if the call needs the module.
+        """
+        config = get_input_config(self.data, self.location.html_id())
+        if config is None:
+            return None
+        tag = config.get(data.get('input_id'))
+        if tag is None:
+            return None
+        input_class = input_registry.get_class_for_tag(tag)
+        return input_class.handle_stateless_ajax(data.get('dispatch'), data)
+
     # VS[compat]
     # TODO (cpennington): Delete this method once all fall 2012 course are being
     # edited in the cms
@@ -190,6 +190,15 @@ class ContentStore(object):
         '''
         raise NotImplementedError
 
+    def get_content_page_for_course(self, location, sort_field='uploadDate', ascending=False, after=None,
+                                    limit=50, name=None, content_type=None):
+        '''
+        Returns a page of the static assets of a course, as (assets, next_after):
+        up to `limit` assets in the format of get_all_content_for_course, and
+        what to pass as `after` to get the next page (None after the last).
+        '''
+        raise NotImplementedError
+
     def generate_thumbnail(self, content, tempfile_path=None):
         thumbnail_content = None
         # use a naming convention to associate originals with the thumbnail
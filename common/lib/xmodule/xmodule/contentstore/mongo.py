@@ -1,4 +1,4 @@
-from pymongo import Connection
+from pymongo import ASCENDING, DESCENDING, Connection
 import gridfs
 from gridfs.errors import NoFile
 
@@ -13,6 +13,11 @@ from xmodule.exceptions import NotFoundError
 from fs.osfs import OSFS
 import os
 import json
+import re
+
+# The fields that a course's assets can be listed by, a page at a time (see
+# MongoContentStore.get_content_page_for_course)
+ASSET_SORT_FIELDS = ('uploadDate', 'displayname')
 
 
 class MongoContentStore(ContentStore):
@@ -26,6 +31,22 @@ class MongoContentStore(ContentStore):
         self.fs = gridfs.GridFS(_db, bucket)
 
         self.fs_files = _db[bucket + ".files"]  # the underlying collection GridFS uses
+        self._create_indexes()
+
+    def _create_indexes(self):
+        """
+        Index the assets of each course by each of ASSET_SORT_FIELDS, for
+        get_content_page_for_course.  Each index serves both sort directions.
+
+        The indexes are built in the background, so that the first startup
+        against a large existing store doesn't block reads and writes of the
+        collection until they are done.
+        """
+        for sort_field in ASSET_SORT_FIELDS:
+            self.fs_files.ensure_index([
+                ('_id.org', ASCENDING), ('_id.course', ASCENDING), ('_id.category', ASCENDING),
+                (sort_field, ASCENDING), ('_id.name', ASCENDING),
+            ], background=True)
 
     def save(self, content):
         content_id = content.get_id()
@@ -159,6 +180,48 @@ class MongoContentStore(ContentStore):
         items = self.fs_files.find(location_to_query(course_filter))
         return list(items)
 
+    def get_content_page_for_course(self, location, sort_field='uploadDate', ascending=False, after=None,
+                                    limit=50, name=None, content_type=None):
+        '''
+        Returns a page of the static assets of a course, as (assets, next_after).
+
+        assets is a list of up to `limit` assets, in the same format as
+        get_all_content_for_course, ordered by `sort_field` (one of
+        ASSET_SORT_FIELDS) and then by name.  next_after is what to pass as
+        `after` to get the following page, or None if this is the last one.
+
+        after: the (sort field value, name) of the last asset of the previous
+            page, or None for the first page
+        name: if given, only assets whose display name contains it, ignoring case
+        content_type: if given, only assets whose content type starts with it
+            (e.g. 'image/')
+        '''
+        if sort_field not in ASSET_SORT_FIELDS:
+            raise ValueError("Can't sort assets by {0}".format(sort_field))
+
+        course_filter = Location(XASSET_LOCATION_TAG, category="asset", course=location.course, org=location.org)
+        query = location_to_query(course_filter)
+        if name:
+            query['displayname'] = {'$regex': re.escape(name), '$options': 'i'}
+        if content_type:
+            query['contentType'] = {'$regex': '^' + re.escape(content_type)}
+        if after is not None:
+            after_value, after_name = after
+            beyond = '$gt' if ascending else '$lt'
+            query['$or'] = [
+                {sort_field: {beyond: after_value}},
+                {sort_field: after_value, '_id.name': {beyond: after_name}},
+            ]
+
+        direction = ASCENDING if ascending else DESCENDING
+        items = list(
+            self.fs_files.find(query).sort([(sort_field, direction), ('_id.name', direction)]).limit(limit + 1)
+        )
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, (items[-1][sort_field], items[-1]['_id']['name'])
+
     def set_attr(self, location, attr, value=True):
         """
         Add/set the given attr on the asset at the given location. Does not allow overwriting gridFS built in
@@ -7,7 +7,6 @@ Currently experimental - not for instructor use, yet.
 import logging
 import json
 import random
-import copy
 
 from pkg_resources import resource_string
 
@@ -17,12 +16,17 @@ from xmodule.x_module import XModule
 from xmodule.raw_module import RawDescriptor
 from xblock.fields import Scope, String, Integer, Boolean, Dict, List
 
+from calc.lru_cache import LRUCache
 from capa.responsetypes import FormulaResponse
+from capa.util import nearby_buckets
 
 from django.utils.html import escape
 
 log = logging.getLogger(__name__)
 
+# Answer indexes (see CrowdsourceHinterModule.get_answer_index), by problem.
+answer_index_cache = LRUCache(maxsize=1000)
+
 
 class CrowdsourceHinterFields(object):
     """Defines fields for the crowdsource hinter module."""
@@ -35,7 +39,9 @@ class CrowdsourceHinterFields(object):
     # Usage: hints[answer] = {str(pk): [hint_text, #votes]}
     # hints is a dictionary that takes answer keys.
     # Each value is itself a dictionary, accepting hint_pk strings as keys,
-    # and returning [hint text, #votes] pairs as values
+    # and returning [hint text, #votes] pairs as values.
+    # Votes cast by students are not written here; they are kept in the runtime's
+    # counters (see CrowdsourceHinterModule.vote_counts) until staff change them.
     hints = Dict(help='A dictionary containing all the active hints.', scope=Scope.content, default={})
     mod_queue = Dict(help='A dictionary containing hints still awaiting approval', scope=Scope.content,
                      default={})
@@ -93,6 +99,13 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
         if hasattr(responder, 'compare_answer') and hasattr(responder, 'validate_answer'):
             self.compare_answer = responder.compare_answer
             self.validate_answer = responder.validate_answer
+            # answer_bucket, if the responder has it, lets us find the answers that
+            # compare_answer could match without comparing against all of them.
+            self.answer_bucket = getattr(responder, 'answer_bucket', None)
+            # The buckets depend on the problem's settings, as well as on the answers.
+            self.answer_index_key = (
+                self.location.url(), getattr(responder, 'tolerance', None), getattr(responder, 'samples', None)
+            )
         else:
             # This response type is not supported!
             log.exception('Response type not supported for hinting: ' + str(responder))
@@ -143,12 +156,75 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
         """
         return str(answer.values()[0])
 
+    def get_answer_index(self):
+        """
+        Index the answer keys of self.hints by answer_bucket.
+
+        Returns (index, unbucketed), where index[bucket] is a list of the answer keys
+        in that bucket, and unbucketed lists the keys that couldn't be bucketed.
+        Neither may be changed.
+
+        The index is kept per problem in answer_index_cache, along with the bucket
+        of each answer, so it is only rebuilt when the hinted answers change, and
+        then only the new answers are bucketed.
+        """
+        answers = frozenset(self.hints)
+        entry = answer_index_cache.get(self.answer_index_key)
+        if entry is not None and entry['answers'] == answers:
+            return entry['index'], entry['unbucketed']
+
+        old_buckets = entry['buckets'] if entry is not None else {}
+        buckets = {}
+        index = {}
+        unbucketed = []
+        for key in answers:
+            bucket = old_buckets[key] if key in old_buckets else self.answer_bucket(key)
+            buckets[key] = bucket
+            if bucket is None:
+                unbucketed.append(key)
+            else:
+                index.setdefault(bucket, []).append(key)
+        answer_index_cache.set(self.answer_index_key, {
+            'answers': answers, 'buckets': buckets, 'index': index, 'unbucketed': unbucketed,
+        })
+        return index, unbucketed
+
     def get_matching_answers(self, answer):
         """
         Look in self.hints, and find all answer keys that are "equal with tolerance"
         to the input answer.
         """
-        return [key for key in self.hints if self.compare_answer(key, answer)]
+        bucket = None
+        if getattr(self, 'answer_bucket', None) is not None:
+            bucket = self.answer_bucket(answer)
+        if bucket is None:
+            # No index for this responder or answer; compare against everything.
+            return [key for key in self.hints if self.compare_answer(key, answer)]
+
+        index, unbucketed = self.get_answer_index()
+        candidates = list(unbucketed)
+        for nearby in nearby_buckets(bucket):
+            candidates.extend(index.get(nearby, []))
+        return [key for key in candidates if self.compare_answer(key, answer)]
+
+    def vote_counts(self):
+        """
+        Return the votes cast on hints since staff last changed them, as a dict
+        mapping hint pk strings to numbers of votes.
+
+        Votes are tallied in the runtime's counters instead of self.hints, so that
+        voting doesn't rewrite (and contend for) the whole hints dictionary.
+        """
+        return self.system.counters.get_counts(self.location.url(), 'hint_votes')
+
+    def hints_with_votes(self, answer, vote_counts):
+        """
+        Return self.hints[answer], with the votes in `vote_counts` added in.
+        """
+        out = {}
+        for pk, (hint_text, votes) in self.hints[answer].items():
+            out[pk] = [hint_text, votes + vote_counts.get(pk, 0)]
+        return out
 
     def handle_ajax(self, dispatch, data):
         """
@@ -205,8 +281,9 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
         # Also track the original answer of each hint.
         matching_answers = self.get_matching_answers(answer)
         matching_hints = {}
+        vote_counts = self.vote_counts() if matching_answers else {}
         for matching_answer in matching_answers:
-            temp_dict = copy.deepcopy(self.hints[matching_answer])
+            temp_dict = self.hints_with_votes(matching_answer, vote_counts)
             for key, value in temp_dict.items():
                 # Each value now has hint, votes, matching_answer.
                 temp_dict[key] = value + [matching_answer]
@@ -304,27 +381,25 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
             log.exception('Failure in hinter tally_vote: Unable to parse answer: {ans}'.format(ans=ans))
             return {'error': 'Failure in voting!'}
         hint_pk = str(data['hint'])
-        # We use temp_dict because we need to do a direct write for the database to update.
-        temp_dict = self.hints
-        try:
-            temp_dict[ans][hint_pk][1] += 1
-        except KeyError:
+        if hint_pk not in self.hints.get(ans, {}):
             log.exception('''Failure in hinter tally_vote: User voted for non-existant hint:
                              Answer={ans} pk={hint_pk}'''.format(ans=ans, hint_pk=hint_pk))
             return {'error': 'Failure in voting!'}
-        self.hints = temp_dict
+        self.system.counters.incr(self.location.url(), 'hint_votes', hint_pk)
         # Don't let the user vote again!
         self.user_voted = True
 
         # Return a list of how many votes each hint got.
         pk_list = json.loads(data['pk_list'])
+        vote_counts = self.vote_counts()
         hint_and_votes = []
         for answer, vote_pk in pk_list:
             if not self.validate_answer(answer):
                 log.exception('In hinter tally_vote, couldn\'t parse {ans}'.format(ans=answer))
                 continue
             try:
-                hint_and_votes.append(temp_dict[answer][str(vote_pk)])
+                hint_text, votes = self.hints[answer][str(vote_pk)]
+                hint_and_votes.append([hint_text, votes + vote_counts.get(str(vote_pk), 0)])
             except KeyError:
                 log.exception('In hinter tally_vote, couldn\'t find: {ans}, {vote_pk}'.format(
                               ans=answer, vote_pk=str(vote_pk)))
@@ -6,6 +6,7 @@ Passes settings.MODULESTORE as kwargs to MongoModuleStore
 
 from __future__ import absolute_import
 from importlib import import_module
+import threading
 
 from django.conf import settings
 from django.core.cache import get_cache, InvalidCacheBackendError
@@ -20,9 +21,15 @@ except ImportError:
     HAS_REQUEST_CACHE = False
 
 _MODULESTORES = {}
+# Held while creating a modulestore, so that threads don't create the same one twice
+_MODULESTORES_LOCK = threading.RLock()
 
 FUNCTION_KEYS = ['render_template']
 
+# Sent by every modulestore created here when it writes an item, so that
+# listeners don't need to know which modulestore instances exist.
+modulestore_update_signal = Signal(providing_args=['modulestore', 'course_id', 'location'])
+
 
 def load_function(path):
     """
@@ -61,7 +68,7 @@ def create_modulestore_instance(engine, options):
     return class_(
         metadata_inheritance_cache_subsystem=metadata_inheritance_cache,
         request_cache=request_cache,
-        modulestore_update_signal=Signal(providing_args=['modulestore', 'course_id', 'location']),
+        modulestore_update_signal=modulestore_update_signal,
         xblock_mixins=getattr(settings, 'XBLOCK_MIXINS', ()),
         **_options
     )
@@ -73,8 +80,10 @@ def modulestore(name='default'):
     modulestore or create a new one
     """
     if name not in _MODULESTORES:
-        _MODULESTORES[name] = create_modulestore_instance(settings.MODULESTORE[name]['ENGINE'],
-                                                          settings.MODULESTORE[name]['OPTIONS'])
+        with _MODULESTORES_LOCK:
+            if name not in _MODULESTORES:
+                _MODULESTORES[name] = create_modulestore_instance(settings.MODULESTORE[name]['ENGINE'],
+                                                                  settings.MODULESTORE[name]['OPTIONS'])
 
     return _MODULESTORES[name]
 
@@ -283,6 +283,12 @@ class MongoModuleStore(ModuleStoreBase):
         self.collection.ensure_index(
             zip(('_id.' + field for field in Location._fields), repeat(1)))
 
+        # Index the children of items, so that finding the parents of an item
+        # (get_parent_locations) doesn't scan the whole collection.  It's built
+        # in the background, so that adding it to an existing store doesn't
+        # block the collection while it's built
+        self.collection.ensure_index('definition.children', background=True)
+
         if default_class is not None:
             module_path, _, class_name = default_class.rpartition('.')
             class_ = getattr(import_module(module_path), class_name)
@@ -30,6 +30,8 @@ class PollFields(object):
 
     voted = Boolean(help="Whether this student has voted on the poll", scope=Scope.user_state, default=False)
     poll_answer = String(help="Student answer", scope=Scope.user_state, default='')
+    # No longer updated: votes are tallied in the runtime's counters (see
+    # PollModule.get_poll_answers), where courseware migration 0014 moved them.
     poll_answers = Dict(help="All possible answers for the poll fro other students", scope=Scope.user_state_summary)
 
     answers = List(help="Poll answers from xml", scope=Scope.content, default=[])
@@ -57,39 +59,43 @@ class PollModule(PollFields, XModule):
         Returns:
             json string
         """
-        if dispatch in self.poll_answers and not self.voted:
-            # FIXME: fix this, when xblock will support mutable types.
-            # Now we use this hack.
-            temp_poll_answers = self.poll_answers
-            temp_poll_answers[dispatch] += 1
-            self.poll_answers = temp_poll_answers
+        poll_answers = self.get_poll_answers()
+        if dispatch in poll_answers and not self.voted:
+            self.system.counters.incr(self.location.url(), 'poll_answers', dispatch)
+            poll_answers[dispatch] += 1
 
             self.voted = True
             self.poll_answer = dispatch
-            return json.dumps({'poll_answers': self.poll_answers,
-                               'total': sum(self.poll_answers.values()),
+            return json.dumps({'poll_answers': poll_answers,
+                               'total': sum(poll_answers.values()),
                                'callback': {'objectName': 'Conditional'}
                                })
         elif dispatch == 'get_state':
             return json.dumps({'poll_answer': self.poll_answer,
-                               'poll_answers': self.poll_answers,
-                               'total': sum(self.poll_answers.values())
+                               'poll_answers': poll_answers,
+                               'total': sum(poll_answers.values())
                                })
         elif dispatch == 'reset_poll' and self.voted and \
                 self.descriptor.xml_attributes.get('reset', 'True').lower() != 'false':
             self.voted = False
-
-            # FIXME: fix this, when xblock will support mutable types.
-            # Now we use this hack.
-            temp_poll_answers = self.poll_answers
-            temp_poll_answers[self.poll_answer] -= 1
-            self.poll_answers = temp_poll_answers
-
+            self.system.counters.incr(self.location.url(), 'poll_answers', self.poll_answer, -1)
             self.poll_answer = ''
             return json.dumps({'status': 'success'})
         else:  # return error message
             return json.dumps({'error': 'Unknown Command!'})
 
+    def get_poll_answers(self):
+        """
+        Return the number of votes for each answer of the poll, by answer id.
+
+        Votes are tallied in the runtime's counters instead of
+        self.poll_answers, so that concurrent votes neither lose each other
+        nor all rewrite the same row.
+        """
+        poll_answers = dict((answer['id'], 0) for answer in self.answers)
+        poll_answers.update(self.system.counters.get_counts(self.location.url(), 'poll_answers'))
+        return poll_answers
+
     def get_html(self):
         """Renders parameters to template."""
         params = {
@@ -107,31 +113,17 @@ class PollModule(PollFields, XModule):
         Returns:
             string - Serialize json.
         """
-        # FIXME: hack for resolving caching `default={}` during definition
-        # poll_answers field
-        if self.poll_answers is None:
-            self.poll_answers = {}
-
         answers_to_json = OrderedDict()
-
-        # FIXME: fix this, when xblock support mutable types.
-        # Now we use this hack.
-        temp_poll_answers = self.poll_answers
-
-         # Fill self.poll_answers, prepare data for template context.
         for answer in self.answers:
-            # Set default count for answer = 0.
-            if answer['id'] not in temp_poll_answers:
-                temp_poll_answers[answer['id']] = 0
             answers_to_json[answer['id']] = cgi.escape(answer['text'])
-        self.poll_answers = temp_poll_answers
+        poll_answers = self.get_poll_answers() if self.voted else {}
 
         return json.dumps({'answers': answers_to_json,
             'question': cgi.escape(self.question),
             # to show answered poll after reload:
             'poll_answer': self.poll_answer,
-            'poll_answers': self.poll_answers if self.voted else {},
-            'total': sum(self.poll_answers.values()) if self.voted else 0,
+            'poll_answers': poll_answers,
+            'total': sum(poll_answers.values()),
             'reset': str(self.descriptor.xml_attributes.get('reset', 'true')).lower()})
 
 
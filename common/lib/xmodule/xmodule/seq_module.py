@@ -67,6 +67,13 @@ class SequenceModule(SequenceFields, XModule):
         if dispatch == 'goto_position':
             self.position = int(data['position'])
             return json.dumps({'success': True})
+        elif dispatch == 'get_contents':
+            # The contents of the tabs that weren't rendered with the page
+            position = int(data['position'])
+            display_items = self.get_display_items()
+            if not 1 <= position <= len(display_items):
+                raise NotFoundError('No tab at position {0}'.format(position))
+            return json.dumps({'success': True, 'content': display_items[position - 1].get_html()})
         raise NotFoundError('Unexpected dispatch type')
 
     def render(self):
@@ -78,11 +85,13 @@ class SequenceModule(SequenceFields, XModule):
         if self.rendered:
             return
         ## Returns a set of all types of all sub-children
+        # Only the active tab is rendered now; the others are fetched when
+        # they are shown (see the get_contents dispatch).
         contents = []
-        for child in self.get_display_items():
+        for position, child in enumerate(self.get_display_items(), start=1):
             progress = child.get_progress()
             childinfo = {
-                'content': child.get_html(),
+                'content': child.get_html() if position == self.position else None,
                 'title': "\n".join(
                     grand_child.display_name
                     for grand_child in child.get_children()
@@ -19,9 +19,11 @@ from path import path
 
 import calc
 from xblock.field_data import DictFieldData
+from xblock.fields import ScopeIds
 from xmodule.x_module import ModuleSystem, XModuleDescriptor, DescriptorSystem
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.mako_module import MakoDescriptorSystem
+from xmodule.modulestore import Location
 
 
 # Location of common test DATA directory
@@ -119,8 +121,10 @@ class LogicTest(unittest.TestCase):
         self.descriptor = EmptyClass()
 
         self.xmodule_class = self.descriptor_class.module_class
+        location = Location(['i4x', 'edX', 'logic_test', 'test', 'LogicTest'])
         self.xmodule = self.xmodule_class(
-            self.descriptor, self.system, DictFieldData(self.raw_field_data), Mock()
+            self.descriptor, self.system, DictFieldData(self.raw_field_data),
+            ScopeIds(None, None, location, location)
         )
 
     def ajax_request(self, dispatch, data):
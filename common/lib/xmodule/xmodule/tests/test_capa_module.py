@@ -1272,6 +1272,23 @@ class CapaModuleTest(unittest.TestCase):
         module = CapaFactory.create()
         self.assertEquals(module.get_problem("data"), {'html': module.get_problem_html(encapsulate=False)})
 
+    def test_input_preview(self):
+        """
+        Check that input_preview uses the descriptor's stateless answer, and
+        falls back to input_ajax when there is none.
+        """
+        module = CapaFactory.create()
+        data = {'input_id': CapaFactory.answer_key(), 'dispatch': 'preview_formcalc'}
+        module.handle_input_ajax = Mock(return_value={'from': 'module'})
+
+        module.descriptor.handle_input_preview = Mock(return_value={'from': 'descriptor'})
+        self.assertEquals(module.handle_input_preview(data), {'from': 'descriptor'})
+        self.assertFalse(module.handle_input_ajax.called)
+
+        module.descriptor.handle_input_preview = Mock(return_value=None)
+        self.assertEquals(module.handle_input_preview(data), {'from': 'module'})
+        module.handle_input_ajax.assert_called_once_with(data)
+
 
 class ComplexEncoderTest(unittest.TestCase):
     def test_default(self):
@@ -126,6 +126,11 @@ class CHModuleFactory(object):
             return ans1 == ans2
         responder.compare_answer = compare_answer
 
+        def answer_bucket(answer):
+            """ A fake answer bucketer - equal answers share a bucket """
+            return answer
+        responder.answer_bucket = answer_bucket
+
         capa_module.lcp.responders = {'responder0': responder}
         capa_module.displayable_items = lambda: [capa_module]
 
@@ -289,6 +294,54 @@ class CrowdsourceHinterTest(unittest.TestCase):
         parsed = mock_module.formula_answer_to_str(get)
         self.assertTrue(parsed == 'x*y^2')
 
+    def test_matching_answers_use_index(self):
+        """
+        Only the answers in nearby buckets are compared with the submission.
+        """
+        mock_module = CHModuleFactory.create()
+        compared = []
+
+        def compare_answer(ans1, ans2):
+            """ A fake answer comparer, which records its calls """
+            compared.append(ans1)
+            return ans1 == ans2
+        mock_module.compare_answer = compare_answer
+        self.assertTrue(mock_module.get_matching_answers('25.0') == ['25.0'])
+        self.assertTrue(compared == ['25.0'])
+
+    def test_answer_index_cached(self):
+        """
+        Answers are only bucketed again when the hinted answers change, and then
+        only the new ones.
+        """
+        mock_module = CHModuleFactory.create()
+        bucketed = []
+
+        def answer_bucket(answer):
+            """ A fake answer bucketer, which records its calls """
+            bucketed.append(answer)
+            return answer
+        mock_module.answer_bucket = answer_bucket
+
+        self.assertTrue(mock_module.get_matching_answers('25.0') == ['25.0'])
+        self.assertTrue(sorted(bucketed) == ['24.0', '25.0', '25.0'])
+        del bucketed[:]
+        self.assertTrue(mock_module.get_matching_answers('24.0') == ['24.0'])
+        self.assertTrue(bucketed == ['24.0'])
+
+        del bucketed[:]
+        mock_module.hints = dict(mock_module.hints, **{'26.0': {'7': ['A new hint', 0]}})
+        self.assertTrue(mock_module.get_matching_answers('26.0') == ['26.0'])
+        self.assertTrue(bucketed == ['26.0', '26.0'])
+
+    def test_matching_answers_unbucketed(self):
+        """
+        Without answer buckets, every answer is compared with the submission.
+        """
+        mock_module = CHModuleFactory.create()
+        mock_module.answer_bucket = None
+        self.assertTrue(mock_module.get_matching_answers('25.0') == ['25.0'])
+
     def test_gethint_0hint(self):
         """
         Someone asks for a hint, when there's no hint to give.
@@ -420,11 +473,23 @@ class CrowdsourceHinterTest(unittest.TestCase):
             previous_answers=[['24.0', [0, 3, None]]])
         json_in = {'answer': '24.0', 'hint': 3, 'pk_list': json.dumps([['24.0', 0], ['24.0', 3]])}
         dict_out = mock_module.tally_vote(json_in)
-        self.assertTrue(mock_module.hints['24.0']['0'][1] == 40)
-        self.assertTrue(mock_module.hints['24.0']['3'][1] == 31)
+        # The vote is tallied in the counters, not in the hints field.
+        self.assertTrue(mock_module.hints['24.0']['3'][1] == 30)
+        self.assertTrue(mock_module.vote_counts() == {'3': 1})
         self.assertTrue(['Best hint', 40] in dict_out['hint_and_votes'])
         self.assertTrue(['Another hint', 31] in dict_out['hint_and_votes'])
 
+    def test_vote_counts_shown_with_hints(self):
+        """
+        Votes tallied in the counters are added to the stored votes when
+        choosing and showing hints.
+        """
+        mock_module = CHModuleFactory.create()
+        for _ in xrange(20):
+            mock_module.system.counters.incr(mock_module.location.url(), 'hint_votes', '6')
+        out = mock_module.get_hint({'ans': '24.0'})
+        self.assertTrue(out['hints'][0] == 'A less popular hint')
+
     def test_vote_unparsable(self):
         """
         A user somehow votes for an unparsable answer.
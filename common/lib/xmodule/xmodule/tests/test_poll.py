@@ -8,11 +8,19 @@ class PollModuleTest(LogicTest):
     """Logic tests for Poll Xmodule."""
     descriptor_class = PollDescriptor
     raw_field_data = {
-        'poll_answers': {'Yes': 1, 'Dont_know': 0, 'No': 0},
+        'answers': [
+            {'id': 'Yes', 'text': 'Yes'},
+            {'id': 'Dont_know', 'text': "Don't know"},
+            {'id': 'No', 'text': 'No'},
+        ],
         'voted': False,
         'poll_answer': ''
     }
 
+    def setUp(self):
+        super(PollModuleTest, self).setUp()
+        self.system.counters.incr(self.xmodule.location.url(), 'poll_answers', 'Yes')
+
     def test_bad_ajax_request(self):
         # Make sure that answer for incorrect request is error json.
         response = self.ajax_request('bad_answer', {})
@@ -30,3 +38,14 @@ class PollModuleTest(LogicTest):
         self.assertEqual(total, 2)
         self.assertDictEqual(callback, {'objectName': 'Conditional'})
         self.assertEqual(self.xmodule.poll_answer, 'No')
+
+    def test_reset_poll(self):
+        # Resetting takes the student's vote back out of the tally.
+        self.ajax_request('No', {})
+        self.xmodule.descriptor.xml_attributes = {}
+        self.assertDictEqual(self.ajax_request('reset_poll', {}), {'status': 'success'})
+
+        response = self.ajax_request('get_state', {})
+        self.assertDictEqual(response['poll_answers'], {'Yes': 1, 'Dont_know': 0, 'No': 0})
+        self.assertEqual(response['total'], 1)
+        self.assertFalse(self.xmodule.voted)
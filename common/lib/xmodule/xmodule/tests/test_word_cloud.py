@@ -9,11 +9,14 @@ class WordCloudModuleTest(LogicTest):
     """Logic tests for Word Cloud Xmodule."""
     descriptor_class = WordCloudDescriptor
     raw_field_data = {
-        'all_words': {'cat': 10, 'dog': 5, 'mom': 1, 'dad': 2},
-        'top_words': {'cat': 10, 'dog': 5, 'dad': 2},
         'submitted': False
     }
 
+    def setUp(self):
+        super(WordCloudModuleTest, self).setUp()
+        for word, count in {'cat': 10, 'dog': 5, 'mom': 1, 'dad': 2}.items():
+            self.system.counters.incr(self.xmodule.location.url(), 'all_words', word, count)
+
     def test_bad_ajax_request(self):
         "Make sure that answer for incorrect request is error json"
         response = self.ajax_request('bad_dispatch', {})
@@ -46,3 +49,12 @@ class WordCloudModuleTest(LogicTest):
             100.0,
             sum(i['percent'] for i in response['top_words']))
 
+
+    def test_top_words_limited(self):
+        "Only the most frequent num_top_words words are in the cloud"
+        self.xmodule.num_top_words = 2
+        post_data = PostData({'student_words[]': ['sun']})
+        response = self.ajax_request('submit', post_data)
+        self.assertEqual(response['total_count'], 19)
+        self.assertItemsEqual([word['text'] for word in response['top_words']], ['cat', 'dog'])
+        self.assertDictEqual(response['student_words'], {'sun': 1})
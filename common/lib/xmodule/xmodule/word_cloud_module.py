@@ -18,6 +18,10 @@ from xblock.fields import Scope, Dict, Boolean, List, Integer, String
 
 log = logging.getLogger(__name__)
 
+# Longest word that is counted; longer ones are cut to this length, the
+# longest key that runtimes' counters have to keep.
+MAX_WORD_LENGTH = 255
+
 
 def pretty_bool(value):
     """Check value for possible `True` value.
@@ -69,6 +73,9 @@ class WordCloudFields(object):
         scope=Scope.user_state,
         default=[]
     )
+    # Neither is updated any more: words are tallied in the runtime's
+    # counters, and the top words read from them (see WordCloudModule.get_state).
+    # Courseware migration 0014 moved the tallies there.
     all_words = Dict(
         help="All possible words from all students.",
         scope=Scope.user_state_summary
@@ -93,20 +100,26 @@ class WordCloudModule(WordCloudFields, XModule):
     js_module_name = "WordCloud"
 
     def get_state(self):
-        """Return success json answer for client."""
+        """Return success json answer for client.
+
+        Words are tallied in the runtime's counters instead of
+        self.all_words, so that concurrent submissions neither lose each
+        other nor all rewrite the same row, and the top words are read from
+        the counters instead of being recomputed from all of the words.
+        """
         if self.submitted:
-            total_count = sum(self.all_words.itervalues())
+            usage_id = self.location.url()
+            total_count = self.system.counters.get_total(usage_id, 'all_words')
+            top_words = self.system.counters.get_top_counts(usage_id, 'all_words', self.num_top_words)
             return json.dumps({
                 'status': 'success',
                 'submitted': True,
                 'display_student_percents': pretty_bool(
                     self.display_student_percents
                 ),
-                'student_words': {
-                    word: self.all_words[word] for word in self.student_words
-                },
+                'student_words': self.system.counters.get_counts(usage_id, 'all_words', self.student_words),
                 'total_count': total_count,
-                'top_words': self.prepare_words(self.top_words, total_count)
+                'top_words': self.prepare_words(top_words, total_count)
             })
         else:
             return json.dumps({
@@ -120,7 +133,7 @@ class WordCloudModule(WordCloudFields, XModule):
 
     def good_word(self, word):
         """Convert raw word to suitable word."""
-        return word.strip().lower()
+        return word.strip().lower()[:MAX_WORD_LENGTH]
 
     def prepare_words(self, top_words, total_count):
         """Convert words dictionary for client API.
@@ -156,24 +169,6 @@ class WordCloudModule(WordCloudFields, XModule):
             )
         return list_to_return
 
-    def top_dict(self, dict_obj, amount):
-        """Return top words from all words, filtered by number of
-        occurences
-
-        :param dict_obj: all words
-        :type dict_obj: dict
-        :param amount: number of words to be in top dict
-        :type amount: int
-        :rtype: dict
-        """
-        return dict(
-            sorted(
-                dict_obj.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:amount]
-        )
-
     def handle_ajax(self, dispatch, data):
         """Ajax handler.
 
@@ -197,26 +192,10 @@ class WordCloudModule(WordCloudFields, XModule):
             student_words = filter(None, map(self.good_word, raw_student_words))
 
             self.student_words = student_words
-
-            # FIXME: fix this, when xblock will support mutable types.
-            # Now we use this hack.
-            # speed issues
-            temp_all_words = self.all_words
-
             self.submitted = True
 
-            # Save in all_words.
             for word in self.student_words:
-                temp_all_words[word] = temp_all_words.get(word, 0) + 1
-
-            # Update top_words.
-            self.top_words = self.top_dict(
-                temp_all_words,
-                self.num_top_words
-            )
-
-            # Save all_words in database.
-            self.all_words = temp_all_words
+                self.system.counters.incr(self.location.url(), 'all_words', word)
 
             return self.get_state()
         elif dispatch == 'get_state':
@@ -843,7 +843,7 @@ class ModuleSystem(Runtime):
             anonymous_student_id='', course_id=None,
             open_ended_grading_interface=None, s3_interface=None,
             cache=None, can_execute_unsafe_code=None, replace_course_urls=None,
-            replace_jump_to_id_urls=None, **kwargs):
+            replace_jump_to_id_urls=None, counters=None, **kwargs):
         '''
         Create a closure around the system environment.
 
@@ -893,6 +893,11 @@ class ModuleSystem(Runtime):
         can_execute_unsafe_code - A function returning a boolean, whether or
             not to allow the execution of unsafe, unsandboxed code.
 
+        counters - A store of counters shared by all users of a module, for
+            tallies that many users update at once.  See DictCounterStore for
+            the interface.  Defaults to a DictCounterStore, which only lasts
+            as long as the system.
+
         '''
         super(ModuleSystem, self).__init__(**kwargs)
 
@@ -921,6 +926,7 @@ class ModuleSystem(Runtime):
         self.s3_interface = s3_interface
 
         self.cache = cache or DoNothingCache()
+        self.counters = counters or DictCounterStore()
         self.can_execute_unsafe_code = can_execute_unsafe_code or (lambda: False)
         self.replace_course_urls = replace_course_urls
         self.replace_jump_to_id_urls = replace_jump_to_id_urls
@@ -947,3 +953,46 @@ class DoNothingCache(object):
 
     def set(self, key, value, timeout=None):
         pass
+
+
+class DictCounterStore(object):
+    """
+    Counters shared by the users of a module, kept in memory.
+
+    Modules increment counters instead of read-modify-writing a tally in a
+    Scope.user_state_summary field, so that runtimes can make increments
+    atomic and keep them off the field's row.  Counters are identified by the
+    usage id of the module, a name, and a key (a string).
+    """
+    def __init__(self):
+        self._counts = {}
+
+    def incr(self, usage_id, name, key, delta=1):
+        """Add `delta` to counter `key` of `name`."""
+        counts = self._counts.setdefault((usage_id, name), {})
+        counts[key] = counts.get(key, 0) + delta
+
+    def get_counts(self, usage_id, name, keys=None):
+        """Return a dict of the counters `keys` of `name`, or all of them, by key."""
+        counts = self._counts.get((usage_id, name), {})
+        if keys is None:
+            return dict(counts)
+        return dict((key, counts[key]) for key in keys if key in counts)
+
+    def get_top_counts(self, usage_id, name, amount):
+        """Return a dict of the `amount` highest counters of `name`, by key."""
+        counts = self._counts.get((usage_id, name), {})
+        return dict(sorted(counts.iteritems(), key=lambda item: (-item[1], item[0]))[:amount])
+
+    def get_total(self, usage_id, name):
+        """Return the sum of the counters of `name`."""
+        return sum(self._counts.get((usage_id, name), {}).itervalues())
+
+    def reset(self, usage_id, name, keys=None):
+        """Drop the counters `keys` of `name`, or all of them."""
+        if keys is None:
+            self._counts.pop((usage_id, name), None)
+        else:
+            counts = self._counts.get((usage_id, name), {})
+            for key in keys:
+                counts.pop(key, None)
@@ -1,29 +1,45 @@
 (function () {
-    update = function() {
-        function create_handler(saved_div) {
-            return (function(response) {
-                if (response.error) {
-                    saved_div.html("<span class='error'>" + response.error + "</span>");
-                } else {
-                    saved_div.html(response.preview);
-                }
-            });
-        }
+    var minDelay = 300;  // Minimum time between requests sent out.
 
-        prev_id = "#" + this.id + "_preview";
-        preview_div = $(prev_id);
+    setup = function() {
+        var preview_div = $("#" + this.id + "_preview");
 
         // find the closest parent problems-wrapper and use that url
-        url = $(this).closest('.problems-wrapper').data('url');
+        var url = $(this).closest('.problems-wrapper').data('url');
         // grab the input id from the input
-        input_id = $(this).data('input-id')
+        var input_id = $(this).data('input-id');
+
+        // Requests may come back out of order: only show the latest one.
+        var last_shown = 0;
+
+        function handle_response(response) {
+            if (response.request_start <= last_shown) {
+                return;
+            }
+            last_shown = response.request_start;
+            if (response.error) {
+                preview_div.html("<span class='error'>" + response.error + "</span>");
+            } else {
+                preview_div.html(response.preview);
+            }
+        }
+
+        function send_request(formula) {
+            Problem.inputPreview(url, input_id, 'preview_chemcalc',
+                                 {"formula" : formula, "request_start" : Date.now()},
+                                 handle_response);
+        }
+
+        var throttled_request = _.throttle(send_request, minDelay);
+        var update = function () {
+            throttled_request(this.value);
+        };
 
-        Problem.inputAjax(url, input_id, 'preview_chemcalc', {"formula" : this.value}, create_handler(preview_div));
+        // update on load
+        update.call(this);
+        // and on every change
+        $(this).bind("input", update);
     }
 
-    inputs = $('.chemicalequationinput input');
-    // update on load
-    inputs.each(update); 
-    // and on every change
-    inputs.bind("input", update);
+    $('.chemicalequationinput input').each(setup);
 }).call(this);
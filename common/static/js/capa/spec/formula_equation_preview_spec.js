@@ -50,7 +50,7 @@ describe("Formula Equation Preview", function () {
         this.oldProblem = window.Problem;
 
         window.Problem = {};
-        Problem.inputAjax = jasmine.createSpy('Problem.inputAjax')
+        Problem.inputPreview = jasmine.createSpy('Problem.inputPreview')
             .andCallFake(function () {
                 ajaxTimes.push(Date.now());
             });
@@ -86,16 +86,16 @@ describe("Formula Equation Preview", function () {
 
             // This part may be asynchronous, so wait.
             waitsFor(function () {
-                return Problem.inputAjax.wasCalled;
+                return Problem.inputPreview.wasCalled;
             }, "AJAX never called initially", 1000);
         });
 
         it('has an initial request with the correct parameters', function () {
-            expect(Problem.inputAjax.callCount).toEqual(1);
+            expect(Problem.inputPreview.callCount).toEqual(1);
 
             // Use `.toEqual` rather than `.toHaveBeenCalledWith`
             // since it supports `jasmine.any`.
-            expect(Problem.inputAjax.mostRecentCall.args).toEqual([
+            expect(Problem.inputPreview.mostRecentCall.args).toEqual([
                 "THE_URL",
                 "THE_ID",
                 "preview_formcalc",
@@ -106,36 +106,36 @@ describe("Formula Equation Preview", function () {
         });
 
         it('makes a request on user input', function () {
-            Problem.inputAjax.reset();
+            Problem.inputPreview.reset();
             $('#input_THE_ID').val('user_input').trigger('input');
 
             // This part is probably asynchronous
             waitsFor(function () {
-                return Problem.inputAjax.wasCalled;
+                return Problem.inputPreview.wasCalled;
             }, "AJAX never called on user input", 1000);
 
             runs(function () {
-                expect(Problem.inputAjax.mostRecentCall.args[3].formula
+                expect(Problem.inputPreview.mostRecentCall.args[3].formula
                       ).toEqual('user_input');
             });
         });
 
         it("isn't requested for empty input", function () {
-            Problem.inputAjax.reset();
+            Problem.inputPreview.reset();
 
             // When we make an input of '',
             $('#input_THE_ID').val('').trigger('input');
 
             // Either it makes a request or jumps straight into displaying ''.
             waitsFor(function () {
-                // (Short circuit if `inputAjax` is indeed called)
-                return Problem.inputAjax.wasCalled || 
+                // (Short circuit if `inputPreview` is indeed called)
+                return Problem.inputPreview.wasCalled || 
                     MathJax.Hub.Queue.wasCalled;
             }, "AJAX never called on user input", 1000);
 
             runs(function () {
                 // Expect the request not to have been called.
-                expect(Problem.inputAjax).not.toHaveBeenCalled();
+                expect(Problem.inputPreview).not.toHaveBeenCalled();
             });
         });
 
@@ -156,13 +156,13 @@ describe("Formula Equation Preview", function () {
             });
 
             waitsFor(function () {
-                return Problem.inputAjax.wasCalled &&
-                    Problem.inputAjax.mostRecentCall.args[3].formula == value;
+                return Problem.inputPreview.wasCalled &&
+                    Problem.inputPreview.mostRecentCall.args[3].formula == value;
             }, "AJAX never called with final value from input", 1000);
 
             runs(function () {
                 // There should be 2 or 3 calls (depending on leading edge).
-                expect(Problem.inputAjax.callCount).not.toBeGreaterThan(3);
+                expect(Problem.inputPreview.callCount).not.toBeGreaterThan(3);
 
                 // The calls should happen approximately `minDelay` apart.
                 for (var i =1; i < this.ajaxTimes.length; i ++) {
@@ -182,7 +182,7 @@ describe("Formula Equation Preview", function () {
 
             // This part could be asynchronous
             waitsFor(function () {
-                return Problem.inputAjax.wasCalled;
+                return Problem.inputPreview.wasCalled;
             }, "AJAX never called initially", 1000);
 
             runs(function () {
@@ -197,7 +197,7 @@ describe("Formula Equation Preview", function () {
 
             // Don't let it fail later.
             waitsFor(function () {
-                var args = Problem.inputAjax.mostRecentCall.args;
+                var args = Problem.inputPreview.mostRecentCall.args;
                 return args[3].formula == "different";
             });
         });
@@ -205,11 +205,11 @@ describe("Formula Equation Preview", function () {
         it('updates MathJax and loading icon on callback', function () {
             formulaEquationPreview.enable();
             waitsFor(function () {
-                return Problem.inputAjax.wasCalled;
+                return Problem.inputPreview.wasCalled;
             }, "AJAX never called initially", 1000);
 
             runs(function () {
-                var args = Problem.inputAjax.mostRecentCall.args;
+                var args = Problem.inputPreview.mostRecentCall.args;
                 var callback = args[4];
                 callback({
                     preview: 'THE_FORMULA',
@@ -236,11 +236,11 @@ describe("Formula Equation Preview", function () {
             $('#input_THE_ID').val('user_input').trigger('input');
 
             waitsFor(function () {
-                return Problem.inputAjax.wasCalled;
+                return Problem.inputPreview.wasCalled;
             }, "AJAX never called initially", 1000);
 
             runs(function () {
-                var args = Problem.inputAjax.mostRecentCall.args;
+                var args = Problem.inputPreview.mostRecentCall.args;
                 var callback = args[4];
 
                 // Cannot find MathJax.
@@ -270,11 +270,11 @@ describe("Formula Equation Preview", function () {
             var $img = $("img.loading");
             formulaEquationPreview.enable();
             waitsFor(function () {
-                return Problem.inputAjax.wasCalled;
+                return Problem.inputPreview.wasCalled;
             }, "AJAX never called initially", 1000);
 
             runs(function () {
-                var args = Problem.inputAjax.mostRecentCall.args;
+                var args = Problem.inputPreview.mostRecentCall.args;
                 var callback = args[4];
                 callback({
                     error: 'OOPSIE',
@@ -305,7 +305,7 @@ describe("Formula Equation Preview", function () {
             formulaEquationPreview.enable();
 
             waitsFor(function () {
-                return Problem.inputAjax.wasCalled;
+                return Problem.inputPreview.wasCalled;
             });
 
             runs(function () {
@@ -313,11 +313,11 @@ describe("Formula Equation Preview", function () {
             });
 
             waitsFor(function () {
-                return Problem.inputAjax.callCount > 1;
+                return Problem.inputPreview.callCount > 1;
             });
 
             runs(function () {
-                var args = Problem.inputAjax.argsForCall;
+                var args = Problem.inputPreview.argsForCall;
                 var response0 = {
                     preview: 'THE_FORMULA_0',
                     request_start: args[0][3].request_start
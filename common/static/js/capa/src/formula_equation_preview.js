@@ -76,7 +76,7 @@ formulaEquationPreview.enable = function () {
 
         if (formula) {
             // Send the request.
-            Problem.inputAjax(
+            Problem.inputPreview(
                 inputData.url,
                 inputData.inputId,
                 'preview_formcalc',
@@ -25,26 +25,45 @@ def enrolled_students_features(course_id, features):
         {'username': 'username3', 'first_name': 'firstname3'}
     ]
     """
+    return list(iter_enrolled_students_features(course_id, features))
+
+
+def iter_enrolled_students_features(course_id, features, chunk_size=1000):
+    """
+    Generate student features as dictionaries, ordered by username.
+
+    Same output as enrolled_students_features, but only the requested columns
+    are fetched, and at most `chunk_size` students are loaded at a time,
+    paging on username rather than with OFFSET. Use this for large courses.
+    """
+    student_features = [x for x in STUDENT_FEATURES if x in features]
+    profile_features = [x for x in PROFILE_FEATURES if x in features]
+    # always fetch username, since we page on it
+    columns = ['username'] + [x for x in student_features if x != 'username']
+    columns += ['profile__' + x for x in profile_features]
+
     students = User.objects.filter(
         courseenrollment__course_id=course_id,
         courseenrollment__is_active=1,
-    ).order_by('username').select_related('profile')
-
-    def extract_student(student, features):
-        """ convert student to dictionary """
-        student_features = [x for x in STUDENT_FEATURES if x in features]
-        profile_features = [x for x in PROFILE_FEATURES if x in features]
-
-        student_dict = dict((feature, getattr(student, feature))
-                            for feature in student_features)
-        profile = student.profile
-        if profile is not None:
-            profile_dict = dict((feature, getattr(profile, feature))
-                                for feature in profile_features)
-            student_dict.update(profile_dict)
-        return student_dict
-
-    return [extract_student(student, features) for student in students]
+    ).order_by('username')
+
+    last_username = None
+    while True:
+        chunk = students
+        if last_username is not None:
+            chunk = chunk.filter(username__gt=last_username)
+        chunk = list(chunk.values(*columns)[:chunk_size])
+
+        for row in chunk:
+            student_dict = dict((feature, row[feature]) for feature in student_features)
+            student_dict.update(
+                (feature, row['profile__' + feature]) for feature in profile_features
+            )
+            yield student_dict
+
+        if len(chunk) < chunk_size:
+            return
+        last_username = chunk[-1]['username']
 
 
 def dump_grading_context(course):
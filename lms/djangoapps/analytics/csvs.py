@@ -5,6 +5,7 @@ Format and create csv responses
 """
 
 import csv
+from cStringIO import StringIO
 from django.http import HttpResponse
 
 
@@ -31,6 +32,38 @@ def create_csv_response(filename, header, datarows):
     return response
 
 
+def create_streaming_csv_response(filename, header, datarows, rows_per_chunk=500):
+    """
+    Like create_csv_response, but `datarows` may be any iterable (e.g. a
+    generator), and the csv is written to the client in chunks of
+    `rows_per_chunk` rows as `datarows` is consumed, instead of being built
+    up in memory first.
+    """
+    def generate_csv():
+        """ Yield the csv a chunk at a time. """
+        buf = StringIO()
+        csvwriter = csv.writer(
+            buf,
+            dialect='excel',
+            quotechar='"',
+            quoting=csv.QUOTE_ALL)
+
+        csvwriter.writerow(header)
+        for index, datarow in enumerate(datarows, 1):
+            encoded_row = [unicode(s).encode('utf-8') for s in datarow]
+            csvwriter.writerow(encoded_row)
+            if index % rows_per_chunk == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+
+    response = HttpResponse(generate_csv(), mimetype='text/csv')
+    response['Content-Disposition'] = 'attachment; filename={0}'\
+        .format(filename)
+    return response
+
+
 def format_dictlist(dictlist, features):
     """
     Convert a list of dictionaries to be compatible with create_csv_response
@@ -95,3 +128,15 @@ def format_instances(instances, features):
     header = features
     datarows = [[getattr(x, f) for f in features] for x in instances]
     return header, datarows
+
+
+def iter_dictlist(dictlist, features):
+    """
+    Lazy version of format_dictlist for use with create_streaming_csv_response.
+
+    `dictlist` is any iterable of dictionaries.
+    Returns header and a generator of datarows.
+    """
+    header = features
+    datarows = ([dct.get(feature) for feature in features] for dct in dictlist)
+    return header, datarows
@@ -21,6 +21,8 @@ The distribution in a course for gender might look like:
 }
 """
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Count
 from student.models import CourseEnrollment, UserProfile
 
@@ -30,6 +32,8 @@ _EASY_CHOICE_FEATURES = ('gender', 'level_of_education')
 _OPEN_CHOICE_FEATURES = ('year_of_birth',)
 
 AVAILABLE_PROFILE_FEATURES = _EASY_CHOICE_FEATURES + _OPEN_CHOICE_FEATURES
+# how long cached_profile_distribution keeps results, in seconds
+DISTRIBUTION_CACHE_TIMEOUT = getattr(settings, 'ANALYTICS_DISTRIBUTION_CACHE_TIMEOUT', 60)
 DISPLAY_NAMES = {
     'gender': 'Gender',
     'level_of_education': 'Level of Education',
@@ -112,29 +116,19 @@ def profile_distribution(course_id, feature):
         choices = [(short, full)
                    for (short, full) in raw_choices] + [('no_data', 'No Data')]
 
-        def get_filter(feature, value):
-            """ Get the orm filter parameters for a feature. """
-            return {
-                'gender': {'user__profile__gender': value},
-                'level_of_education': {'user__profile__level_of_education': value},
-            }[feature]
-
-        def get_count(feature, value):
-            """ Get the count of enrolled students matching the feature value. """
-            return CourseEnrollment.objects.filter(
-                course_id=course_id,
-                **get_filter(feature, value)
-            ).count()
-
-        distribution = {}
-        for (short, full) in choices:
+        # count enrollments for every value of the feature in one query
+        query_distribution = CourseEnrollment.objects.filter(
+            course_id=course_id
+        ).values('user__profile__' + feature).annotate(count=Count('id')).order_by()
+
+        distribution = dict((short, 0) for (short, full) in choices)
+        for vald in query_distribution:
+            value = vald['user__profile__' + feature]
             # handle no data case
-            if short == 'no_data':
-                distribution['no_data'] = 0
-                distribution['no_data'] += get_count(feature, None)
-                distribution['no_data'] += get_count(feature, '')
-            else:
-                distribution[short] = get_count(feature, short)
+            if value in (None, ''):
+                distribution['no_data'] += vald['count']
+            elif value in distribution:
+                distribution[value] = vald['count']
 
         prd.data = distribution
         prd.choices_display_names = dict(choices)
@@ -143,28 +137,34 @@ def profile_distribution(course_id, feature):
         profiles = UserProfile.objects.filter(
             user__courseenrollment__course_id=course_id
         )
+        # count rows rather than the feature, so that NULL values are counted too
         query_distribution = profiles.values(
-            feature).annotate(Count(feature)).order_by()
-        # query_distribution is of the form [{'featureval': 'value1', 'featureval__count': 4},
-        #    {'featureval': 'value2', 'featureval__count': 2}, ...]
+            feature).annotate(count=Count('id')).order_by()
+        # query_distribution is of the form [{'featureval': 'value1', 'count': 4},
+        #    {'featureval': 'value2', 'count': 2}, ...]
 
-        distribution = dict((vald[feature], vald[feature + '__count'])
+        distribution = dict((vald[feature], vald['count'])
                             for vald in query_distribution)
         # distribution is of the form {'value1': 4, 'value2': 2, ...}
 
         # change none to no_data for valid json key
         if None in distribution:
-            # django does not properly count NULL values when using annotate Count
-            # so
-            #     distribution['no_data'] = distribution.pop(None)
-            # would always be 0.
-
-            # Correctly count null values
-            distribution['no_data'] = profiles.filter(
-                **{feature: None}
-            ).count()
+            distribution['no_data'] = distribution.pop(None)
 
         prd.data = distribution
 
     prd.validate()
     return prd
+
+
+def cached_profile_distribution(course_id, feature):
+    """
+    Same as profile_distribution, but results are cached per course and
+    feature for DISTRIBUTION_CACHE_TIMEOUT seconds.
+    """
+    cache_key = u'analytics.distributions.{}.{}'.format(course_id, feature)
+    prd = cache.get(cache_key)
+    if prd is None:
+        prd = profile_distribution(course_id, feature)
+        cache.set(cache_key, prd, DISTRIBUTION_CACHE_TIMEOUT)
+    return prd
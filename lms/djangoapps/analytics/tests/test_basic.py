@@ -6,7 +6,8 @@ from django.test import TestCase
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory
 
-from analytics.basic import enrolled_students_features, AVAILABLE_FEATURES, STUDENT_FEATURES, PROFILE_FEATURES
+from analytics.basic import (enrolled_students_features, iter_enrolled_students_features,
+                             AVAILABLE_FEATURES, STUDENT_FEATURES, PROFILE_FEATURES)
 
 
 class TestAnalyticsBasic(TestCase):
@@ -38,6 +39,15 @@ class TestAnalyticsBasic(TestCase):
             self.assertIn(userreport['email'], [user.email for user in self.users])
             self.assertIn(userreport['name'], [user.profile.name for user in self.users])
 
+    def test_iter_enrolled_students_features_chunks(self):
+        query_features = ('username', 'name')
+        userreports = list(iter_enrolled_students_features(self.course_id, query_features, chunk_size=7))
+        self.assertEqual(userreports, enrolled_students_features(self.course_id, query_features))
+        self.assertEqual(
+            [userreport['username'] for userreport in userreports],
+            sorted(user.username for user in self.users)
+        )
+
     def test_available_features(self):
         self.assertEqual(len(AVAILABLE_FEATURES), len(STUDENT_FEATURES + PROFILE_FEATURES))
         self.assertEqual(set(AVAILABLE_FEATURES), set(STUDENT_FEATURES + PROFILE_FEATURES))
@@ -3,7 +3,8 @@
 from django.test import TestCase
 from nose.tools import raises
 
-from analytics.csvs import create_csv_response, format_dictlist, format_instances
+from analytics.csvs import (create_csv_response, create_streaming_csv_response,
+                            format_dictlist, format_instances, iter_dictlist)
 
 
 class TestAnalyticsCSVS(TestCase):
@@ -27,6 +28,15 @@ class TestAnalyticsCSVS(TestCase):
         self.assertEqual(res['Content-Disposition'], 'attachment; filename={0}'.format('robot.csv'))
         self.assertEqual(res.content.strip(), '"Name","Email"\r\n"Jim","jim@edy.org"\r\n"Jake","jake@edy.org"\r\n"Jeeves","jeeves@edy.org"')
 
+    def test_create_streaming_csv_response(self):
+        header = ['Name', 'Email']
+        datarows = (row for row in [['Jim', 'jim@edy.org'], ['Jake', 'jake@edy.org'], ['Jeeves', 'jeeves@edy.org']])
+
+        res = create_streaming_csv_response('robot.csv', header, datarows, rows_per_chunk=2)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        self.assertEqual(res['Content-Disposition'], 'attachment; filename={0}'.format('robot.csv'))
+        self.assertEqual(res.content.strip(), '"Name","Email"\r\n"Jim","jim@edy.org"\r\n"Jake","jake@edy.org"\r\n"Jeeves","jeeves@edy.org"')
+
     def test_create_csv_response_empty(self):
         header = []
         datarows = []
@@ -122,3 +132,13 @@ class TestAnalyticsFormatInstances(TestCase):
     @raises(AttributeError)
     def test_format_instances_response_nonexistantfeature(self):
         format_instances(self.instances, ['robot_not_a_real_feature'])
+
+
+class TestAnalyticsIterDictlist(TestCase):
+    """ Test lazy conversion of dictionaries to csv rows. """
+
+    def test_iter_dictlist(self):
+        dictlist = ({'label1': 'value-{},1'.format(i), 'label2': 'value-{},2'.format(i)} for i in xrange(3))
+        header, datarows = iter_dictlist(dictlist, ['label2', 'label1'])
+        self.assertEqual(header, ['label2', 'label1'])
+        self.assertEqual(list(datarows), [['value-{},2'.format(i), 'value-{},1'.format(i)] for i in xrange(3)])
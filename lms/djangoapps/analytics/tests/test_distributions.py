@@ -1,11 +1,12 @@
 """ Tests for analytics.distributions """
 
+from django.core.cache import cache
 from django.test import TestCase
 from nose.tools import raises
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory
 
-from analytics.distributions import profile_distribution, AVAILABLE_PROFILE_FEATURES
+from analytics.distributions import profile_distribution, cached_profile_distribution, AVAILABLE_PROFILE_FEATURES
 
 
 class TestAnalyticsDistributions(TestCase):
@@ -48,6 +49,17 @@ class TestAnalyticsDistributions(TestCase):
         self.assertNotIn('no_data', distribution.data)
         self.assertEqual(distribution.data[1930], 1)
 
+    def test_profile_distribution_easy_choice_single_query(self):
+        with self.assertNumQueries(1):
+            profile_distribution(self.course_id, 'level_of_education')
+
+    def test_cached_profile_distribution(self):
+        cache.clear()
+        distribution = cached_profile_distribution(self.course_id, 'gender')
+        with self.assertNumQueries(0):
+            cached = cached_profile_distribution(self.course_id, 'gender')
+        self.assertEqual(cached.data, distribution.data)
+
 
 class TestAnalyticsDistributionsNoData(TestCase):
     '''Test analytics distribution gathering.'''
@@ -1,5 +1,3 @@
-from xmodule.modulestore.django import modulestore
-from xmodule.course_module import CourseDescriptor
 from django.conf import settings
 
 
@@ -10,14 +8,12 @@ def pick_subdomain(domain, options, default='default'):
     return default
 
 
-def get_visible_courses(domain=None):
+def get_visible_courses(courses, domain=None):
     """
-    Return the set of CourseDescriptors that should be visible in this branded instance
-    """
-    _courses = modulestore().get_courses()
+    Return the courses, out of `courses`, that should be visible in this branded instance
 
-    courses = [c for c in _courses
-               if isinstance(c, CourseDescriptor)]
+    `courses` may be CourseDescriptors or CourseSummary objects.
+    """
     courses = sorted(courses, key=lambda course: course.number)
 
     if domain and settings.MITX_FEATURES.get('SUBDOMAIN_COURSE_LISTINGS'):
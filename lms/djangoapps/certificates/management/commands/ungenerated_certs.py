@@ -42,6 +42,24 @@ class Command(BaseCommand):
                     'whose entry in the certificate table matches STATUS. '
                     'STATUS can be generating, unavailable, deleted, error '
                     'or notpassing.'),
+        make_option('-b', '--batch',
+                    action='store_true',
+                    dest='batch',
+                    default=False,
+                    help='Grade students and save certificates in batches, '
+                    'sending queue requests concurrently. Interrupted runs '
+                    'can be resumed by running the command again.'),
+        make_option('--batch-size',
+                    type='int',
+                    dest='batch_size',
+                    default=100,
+                    help='Number of students per batch in --batch mode'),
+        make_option('--concurrency',
+                    type='int',
+                    dest='concurrency',
+                    default=4,
+                    help='Maximum number of simultaneous queue requests '
+                    'in --batch mode'),
     )
 
     def handle(self, *args, **options):
@@ -81,6 +99,18 @@ class Command(BaseCommand):
                 courseenrollment__course_id=course_id).prefetch_related(
                     "groups").order_by('username')
             xq = XQueueCertInterface()
+
+            if options['batch']:
+                if options['noop']:
+                    continue
+                counts = xq.add_certs(course_id, enrolled_students, course=course,
+                                      valid_statuses=valid_statuses,
+                                      batch_size=options['batch_size'],
+                                      concurrency=options['concurrency'])
+                for cert_status, count in sorted(counts.items()):
+                    print '{0}: {1}'.format(cert_status, count)
+                continue
+
             total = enrolled_students.count()
             count = 0
             start = datetime.datetime.now(UTC)
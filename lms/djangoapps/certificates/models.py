@@ -1,7 +1,11 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from datetime import datetime
 
+from student.models import invalidate_dashboards
+
 """
 Certificates are created for a student and an offering of a course.
 
@@ -97,6 +101,13 @@ class GeneratedCertificate(models.Model):
         unique_together = (('user', 'course_id'),)
 
 
+@receiver(post_save, sender=GeneratedCertificate)
+@receiver(post_delete, sender=GeneratedCertificate)
+def invalidate_dashboard_on_certificate_change(sender, instance, **kwargs):  # pylint: disable=W0613
+    """Drop the cached dashboard of a user whose certificate changed."""
+    invalidate_dashboards([instance.user_id])
+
+
 def certificate_status_for_student(student, course_id):
     '''
     This returns a dictionary with a key for status, and other information.
@@ -129,13 +140,37 @@ def certificate_status_for_student(student, course_id):
     try:
         generated_certificate = GeneratedCertificate.objects.get(
                 user=student, course_id=course_id)
-        d = {'status': generated_certificate.status}
-        if generated_certificate.grade:
-            d['grade'] = generated_certificate.grade
-        if generated_certificate.status == CertificateStatuses.downloadable:
-            d['download_url'] = generated_certificate.download_url
-
-        return d
+        return _certificate_status(generated_certificate)
     except GeneratedCertificate.DoesNotExist:
         pass
     return {'status': CertificateStatuses.unavailable}
+
+
+def certificate_statuses_for_student(student, course_ids):
+    '''
+    Like certificate_status_for_student, for each of `course_ids` at once.
+    Returns a dictionary mapping each course id to its status dictionary.
+    '''
+    statuses = dict(
+        (course_id, {'status': CertificateStatuses.unavailable})
+        for course_id in course_ids
+    )
+    if statuses:
+        for generated_certificate in GeneratedCertificate.objects.filter(
+                user=student, course_id__in=statuses.keys()):
+            statuses[generated_certificate.course_id] = _certificate_status(generated_certificate)
+    return statuses
+
+
+def _certificate_status(generated_certificate):
+    '''
+    Returns the status dictionary of `generated_certificate`.
+    See certificate_status_for_student.
+    '''
+    d = {'status': generated_certificate.status}
+    if generated_certificate.grade:
+        d['grade'] = generated_certificate.grade
+    if generated_certificate.status == CertificateStatuses.downloadable:
+        d['download_url'] = generated_certificate.download_url
+
+    return d
@@ -4,16 +4,18 @@ from certificates.models import CertificateStatuses as status
 from certificates.models import CertificateWhitelist
 
 from courseware import grades, courses
+from django.db import transaction
 from django.test.client import RequestFactory
 from capa.xqueue_interface import XQueueInterface
 from capa.xqueue_interface import make_xheader, make_hashkey
 from django.conf import settings
 from requests.auth import HTTPBasicAuth
-from student.models import UserProfile
+from student.models import UserProfile, invalidate_dashboards
 
 import json
 import random
 import logging
+from multiprocessing.pool import ThreadPool
 
 
 logger = logging.getLogger(__name__)
@@ -48,6 +50,9 @@ class XQueueCertInterface(object):
                    For a user that already has a certificate
                    this will delete his cert.
 
+       add_certs:  Batch version of add_cert for many students
+                   in one course.
+
     """
 
     def __init__(self, request=None):
@@ -207,6 +212,163 @@ class XQueueCertInterface(object):
 
         return cert_status
 
+    def add_certs(self, course_id, students, course=None, valid_statuses=None,
+                  batch_size=100, concurrency=4):
+        """
+
+        Arguments:
+          course_id - courseenrollment.course_id (string)
+          students - iterable of User objects enrolled in the course
+          valid_statuses - only students whose current certificate status
+                           is in this list are considered (default: the
+                           statuses add_cert accepts)
+          batch_size - number of students graded and saved at a time
+          concurrency - maximum number of simultaneous xqueue requests
+
+        Request new certificates for many students in a course, with the
+        same eligibility rules as add_cert.
+
+        The whitelist, restricted list and existing certificates are loaded
+        once for the course, students are graded through
+        grades.iterate_grades_for, and certificate rows are written a batch
+        at a time before their xqueue requests are sent.
+
+        The run can be interrupted and restarted: students who were already
+        processed no longer have a valid status and are skipped. Students
+        whose xqueue request failed are left in the 'error' state, and can
+        be retried by including status.error in valid_statuses.
+
+        Returns a dict mapping each resulting status to a count of students.
+
+        """
+        ADD_CERT_STATUSES = [status.generating,
+                status.unavailable, status.deleted, status.error,
+                status.notpassing]
+
+        if valid_statuses is None:
+            valid_statuses = ADD_CERT_STATUSES
+        if course is None:
+            course = courses.get_course_by_id(course_id)
+
+        whitelisted = set(CertificateWhitelist.objects.filter(
+            course_id=course_id, whitelist=True).values_list('user_id', flat=True))
+        restricted = set(UserProfile.objects.filter(
+            allow_certificate=False,
+            user__courseenrollment__course_id=course_id,
+        ).values_list('user_id', flat=True))
+        existing_certs = dict(
+            (cert.user_id, cert)
+            for cert in GeneratedCertificate.objects.filter(course_id=course_id)
+        )
+
+        def needs_cert(student):
+            """ Whether add_cert would act on this student. """
+            cert = existing_certs.get(student.id)
+            cert_status = cert.status if cert is not None else status.unavailable
+            return cert_status in ADD_CERT_STATUSES and cert_status in valid_statuses
+
+        counts = {}
+        pool = ThreadPool(concurrency)
+        try:
+            pending = []
+            for student in students:
+                if needs_cert(student):
+                    pending.append(student)
+                if len(pending) >= batch_size:
+                    self._add_cert_batch(course, pending, existing_certs, whitelisted, restricted, pool, counts)
+                    pending = []
+            if pending:
+                self._add_cert_batch(course, pending, existing_certs, whitelisted, restricted, pool, counts)
+        finally:
+            pool.close()
+            pool.join()
+
+        return counts
+
+    def _add_cert_batch(self, course, students, existing_certs, whitelisted, restricted, pool, counts):
+        """
+        Grade `students`, upsert their certificates and send the resulting
+        xqueue requests through `pool`. Updates `counts` in place.
+        """
+        course_id = course.id
+        names = dict(UserProfile.objects.filter(
+            user__in=students).values_list('user_id', 'name'))
+
+        certs = []
+        queue_requests = []
+        for student, grade, err_msg in grades.iterate_grades_for(course, students):
+            if err_msg:
+                # leave the certificate alone, so it is retried on the next run
+                continue
+
+            cert = existing_certs.get(student.id)
+            if cert is None:
+                cert = GeneratedCertificate(user=student, course_id=course_id)
+            cert.grade = grade['percent']
+            cert.name = names.get(student.id, '')
+
+            if student.id in whitelisted or grade['grade'] is not None:
+                cert.key = make_hashkey(random.random())
+                if student.id in restricted:
+                    cert.status = status.restricted
+                else:
+                    cert.status = status.generating
+                    queue_requests.append((cert, {
+                        'action': 'create',
+                        'username': student.username,
+                        'course_id': course_id,
+                        'name': cert.name,
+                    }))
+            else:
+                cert.status = status.notpassing
+            certs.append(cert)
+
+        self._save_certs(certs, existing_certs)
+
+        def send(request):
+            """ Send one request, returning the cert if it failed. """
+            cert, contents = request
+            try:
+                self._send_to_xqueue(contents, cert.key)
+            except Exception:  # pylint: disable=W0703
+                return cert
+            return None
+
+        failed = [cert for cert in pool.map(send, queue_requests) if cert is not None]
+        if failed:
+            GeneratedCertificate.objects.filter(
+                id__in=[cert.id for cert in failed]
+            ).update(status=status.error, error_reason='Unable to send queue message')
+            for cert in failed:
+                cert.status = status.error
+
+        # bulk_create in _save_certs, and the update above, skip the save signals.
+        invalidate_dashboards([cert.user_id for cert in certs])
+
+        for cert in certs:
+            counts[cert.status] = counts.get(cert.status, 0) + 1
+
+    @transaction.commit_on_success
+    def _save_certs(self, certs, existing_certs):
+        """
+        Insert new certificates with one bulk query, and update existing
+        ones, all in a single transaction.
+        """
+        new_certs = [cert for cert in certs if cert.id is None]
+        for cert in certs:
+            if cert.id is not None:
+                cert.save()
+        if new_certs:
+            GeneratedCertificate.objects.bulk_create(new_certs)
+            # bulk_create doesn't set primary keys, so fetch them back
+            ids = dict(GeneratedCertificate.objects.filter(
+                course_id=new_certs[0].course_id,
+                user__in=[cert.user_id for cert in new_certs],
+            ).values_list('user_id', 'id'))
+            for cert in new_certs:
+                cert.id = ids[cert.user_id]
+                existing_certs[cert.user_id] = cert
+
     def _send_to_xqueue(self, contents, key):
 
         xheader = make_xheader(
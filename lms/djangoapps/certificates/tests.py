@@ -0,0 +1,99 @@
+"""
+Tests for the batch certificate generation in certificates.queue
+"""
+from mock import Mock, patch
+
+from django.test import TestCase
+
+from certificates.models import CertificateStatuses as status
+from certificates.models import CertificateWhitelist, GeneratedCertificate
+from certificates.queue import XQueueCertInterface
+from student.tests.factories import UserFactory
+
+COURSE_ID = 'edX/test_course/test'
+
+
+class TestAddCerts(TestCase):
+    """
+    Tests of XQueueCertInterface.add_certs
+    """
+    def setUp(self):
+        self.course = Mock(id=COURSE_ID)
+        self.students = [UserFactory.create() for _ in range(4)]
+        # The grade each student gets; a (None, message) tuple means grading fails
+        self.grades = dict((student.id, 'Pass') for student in self.students)
+        self.xq = XQueueCertInterface()
+
+        patcher = patch.object(XQueueCertInterface, '_send_to_xqueue')
+        self.send_to_xqueue = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch('certificates.queue.grades.iterate_grades_for', side_effect=self.iterate_grades_for)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def iterate_grades_for(self, course, students):
+        """ Grade students from self.grades, like grades.iterate_grades_for """
+        for student in students:
+            grade = self.grades[student.id]
+            if isinstance(grade, tuple):
+                yield student, {}, grade[1]
+            else:
+                yield student, {'grade': grade, 'percent': 0.9 if grade else 0.1}, ''
+
+    def add_certs(self, **kwargs):
+        """ Run add_certs over all of the students """
+        return self.xq.add_certs(COURSE_ID, self.students, course=self.course, batch_size=3, **kwargs)
+
+    def cert_status(self, student):
+        """ The status of the student's certificate """
+        return GeneratedCertificate.objects.get(user=student, course_id=COURSE_ID).status
+
+    def test_passing(self):
+        self.assertEqual({status.generating: 4}, self.add_certs())
+        for student in self.students:
+            self.assertEqual(status.generating, self.cert_status(student))
+        self.assertEqual(4, self.send_to_xqueue.call_count)
+
+    def test_already_generated(self):
+        GeneratedCertificate.objects.create(user=self.students[0], course_id=COURSE_ID, status=status.downloadable)
+        self.assertEqual({status.generating: 3}, self.add_certs())
+        self.assertEqual(status.downloadable, self.cert_status(self.students[0]))
+        self.assertEqual(3, self.send_to_xqueue.call_count)
+
+    def test_not_passing(self):
+        self.grades[self.students[0].id] = None
+        self.assertEqual({status.generating: 3, status.notpassing: 1}, self.add_certs())
+        self.assertEqual(status.notpassing, self.cert_status(self.students[0]))
+
+    def test_not_passing_whitelisted(self):
+        self.grades[self.students[0].id] = None
+        CertificateWhitelist.objects.create(user=self.students[0], course_id=COURSE_ID, whitelist=True)
+        self.assertEqual({status.generating: 4}, self.add_certs())
+
+    def test_restricted(self):
+        profile = self.students[0].profile
+        profile.allow_certificate = False
+        profile.save()
+        self.assertEqual({status.generating: 3, status.restricted: 1}, self.add_certs())
+        self.assertEqual(status.restricted, self.cert_status(self.students[0]))
+        self.assertEqual(3, self.send_to_xqueue.call_count)
+
+    def test_grading_error(self):
+        self.grades[self.students[0].id] = (None, 'robot error')
+        self.assertEqual({status.generating: 3}, self.add_certs())
+        self.assertFalse(GeneratedCertificate.objects.filter(user=self.students[0]).exists())
+
+        # The student is picked up again by the next run
+        self.grades[self.students[0].id] = 'Pass'
+        self.assertEqual({status.generating: 1}, self.add_certs(valid_statuses=[status.unavailable]))
+
+    def test_queue_error(self):
+        self.send_to_xqueue.side_effect = [None, Exception('Unable to send queue message'), None, None]
+        self.assertEqual({status.generating: 3, status.error: 1}, self.add_certs(concurrency=1))
+        self.assertEqual(1, GeneratedCertificate.objects.filter(course_id=COURSE_ID, status=status.error).count())
+
+        # Failed requests are retried by including the error status
+        self.send_to_xqueue.side_effect = None
+        self.assertEqual({status.generating: 1}, self.add_certs(valid_statuses=[status.error]))
+        self.assertFalse(GeneratedCertificate.objects.filter(course_id=COURSE_ID, status=status.error).exists())
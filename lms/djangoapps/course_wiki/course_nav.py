@@ -1,4 +1,5 @@
 import re
+import threading
 from urlparse import urlparse
 
 from django.http import Http404
@@ -11,6 +12,19 @@ from courseware.courses import get_course_with_access
 
 IN_COURSE_WIKI_REGEX = r'/courses/(?P<course_id>[^/]+/[^/]+/[^/]+)/wiki/(?P<wiki_path>.*|)$'
 
+# The prefix that wiki urls get while handling a request in a course wiki, for
+# the request being handled by the current thread.
+_local = threading.local()
+
+
+def _transform_url(url):
+    """
+    Prefix `url` with the course of the course wiki being viewed, if any.
+    """
+    return getattr(_local, 'url_prefix', '') + url
+
+wiki_reverse._transform_url = _transform_url
+
 
 class Middleware(object):
     """
@@ -28,18 +42,17 @@ class Middleware(object):
     keeps the student in the course.
 
     Finally, if the student is in the course viewing a wiki, we change the
-    reverse() function to resolve wiki urls as a course wiki url by setting
-    the _transform_url attribute on wiki.models.reverse.
+    reverse() function to resolve wiki urls as a course wiki url, through the
+    _transform_url attribute set on wiki.models.reverse above.  The prefix it
+    adds is kept per thread, and whether we redirected is kept on the request,
+    so that requests can be handled concurrently.
 
     Forgive me Father, for I have hacked.
     """
 
-    def __init__(self):
-        self.redirected = False
-
     def process_request(self, request):
-        self.redirected = False
-        wiki_reverse._transform_url = lambda url: url
+        request.course_wiki_redirected = False
+        _local.url_prefix = ''
 
         referer = request.META.get('HTTP_REFERER')
         destination = request.path
@@ -50,14 +63,14 @@ class Middleware(object):
 
             if new_destination != destination:
                 # We mark that we generated this redirection, so we don't modify it again
-                self.redirected = True
+                request.course_wiki_redirected = True
                 return redirect(new_destination)
 
         course_match = re.match(IN_COURSE_WIKI_REGEX, destination)
         if course_match:
             course_id = course_match.group('course_id')
             prepend_string = '/courses/' + course_match.group('course_id')
-            wiki_reverse._transform_url = lambda url: prepend_string + url
+            _local.url_prefix = prepend_string
 
         return None
 
@@ -67,7 +80,8 @@ class Middleware(object):
         If this is a redirect response going to /wiki/*, then we might need
         to change it to be a redirect going to /courses/*/wiki*.
         """
-        if not self.redirected and response.status_code == 302:   # This is a redirect
+        redirected = getattr(request, 'course_wiki_redirected', False)
+        if not redirected and response.status_code == 302:   # This is a redirect
             referer = request.META.get('HTTP_REFERER')
             destination_url = response['LOCATION']
             destination = urlparse(destination_url).path
@@ -1,5 +1,9 @@
+from django.contrib.auth.models import AnonymousUser
 from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.client import RequestFactory
 from django.test.utils import override_settings
+from wiki.models import reverse as wiki_reverse
 
 import xmodule.modulestore.django
 
@@ -7,6 +11,9 @@ from courseware.tests.tests import LoginEnrollmentTestCase
 from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
 from xmodule.modulestore.django import modulestore
 
+from course_wiki import course_nav
+from util.testing import run_concurrently
+
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
 class WikiRedirectTestCase(LoginEnrollmentTestCase):
@@ -105,3 +112,27 @@ class WikiRedirectTestCase(LoginEnrollmentTestCase):
         resp = self.client.get(course_wiki_page, follow=True, HTTP_REFERER=referer)
 
         self.has_course_navigator(resp)
+
+
+class CourseNavConcurrencyTestCase(TestCase):
+    """
+    Check that concurrent requests for different course wikis each resolve
+    wiki urls in their own course.
+    """
+    def test_concurrent_course_wikis(self):
+        def handle_request(course_id):
+            """Reverse a wiki url while handling a request in the wiki of `course_id`."""
+            def run(rendezvous):
+                request = RequestFactory().get('/courses/{}/wiki/some/page/'.format(course_id))
+                request.user = AnonymousUser()
+                middleware = course_nav.Middleware()
+                self.assertIsNone(middleware.process_request(request))
+                rendezvous.wait()
+                return wiki_reverse._transform_url('/wiki/some/page/')  # pylint: disable=W0212
+            return run
+
+        course_ids = ['edX/course{}/2013_Fall'.format(index) for index in range(4)]
+        self.assertEqual(
+            ['/courses/{}/wiki/some/page/'.format(course_id) for course_id in course_ids],
+            run_concurrently([handle_request(course_id) for course_id in course_ids])
+        )
@@ -2,6 +2,7 @@
 Ideally, it will be the only place that needs to know about any special settings
 like DISABLE_START_DATES"""
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from functools import partial
 
@@ -9,6 +10,7 @@ from django.conf import settings
 from django.contrib.auth.models import Group
 
 from xmodule.course_module import CourseDescriptor
+from course_summaries.summary import CourseSummary
 from xmodule.error_module import ErrorDescriptor
 from xmodule.modulestore import Location
 from xmodule.x_module import XModule, XModuleDescriptor
@@ -17,12 +19,17 @@ from student.models import CourseEnrollmentAllowed
 from external_auth.models import ExternalAuthMap
 from courseware.masquerade import is_masquerading_as_student
 from django.utils.timezone import UTC
+from request_cache.middleware import RequestCache
 from student.models import CourseEnrollment
 
 DEBUG_ACCESS = False
 
 log = logging.getLogger(__name__)
 
+# The request cache key of the access decisions made while handling a request
+# (see begin_access_cache)
+ACCESS_CACHE = 'courseware.access.cache'
+
 
 class CourseContextRequired(Exception):
     """
@@ -37,6 +44,154 @@ def debug(*args, **kwargs):
         log.debug(*args, **kwargs)
 
 
+class AccessPrincipal(object):
+    """
+    What access checks need to know about a user: their groups (which give
+    staff, instructor and beta tester roles), enrollments, enrollment
+    allowances and external auth domains.
+
+    Each of these is loaded the first time it's needed and never changes
+    afterwards, so a principal can be shared by all the access checks of a
+    request (see begin_access_cache).
+    """
+    def __init__(self, user):
+        self._user = user
+        self._facts = {}
+
+    def _fact(self, name, load):
+        """ Returns the fact `name`, loading it with `load` the first time """
+        if name not in self._facts:
+            self._facts[name] = load()
+        return self._facts[name]
+
+    @property
+    def group_names(self):
+        """ A frozenset of the names of the user's groups """
+        return self._fact('group_names', lambda: frozenset(g.name for g in self._user.groups.all()))
+
+    @property
+    def enrolled_course_ids(self):
+        """ A frozenset of the ids of the courses the user is enrolled in """
+        return self._fact('enrolled_course_ids', lambda: CourseEnrollment.enrolled_course_ids(self._user))
+
+    @property
+    def enrollment_allowed_course_ids(self):
+        """ A frozenset of the ids of the courses the user's email may enroll in """
+        return self._fact('enrollment_allowed_course_ids', lambda: frozenset(
+            CourseEnrollmentAllowed.objects.filter(email=self._user.email).values_list('course_id', flat=True)
+        ))
+
+    @property
+    def external_auth_domains(self):
+        """ A frozenset of the domains the user has external auth from """
+        return self._fact('external_auth_domains', lambda: frozenset(
+            ExternalAuthMap.objects.filter(user=self._user).values_list('external_domain', flat=True)
+        ))
+
+
+class _UserAccess(object):
+    """ The principal of a user and the access decisions made for them in a request """
+    def __init__(self, user):
+        self.principal = AccessPrincipal(user)
+        self.decisions = {}
+
+
+def begin_access_cache():
+    """
+    Start keeping the principals of users, and the access decisions made
+    for them, until end_access_cache is called.  courseware's
+    AccessCacheMiddleware does this for each request.
+
+    Outside of this, each access check loads what it needs about the user
+    again.
+    """
+    RequestCache.get_request_cache().data[ACCESS_CACHE] = {}
+
+
+def end_access_cache():
+    """
+    Drop the principals and access decisions kept since begin_access_cache.
+    """
+    RequestCache.get_request_cache().data.pop(ACCESS_CACHE, None)
+
+
+@contextmanager
+def access_cache():
+    """
+    Keep principals and access decisions within the block, unless they are
+    already kept (e.g. because this is handling a request).
+    """
+    if RequestCache.get_request_cache().data.get(ACCESS_CACHE) is not None:
+        yield
+        return
+    begin_access_cache()
+    try:
+        yield
+    finally:
+        end_access_cache()
+
+
+def invalidate_access_cache(user_ids=None):
+    """
+    Drop the principals and access decisions kept for the users with ids
+    `user_ids` (default: all users), e.g. because their groups changed.
+    """
+    cache = RequestCache.get_request_cache().data.get(ACCESS_CACHE)
+    if cache is None:
+        return
+    if user_ids is None:
+        cache.clear()
+    else:
+        for user_id in user_ids:
+            cache.pop(user_id, None)
+
+
+def _user_access(user):
+    """
+    Returns the _UserAccess of `user` kept in the access cache, or None if
+    no access cache is being kept.
+    """
+    cache = RequestCache.get_request_cache().data.get(ACCESS_CACHE)
+    if cache is None or user is None:
+        return None
+    user_id = getattr(user, 'id', None)
+    if user_id not in cache:
+        cache[user_id] = _UserAccess(user)
+    return cache[user_id]
+
+
+def get_principal(user):
+    """
+    Returns the AccessPrincipal of `user`: the one kept in the access cache,
+    if one is being kept, or else a new one.
+    """
+    user_access = _user_access(user)
+    if user_access is None:
+        return AccessPrincipal(user)
+    return user_access.principal
+
+
+def _decision_key(obj, action, course_context):
+    """
+    Returns the key that the decision of has_access(user, obj, action,
+    course_context) is kept under, or None if it shouldn't be kept.
+    """
+    if isinstance(obj, (CourseDescriptor, CourseSummary)):
+        obj_key = ('course', obj.id)
+    elif isinstance(obj, ErrorDescriptor):
+        obj_key = ('error', obj.location.url())
+    elif isinstance(obj, XModuleDescriptor):
+        obj_key = ('descriptor', obj.location.url())
+    elif isinstance(obj, Location):
+        obj_key = ('location', obj.url())
+    elif isinstance(obj, basestring):
+        obj_key = ('string', obj)
+    else:
+        # XModules are checked through their descriptors
+        return None
+    return (obj_key, action, course_context)
+
+
 def has_access(user, obj, action, course_context=None):
     """
     Check whether a user has the access to do action on obj.  Handles any magic
@@ -49,8 +204,8 @@ def has_access(user, obj, action, course_context=None):
 
     user: a Django user object. May be anonymous.
 
-    obj: The object to check access for.  A module, descriptor, location, or
-                    certain special strings (e.g. 'global')
+    obj: The object to check access for.  A module, descriptor, CourseSummary,
+                    location, or certain special strings (e.g. 'global')
 
     action: A string specifying the action that the client is trying to perform.
 
@@ -63,12 +218,45 @@ def has_access(user, obj, action, course_context=None):
 
     Returns a bool.  It is up to the caller to actually deny access in a way
     that makes sense in context.
+
+    While an access cache is kept (see begin_access_cache), the decision is
+    kept too, and reused for the same user, object, action and course.
+    """
+    user_access = _user_access(user)
+    key = _decision_key(obj, action, course_context)
+    if user_access is None or key is None:
+        return _has_access(user, obj, action, course_context)
+
+    # Masquerading is turned on part way through requests, so it's part of the key.
+    key += (is_masquerading_as_student(user),)
+    if key not in user_access.decisions:
+        user_access.decisions[key] = _has_access(user, obj, action, course_context)
+    return user_access.decisions[key]
+
+
+def filter_has_access(user, objs, action, course_context=None):
+    """
+    Returns the list of the items of `objs` that `user` has access to do
+    `action` on (see has_access), loading what is needed about the user at
+    most once, even outside of a request.
+    """
+    with access_cache():
+        return [obj for obj in objs if has_access(user, obj, action, course_context)]
+
+
+def _has_access(user, obj, action, course_context):
+    """
+    Implements has_access, without keeping the decision.
     """
     # delegate the work to type-specific functions.
     # (start with more specific types, then get more general)
     if isinstance(obj, CourseDescriptor):
         return _has_access_course_desc(user, obj, action)
 
+    # Summaries have the attributes that course access checks use.
+    if isinstance(obj, CourseSummary):
+        return _has_access_course_desc(user, obj, action)
+
     if isinstance(obj, ErrorDescriptor):
         return _has_access_error_desc(user, obj, action, course_context)
 
@@ -135,7 +323,7 @@ def _has_access_course_desc(user, course, action):
         Can this user access the forums in this course?
         """
         return (can_load() and \
-            (CourseEnrollment.is_enrolled(user, course.id) or \
+            (course.id in get_principal(user).enrolled_course_ids or \
                 _has_staff_access_to_descriptor(user, course)
             ))
 
@@ -155,7 +343,7 @@ def _has_access_course_desc(user, course, action):
         # if using registration method to restrict (say shibboleth)
         if settings.MITX_FEATURES.get('RESTRICT_ENROLL_BY_REG_METHOD') and course.enrollment_domain:
             if user is not None and user.is_authenticated() and \
-                ExternalAuthMap.objects.filter(user=user, external_domain=course.enrollment_domain):
+                course.enrollment_domain in get_principal(user).external_auth_domains:
                 debug("Allow: external_auth of " + course.enrollment_domain)
                 reg_method_ok = True
             else:
@@ -173,8 +361,8 @@ def _has_access_course_desc(user, course, action):
             return True
 
         # if user is in CourseEnrollmentAllowed with right course_id then can also enroll
-        if user is not None and user.is_authenticated() and CourseEnrollmentAllowed:
-            if CourseEnrollmentAllowed.objects.filter(email=user.email, course_id=course.id):
+        if user is not None and user.is_authenticated():
+            if course.id in get_principal(user).enrollment_allowed_course_ids:
                 return True
 
         # otherwise, need staff access
@@ -516,8 +704,7 @@ def _adjust_start_date_for_beta_testers(user, descriptor):
     Returns:
         A datetime.  Either the same as start, or earlier for beta testers.
 
-    NOTE: number of days to adjust should be cached to avoid looking it up thousands of
-    times per query.
+    The user's groups are looked up once per request (see get_principal).
 
     NOTE: For now, this function assumes that the descriptor's location is in the course
     the user is looking at.  Once we have proper usages and definitions per the XBlock
@@ -530,7 +717,7 @@ def _adjust_start_date_for_beta_testers(user, descriptor):
         # bail early if no beta testing is set up
         return descriptor.start
 
-    user_groups = [g.name for g in user.groups.all()]
+    user_groups = get_principal(user).group_names
 
     beta_group = course_beta_test_group_name(descriptor.location)
     if beta_group in user_groups:
@@ -577,7 +764,7 @@ def _has_access_to_location(user, location, access_level, course_context):
         return True
 
     # If not global staff, is the user in the Auth group for this class?
-    user_groups = [g.name for g in user.groups.all()]
+    user_groups = get_principal(user).group_names
 
     if access_level == 'staff':
         staff_groups = group_names_for_staff(location, course_context) + \
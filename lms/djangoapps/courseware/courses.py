@@ -15,7 +15,9 @@ from xmodule.contentstore.content import StaticContent
 from xmodule.modulestore.exceptions import ItemNotFoundError, InvalidLocationError
 from courseware.model_data import FieldDataCache
 from static_replace import replace_static_urls
-from courseware.access import has_access
+from courseware.access import filter_has_access, has_access
+from course_summaries import get_cached_course_ids, get_cached_course_summaries, cache_course_summaries
+from course_summaries.summary import CourseSummary
 import branding
 
 log = logging.getLogger(__name__)
@@ -82,6 +84,8 @@ def get_opt_course_with_access(user, course_id, action):
 def course_image_url(course):
     """Try to look up the image url for the course.  If it's not found,
     log an error and return the dead link"""
+    if isinstance(course, CourseSummary):
+        return course.image_url
     if course.static_asset_path or modulestore().get_modulestore_type(course.location.course_id) == XML_MODULESTORE_TYPE:
         return '/static/' + (course.static_asset_path or getattr(course, 'data_dir', '')) + "/images/course_image.jpg"
     else:
@@ -131,6 +135,12 @@ def get_course_about_section(course, section_key):
     - ocw_links
     """
 
+    if isinstance(course, CourseSummary):
+        # Summaries only carry the sections that course listings show.
+        if section_key in course.about_sections:
+            return course.about_sections[section_key]
+        course = get_course_by_id(course.id)
+
     # Many of these are stored as html files instead of some semantic
     # markup. This can change without effecting this interface when we find a
     # good format for defining so many snippets of text/html.
@@ -272,12 +282,60 @@ def get_courses_by_university(user, domain=None):
     return universities
 
 
+def summarize_course(course):
+    '''
+    Returns a CourseSummary of the CourseDescriptor `course`.
+    '''
+    about_sections = dict(
+        (section_key, get_course_about_section(course, section_key))
+        for section_key in CourseSummary.ABOUT_SECTIONS
+    )
+    return CourseSummary(course, about_sections, course_image_url(course))
+
+
+def get_course_summaries():
+    '''
+    Returns a list of CourseSummary objects for all the courses in the
+    modulestore.  They are cached, so course descriptors are only loaded
+    for the courses whose summaries have been dropped (see the
+    course_summaries app), or all of them if the list of courses has been.
+    '''
+    course_ids = get_cached_course_ids()
+    if course_ids is None:
+        course_list = [course for course in modulestore().get_courses() if isinstance(course, CourseDescriptor)]
+        course_ids = [course.id for course in course_list]
+        courses = dict((course.id, course) for course in course_list)
+    else:
+        courses = {}
+
+    summaries = get_cached_course_summaries(course_ids)
+    rebuilt = []
+    for course_id in course_ids:
+        if course_id in summaries:
+            continue
+        course = courses.get(course_id)
+        if course is None:
+            try:
+                course = get_course_by_id(course_id)
+            except Http404:
+                # The course has been deleted
+                continue
+        summaries[course_id] = summarize_course(course)
+        rebuilt.append(summaries[course_id])
+
+    listed_ids = [course_id for course_id in course_ids if course_id in summaries]
+    if rebuilt or courses or len(listed_ids) < len(course_ids):
+        cache_course_summaries(rebuilt, listed_ids)
+    return [summaries[course_id] for course_id in listed_ids]
+
+
 def get_courses(user, domain=None):
     '''
-    Returns a list of courses available, sorted by course.number
+    Returns a list of CourseSummary objects for the courses available,
+    sorted by course.number
     '''
-    courses = branding.get_visible_courses(domain)
-    courses = [c for c in courses if has_access(user, c, 'see_exists')]
+    courses = branding.get_visible_courses(get_course_summaries(), domain)
+    courses = filter_has_access(user, courses, 'see_exists')
 
     courses = sorted(courses, key=lambda course: course.number)
 
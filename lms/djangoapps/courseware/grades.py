@@ -7,8 +7,9 @@ import logging
 from collections import defaultdict
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.test.client import RequestFactory
 
-from courseware.model_data import FieldDataCache, DjangoKeyValueStore
+from courseware.model_data import FieldDataCache, DjangoKeyValueStore, chunks
 from xblock.fields import Scope
 from .module_render import get_module, get_module_for_descriptor
 from xmodule import graders
@@ -234,6 +235,50 @@ def grade(student, request, course, field_data_cache=None, keep_raw_scores=False
     return grade_summary
 
 
+def iterate_grades_for(course, students, chunk_size=100, keep_raw_scores=False):
+    """
+    Given a course descriptor and an iterable of Users, yield a tuple of:
+
+    (student, gradeset, err_msg) for every student
+
+    student: the User being graded
+    gradeset: the result of grade() for this student, or {} on error
+    err_msg: an error message if grading failed, otherwise ''
+
+    This is the bulk version of grade(). Students are processed `chunk_size`
+    at a time; the state of every student in a chunk is loaded together with
+    FieldDataCache.cache_for_users, so a chunk costs a few queries rather
+    than a few per student. The course's grading context is computed once.
+    `keep_raw_scores` is passed on to grade().
+    """
+    request = RequestFactory().get('/')
+    descriptors = course.grading_context['all_descriptors']
+
+    for student_chunk in chunks(students, chunk_size):
+        field_data_caches = FieldDataCache.cache_for_users(descriptors, course.id, student_chunk)
+
+        for student in student_chunk:
+            field_data_cache = field_data_caches[student.id]
+
+            # grade() and the modules it creates expect an authenticated request
+            request.user = student
+            request.session = {}
+            try:
+                gradeset = grade(student, request, course, field_data_cache, keep_raw_scores)
+                yield student, gradeset, ""
+            except Exception as exc:  # pylint: disable=W0703
+                # Keep marching on even if this student couldn't be graded for
+                # some reason, but log it for future reference.
+                log.exception(
+                    'Cannot grade student %s (%s) in course %s because of exception: %s',
+                    student.username,
+                    student.id,
+                    course.id,
+                    exc.message
+                )
+                yield student, {}, exc.message
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -4,7 +4,12 @@ When we added XBlock storage, each field modification wrote a new history row
 to the db.  Now that we have bulk saves to avoid that database hammering, we
 need to clean out the unnecessary rows from the database.
 
-This command that does that.
+This command that does that.  It also compresses the states of the rows it
+keeps that were written before history states were stored compressed.
+
+The work is done a batch of StudentModules at a time, each batch in its own
+transaction, and where it got to is saved after each batch, so it can be
+stopped at any point and run again to pick up from there.
 
 """
 
@@ -18,6 +23,8 @@ import traceback
 from django.core.management.base import NoArgsCommand
 from django.db import connection
 
+from courseware.models import StudentModuleHistory
+
 
 class Command(NoArgsCommand):
     """The actual clean_history command to clean history rows."""
@@ -237,3 +244,41 @@ class StudentModuleHistoryCleaner(object):
 
         if ids_to_delete and not self.dry_run:
             self.delete_history(ids_to_delete)
+
+        if not self.dry_run:
+            self.compress_history(student_module_id)
+
+    def compress_history(self, student_module_id):
+        """
+        Compress the states of the history rows of a student module that are
+        stored as plain json.
+
+        ```student_module_id```: the id of the student module we're
+        interested in.
+
+        """
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT id, state FROM courseware_studentmodulehistory
+            WHERE student_module_id = %s AND state NOT LIKE %s
+            """,
+            [student_module_id, StudentModuleHistory.COMPRESSED_PREFIX + '%']
+        )
+        # States that compressing wouldn't make smaller are left as they are
+        updates = []
+        for history_id, state in cursor.fetchall():
+            compressed = StudentModuleHistory.compress_state(state)
+            if compressed != state:
+                updates.append((compressed, history_id))
+        if not updates:
+            return
+
+        self.say("Compressing {count} rows for student_module_id {id}".format(
+            count=len(updates),
+            id=student_module_id,
+        ))
+        cursor.executemany("""
+            UPDATE courseware_studentmodulehistory SET state = %s WHERE id = %s
+            """,
+            updates
+        )
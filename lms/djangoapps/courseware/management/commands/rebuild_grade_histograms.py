@@ -0,0 +1,51 @@
+'''
+Backfill or repair the StudentModuleGradeHistogram table.
+
+The histogram is normally kept up to date as StudentModule grades change, but
+it has to be populated once for existing data, and can drift if StudentModule
+rows are changed with queryset updates that bypass model signals.
+'''
+
+import logging
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from courseware.models import StudentModule, StudentModuleGradeHistogram
+
+LOG = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''
+    Recompute grade histograms for every module with student state in the
+    given courses, or in all courses if none are given.
+    '''
+
+    args = '[<course_id> <course_id> ...]'
+    help = 'Recomputes StudentModuleGradeHistogram from StudentModule for the given courses (default: all).'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--sleep',
+                    type='float',
+                    default=0,
+                    help='Seconds to sleep between modules, to limit load on the database.'),
+    )
+
+    def handle(self, *args, **options):
+        modules = StudentModule.objects.all()
+        if args:
+            modules = modules.filter(course_id__in=args)
+        module_state_keys = modules.values_list('module_state_key', flat=True).distinct()
+
+        num_rebuilt = 0
+        for module_state_key in module_state_keys.iterator():
+            StudentModuleGradeHistogram.rebuild(module_state_key)
+            num_rebuilt += 1
+            if num_rebuilt % 100 == 0:
+                LOG.info("Rebuilt grade histograms for %d modules", num_rebuilt)
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        LOG.info("Finished rebuilding grade histograms for %d modules", num_rebuilt)
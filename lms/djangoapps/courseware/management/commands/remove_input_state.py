@@ -110,7 +110,7 @@ class Command(BaseCommand):
     @transaction.autocommit
     def remove_studentmodulehistory_input_state(self, module, save_changes):
         ''' Fix the grade assigned to a StudentModule'''
-        module_state = module.state
+        module_state = module.full_state
         if module_state is None:
             # not likely, since we filter on it.  But in general...
             LOG.info("No state found for {type} module {id} for student {student} in course {course_id}"
@@ -126,7 +126,7 @@ class Command(BaseCommand):
         elif save_changes:
             # make the change and persist
             del state_dict['input_state']
-            module.state = json.dumps(state_dict)
+            module.state = StudentModuleHistory.compress_state(json.dumps(state_dict))
             module.save()
             self.num_hist_changed += 1
         else:
@@ -11,6 +11,7 @@ from django.test import TransactionTestCase
 from django.db import connection
 
 from courseware.management.commands.clean_history import StudentModuleHistoryCleaner
+from courseware.models import StudentModuleHistory
 
 # In lots of places in this file, smhc == StudentModuleHistoryCleaner
 
@@ -260,6 +261,32 @@ class HistoryCleanerWitDbTest(HistoryCleanerTest):
             (99, "2013-07-13 16:30:59.000", 11),    # keep
         ])
 
+    def test_compressing_old_states(self):
+        # Cleaning a student_module_id compresses the states of the rows it keeps.
+        smhc = SmhcSayStubbed()
+        self.write_history([
+            ( 4, "2013-07-13 16:30:00.000", 11),    # keep
+            ( 8, "2013-07-13 16:30:59.000", 11),    # keep
+            (15, "2013-07-13 16:31:01.200", 22),    # other student_module_id!
+        ])
+        state = '{"attempts": 1, "student_answers": {"i4x-edX-test-problem-p_2_1": "%s"}}' % ("x" * 200)
+        cursor = connection.cursor()
+        cursor.execute("UPDATE courseware_studentmodulehistory SET state = %s", [state])
+        # A state too small to gain from compression
+        cursor.execute("UPDATE courseware_studentmodulehistory SET state = %s WHERE id = 8", ['{"attempts": 1}'])
+
+        smhc.clean_one_student_module(11)
+        self.assert_said(smhc,
+            "Deleting 0 rows of 2 for student_module_id 11",
+            "Compressing 1 rows for student_module_id 11",
+        )
+        cursor.execute("SELECT id, state FROM courseware_studentmodulehistory ORDER BY id")
+        states = dict(cursor.fetchall())
+        self.assertTrue(states[4].startswith(StudentModuleHistory.COMPRESSED_PREFIX))
+        self.assertEqual(StudentModuleHistory.decompress_state(states[4]), state)
+        self.assertEqual(states[8], '{"attempts": 1}')
+        self.assertEqual(states[15], state)
+
     def test_a_bunch_of_rows_dry_run(self):
         # Cleaning a student_module_id with 8 records, 4 to delete, 
         # but don't really do it.
@@ -0,0 +1,82 @@
+"""
+Middleware for the courseware app
+"""
+import logging
+
+from django.db import transaction
+from django.utils.translation import ugettext as _
+from xblock.exceptions import KeyValueMultiSaveError
+
+from courseware.access import begin_access_cache, end_access_cache
+from courseware.model_data import begin_write_behind, flush_write_behind, discard_write_behind
+from courseware.models import begin_history_queue, send_history_queue, discard_history_queue
+from static_template_view.views import render_500
+from util.json_request import JsonResponse
+
+log = logging.getLogger(__name__)
+
+
+class FieldDataCacheMiddleware(object):
+    """
+    Holds the student state that modules change while handling a request, and
+    saves it in one batch at the end of the request (see
+    courseware.model_data.FieldDataCache.flush).
+
+    This must come after TransactionMiddleware, so that the batch is written
+    before the request's transaction is committed.
+    """
+    def process_request(self, request):
+        begin_write_behind()
+
+    def process_response(self, request, response):
+        try:
+            flush_write_behind()
+        except KeyValueMultiSaveError:
+            log.exception("Error saving student state for %s", request.path)
+            if transaction.is_managed():
+                transaction.rollback()
+            discard_history_queue()
+            if request.is_ajax():
+                return JsonResponse({'error': _('Your changes could not be saved. Please try again.')}, status=500)
+            return render_500(request)
+        return response
+
+    def process_exception(self, request, exception):
+        discard_write_behind()
+
+
+class StudentModuleHistoryMiddleware(object):
+    """
+    Queues the StudentModuleHistory entries recorded while handling a request,
+    and sends them to be written in one batch once the request is over.
+
+    This must come before TransactionMiddleware, so that the entries are only
+    sent once the changes they record are committed.
+    """
+    def process_request(self, request):
+        begin_history_queue()
+
+    def process_response(self, request, response):
+        send_history_queue()
+        return response
+
+    def process_exception(self, request, exception):
+        discard_history_queue()
+
+
+class AccessCacheMiddleware(object):
+    """
+    Keeps what access checks load about users, and their decisions, for the
+    length of a request, so that checking access to every chapter and
+    section of a course doesn't look up the user's groups each time (see
+    courseware.access.begin_access_cache).
+    """
+    def process_request(self, request):
+        begin_access_cache()
+
+    def process_response(self, request, response):
+        end_access_cache()
+        return response
+
+    def process_exception(self, request, exception):
+        end_access_cache()
@@ -3,17 +3,25 @@ Classes to provide the LMS runtime data storage to XBlocks
 """
 
 import json
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from copy import deepcopy
 from itertools import chain
+from operator import or_
 from .models import (
     StudentModule,
+    XModuleCounter,
     XModuleUserStateSummaryField,
     XModuleStudentPrefsField,
     XModuleStudentInfoField
 )
 import logging
 
-from django.db import DatabaseError
+from django.db import DatabaseError, DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Q, Sum
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from request_cache.middleware import RequestCache
 
 from xblock.runtime import KeyValueStore
 from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
@@ -37,12 +45,63 @@ def chunks(items, chunk_size):
     return (items[i:i + chunk_size] for i in xrange(0, len(items), chunk_size))
 
 
+# The request cache key under which the FieldDataCaches whose writes are
+# deferred to the end of the current request are kept.
+WRITE_BEHIND_CACHES = 'field_data_caches'
+
+# The request cache key under which the cached objects and changes shared by
+# the FieldDataCaches of each user and course in the current request are kept.
+SHARED_CACHE_STATES = 'field_data_cache_states'
+
+
+def _write_behind_caches():
+    """
+    Returns the list of FieldDataCaches to flush at the end of the current
+    request, or None if writes aren't being deferred.
+    """
+    return RequestCache.get_request_cache().data.get(WRITE_BEHIND_CACHES)
+
+
+def begin_write_behind():
+    """
+    Defer the writes of the FieldDataCaches created from now on until
+    `flush_write_behind` is called.
+    """
+    request_cache = RequestCache.get_request_cache().data
+    request_cache[WRITE_BEHIND_CACHES] = []
+    request_cache[SHARED_CACHE_STATES] = {}
+
+
+def flush_write_behind():
+    """
+    Write out the changes held by the FieldDataCaches created since
+    `begin_write_behind`, and stop deferring writes.
+
+    Raises KeyValueMultiSaveError if any of the writes fail.
+    """
+    request_cache = RequestCache.get_request_cache().data
+    caches = request_cache.pop(WRITE_BEHIND_CACHES, None) or []
+    request_cache.pop(SHARED_CACHE_STATES, None)
+    for field_data_cache in caches:
+        field_data_cache.flush()
+
+
+def discard_write_behind():
+    """
+    Drop the changes held by the FieldDataCaches created since
+    `begin_write_behind`, and stop deferring writes.
+    """
+    request_cache = RequestCache.get_request_cache().data
+    request_cache.pop(WRITE_BEHIND_CACHES, None)
+    request_cache.pop(SHARED_CACHE_STATES, None)
+
+
 class FieldDataCache(object):
     """
     A cache of django model objects needed to supply the data
     for a module and its decendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, prefetch=True):
         '''
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -54,6 +113,7 @@ class FieldDataCache(object):
         course_id: The id of the current course
         user: The user for which to cache data
         select_for_update: True if rows should be locked until end of transaction
+        prefetch: False to leave the cache empty, for cache_for_users to fill
         '''
         self.cache = {}
         self.descriptors = descriptors
@@ -61,10 +121,75 @@ class FieldDataCache(object):
         self.course_id = course_id
         self.user = user
 
-        if user.is_authenticated():
+        # Decoded StudentModule.state, by cache key
+        self._user_states = {}
+        # The serialized value of each cached object as last read from or
+        # written to the database, by cache key
+        self._persisted = {}
+        # The KeyValueStore keys changed since the last flush, by cache key
+        self._dirty = OrderedDict()
+
+        # Within a request, writes are held until the end of the request
+        # (see courseware.middleware.FieldDataCacheMiddleware)
+        write_behind_caches = _write_behind_caches()
+        self.writes_deferred = write_behind_caches is not None
+        if self.writes_deferred:
+            # The caches of a user and course in the same request share their
+            # objects and changes, so that they see each other's writes rather
+            # than overwrite them when flushed. Caches that lock their rows
+            # load them on their own.
+            shared_states = RequestCache.get_request_cache().data.setdefault(SHARED_CACHE_STATES, {})
+            shared_key = (user.id, course_id)
+            if not select_for_update and shared_key in shared_states:
+                self.cache, self._user_states, self._persisted, self._dirty = shared_states[shared_key]
+            else:
+                if not select_for_update:
+                    shared_states[shared_key] = (self.cache, self._user_states, self._persisted, self._dirty)
+                write_behind_caches.append(self)
+
+        if prefetch and user.is_authenticated():
             for scope, fields in self._fields_to_cache().items():
                 for field_object in self._retrieve_fields(scope, fields):
-                    self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
+                    self._add_field_object(scope, field_object)
+
+    @classmethod
+    def cache_for_users(cls, descriptors, course_id, users):
+        """
+        Return a dict mapping the id of each of `users` to the
+        FieldDataCache(descriptors, course_id, user) for that user.
+
+        The rows for all of the users are loaded together, with one query
+        per scope (per chunk of modules) rather than one per scope per user.
+        """
+        caches = dict(
+            (user.id, cls(descriptors, course_id, user, prefetch=False))
+            for user in users
+        )
+        if not caches:
+            return caches
+
+        loader = caches.itervalues().next()
+        # pylint: disable=W0212
+        for scope, fields in loader._fields_to_cache().items():
+            for field_object in loader._retrieve_fields(scope, fields, user_ids=caches.keys()):
+                if scope == Scope.user_state_summary:
+                    for cache in caches.itervalues():
+                        cache._add_field_object(scope, field_object)
+                else:
+                    caches[field_object.student_id]._add_field_object(scope, field_object)
+
+        return caches
+
+    def _add_field_object(self, scope, field_object):
+        """
+        Add a model object loaded from the database to the cache, unless
+        another cache sharing this one's objects already has it
+        """
+        cache_key = self._cache_key_from_field_object(scope, field_object)
+        if cache_key in self.cache:
+            return
+        self.cache[cache_key] = field_object
+        self._persisted[cache_key] = self._serialized_value(scope, field_object)
 
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
@@ -133,17 +258,23 @@ class FieldDataCache(object):
         )
         return res
 
-    def _retrieve_fields(self, scope, fields):
+    def _retrieve_fields(self, scope, fields, user_ids=None):
         """
-        Queries the database for all of the fields in the specified scope
+        Queries the database for all of the fields in the specified scope,
+        for self.user or, if given, for all of the users in `user_ids`
         """
+        if user_ids is None:
+            students = {'student': self.user.pk}
+        else:
+            students = {'student__in': user_ids}
+
         if scope == Scope.user_state:
             return self._chunked_query(
                 StudentModule,
                 'module_state_key__in',
                 (descriptor.location.url() for descriptor in self.descriptors),
                 course_id=self.course_id,
-                student=self.user.pk,
+                **students
             )
         elif scope == Scope.user_state_summary:
             return self._chunked_query(
@@ -157,14 +288,14 @@ class FieldDataCache(object):
                 XModuleStudentPrefsField,
                 'module_type__in',
                 set(descriptor.module_class.__name__ for descriptor in self.descriptors),
-                student=self.user.pk,
                 field_name__in=set(field.name for field in fields),
+                **students
             )
         elif scope == Scope.user_info:
             return self._query(
                 XModuleStudentInfoField,
-                student=self.user.pk,
                 field_name__in=set(field.name for field in fields),
+                **students
             )
         else:
             return []
@@ -255,8 +386,242 @@ class FieldDataCache(object):
 
         cache_key = self._cache_key_from_kvs_key(key)
         self.cache[cache_key] = field_object
+        self._persisted[cache_key] = self._serialized_value(key.scope, field_object)
         return field_object
 
+    def _find_or_add(self, key):
+        """
+        Find a model data object in this cache, or add an unsaved one for
+        the next flush to insert if it doesn't exist
+        """
+        field_object = self.find(key)
+
+        if field_object is not None:
+            return field_object
+
+        if key.scope == Scope.user_state:
+            field_object = StudentModule(
+                course_id=self.course_id,
+                student=self.user,
+                module_state_key=key.block_scope_id.url(),
+                state=json.dumps({}),
+                module_type=key.block_scope_id.category,
+            )
+        elif key.scope == Scope.user_state_summary:
+            field_object = XModuleUserStateSummaryField(
+                field_name=key.field_name,
+                usage_id=key.block_scope_id.url()
+            )
+        elif key.scope == Scope.preferences:
+            field_object = XModuleStudentPrefsField(
+                field_name=key.field_name,
+                module_type=key.block_scope_id,
+                student=self.user,
+            )
+        elif key.scope == Scope.user_info:
+            field_object = XModuleStudentInfoField(
+                field_name=key.field_name,
+                student=self.user,
+            )
+
+        self.cache[self._cache_key_from_kvs_key(key)] = field_object
+        return field_object
+
+    @staticmethod
+    def _serialized_value(scope, field_object):
+        """
+        Return the json that `field_object` stores its value(s) in
+        """
+        if scope == Scope.user_state:
+            return field_object.state
+        else:
+            return field_object.value
+
+    def user_state(self, key):
+        """
+        Return the decoded state of the StudentModule selected by the
+        Scope.user_state `key`, or None if there is no such StudentModule.
+
+        Changes to the returned dict are saved by the next flush after
+        `mark_dirty` is called for them.
+        """
+        cache_key = self._cache_key_from_kvs_key(key)
+        if cache_key not in self._user_states:
+            field_object = self.cache.get(cache_key)
+            if field_object is None:
+                return None
+            self._user_states[cache_key] = json.loads(field_object.state)
+        return self._user_states[cache_key]
+
+    def set(self, key, value):
+        """
+        Set the field selected by the DjangoKeyValueStore.Key `key` to
+        `value`, to be saved by the next flush.  `value` is copied, so later
+        changes to it by the caller aren't saved.
+        """
+        field_object = self._find_or_add(key)
+        if key.scope == Scope.user_state:
+            self.user_state(key)[key.field_name] = deepcopy(value)
+        else:
+            field_object.value = json.dumps(value)
+        self.mark_dirty(key)
+
+    def mark_dirty(self, key):
+        """
+        Record that the field selected by `key` has changed, so that the next
+        flush saves its model data object
+        """
+        self._dirty.setdefault(self._cache_key_from_kvs_key(key), []).append(key)
+
+    def remove(self, key):
+        """
+        Delete the model data object selected by `key` (which must not be in
+        Scope.user_state) from the database and this cache
+        """
+        cache_key = self._cache_key_from_kvs_key(key)
+        field_object = self.cache.pop(cache_key)
+        self._dirty.pop(cache_key, None)
+        self._persisted.pop(cache_key, None)
+        if field_object.pk is not None:
+            field_object.delete()
+
+    def flush(self):
+        """
+        Save the model data objects changed since the last flush.
+
+        Objects whose serialized value hasn't changed aren't written.  Changed
+        objects are written with one UPDATE each, and new objects are inserted
+        in bulk.  The post_save signal is sent for each object written, as
+        Model.save would.
+
+        Raises KeyValueMultiSaveError, listing the names of the fields that
+        were saved, if a write fails.  The fields that weren't saved are
+        kept for the next flush.
+        """
+        # Emptied in place, since it may be shared with other caches
+        dirty = OrderedDict(self._dirty)
+        self._dirty.clear()
+
+        saved_fields = []
+        updates = []
+        inserts = defaultdict(list)
+        for cache_key, keys in dirty.items():
+            scope = cache_key[0]
+            field_object = self.cache[cache_key]
+            if scope == Scope.user_state:
+                field_object.state = json.dumps(self._user_states[cache_key], sort_keys=True)
+            value = self._serialized_value(scope, field_object)
+
+            if field_object.pk is None:
+                inserts[type(field_object)].append((cache_key, keys))
+            elif value != self._persisted.get(cache_key):
+                updates.append((cache_key, keys))
+            else:
+                saved_fields.extend(key.field_name for key in keys)
+
+        unsaved = OrderedDict(updates + list(chain.from_iterable(inserts.values())))
+        try:
+            for cache_key, keys in updates:
+                self._update(cache_key)
+                saved_fields.extend(key.field_name for key in keys)
+                del unsaved[cache_key]
+
+            for model_class, new_objects in inserts.items():
+                self._insert(model_class, [cache_key for cache_key, _ in new_objects])
+                for cache_key, keys in new_objects:
+                    saved_fields.extend(key.field_name for key in keys)
+                    del unsaved[cache_key]
+        except DatabaseError:
+            log.error('Error saving fields %r', list(chain.from_iterable(unsaved.values())))
+            for cache_key, keys in unsaved.items():
+                self._dirty.setdefault(cache_key, []).extend(keys)
+            raise KeyValueMultiSaveError(saved_fields)
+
+    def _update(self, cache_key):
+        """
+        Write the value of the saved model data object at `cache_key`
+        """
+        scope = cache_key[0]
+        field_object = self.cache[cache_key]
+        value = self._serialized_value(scope, field_object)
+        value_field = 'state' if scope == Scope.user_state else 'value'
+
+        field_object.modified = timezone.now()
+        type(field_object).objects.filter(pk=field_object.pk).update(**{
+            value_field: value,
+            'modified': field_object.modified,
+        })
+        self._persisted[cache_key] = value
+        post_save.send(sender=type(field_object), instance=field_object, created=False,
+                       raw=False, using=DEFAULT_DB_ALIAS)
+
+    def _insert(self, model_class, cache_keys):
+        """
+        Insert the unsaved `model_class` objects at `cache_keys`
+        """
+        field_objects = [self.cache[cache_key] for cache_key in cache_keys]
+
+        created = [True] * len(field_objects)
+        sid = transaction.savepoint()
+        try:
+            model_class.objects.bulk_create(field_objects)
+            transaction.savepoint_commit(sid)
+        except IntegrityError:
+            # Another request created some of these rows since we looked for
+            # them, so write them one at a time, overwriting those.
+            transaction.savepoint_rollback(sid)
+            created = [self._insert_or_update(field_object) for field_object in field_objects]
+
+        # bulk_create doesn't set primary keys, so look them up by the unique
+        # fields of each object.
+        unique_fields = [model_class._meta.get_field(name).attname for name in model_class._meta.unique_together[0]]
+
+        def unique_values(field_object):
+            """The values of the unique fields of `field_object`"""
+            return tuple(getattr(field_object, name) for name in unique_fields)
+
+        pks = dict(
+            (tuple(row[1:]), row[0])
+            for row in model_class.objects.filter(reduce(or_, (
+                Q(**dict(zip(unique_fields, unique_values(field_object)))) for field_object in field_objects
+            ))).values_list('pk', *unique_fields)
+        )
+
+        for cache_key, field_object, was_created in zip(cache_keys, field_objects, created):
+            field_object.pk = pks[unique_values(field_object)]
+            field_object._state.adding = False  # pylint: disable=W0212
+            field_object._state.db = DEFAULT_DB_ALIAS  # pylint: disable=W0212
+            self._persisted[cache_key] = self._serialized_value(cache_key[0], field_object)
+            post_save.send(sender=model_class, instance=field_object, created=was_created,
+                           raw=False, using=DEFAULT_DB_ALIAS)
+
+    @staticmethod
+    def _insert_or_update(field_object):
+        """
+        Insert the unsaved `field_object`, or overwrite the row that has its
+        unique fields.  Returns whether a row was inserted.
+        """
+        model_class = type(field_object)
+        sid = transaction.savepoint()
+        try:
+            model_class.objects.bulk_create([field_object])
+            transaction.savepoint_commit(sid)
+            return True
+        except IntegrityError:
+            transaction.savepoint_rollback(sid)
+
+        unique_fields = model_class._meta.unique_together[0]
+        values = dict(
+            (field.attname, getattr(field_object, field.attname))
+            for field in model_class._meta.local_fields
+            if not (field.primary_key or field.name in unique_fields or field.name == 'created')
+        )
+        field_object.modified = values['modified'] = timezone.now()
+        model_class.objects.filter(
+            **dict((name, getattr(field_object, name)) for name in unique_fields)
+        ).update(**values)
+        return False
+
 
 class DjangoKeyValueStore(KeyValueStore):
     """
@@ -296,7 +661,8 @@ class DjangoKeyValueStore(KeyValueStore):
             raise KeyError(key.field_name)
 
         if key.scope == Scope.user_state:
-            return json.loads(field_object.state)[key.field_name]
+            # A copy, so that changing it doesn't change what's saved
+            return deepcopy(self._field_data_cache.user_state(key)[key.field_name])
         else:
             return json.loads(field_object.value)
 
@@ -313,42 +679,19 @@ class DjangoKeyValueStore(KeyValueStore):
         `kv_dict`: A dictionary of dirty fields that maps
           xblock.DbModel._key : value
 
+        The values are written when the FieldDataCache is flushed: at the end
+        of the request if its writes are deferred, otherwise right away.
         """
-        saved_fields = []
-        # field_objects maps a field_object to a list of associated fields
-        field_objects = dict()
         for field in kv_dict:
             # Check field for validity
             if field.scope not in self._allowed_scopes:
                 raise InvalidScopeError(field.scope)
 
-            # If the field is valid and isn't already in the dictionary, add it.
-            field_object = self._field_data_cache.find_or_create(field)
-            if field_object not in field_objects.keys():
-                field_objects[field_object] = []
-            # Update the list of associated fields
-            field_objects[field_object].append(field)
-
-            # Special case when scope is for the user state, because this scope saves fields in a single row
-            if field.scope == Scope.user_state:
-                state = json.loads(field_object.state)
-                state[field.field_name] = kv_dict[field]
-                field_object.state = json.dumps(state)
-            else:
-            # The remaining scopes save fields on different rows, so
-            # we don't have to worry about conflicts
-                field_object.value = json.dumps(kv_dict[field])
-
-        for field_object in field_objects:
-            try:
-                # Save the field object that we made above
-                field_object.save()
-                # If save is successful on this scope, add the saved fields to
-                # the list of successful saves
-                saved_fields.extend([field.field_name for field in field_objects[field_object]])
-            except DatabaseError:
-                log.error('Error saving fields %r', field_objects[field_object])
-                raise KeyValueMultiSaveError(saved_fields)
+        for field, value in kv_dict.items():
+            self._field_data_cache.set(field, value)
+
+        if not self._field_data_cache.writes_deferred:
+            self._field_data_cache.flush()
 
     def delete(self, key):
         if key.scope not in self._allowed_scopes:
@@ -359,12 +702,12 @@ class DjangoKeyValueStore(KeyValueStore):
             raise KeyError(key.field_name)
 
         if key.scope == Scope.user_state:
-            state = json.loads(field_object.state)
-            del state[key.field_name]
-            field_object.state = json.dumps(state)
-            field_object.save()
+            del self._field_data_cache.user_state(key)[key.field_name]
+            self._field_data_cache.mark_dirty(key)
+            if not self._field_data_cache.writes_deferred:
+                self._field_data_cache.flush()
         else:
-            field_object.delete()
+            self._field_data_cache.remove(key)
 
     def has(self, key):
         if key.scope not in self._allowed_scopes:
@@ -375,6 +718,42 @@ class DjangoKeyValueStore(KeyValueStore):
             return False
 
         if key.scope == Scope.user_state:
-            return key.field_name in json.loads(field_object.state)
+            return key.field_name in self._field_data_cache.user_state(key)
         else:
             return True
+
+
+class DjangoCounterStore(object):
+    """
+    Counters shared by the users of a module, stored as XModuleCounter rows.
+
+    Implements the interface of xmodule.x_module.DictCounterStore.
+    """
+
+    def incr(self, usage_id, name, key, delta=1):
+        """Add `delta` to counter `key` of `name`."""
+        XModuleCounter.incr(usage_id, name, key, delta)
+
+    def get_counts(self, usage_id, name, keys=None):
+        """Return a dict of the counters `keys` of `name`, or all of them, by key."""
+        counters = XModuleCounter.objects.filter(usage_id=usage_id, name=name)
+        if keys is not None:
+            counters = counters.filter(key__in=list(keys))
+        return dict(counters.values_list('key', 'count'))
+
+    def get_top_counts(self, usage_id, name, amount):
+        """Return a dict of the `amount` highest counters of `name`, by key."""
+        counters = XModuleCounter.objects.filter(usage_id=usage_id, name=name).order_by('-count', 'key')
+        return dict(counters.values_list('key', 'count')[:amount])
+
+    def get_total(self, usage_id, name):
+        """Return the sum of the counters of `name`."""
+        total = XModuleCounter.objects.filter(usage_id=usage_id, name=name).aggregate(total=Sum('count'))['total']
+        return total or 0
+
+    def reset(self, usage_id, name, keys=None):
+        """Drop the counters `keys` of `name`, or all of them."""
+        counters = XModuleCounter.objects.filter(usage_id=usage_id, name=name)
+        if keys is not None:
+            counters = counters.filter(key__in=list(keys))
+        counters.delete()
@@ -12,10 +12,21 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import base64
+import logging
+import zlib
+
 from django.contrib.auth.models import User
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, F
+from django.db.models.signals import m2m_changed, post_init, post_save, post_delete
 from django.dispatch import receiver
+from django.utils.dateparse import parse_datetime
+
+from request_cache.middleware import RequestCache
+from student.models import CourseEnrollment
+
+log = logging.getLogger(__name__)
 
 
 class StudentModule(models.Model):
@@ -71,13 +82,29 @@ class StudentModule(models.Model):
         return unicode(repr(self))
 
 
+# The request cache key under which the history entries recorded while
+# handling a request are queued.
+HISTORY_QUEUE = 'student_module_history'
+
+
 class StudentModuleHistory(models.Model):
     """Keeps a complete history of state changes for a given XModule for a given
     Student. Right now, we restrict this to problems so that the table doesn't
-    explode in size."""
+    explode in size.
+
+    History is append-only, and written off the request thread: entries are
+    queued while a request is handled and inserted together by the
+    record_history celery task once it's over (see
+    courseware.middleware.StudentModuleHistoryMiddleware).  States are stored
+    compressed when that makes them smaller; use `full_state` or
+    `get_history` to read them."""
 
     HISTORY_SAVING_TYPES = {'problem'}
 
+    # Prefix of the states that are stored compressed. Older rows, which
+    # clean_history hasn't compressed yet, hold plain json.
+    COMPRESSED_PREFIX = 'zlib:'
+
     class Meta:
         get_latest_by = "created"
 
@@ -90,16 +117,271 @@ class StudentModuleHistory(models.Model):
     grade = models.FloatField(null=True, blank=True)
     max_grade = models.FloatField(null=True, blank=True)
 
+    @classmethod
+    def compress_state(cls, state):
+        """
+        Return the form in which the json `state` is stored: compressed, or
+        as it is if compressing it wouldn't make it any smaller.
+        """
+        if state is None or state.startswith(cls.COMPRESSED_PREFIX):
+            return state
+        compressed = cls.COMPRESSED_PREFIX + base64.b64encode(zlib.compress(state.encode('utf-8')))
+        if len(compressed) >= len(state):
+            return state
+        return compressed
+
+    @classmethod
+    def decompress_state(cls, stored_state):
+        """Return the json state stored as `stored_state`."""
+        if stored_state is None or not stored_state.startswith(cls.COMPRESSED_PREFIX):
+            return stored_state
+        return zlib.decompress(base64.b64decode(stored_state[len(cls.COMPRESSED_PREFIX):])).decode('utf-8')
+
+    @property
+    def full_state(self):
+        """The json state of the StudentModule at this point in its history."""
+        return self.decompress_state(self.state)
+
+    @classmethod
+    def get_history(cls, student_module):
+        """
+        Return the history of `student_module`, newest first.
+
+        Entries are inserted in batches, off the request thread, so their ids
+        don't follow the order they were recorded in; they are ordered by
+        when they were recorded, and only then by id.
+
+        If none has been recorded yet (it's written asynchronously), this is
+        an unsaved entry holding the current state of `student_module`.
+        """
+        history = list(cls.objects.filter(student_module=student_module).order_by('-created', '-id'))
+        if not history:
+            history = [cls(student_module=student_module,
+                           created=student_module.modified,
+                           state=student_module.state,
+                           grade=student_module.grade,
+                           max_grade=student_module.max_grade)]
+        return history
+
+    @classmethod
+    def record(cls, student_module):
+        """
+        Record the current state of `student_module` in its history.
+
+        Within a request this is queued until the request is over, otherwise
+        it is sent to be written right away.
+        """
+        entry = {
+            'student_module_id': student_module.id,
+            'created': student_module.modified.isoformat(),
+            'state': cls.compress_state(student_module.state),
+            'grade': student_module.grade,
+            'max_grade': student_module.max_grade,
+        }
+        queue = RequestCache.get_request_cache().data.get(HISTORY_QUEUE)
+        if queue is not None:
+            queue.append(entry)
+        else:
+            cls.send_entries([entry])
+
+    @classmethod
+    def send_entries(cls, entries):
+        """
+        Send the history `entries` (made by `record`) to the record_history
+        task, or write them here if the task can't be queued.
+        """
+        from courseware.tasks import record_history
+        try:
+            record_history.delay(entries)
+        except Exception:  # pylint: disable=W0703
+            log.exception("Couldn't queue %d history entries, writing them now", len(entries))
+            cls.write_entries(entries)
+
+    @classmethod
+    def write_entries(cls, entries):
+        """Insert the history `entries` (made by `record`)."""
+        cls.objects.bulk_create([
+            cls(student_module_id=entry['student_module_id'],
+                version=None,
+                created=parse_datetime(entry['created']),
+                state=entry['state'],
+                grade=entry['grade'],
+                max_grade=entry['max_grade'])
+            for entry in entries
+        ])
+
     @receiver(post_save, sender=StudentModule)
     def save_history(sender, instance, **kwargs):
         if instance.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES:
-            history_entry = StudentModuleHistory(student_module=instance,
-                                                 version=None,
-                                                 created=instance.modified,
-                                                 state=instance.state,
-                                                 grade=instance.grade,
-                                                 max_grade=instance.max_grade)
-            history_entry.save()
+            StudentModuleHistory.record(instance)
+
+
+def begin_history_queue():
+    """
+    Queue the history entries recorded from now on until
+    `send_history_queue` is called.
+    """
+    RequestCache.get_request_cache().data[HISTORY_QUEUE] = []
+
+
+def send_history_queue():
+    """
+    Send the history entries queued since `begin_history_queue` to be
+    written, and stop queueing them.
+    """
+    entries = RequestCache.get_request_cache().data.pop(HISTORY_QUEUE, None)
+    if entries:
+        StudentModuleHistory.send_entries(entries)
+
+
+def discard_history_queue():
+    """
+    Drop the history entries queued since `begin_history_queue`, and stop
+    queueing them.
+    """
+    RequestCache.get_request_cache().data.pop(HISTORY_QUEUE, None)
+
+
+class StudentModuleGradeHistogram(models.Model):
+    """
+    Number of StudentModule rows holding each grade for a given module.
+
+    This is a denormalization of a `GROUP BY grade` over StudentModule, kept
+    up to date by signal receivers whenever a StudentModule is created,
+    regraded or deleted, so that the staff grade histogram is a single
+    indexed lookup. Use the rebuild_grade_histograms management command to
+    backfill or repair it.
+
+    Ungraded modules are counted under the UNGRADED sentinel rather than a
+    NULL grade, because unique indexes treat NULLs as distinct and would let
+    concurrent inserts create duplicate buckets.
+    """
+
+    # Grades are never negative, so this can't collide with a real grade
+    UNGRADED = -1.0
+
+    class Meta:
+        unique_together = (('module_state_key', 'grade'),)
+
+    module_state_key = models.CharField(max_length=255, db_index=True, db_column='module_id')
+    grade = models.FloatField(default=UNGRADED)
+    count = models.IntegerField(default=0)
+
+    def __repr__(self):
+        return 'StudentModuleGradeHistogram<%r>' % ({
+            'module_state_key': self.module_state_key,
+            'grade': self.grade,
+            'count': self.count,
+        },)
+
+    def __unicode__(self):
+        return unicode(repr(self))
+
+    @classmethod
+    def bucket_grade(cls, grade):
+        """
+        Return the value `grade` is stored under in the histogram.
+        """
+        return cls.UNGRADED if grade is None else grade
+
+    @classmethod
+    def adjust(cls, module_state_key, grade, delta):
+        """
+        Add `delta` to the count of students with `grade` on `module_state_key`.
+        """
+        grade = cls.bucket_grade(grade)
+        buckets = cls.objects.filter(module_state_key=module_state_key, grade=grade)
+        if buckets.update(count=F('count') + delta) or delta < 0:
+            # A missing bucket with a negative delta means the module has not
+            # been backfilled yet; there's nothing sensible to decrement.
+            return
+
+        sid = transaction.savepoint()
+        try:
+            cls.objects.create(module_state_key=module_state_key, grade=grade, count=delta)
+            transaction.savepoint_commit(sid)
+        except IntegrityError:
+            # Someone else created the bucket between our update and insert.
+            transaction.savepoint_rollback(sid)
+            buckets.update(count=F('count') + delta)
+
+    @classmethod
+    def histogram(cls, module_state_key):
+        """
+        Return a list of (grade, count) pairs for `module_state_key`, sorted by
+        grade. Returns an empty list if any student has no grade, matching the
+        behavior of the original aggregate query.
+        """
+        grades = list(
+            cls.objects.filter(
+                module_state_key=module_state_key, count__gt=0
+            ).values_list('grade', 'count')
+        )
+        grades.sort(key=lambda x: x[0])
+        if len(grades) >= 1 and grades[0][0] == cls.UNGRADED:
+            return []
+        return grades
+
+    @classmethod
+    @transaction.commit_on_success
+    def rebuild(cls, module_state_key):
+        """
+        Recompute the histogram for `module_state_key` from StudentModule.
+        """
+        counts = StudentModule.objects.filter(
+            module_state_key=module_state_key
+        ).values('grade').annotate(count=Count('student'))
+
+        buckets = {}
+        for row in counts:
+            grade = cls.bucket_grade(row['grade'])
+            buckets[grade] = buckets.get(grade, 0) + row['count']
+
+        cls.objects.filter(module_state_key=module_state_key).delete()
+        cls.objects.bulk_create([
+            cls(module_state_key=module_state_key, grade=grade, count=count)
+            for grade, count in buckets.iteritems()
+        ])
+
+
+@receiver(post_init, sender=StudentModule)
+def remember_loaded_grade(sender, instance, **kwargs):  # pylint: disable=W0613
+    """
+    Remember the grade a StudentModule had when it was loaded, so that
+    post_save can tell which histogram bucket it moved out of.
+    """
+    if instance.pk is None:
+        instance._histogram_bucket = None  # pylint: disable=W0212
+    else:
+        instance._histogram_bucket = (instance.module_state_key, instance.grade)  # pylint: disable=W0212
+
+
+@receiver(post_save, sender=StudentModule)
+def update_grade_histogram(sender, instance, created, **kwargs):  # pylint: disable=W0613
+    """
+    Move the StudentModule between grade histogram buckets if its grade changed.
+    """
+    old_bucket = getattr(instance, '_histogram_bucket', None)
+    new_bucket = (instance.module_state_key, instance.grade)
+
+    if created:
+        StudentModuleGradeHistogram.adjust(*new_bucket, delta=1)
+    elif old_bucket is not None and old_bucket != new_bucket:
+        StudentModuleGradeHistogram.adjust(*old_bucket, delta=-1)
+        StudentModuleGradeHistogram.adjust(*new_bucket, delta=1)
+
+    instance._histogram_bucket = new_bucket  # pylint: disable=W0212
+
+
+@receiver(post_delete, sender=StudentModule)
+def remove_from_grade_histogram(sender, instance, **kwargs):  # pylint: disable=W0613
+    """
+    Remove a deleted StudentModule from the grade histogram.
+    """
+    bucket = getattr(instance, '_histogram_bucket', None)
+    if bucket is None:
+        bucket = (instance.module_state_key, instance.grade)
+    StudentModuleGradeHistogram.adjust(*bucket, delta=-1)
 
 
 class XModuleUserStateSummaryField(models.Model):
@@ -133,6 +415,57 @@ class XModuleUserStateSummaryField(models.Model):
         return unicode(repr(self))
 
 
+class XModuleCounter(models.Model):
+    """
+    A counter shared by all students of an xmodule, like the votes on a hint.
+
+    Counters are incremented in place with an UPDATE, so that concurrent
+    increments neither lose each other nor rewrite the module's
+    XModuleUserStateSummaryField rows.
+    """
+
+    class Meta:
+        unique_together = (('usage_id', 'name', 'key'),)
+
+    # The definition id for the module
+    usage_id = models.CharField(max_length=255, db_index=True)
+
+    # What the counters count, and which one this is
+    name = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+
+    count = models.IntegerField(default=0)
+
+    def __repr__(self):
+        return 'XModuleCounter<%r>' % ({
+            'usage_id': self.usage_id,
+            'name': self.name,
+            'key': self.key,
+            'count': self.count,
+        },)
+
+    def __unicode__(self):
+        return unicode(repr(self))
+
+    @classmethod
+    def incr(cls, usage_id, name, key, delta=1):
+        """
+        Add `delta` to the counter `key` of `name` for `usage_id`.
+        """
+        counters = cls.objects.filter(usage_id=usage_id, name=name, key=key)
+        if counters.update(count=F('count') + delta):
+            return
+
+        sid = transaction.savepoint()
+        try:
+            cls.objects.create(usage_id=usage_id, name=name, key=key, count=delta)
+            transaction.savepoint_commit(sid)
+        except IntegrityError:
+            # Someone else created the counter between our update and insert.
+            transaction.savepoint_rollback(sid)
+            counters.update(count=F('count') + delta)
+
+
 class XModuleStudentPrefsField(models.Model):
     """
     Stores data set in the Scope.preferences scope by an xmodule field
@@ -232,3 +565,56 @@ class OfflineComputedGradeLog(models.Model):
 
     def __unicode__(self):
         return "[OCGLog] %s: %s" % (self.course_id, self.created)
+
+
+class OfflineComputedGradeShard(models.Model):
+    """
+    Checkpoint of one shard of an offline grade calculation done in parallel:
+    the students of a course whose ids are between first_user_id and
+    last_user_id (inclusive).
+
+    The shards of a calculation are kept until all of them are completed, so
+    that an interrupted calculation resumes without regrading completed shards.
+    """
+    class Meta:
+        unique_together = (('course_id', 'first_user_id'),)
+
+    course_id = models.CharField(max_length=255, db_index=True)
+    first_user_id = models.IntegerField()
+    last_user_id = models.IntegerField()
+
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    completed = models.DateTimeField(null=True, blank=True)
+    seconds = models.IntegerField(default=0)  	# seconds spent grading the shard
+    nstudents = models.IntegerField(default=0)
+
+    def __unicode__(self):
+        return "[OCGShard] %s: %s-%s (%s)" % (self.course_id, self.first_user_id, self.last_user_id, self.completed)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def drop_access_cache_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):  # pylint: disable=W0613
+    """
+    Drop the access decisions kept for users whose groups changed (see
+    courseware.access.begin_access_cache).
+    """
+    if not action.startswith('post_'):
+        return
+    from courseware.access import invalidate_access_cache
+    if not reverse:
+        invalidate_access_cache([instance.id])
+    elif pk_set is not None:
+        invalidate_access_cache(pk_set)
+    else:
+        # A group was cleared, so any user may have left it.
+        invalidate_access_cache()
+
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def drop_access_cache_on_enrollment_change(sender, instance, **kwargs):  # pylint: disable=W0613
+    """
+    Drop the access decisions kept for a user whose enrollment changed.
+    """
+    from courseware.access import invalidate_access_cache
+    invalidate_access_cache([instance.user_id])
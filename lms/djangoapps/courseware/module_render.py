@@ -33,7 +33,7 @@ from student.models import unique_id_for_user
 
 from courseware.access import has_access
 from courseware.masquerade import setup_masquerade
-from courseware.model_data import FieldDataCache, DjangoKeyValueStore
+from courseware.model_data import FieldDataCache, DjangoKeyValueStore, DjangoCounterStore
 from xblock.runtime import KeyValueStore
 from xblock.fields import Scope
 from util.sandboxing import can_execute_unsafe_code
@@ -375,6 +375,7 @@ def get_module_for_descriptor_internal(user, descriptor, field_data_cache, cours
         open_ended_grading_interface=open_ended_grading_interface,
         s3_interface=s3_interface,
         cache=cache,
+        counters=DjangoCounterStore(),
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
         mixins=descriptor.system.mixologist._mixins,
@@ -591,6 +592,39 @@ def modx_dispatch(request, dispatch, location, course_id):
     return HttpResponse(ajax_return)
 
 
+def input_preview(request, course_id, location):
+    """
+    Answer an input's live preview request without building the module.
+
+    Formula and chemical equation previews are requested on every keystroke,
+    and depend only on what was typed.  Rather than loading the student's
+    state and the whole problem like `modx_dispatch`, this only needs the
+    problem definition, from which the inputs' static configuration is
+    computed (and cached).  Requests the descriptor can't answer that way go
+    through `modx_dispatch` as 'input_ajax' calls.
+    """
+    if not Location.is_valid(location):
+        raise Http404("Invalid location")
+
+    if not request.user.is_authenticated():
+        raise PermissionDenied
+
+    try:
+        descriptor = modulestore().get_instance(course_id, location)
+    except ItemNotFoundError:
+        raise Http404
+
+    if not has_access(request.user, descriptor, 'load', course_id):
+        raise Http404
+
+    response = None
+    if hasattr(descriptor, 'handle_input_preview'):
+        response = descriptor.handle_input_preview(request.POST)
+    if response is None:
+        return modx_dispatch(request, 'input_ajax', location, course_id)
+    return JsonResponse(response)
+
+
 def get_score_bucket(grade, max_grade):
     """
     Function to split arbitrary score ranges into 3 buckets.
@@ -0,0 +1,20 @@
+"""
+Celery tasks of the courseware app
+"""
+from celery import task
+from django.db import DatabaseError, transaction
+
+from courseware.models import StudentModuleHistory
+
+
+@task(default_retry_delay=10, max_retries=5)  # pylint: disable=E1102
+def record_history(entries):
+    """
+    Insert the StudentModuleHistory `entries` (see StudentModuleHistory.record)
+    in one batch.
+    """
+    try:
+        with transaction.commit_on_success():
+            StudentModuleHistory.write_entries(entries)
+    except DatabaseError as exc:
+        raise record_history.retry(exc=exc)
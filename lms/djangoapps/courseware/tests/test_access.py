@@ -4,7 +4,7 @@ from django.test import TestCase
 
 from xmodule.modulestore import Location
 import courseware.access as access
-from .factories import CourseEnrollmentAllowedFactory
+from .factories import CourseEnrollmentAllowedFactory, GroupFactory, UserFactory
 import datetime
 from django.utils.timezone import UTC
 
@@ -106,3 +106,45 @@ class AccessTestCase(TestCase):
 
         # TODO:
         # Non-staff cannot enroll outside the open enrollment period if not specifically allowed
+
+
+class AccessCacheTestCase(TestCase):
+    """
+    Tests for the principals and access decisions kept while handling a request.
+    """
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.course_location = Location('i4x://edX/toy/course/2012_Fall')
+        self.chapter_location = Location('i4x://edX/toy/chapter/Overview')
+
+    def test_groups_loaded_once(self):
+        with access.access_cache():
+            with self.assertNumQueries(1):
+                self.assertFalse(access.has_access(self.user, self.course_location, 'staff'))
+                self.assertFalse(access.has_access(self.user, self.chapter_location, 'staff', 'edX/toy/2012_Fall'))
+            with self.assertNumQueries(0):
+                self.assertFalse(access.has_access(self.user, self.course_location, 'staff'))
+
+    def test_group_change_invalidates(self):
+        with access.access_cache():
+            self.assertFalse(access.has_access(self.user, self.course_location, 'staff'))
+            self.user.groups.add(GroupFactory.create(name='staff_edX/toy/2012_Fall'))
+            self.assertTrue(access.has_access(self.user, self.course_location, 'staff'))
+
+    def test_not_kept_outside_cache(self):
+        self.assertFalse(access.has_access(self.user, self.course_location, 'staff'))
+        GroupFactory.create(name='staff_edX/toy/2012_Fall').user_set.add(self.user)
+        self.assertTrue(access.has_access(self.user, self.course_location, 'staff'))
+
+    def test_masquerade_not_shared(self):
+        self.user.groups.add(GroupFactory.create(name='staff_edX/toy/2012_Fall'))
+        with access.access_cache():
+            self.assertTrue(access.has_access(self.user, self.course_location, 'staff'))
+            self.user.masquerade_as_student = True
+            self.assertFalse(access.has_access(self.user, self.course_location, 'staff'))
+
+    def test_filter_has_access(self):
+        self.user.groups.add(GroupFactory.create(name='staff_edX/toy/2012_Fall'))
+        locations = [self.course_location, Location('i4x://edX/other/course/2012_Fall')]
+        with self.assertNumQueries(1):
+            self.assertEqual(access.filter_has_access(self.user, locations, 'staff'), [self.course_location])
@@ -0,0 +1,97 @@
+"""
+Tests for the incrementally maintained StudentModuleGradeHistogram.
+"""
+from django.core.management import call_command
+from django.test import TestCase
+
+from courseware.models import StudentModule, StudentModuleGradeHistogram
+from courseware.tests.factories import StudentModuleFactory, location
+
+import xmodule_modifiers
+
+
+class TestGradeHistogram(TestCase):
+    """
+    Check that the histogram follows StudentModule grade changes.
+    """
+    def setUp(self):
+        self.module_state_key = location('histogram_problem').url()
+
+    def make_module(self, grade):
+        """Create a StudentModule with `grade` for a new student."""
+        return StudentModuleFactory.create(
+            module_state_key=self.module_state_key,
+            grade=grade,
+            max_grade=2,
+        )
+
+    def test_create(self):
+        self.make_module(1)
+        self.make_module(1)
+        self.make_module(2)
+        self.assertEqual(StudentModuleGradeHistogram.histogram(self.module_state_key), [(1, 2), (2, 1)])
+
+    def test_regrade(self):
+        self.make_module(1)
+        module = self.make_module(1)
+        module = StudentModule.objects.get(pk=module.pk)
+        module.grade = 2
+        module.save()
+        self.assertEqual(StudentModuleGradeHistogram.histogram(self.module_state_key), [(1, 1), (2, 1)])
+
+    def test_save_without_regrade(self):
+        module = self.make_module(1)
+        module.state = '{"attempts": 1}'
+        module.save()
+        self.assertEqual(StudentModuleGradeHistogram.histogram(self.module_state_key), [(1, 1)])
+
+    def test_delete(self):
+        self.make_module(1)
+        self.make_module(2).delete()
+        self.assertEqual(StudentModuleGradeHistogram.histogram(self.module_state_key), [(1, 1)])
+
+    def test_ungraded_student_hides_histogram(self):
+        self.make_module(1)
+        self.make_module(None)
+        self.assertEqual(StudentModuleGradeHistogram.histogram(self.module_state_key), [])
+
+    def test_ungraded_students_share_one_bucket(self):
+        self.make_module(None)
+        self.make_module(None)
+        buckets = StudentModuleGradeHistogram.objects.filter(module_state_key=self.module_state_key)
+        self.assertEqual(
+            list(buckets.values_list('grade', 'count')),
+            [(StudentModuleGradeHistogram.UNGRADED, 2)]
+        )
+
+    def test_grading_leaves_ungraded_bucket(self):
+        module = self.make_module(None)
+        module = StudentModule.objects.get(pk=module.pk)
+        module.grade = 1
+        module.save()
+        self.assertEqual(StudentModuleGradeHistogram.histogram(self.module_state_key), [(1, 1)])
+
+    def test_rebuild_command(self):
+        self.make_module(1)
+        self.make_module(2)
+        StudentModuleGradeHistogram.objects.all().delete()
+        self.assertEqual(StudentModuleGradeHistogram.histogram(self.module_state_key), [])
+
+        call_command('rebuild_grade_histograms')
+        self.assertEqual(StudentModuleGradeHistogram.histogram(self.module_state_key), [(1, 1), (2, 1)])
+
+    def test_rebuild_ungraded(self):
+        self.make_module(1)
+        self.make_module(None)
+        StudentModuleGradeHistogram.rebuild(self.module_state_key)
+        self.assertEqual(
+            StudentModuleGradeHistogram.objects.get(
+                module_state_key=self.module_state_key,
+                grade=StudentModuleGradeHistogram.UNGRADED,
+            ).count,
+            1
+        )
+
+    def test_xmodule_modifiers_grade_histogram(self):
+        self.make_module(1)
+        self.assertEqual(xmodule_modifiers.grade_histogram(self.module_state_key), [(1, 1)])
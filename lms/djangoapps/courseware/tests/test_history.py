@@ -0,0 +1,98 @@
+"""
+Tests for the asynchronously written, compressed StudentModuleHistory.
+"""
+import json
+
+from django.test import TestCase
+from mock import patch
+
+from courseware.models import (
+    StudentModule, StudentModuleHistory,
+    begin_history_queue, send_history_queue, discard_history_queue,
+)
+from courseware.tests.factories import StudentModuleFactory
+
+
+class TestStudentModuleHistory(TestCase):
+    """
+    Check how StudentModule states are recorded and read back.
+    """
+    def setUp(self):
+        self.student_module = StudentModuleFactory.create(state=json.dumps({'attempts': 1}))
+
+    def test_compression_round_trip(self):
+        state = json.dumps({'student_answers': {'input_1': u'é' * 100}})
+        compressed = StudentModuleHistory.compress_state(state)
+        self.assertTrue(compressed.startswith(StudentModuleHistory.COMPRESSED_PREFIX))
+        self.assertLess(len(compressed), len(state))
+        self.assertEqual(StudentModuleHistory.decompress_state(compressed), state)
+        # Compressing twice, or reading an old uncompressed state, are no-ops
+        self.assertEqual(StudentModuleHistory.compress_state(compressed), compressed)
+        self.assertEqual(StudentModuleHistory.decompress_state(state), state)
+
+    def test_small_state_not_compressed(self):
+        state = json.dumps({'attempts': 1})
+        self.assertEqual(StudentModuleHistory.compress_state(state), state)
+
+    def test_history_stored_compressed(self):
+        state = {'attempts': 2, 'student_answers': {'input_1': 'x' * 200}}
+        self.student_module.state = json.dumps(state)
+        self.student_module.save()
+        entry = StudentModuleHistory.get_history(self.student_module)[0]
+        self.assertTrue(entry.state.startswith(StudentModuleHistory.COMPRESSED_PREFIX))
+        self.assertEqual(json.loads(entry.full_state), state)
+
+    def test_queued_within_request(self):
+        begin_history_queue()
+        self.addCleanup(discard_history_queue)
+        self.student_module.state = json.dumps({'attempts': 2})
+        self.student_module.save()
+        self.student_module.state = json.dumps({'attempts': 3})
+        self.student_module.save()
+        self.assertEqual(1, StudentModuleHistory.objects.filter(student_module=self.student_module).count())
+
+        with patch('courseware.tasks.record_history.delay') as mock_delay:
+            send_history_queue()
+        self.assertEqual(1, mock_delay.call_count)
+        entries = mock_delay.call_args[0][0]
+        self.assertEqual(
+            [{'attempts': 2}, {'attempts': 3}],
+            [json.loads(StudentModuleHistory.decompress_state(entry['state'])) for entry in entries]
+        )
+
+    def test_written_if_task_cannot_be_queued(self):
+        with patch('courseware.tasks.record_history.delay', side_effect=IOError):
+            self.student_module.state = json.dumps({'attempts': 2})
+            self.student_module.save()
+        self.assertEqual(2, StudentModuleHistory.objects.filter(student_module=self.student_module).count())
+
+    def test_get_history(self):
+        self.student_module.state = json.dumps({'attempts': 2})
+        self.student_module.save()
+        history = StudentModuleHistory.get_history(self.student_module)
+        self.assertEqual([{'attempts': 2}, {'attempts': 1}], [json.loads(entry.full_state) for entry in history])
+
+    def test_get_history_inserted_out_of_order(self):
+        StudentModuleHistory.objects.all().delete()
+        # A later batch, holding older entries, is written first
+        StudentModuleHistory.write_entries([
+            {'student_module_id': self.student_module.id, 'created': '2013-07-13T16:30:02+00:00',
+             'state': json.dumps({'attempts': 3}), 'grade': None, 'max_grade': None},
+        ])
+        StudentModuleHistory.write_entries([
+            {'student_module_id': self.student_module.id, 'created': '2013-07-13T16:30:00+00:00',
+             'state': json.dumps({'attempts': 1}), 'grade': None, 'max_grade': None},
+            {'student_module_id': self.student_module.id, 'created': '2013-07-13T16:30:01+00:00',
+             'state': json.dumps({'attempts': 2}), 'grade': None, 'max_grade': None},
+        ])
+        history = StudentModuleHistory.get_history(self.student_module)
+        self.assertEqual(
+            [{'attempts': 3}, {'attempts': 2}, {'attempts': 1}],
+            [json.loads(entry.full_state) for entry in history]
+        )
+
+    def test_get_history_before_any_written(self):
+        StudentModuleHistory.objects.all().delete()
+        student_module = StudentModule.objects.get(pk=self.student_module.pk)
+        history = StudentModuleHistory.get_history(student_module)
+        self.assertEqual([{'attempts': 1}], [json.loads(entry.full_state) for entry in history])
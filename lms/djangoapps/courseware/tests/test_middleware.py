@@ -0,0 +1,35 @@
+"""
+Tests for the courseware middleware
+"""
+import json
+
+from django.http import HttpResponse
+from django.test import TestCase
+from django.test.client import RequestFactory
+from mock import patch
+from xblock.exceptions import KeyValueMultiSaveError
+
+from courseware.middleware import FieldDataCacheMiddleware
+
+
+@patch('courseware.middleware.flush_write_behind', side_effect=KeyValueMultiSaveError([]))
+class TestFieldDataCacheMiddleware(TestCase):
+    """
+    Tests of the responses FieldDataCacheMiddleware returns when saving fails
+    """
+    def setUp(self):
+        self.middleware = FieldDataCacheMiddleware()
+
+    def test_ajax_flush_failure(self, _flush):
+        request = RequestFactory().post('/', HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        response = self.middleware.process_response(request, HttpResponse())
+        self.assertEqual(500, response.status_code)
+        self.assertEqual('application/json', response['Content-Type'])
+        self.assertIn('error', json.loads(response.content))
+
+    @patch('courseware.middleware.render_500', return_value=HttpResponse(status=500))
+    def test_flush_failure(self, render_500, _flush):
+        request = RequestFactory().get('/')
+        response = self.middleware.process_response(request, HttpResponse())
+        self.assertEqual(500, response.status_code)
+        render_500.assert_called_once_with(request)
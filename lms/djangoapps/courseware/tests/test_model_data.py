@@ -7,7 +7,8 @@ from functools import partial
 
 from courseware.model_data import DjangoKeyValueStore
 from courseware.model_data import InvalidScopeError, FieldDataCache
-from courseware.models import StudentModule, XModuleUserStateSummaryField
+from courseware.model_data import begin_write_behind, flush_write_behind, discard_write_behind
+from courseware.models import StudentModule, StudentModuleHistory, XModuleUserStateSummaryField
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
 from student.tests.factories import UserFactory
@@ -143,12 +144,126 @@ class TestStudentModuleStorage(TestCase):
         for key in kv_dict:
             self.kvs.set(key, 'test_value')
 
-        with patch('django.db.models.Model.save', side_effect=DatabaseError):
+        with patch('django.db.models.query.QuerySet.update', side_effect=DatabaseError):
             with self.assertRaises(KeyValueMultiSaveError) as exception_context:
                 self.kvs.set_many(kv_dict)
         self.assertEquals(len(exception_context.exception.saved_field_names), 0)
 
 
+class TestWriteBehind(TestCase):
+    """
+    Tests of the FieldDataCaches whose writes are deferred to the end of the request
+    """
+    def setUp(self):
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        begin_write_behind()
+        self.addCleanup(discard_write_behind)
+        self.field_data_cache = FieldDataCache([mock_descriptor([mock_field(Scope.user_state, 'a_field')])], course_id, self.user)
+        self.kvs = DjangoKeyValueStore(self.field_data_cache)
+
+    def test_writes_deferred(self):
+        "Test that changes are only saved when the request's writes are flushed"
+        with self.assertNumQueries(0):
+            self.kvs.set(user_state_key('a_field'), 'new_value')
+            self.kvs.set_many({user_state_key('b_field'): 'b_value', user_state_key('a_field'): 'newer_value'})
+            self.assertEquals('newer_value', self.kvs.get(user_state_key('a_field')))
+        self.assertEquals({'a_field': 'a_value'}, json.loads(StudentModule.objects.get().state))
+
+        flush_write_behind()
+        self.assertEquals({'a_field': 'newer_value', 'b_field': 'b_value'}, json.loads(StudentModule.objects.get().state))
+
+    def test_unchanged_state_not_written(self):
+        "Test that setting fields to the values they already have doesn't write anything"
+        history_count = StudentModuleHistory.objects.count()
+        self.kvs.set(user_state_key('a_field'), 'a_value')
+        with self.assertNumQueries(0):
+            flush_write_behind()
+        self.assertEquals(history_count, StudentModuleHistory.objects.count())
+
+    def test_new_rows_inserted(self):
+        "Test that fields of new StudentModules are inserted together"
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        self.kvs.set(DjangoKeyValueStore.Key(Scope.user_state, 'user', location('other_id'), 'a_field'), 'other_value')
+        self.kvs.set(DjangoKeyValueStore.Key(Scope.user_state, 'user', location('third_id'), 'a_field'), 'third_value')
+        flush_write_behind()
+
+        self.assertEquals(3, StudentModule.objects.count())
+        other = StudentModule.objects.get(module_state_key=location('other_id').url())
+        self.assertEquals({'a_field': 'other_value'}, json.loads(other.state))
+        cached = self.field_data_cache.find(DjangoKeyValueStore.Key(Scope.user_state, 'user', location('other_id'), 'a_field'))
+        self.assertEquals(other.pk, cached.pk)
+
+        # A later change to a new row updates it
+        self.kvs.set(DjangoKeyValueStore.Key(Scope.user_state, 'user', location('other_id'), 'a_field'), 'changed')
+        self.field_data_cache.flush()
+        self.assertEquals(3, StudentModule.objects.count())
+        self.assertEquals({'a_field': 'changed'}, json.loads(StudentModule.objects.get(pk=other.pk).state))
+
+    def test_changes_recorded_in_history(self):
+        "Test that a flush records each changed StudentModule in its history once"
+        history_count = StudentModuleHistory.objects.count()
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        self.kvs.set(user_state_key('b_field'), 'b_value')
+        flush_write_behind()
+        self.assertEquals(history_count + 1, StudentModuleHistory.objects.count())
+
+
+    def test_set_copies_value(self):
+        "Test that changing a value after setting it doesn't change what is saved"
+        value = ['a']
+        self.kvs.set(user_state_key('a_field'), value)
+        value.append('b')
+        self.kvs.get(user_state_key('a_field')).append('c')
+        flush_write_behind()
+        self.assertEquals({'a_field': ['a']}, json.loads(StudentModule.objects.get().state))
+
+    def test_caches_share_changes(self):
+        "Test that caches for the same user and course see, and keep, each other's changes"
+        other_kvs = DjangoKeyValueStore(
+            FieldDataCache([mock_descriptor([mock_field(Scope.user_state, 'a_field')])], course_id, self.user)
+        )
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        self.assertEquals('new_value', other_kvs.get(user_state_key('a_field')))
+        other_kvs.set(user_state_key('b_field'), 'b_value')
+        flush_write_behind()
+        self.assertEquals({'a_field': 'new_value', 'b_field': 'b_value'}, json.loads(StudentModule.objects.get().state))
+
+
+class TestCacheForUsers(TestCase):
+    """
+    Tests of loading the FieldDataCaches of many users together
+    """
+    def setUp(self):
+        self.modules = [
+            StudentModuleFactory(state=json.dumps({'a_field': 'value_%d' % i}))
+            for i in range(3)
+        ]
+        self.users = [module.student for module in self.modules] + [UserFactory.create()]
+        self.descriptors = [mock_descriptor([
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.preferences, 'b_field'),
+        ])]
+
+    def test_one_query_per_scope(self):
+        with self.assertNumQueries(2):
+            caches = FieldDataCache.cache_for_users(self.descriptors, course_id, self.users)
+        self.assertEquals(len(self.users), len(caches))
+
+    def test_same_as_single_user_caches(self):
+        caches = FieldDataCache.cache_for_users(self.descriptors, course_id, self.users)
+        for user in self.users:
+            kvs = DjangoKeyValueStore(caches[user.id])
+            single_kvs = DjangoKeyValueStore(FieldDataCache(self.descriptors, course_id, user))
+            self.assertEquals(single_kvs.has(user_state_key('a_field')), kvs.has(user_state_key('a_field')))
+            if kvs.has(user_state_key('a_field')):
+                self.assertEquals(single_kvs.get(user_state_key('a_field')), kvs.get(user_state_key('a_field')))
+
+    def test_no_users(self):
+        with self.assertNumQueries(0):
+            self.assertEquals({}, FieldDataCache.cache_for_users(self.descriptors, course_id, []))
+
+
 class TestMissingStudentModule(TestCase):
     def setUp(self):
         self.user = UserFactory.create(username='user')
@@ -276,7 +391,7 @@ class StorageTestBase(object):
         for key in kv_dict:
             self.kvs.set(key, 'test value')
 
-        with patch('django.db.models.Model.save', side_effect=[None, DatabaseError]):
+        with patch('django.db.models.query.QuerySet.update', side_effect=[1, DatabaseError]):
             with self.assertRaises(KeyValueMultiSaveError) as exception_context:
                 self.kvs.set_many(kv_dict)
 
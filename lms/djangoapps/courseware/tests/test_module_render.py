@@ -11,6 +11,7 @@ from django.test import TestCase
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
 
+from xmodule.exceptions import NotFoundError
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.factories import ItemFactory, CourseFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
@@ -134,6 +135,27 @@ class ModuleRenderTestCase(ModuleStoreTestCase, LoginEnrollmentTestCase):
             self.course_id
         )
 
+    def test_sequence_renders_active_tab(self):
+        mock_request = MagicMock()
+        mock_request.user = self.mock_user
+        location = ['i4x', 'edX', 'toy', 'videosequence', 'Toy_Videos']
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+            self.course_id, self.mock_user, modulestore().get_instance(self.course_id, location))
+        module = render.get_module(self.mock_user, mock_request, location, field_data_cache, self.course_id)
+        names = [child.location.name for child in module.get_display_items()]
+        jump_to_position = names.index('toyjumpto') + 1
+        module.position = jump_to_position % len(names) + 1
+
+        # The toyjumpto tab isn't active, so is only rendered when asked for
+        jump_to_url = '/courses/' + self.course_id + '/jump_to_id/vertical_test'
+        html = module.get_html()
+        self.assertEqual(1, html.count('data-loaded="true"'))
+        self.assertNotIn(jump_to_url, html)
+
+        response = json.loads(module.handle_ajax('get_contents', {'position': str(jump_to_position)}))
+        self.assertIn(jump_to_url, response['content'])
+        self.assertRaises(NotFoundError, module.handle_ajax, 'get_contents', {'position': '100'})
+
     def test_xqueue_callback_success(self):
         """
         Test for happy-path xqueue_callback
@@ -746,19 +746,8 @@ def submission_history(request, course_id, student_username, location):
     except StudentModule.DoesNotExist:
         return HttpResponse(escape("{0} has never accessed problem {1}".format(student_username, location)))
 
-    history_entries = StudentModuleHistory.objects.filter(
-        student_module=student_module
-    ).order_by('-id')
-
-    # If no history records exist, let's force a save to get history started.
-    if not history_entries:
-        student_module.save()
-        history_entries = StudentModuleHistory.objects.filter(
-            student_module=student_module
-        ).order_by('-id')
-
     context = {
-        'history_entries': history_entries,
+        'history_entries': StudentModuleHistory.get_history(student_module),
         'username': student.username,
         'location': location,
         'course_id': course_id
@@ -1,6 +1,7 @@
 import pytz
 from collections import defaultdict
 import logging
+import threading
 import urllib
 from datetime import datetime
 
@@ -22,7 +23,7 @@ log = logging.getLogger(__name__)
 
 # TODO these should be cached via django's caching rather than in-memory globals
 _FULLMODULES = None
-_DISCUSSIONINFO = defaultdict(dict)
+_FULLMODULES_LOCK = threading.Lock()
 
 
 def extract(dic, keys):
@@ -65,7 +66,9 @@ def has_forum_access(uname, course_id, rolename):
 def get_full_modules():
     global _FULLMODULES
     if not _FULLMODULES:
-        _FULLMODULES = modulestore().modules
+        with _FULLMODULES_LOCK:
+            if not _FULLMODULES:
+                _FULLMODULES = modulestore().modules
     return _FULLMODULES
 
 
@@ -73,19 +76,16 @@ def get_discussion_id_map(course):
     """
         return a dict of the form {category: modules}
     """
-    initialize_discussion_info(course)
-    return _DISCUSSIONINFO[course.id]['id_map']
+    return initialize_discussion_info(course)['id_map']
 
 
 def get_discussion_title(course, discussion_id):
-    initialize_discussion_info(course)
-    title = _DISCUSSIONINFO[course.id]['id_map'].get(discussion_id, {}).get('title', '(no title)')
+    title = initialize_discussion_info(course)['id_map'].get(discussion_id, {}).get('title', '(no title)')
     return title
 
 
 def get_discussion_category_map(course):
-    initialize_discussion_info(course)
-    return filter_unstarted_categories(_DISCUSSIONINFO[course.id]['category_map'])
+    return filter_unstarted_categories(initialize_discussion_info(course)['category_map'])
 
 
 def filter_unstarted_categories(category_map):
@@ -139,6 +139,10 @@ def sort_map_entries(category_map, sort_alpha):
 
 
 def initialize_discussion_info(course):
+    """
+    Compute the discussion id map and category map of `course`, and return
+    them, as a dict with 'id_map', 'category_map' and 'timestamp' keys.
+    """
     course_id = course.id
 
     discussion_id_map = {}
@@ -216,9 +220,11 @@ def initialize_discussion_info(course):
 
     sort_map_entries(category_map, course.discussion_sort_alpha)
 
-    _DISCUSSIONINFO[course.id]['id_map'] = discussion_id_map
-    _DISCUSSIONINFO[course.id]['category_map'] = category_map
-    _DISCUSSIONINFO[course.id]['timestamp'] = datetime.now(UTC())
+    return {
+        'id_map': discussion_id_map,
+        'category_map': category_map,
+        'timestamp': datetime.now(UTC()),
+    }
 
 
 class JsonResponse(HttpResponse):
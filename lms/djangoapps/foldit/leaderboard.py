@@ -0,0 +1,184 @@
+"""
+Foldit leaderboards: the students with the lowest (best) sums of best scores
+over a set of puzzles.
+
+There is a board per course and set of puzzles, and one of all students
+(course ALL_COURSES).  Each is cached as its top BOARD_SIZE entries, which
+are updated in place when one of its students saves a score (see
+update_boards), so that showing a leaderboard doesn't sum every score.
+
+Updates read and write the cached board without a lock, so two students
+saving scores at once can lose one of the updates; boards expire after
+BOARD_TIMEOUT seconds to bound that, and can be rebuilt with the
+rebuild_foldit_leaderboards command.
+"""
+import hashlib
+
+from django.core.cache import get_cache, InvalidCacheBackendError
+from django.db.models import Sum
+
+from foldit.models import Score
+from student.models import CourseEnrollment
+
+# How many entries of each board are kept
+BOARD_SIZE = 50
+
+BOARD_TIMEOUT = 60 * 60
+
+# The course id of the board of all students
+ALL_COURSES = ''
+
+
+def _get_cache():
+    """
+    Return the cache that boards are kept in.
+    """
+    try:
+        return get_cache('foldit')
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+
+def puzzle_set(puzzles):
+    """
+    Returns `puzzles` (a puzzle id, or a list of them, as ints or strings)
+    as a sorted tuple of ints.
+    """
+    if not isinstance(puzzles, (list, tuple, set)):
+        puzzles = [puzzles]
+    return tuple(sorted(set(int(puzzle) for puzzle in puzzles)))
+
+
+def _board_key(course_id, puzzles):
+    """ The cache key of the board of `puzzles` (a puzzle_set) in `course_id` """
+    digest = hashlib.md5(','.join(str(puzzle) for puzzle in puzzles)).hexdigest()
+    return u'foldit.board.{0}.{1}'.format(course_id, digest)
+
+
+def _boards_key(course_id):
+    """ The cache key of the set of puzzle sets with a cached board in `course_id` """
+    return u'foldit.boards.{0}'.format(course_id)
+
+
+def _rank(entry):
+    """ Sort key of board entries: lowest total first, then by user id """
+    user_id, _username, total = entry
+    return (total, user_id)
+
+
+def compute_board(course_id, puzzles, size=BOARD_SIZE):
+    """
+    Returns the top `size` entries of the board of `puzzles` (a puzzle_set)
+    in `course_id`, as a list of (user_id, username, total) tuples, read
+    from the database.
+    """
+    scores = Score.objects.filter(puzzle_id__in=puzzles)
+    if course_id != ALL_COURSES:
+        scores = scores.filter(user__courseenrollment__course_id=course_id)
+    totals = scores.values('user', 'user__username') \
+        .annotate(total=Sum('best_score')) \
+        .order_by('total', 'user')[:size]
+    return [(row['user'], row['user__username'], row['total']) for row in totals]
+
+
+def rebuild_board(course_id, puzzles):
+    """
+    Recompute and cache the board of `puzzles` (a puzzle_set) in
+    `course_id`, and return it.
+    """
+    cache = _get_cache()
+    board = compute_board(course_id, puzzles)
+    cache.set(_board_key(course_id, puzzles), board, BOARD_TIMEOUT)
+
+    # Always set the course's set of boards, so that it expires after all of them.
+    boards = cache.get(_boards_key(course_id)) or set()
+    boards.add(puzzles)
+    cache.set(_boards_key(course_id), boards, BOARD_TIMEOUT)
+    return board
+
+
+def get_board(course_id, puzzles):
+    """
+    Returns the board of `puzzles` (a puzzle_set) in `course_id`, building
+    it if it isn't cached.
+    """
+    board = _get_cache().get(_board_key(course_id, puzzles))
+    if board is None:
+        board = rebuild_board(course_id, puzzles)
+    return board
+
+
+def top_n(n, puzzles, course_ids=None):
+    """
+    Returns the top `n` (user_id, username, total) entries of the board of
+    `puzzles` among the students enrolled in any of `course_ids`, or among
+    all students if `course_ids` is None.
+    """
+    puzzles = puzzle_set(puzzles)
+    if course_ids is None:
+        course_ids = [ALL_COURSES]
+
+    entries = {}
+    for course_id in course_ids:
+        if n > BOARD_SIZE:
+            board = compute_board(course_id, puzzles, n)
+        else:
+            board = get_board(course_id, puzzles)
+        for entry in board:
+            entries[entry[0]] = entry
+    return sorted(entries.itervalues(), key=_rank)[:n]
+
+
+def _update_board(course_id, puzzles, entry):
+    """
+    Put `entry`, a student's new (user_id, username, total), in the cached
+    board of `puzzles` in `course_id`, if that is cached.
+    """
+    cache = _get_cache()
+    key = _board_key(course_id, puzzles)
+    board = cache.get(key)
+    if board is None:
+        return
+
+    others = [other for other in board if other[0] != entry[0]]
+    new_board = sorted(others + [entry], key=_rank)
+    if len(board) >= BOARD_SIZE:
+        if len(others) < len(board) and _rank(entry) > _rank(board[-1]):
+            # The student was on a full board, and is now behind its last
+            # place, so students who aren't on it may be ahead of them.
+            cache.delete(key)
+            return
+        new_board = new_board[:BOARD_SIZE]
+    # A board that isn't full has every student with a score on it.
+    cache.set(key, new_board, BOARD_TIMEOUT)
+
+
+def update_boards(user, puzzle_ids):
+    """
+    Update the cached boards that `user` is on, or now belongs on, after
+    they saved scores for `puzzle_ids`.
+    """
+    changed = puzzle_set(puzzle_ids)
+    course_ids = [ALL_COURSES] + list(
+        CourseEnrollment.objects.filter(user=user).values_list('course_id', flat=True)
+    )
+    registries = _get_cache().get_many([_boards_key(course_id) for course_id in course_ids])
+
+    totals = {}
+    for course_id in course_ids:
+        for puzzles in registries.get(_boards_key(course_id), ()):
+            if set(changed).isdisjoint(puzzles):
+                continue
+            if puzzles not in totals:
+                totals[puzzles] = Score.objects.filter(user=user, puzzle_id__in=puzzles) \
+                    .aggregate(total=Sum('best_score'))['total']
+            _update_board(course_id, puzzles, (user.id, user.username, totals[puzzles]))
+
+
+def invalidate_course(course_id):
+    """
+    Drop the cached boards of `course_id`, e.g. because a student enrolled.
+    """
+    cache = _get_cache()
+    boards = cache.get(_boards_key(course_id)) or ()
+    cache.delete_many([_board_key(course_id, puzzles) for puzzles in boards] + [_boards_key(course_id)])
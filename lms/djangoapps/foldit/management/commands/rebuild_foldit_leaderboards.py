@@ -0,0 +1,46 @@
+'''
+Rebuild cached Foldit leaderboards (see foldit.leaderboard).
+
+Boards are normally updated as scores are saved, but can drift if scores or
+enrollments are changed without saving models one by one.
+'''
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from foldit.leaderboard import ALL_COURSES, puzzle_set, rebuild_board
+from foldit.models import Score
+
+LOG = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''
+    Rebuild the boards of a set of puzzles in the given courses, or in every
+    course with a score for them if none are given, and the board of all
+    students.
+    '''
+
+    args = '<puzzle_id>[,<puzzle_id>...] [<course_id> <course_id> ...]'
+    help = 'Rebuilds the leaderboards of a set of puzzles in the given courses (default: all).'
+
+    def handle(self, *args, **options):
+        if not args:
+            raise CommandError('A comma-separated list of puzzle ids is required')
+        try:
+            puzzles = puzzle_set(args[0].split(','))
+        except ValueError:
+            raise CommandError('Puzzle ids must be integers: {0}'.format(args[0]))
+
+        course_ids = args[1:]
+        if not course_ids:
+            course_ids = Score.objects.filter(puzzle_id__in=puzzles) \
+                .exclude(user__courseenrollment__course_id=None) \
+                .values_list('user__courseenrollment__course_id', flat=True) \
+                .distinct()
+
+        for course_id in [ALL_COURSES] + list(course_ids):
+            board = rebuild_board(course_id, puzzles)
+            LOG.info("Rebuilt the leaderboard of puzzles %s in %r: %d entries",
+                     puzzles, course_id or 'all courses', len(board))
@@ -2,6 +2,10 @@ import logging
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from student.models import CourseEnrollment
 
 
 log = logging.getLogger(__name__)
@@ -48,31 +52,21 @@ class Score(models.Model):
         Returns:
             The top n sum of scores for puzzles in <puzzles>,
             filtered by course. If no courses is specified we default
-            the pool of students to all courses. Output is a list
+            the pool of students to all courses. These are read from the
+            cached leaderboards (see foldit.leaderboard). Output is a list
             of dictionaries, sorted by display_score:
                 [ {username: 'a_user',
                    score: 12000} ...]
         """
 
-        if not isinstance(puzzles, list):
-            puzzles = [puzzles]
-        if course_list is None:
-            scores = Score.objects \
-                .filter(puzzle_id__in=puzzles) \
-                .annotate(total_score=models.Sum('best_score')) \
-                .order_by('total_score')[:n]
-        else:
-            scores = Score.objects \
-                .filter(puzzle_id__in=puzzles) \
-                .filter(user__courseenrollment__course_id__in=course_list) \
-                .annotate(total_score=models.Sum('best_score')) \
-                .order_by('total_score')[:n]
-        num = len(puzzles)
+        # Late import, as the leaderboards use this model.
+        from foldit.leaderboard import puzzle_set, top_n
 
+        num = len(puzzle_set(puzzles))
         return [
-            {'username': score.user.username,
-             'score': Score.display_score(score.total_score, num)}
-            for score in scores
+            {'username': username,
+             'score': Score.display_score(total, num)}
+            for _user_id, username, total in top_n(n, puzzles, course_list)
         ]
 
 
@@ -142,3 +136,17 @@ class PuzzleComplete(models.Model):
 
         return complete.exists()
 
+
+@receiver(post_save, sender=CourseEnrollment)
+def drop_leaderboards_on_enroll(sender, instance, created, **kwargs):  # pylint: disable=W0613
+    """Drop the cached leaderboards of a course that a student joined."""
+    if created:
+        from foldit.leaderboard import invalidate_course
+        invalidate_course(instance.course_id)
+
+
+@receiver(post_delete, sender=CourseEnrollment)
+def drop_leaderboards_on_enrollment_delete(sender, instance, **kwargs):  # pylint: disable=W0613
+    """Drop the cached leaderboards of a course that a student left."""
+    from foldit.leaderboard import invalidate_course
+    invalidate_course(instance.course_id)
@@ -2,9 +2,13 @@ import json
 import logging
 from functools import partial
 
+from django.core.cache import get_cache
+from django.core.management import call_command
 from django.test import TestCase
 from django.test.client import RequestFactory
+from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
+from mock import patch
 
 from foldit.views import foldit_ops, verify_code
 from foldit.models import PuzzleComplete, Score
@@ -17,9 +21,13 @@ from pytz import UTC
 log = logging.getLogger(__name__)
 
 
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                       'LOCATION': 'foldit_tests'}})
 class FolditTestCase(TestCase):
 
     def setUp(self):
+        # The leaderboards are cached, and the cache outlives each test's database.
+        get_cache('default').clear()
         self.factory = RequestFactory()
         self.url = reverse('foldit_ops')
 
@@ -265,6 +273,67 @@ class FolditTestCase(TestCase):
                              "ErrorCode": "VerifyFailed"}]))
 
 
+    def test_leaderboard_updated_in_place(self):
+        puzzle_id = 1
+        self.make_puzzle_score_request(puzzle_id, 0.08, self.user)
+        self.assertEqual(len(Score.get_tops_n(10, puzzle_id)), 1)
+        self.assertEqual(len(Score.get_tops_n(10, puzzle_id, [self.course_id2])), 0)
+
+        # user2 joins the cached boards without them being summed again
+        self.make_puzzle_score_request(puzzle_id, 0.02, self.user2)
+        with self.assertNumQueries(0):
+            top_10 = Score.get_tops_n(10, puzzle_id)
+            course_2_top_10 = Score.get_tops_n(10, puzzle_id, [self.course_id2])
+        self.assertEqual([leader['username'] for leader in top_10],
+                         [self.user2.username, self.user.username])
+        self.assertEqual([leader['username'] for leader in course_2_top_10],
+                         [self.user2.username])
+
+    def test_leaderboard_of_several_puzzles(self):
+        self.make_puzzle_score_request([1, 2], [0.03, 0.04], self.user)
+        self.make_puzzle_score_request([1], [0.01], self.user2)
+        top_10 = Score.get_tops_n(10, [1, 2])
+        self.assertEqual([leader['username'] for leader in top_10],
+                         [self.user2.username, self.user.username])
+
+        # The board is updated with the sum of both puzzles' scores
+        self.make_puzzle_score_request([2], [0.01], self.user2)
+        top_10 = Score.get_tops_n(10, ['1', '2'])
+        self.assertAlmostEqual(top_10[0]['score'], Score.display_score(0.02, 2))
+        self.assertAlmostEqual(top_10[1]['score'], Score.display_score(0.07, 2))
+
+    @patch('foldit.leaderboard.BOARD_SIZE', 1)
+    def test_leaderboard_full(self):
+        puzzle_id = 1
+        self.make_puzzle_score_request(puzzle_id, 0.02, self.user)
+        self.make_puzzle_score_request(puzzle_id, 0.03, self.user2)
+        self.assertEqual(Score.get_tops_n(1, puzzle_id)[0]['username'], self.user.username)
+
+        # Falling off a full board rebuilds it, as the next student isn't on it
+        self.make_puzzle_score_request(puzzle_id, 0.04, self.user)
+        self.assertEqual(Score.get_tops_n(1, puzzle_id)[0]['username'], self.user2.username)
+
+    def test_enrollment_drops_leaderboards(self):
+        puzzle_id = 1
+        self.make_puzzle_score_request(puzzle_id, 0.02, self.user)
+        self.assertEqual(Score.get_tops_n(10, puzzle_id, [self.course_id2]), [])
+
+        CourseEnrollmentFactory.create(user=self.user, course_id=self.course_id2)
+        course_2_top_10 = Score.get_tops_n(10, puzzle_id, [self.course_id2])
+        self.assertEqual([leader['username'] for leader in course_2_top_10], [self.user.username])
+
+    def test_rebuild_leaderboards(self):
+        puzzle_id = 1
+        self.make_puzzle_score_request(puzzle_id, 0.02, self.user)
+        Score.objects.update(best_score=0.05)
+
+        call_command('rebuild_foldit_leaderboards', str(puzzle_id))
+        with self.assertNumQueries(0):
+            top_10 = Score.get_tops_n(10, puzzle_id)
+            course_1_top_10 = Score.get_tops_n(10, puzzle_id, [self.course_id])
+        self.assertEqual(top_10, course_1_top_10)
+        self.assertAlmostEqual(top_10[0]['score'], Score.display_score(0.05))
+
     def make_puzzles_complete_request(self, puzzles):
         """
         Make a puzzles complete request, given an array of
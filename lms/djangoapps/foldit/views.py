@@ -7,6 +7,7 @@ from django.http import HttpResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 
+from foldit.leaderboard import update_boards
 from foldit.models import Score, PuzzleComplete
 from student.models import unique_id_for_user
 
@@ -143,6 +144,9 @@ def save_scores(user, puzzle_scores):
         score_responses.append({'PuzzleID': puzzle_id,
                                 'Status': 'Success'})
 
+    if puzzle_scores:
+        update_boards(user, [score['PuzzleID'] for score in puzzle_scores])
+
     return {"OperationID": "SetPlayerPuzzleScores", "Value": score_responses}
 
 
@@ -5,28 +5,36 @@ Does not include any access control, be sure to check access before calling.
 """
 
 import json
+import logging
 from django.contrib.auth.models import User
-from student.models import CourseEnrollment, CourseEnrollmentAllowed
+from django.db import transaction
+from student.models import CourseEnrollment, CourseEnrollmentAllowed, invalidate_dashboards
 from courseware.models import StudentModule
 
+log = logging.getLogger(__name__)
+
+# How many emails bulk_update_enrollment looks up and changes at a time.
+BULK_ENROLLMENT_CHUNK_SIZE = 500
+
 
 class EmailEnrollmentState(object):
     """ Store the complete enrollment state of an email in a class """
     def __init__(self, course_id, email):
-        exists_user = User.objects.filter(email=email).exists()
-        if exists_user:
-            user = User.objects.get(email=email)
-            exists_ce = CourseEnrollment.is_enrolled(user, course_id)
-        else:
-            exists_ce = False
-        ceas = CourseEnrollmentAllowed.objects.filter(course_id=course_id, email=email).all()
-        exists_allowed = len(ceas) > 0
-        state_auto_enroll = exists_allowed and ceas[0].auto_enroll
-
-        self.user = exists_user
-        self.enrollment = exists_ce
-        self.allowed = exists_allowed
-        self.auto_enroll = bool(state_auto_enroll)
+        state = get_email_enrollment_states(course_id, [email])[email]
+        self.user = state.user
+        self.enrollment = state.enrollment
+        self.allowed = state.allowed
+        self.auto_enroll = state.auto_enroll
+
+    @classmethod
+    def from_flags(cls, user, enrollment, allowed, auto_enroll):
+        """ Make an EmailEnrollmentState from already known values, without queries """
+        state = cls.__new__(cls)
+        state.user = user
+        state.enrollment = enrollment
+        state.allowed = allowed
+        state.auto_enroll = bool(auto_enroll)
+        return state
 
     def __repr__(self):
         return "{}(user={}, enrollment={}, allowed={}, auto_enroll={})".format(
@@ -54,6 +62,170 @@ class EmailEnrollmentState(object):
         }
 
 
+def _user_ids_by_email(emails):
+    """
+    Returns a dict mapping the lowercased email of each user among `emails`
+    to their id.  Emails are matched case-insensitively, as by MySQL.
+    """
+    return dict(
+        (email.lower(), user_id)
+        for email, user_id in User.objects.filter(email__in=emails).values_list('email', 'id')
+    )
+
+
+def get_email_enrollment_states(course_id, emails, user_ids=None):
+    """
+    Returns a dict mapping each of `emails` to its EmailEnrollmentState in
+    `course_id`, with three queries however many emails there are.
+
+    `user_ids` is the result of _user_ids_by_email(emails), if the caller
+    already has it.
+    """
+    if user_ids is None:
+        user_ids = _user_ids_by_email(emails)
+    enrolled_user_ids = set(CourseEnrollment.objects.filter(
+        course_id=course_id,
+        user__in=user_ids.values(),
+        is_active=True,
+    ).values_list('user_id', flat=True))
+    auto_enroll_by_email = dict(
+        (email.lower(), auto_enroll)
+        for email, auto_enroll in CourseEnrollmentAllowed.objects.filter(
+            course_id=course_id,
+            email__in=emails,
+        ).values_list('email', 'auto_enroll')
+    )
+
+    states = {}
+    for email in emails:
+        user_id = user_ids.get(email.lower())
+        auto_enroll = auto_enroll_by_email.get(email.lower())
+        states[email] = EmailEnrollmentState.from_flags(
+            user=user_id is not None,
+            enrollment=user_id in enrolled_user_ids,
+            allowed=auto_enroll is not None,
+            auto_enroll=auto_enroll,
+        )
+    return states
+
+
+def _enroll_user_ids(course_id, user_ids):
+    """
+    Enroll the users with ids `user_ids` in `course_id`, as
+    CourseEnrollment.enroll does, with a fixed number of queries.
+    """
+    enrollments = CourseEnrollment.objects.filter(course_id=course_id, user__in=user_ids)
+    # Reactivate deactivated enrollments and reset their mode, like
+    # CourseEnrollment.create_enrollment.
+    enrollments.exclude(is_active=True, mode="honor").update(is_active=True, mode="honor")
+    existing = set(enrollments.values_list('user_id', flat=True))
+    CourseEnrollment.objects.bulk_create([
+        CourseEnrollment(user_id=user_id, course_id=course_id, is_active=True, mode="honor")
+        for user_id in user_ids if user_id not in existing
+    ])
+
+
+def _enroll_emails(course_id, emails, user_ids, auto_enroll):
+    """
+    Enroll the users among `emails` in `course_id`, and allow the rest to
+    enroll (automatically once they register, if `auto_enroll`).
+    """
+    _enroll_user_ids(course_id, set(user_ids.values()))
+
+    unregistered = [email for email in emails if email.lower() not in user_ids]
+    allowed = CourseEnrollmentAllowed.objects.filter(course_id=course_id, email__in=unregistered)
+    allowed.exclude(auto_enroll=auto_enroll).update(auto_enroll=auto_enroll)
+    existing = set(email.lower() for email in allowed.values_list('email', flat=True))
+    CourseEnrollmentAllowed.objects.bulk_create([
+        CourseEnrollmentAllowed(email=email, course_id=course_id, auto_enroll=auto_enroll)
+        for email in unregistered if email.lower() not in existing
+    ])
+
+
+def _unenroll_emails(course_id, emails, user_ids, auto_enroll):  # pylint: disable=W0613
+    """
+    Unenroll the users among `emails` from `course_id`, and stop allowing any
+    of `emails` to enroll.
+    """
+    CourseEnrollment.objects.filter(
+        course_id=course_id,
+        user__in=user_ids.values(),
+        is_active=True,
+    ).update(is_active=False)
+    CourseEnrollmentAllowed.objects.filter(course_id=course_id, email__in=emails).delete()
+
+
+BULK_ENROLLMENT_ACTIONS = {
+    'enroll': _enroll_emails,
+    'unenroll': _unenroll_emails,
+}
+
+
+def _update_chunk(course_id, emails, action, auto_enroll):
+    """
+    Apply `action` to `emails` in a transaction of its own, returning a list
+    of (email, before, after) with the EmailEnrollmentStates before and
+    after the change.
+
+    The dashboards of the users are only invalidated once the change is
+    committed, so that a concurrent request can't cache them unchanged.
+    """
+    with transaction.commit_on_success():
+        user_ids = _user_ids_by_email(emails)
+        before = get_email_enrollment_states(course_id, emails, user_ids)
+        BULK_ENROLLMENT_ACTIONS[action](course_id, emails, user_ids, auto_enroll)
+        after = get_email_enrollment_states(course_id, emails, user_ids)
+    # update and bulk_create don't send the save signals.
+    invalidate_dashboards(user_ids.values())
+    return [(email, before[email], after[email]) for email in emails]
+
+
+def _iter_bulk_update(course_id, emails, action, auto_enroll):
+    """ The generator that bulk_update_enrollment returns """
+    for start in xrange(0, len(emails), BULK_ENROLLMENT_CHUNK_SIZE):
+        chunk = emails[start:start + BULK_ENROLLMENT_CHUNK_SIZE]
+        try:
+            results = _update_chunk(course_id, chunk, action, auto_enroll)
+        except Exception:  # pylint: disable=W0703
+            # Don't let one bad email fail the rest of the chunk: redo it one
+            # email at a time.
+            log.exception("Error while %sing a chunk of students in %s, retrying one at a time", action, course_id)
+            results = []
+            for email in chunk:
+                try:
+                    results.extend(_update_chunk(course_id, [email], action, auto_enroll))
+                except Exception:  # pylint: disable=W0703
+                    log.exception("Error while %sing student %s in %s", action, email, course_id)
+                    results.append((email, None, None))
+        for result in results:
+            yield result
+
+
+def bulk_update_enrollment(course_id, emails, action, auto_enroll=False):
+    """
+    Enroll (`action` 'enroll') or unenroll (`action` 'unenroll') students by
+    email, as enroll_email and unenroll_email do, but with a fixed number of
+    queries for every BULK_ENROLLMENT_CHUNK_SIZE emails.
+
+    Returns a generator of (email, before, after) for each of the distinct
+    `emails`, in order, where before and after are the EmailEnrollmentStates
+    before and after the change, or both None if the email couldn't be
+    changed.  The changes are made and committed as the generator is
+    consumed, a chunk at a time.
+
+    Raises ValueError if `action` is unrecognized.
+    """
+    if action not in BULK_ENROLLMENT_ACTIONS:
+        raise ValueError("Unrecognized action '{}'".format(action))
+    seen = set()
+    distinct_emails = []
+    for email in emails:
+        if email.lower() not in seen:
+            seen.add(email.lower())
+            distinct_emails.append(email)
+    return _iter_bulk_update(course_id, distinct_emails, action, auto_enroll)
+
+
 def enroll_email(course_id, student_email, auto_enroll=False):
     """
     Enroll a student by email.
@@ -66,17 +238,7 @@ def enroll_email(course_id, student_email, auto_enroll=False):
     returns two EmailEnrollmentState's
         representing state before and after the action.
     """
-
-    previous_state = EmailEnrollmentState(course_id, student_email)
-
-    if previous_state.user:
-        CourseEnrollment.enroll_by_email(student_email, course_id)
-    else:
-        cea, _ = CourseEnrollmentAllowed.objects.get_or_create(course_id=course_id, email=student_email)
-        cea.auto_enroll = auto_enroll
-        cea.save()
-
-    after_state = EmailEnrollmentState(course_id, student_email)
+    [(_, previous_state, after_state)] = _update_chunk(course_id, [student_email], 'enroll', auto_enroll)
 
     return previous_state, after_state
 
@@ -90,16 +252,7 @@ def unenroll_email(course_id, student_email):
     returns two EmailEnrollmentState's
         representing state before and after the action.
     """
-
-    previous_state = EmailEnrollmentState(course_id, student_email)
-
-    if previous_state.enrollment:
-        CourseEnrollment.unenroll_by_email(student_email, course_id)
-
-    if previous_state.allowed:
-        CourseEnrollmentAllowed.objects.get(course_id=course_id, email=student_email).delete()
-
-    after_state = EmailEnrollmentState(course_id, student_email)
+    [(_, previous_state, after_state)] = _update_chunk(course_id, [student_email], 'unenroll', False)
 
     return previous_state, after_state
 
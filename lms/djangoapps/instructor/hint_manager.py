@@ -22,6 +22,10 @@ import courseware.model_data as model_data
 from xmodule.modulestore import Location
 from xmodule.modulestore.django import modulestore
 
+# Students' votes on hints are tallied in these counters, and added to the
+# votes stored in the 'hints' field when shown.  See CrowdsourceHinterModule.
+HINT_VOTES = 'hint_votes'
+
 
 @ensure_csrf_cookie
 def hint_manager(request, course_id):
@@ -118,8 +122,11 @@ def get_hints(request, course_id, field):
                 # Put all non-numerical answers first.
                 return float('-inf')
 
+        problem_dict = json.loads(hints_by_problem.value)
+        if field == 'hints':
+            add_vote_counts(hints_by_problem.usage_id, problem_dict)
         # Answer list contains [answer, dict_of_hints] pairs.
-        answer_list = sorted(json.loads(hints_by_problem.value).items(), key=answer_sorter)
+        answer_list = sorted(problem_dict.items(), key=answer_sorter)
         big_out_dict[hints_by_problem.usage_id] = answer_list
 
     render_dict = {'field': field,
@@ -131,6 +138,19 @@ def get_hints(request, course_id, field):
     return render_dict
 
 
+def add_vote_counts(problem_id, problem_dict):
+    """
+    Add the votes tallied in counters for `problem_id` to the votes in
+    `problem_dict`, which maps answers to {pk: [hint, votes]} dicts.
+    """
+    vote_counts = model_data.DjangoCounterStore().get_counts(problem_id, HINT_VOTES)
+    if not vote_counts:
+        return
+    for hints in problem_dict.values():
+        for pk, hint in hints.items():
+            hint[1] += vote_counts.get(str(pk), 0)
+
+
 def location_to_problem_name(course_id, loc):
     """
     Given the location of a crowdsource_hinter module, try to return the name of the
@@ -170,6 +190,8 @@ def delete_hints(request, course_id, field):
         del problem_dict[answer][pk]
         this_problem.value = json.dumps(problem_dict)
         this_problem.save()
+        if field == 'hints':
+            model_data.DjangoCounterStore().reset(problem_id, HINT_VOTES, [pk])
 
 
 def change_votes(request, course_id, field):
@@ -196,6 +218,9 @@ def change_votes(request, course_id, field):
         problem_dict[answer][pk][1] = int(new_votes)
         this_problem.value = json.dumps(problem_dict)
         this_problem.save()
+        if field == 'hints':
+            # new_votes replaces the votes tallied so far.
+            model_data.DjangoCounterStore().reset(problem_id, HINT_VOTES, [pk])
 
 
 def add_hint(request, course_id, field):
@@ -3,7 +3,10 @@
 # django management command: dump grades to csv files
 # for use by batch processes
 
-from instructor.offline_gradecalc import offline_grade_calculation
+from optparse import make_option
+
+from instructor.offline_gradecalc import (offline_grade_calculation, parallel_offline_grade_calculation,
+                                          DEFAULT_SHARD_SIZE)
 from courseware.courses import get_course_by_id
 from xmodule.modulestore.django import modulestore
 
@@ -16,6 +19,32 @@ class Command(BaseCommand):
     help += "   course_id_or_dir: either course_id or course_dir\n"
     help += 'Example course_id: MITx/8.01rq_MW/Classical_Mechanics_Reading_Questions_Fall_2012_MW_Section'
 
+    option_list = BaseCommand.option_list + (
+        make_option('-p', '--parallel',
+                    action='store_true',
+                    dest='parallel',
+                    default=False,
+                    help='Grade shards of students in parallel. Interrupted runs '
+                    'resume where they stopped when the command is run again.'),
+        make_option('--shard-size',
+                    type='int',
+                    dest='shard_size',
+                    default=DEFAULT_SHARD_SIZE,
+                    help='Number of students per shard in --parallel mode'),
+        make_option('--processes',
+                    type='int',
+                    dest='processes',
+                    default=None,
+                    help='Number of grading processes in --parallel mode '
+                    '(default: one per cpu)'),
+        make_option('--celery',
+                    action='store_true',
+                    dest='celery',
+                    default=False,
+                    help='In --parallel mode, grade the shards with celery '
+                    'workers instead of local processes'),
+    )
+
     def handle(self, *args, **options):
 
         print "args = ", args
@@ -40,4 +69,8 @@ class Command(BaseCommand):
         print "-----------------------------------------------------------------------------"
         print "Computing grades for %s" % (course.id)
 
-        offline_grade_calculation(course.id)
+        if options['parallel']:
+            parallel_offline_grade_calculation(course.id, shard_size=options['shard_size'],
+                                               processes=options['processes'], use_celery=options['celery'])
+        else:
+            offline_grade_calculation(course.id)
@@ -6,12 +6,30 @@
 # The grades are stored in the OfflineComputedGrade table of the courseware model.
 
 import json
+import logging
+import multiprocessing
 import time
 
 from json import JSONEncoder
 from courseware import grades, models
 from courseware.courses import get_course_by_id
+from courseware.model_data import chunks
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache, get_cache
+from django.db import connection, transaction
+from django.utils import timezone
+from xmodule.contentstore import django as contentstore_django
+from xmodule.modulestore import django as modulestore_django
+
+log = logging.getLogger(__name__)
+
+# Default number of students per shard of parallel_offline_grade_calculation
+DEFAULT_SHARD_SIZE = 200
+
+# Number of OfflineComputedGrades inserted per query; gradesets with raw
+# scores can be large.
+INSERT_BATCH_SIZE = 50
 
 
 class MyEncoder(JSONEncoder):
@@ -71,6 +89,213 @@ def offline_grade_calculation(course_id):
     print "All Done!"
 
 
+def _enrolled_students(course_id):
+    """ The students actively enrolled in `course_id` """
+    return User.objects.filter(
+        courseenrollment__course_id=course_id,
+        courseenrollment__is_active=1
+    )
+
+
+def _plan_shards(course_id, shard_size):
+    """
+    Returns the OfflineComputedGradeShards of the calculation of `course_id`'s
+    grades, creating them if there is no unfinished calculation.
+
+    Shards cover consecutive ranges of user ids, so that students who enroll
+    during the calculation are graded along with their range.  When resuming,
+    students with ids above the last shard's get new shards.
+    """
+    shards = list(models.OfflineComputedGradeShard.objects.filter(course_id=course_id).order_by('first_user_id'))
+    first_user_id = shards[-1].last_user_id + 1 if shards else 0
+    student_ids = _enrolled_students(course_id).filter(
+        id__gte=first_user_id
+    ).order_by('id').values_list('id', flat=True)
+
+    new_shards = []
+    for shard_ids in chunks(student_ids, shard_size):
+        new_shards.append(models.OfflineComputedGradeShard(
+            course_id=course_id,
+            first_user_id=first_user_id,
+            last_user_id=shard_ids[-1],
+        ))
+        first_user_id = shard_ids[-1] + 1
+    if new_shards:
+        models.OfflineComputedGradeShard.objects.bulk_create(new_shards)
+        shards = list(models.OfflineComputedGradeShard.objects.filter(course_id=course_id).order_by('first_user_id'))
+    return shards
+
+
+def _save_gradesets(course_id, gradesets):
+    """
+    Save `gradesets`, a dict mapping user ids to encoded gradesets, as the
+    OfflineComputedGrades of `course_id`: existing rows are updated, and the
+    rest inserted in batches.
+    """
+    existing = dict(models.OfflineComputedGrade.objects.filter(
+        course_id=course_id,
+        user__in=gradesets.keys(),
+    ).values_list('user_id', 'id'))
+
+    now = timezone.now()
+    for user_id, ocg_id in existing.iteritems():
+        models.OfflineComputedGrade.objects.filter(id=ocg_id).update(gradeset=gradesets[user_id], updated=now)
+
+    new_user_ids = [user_id for user_id in gradesets if user_id not in existing]
+    for batch in chunks(new_user_ids, INSERT_BATCH_SIZE):
+        models.OfflineComputedGrade.objects.bulk_create([
+            models.OfflineComputedGrade(user_id=user_id, course_id=course_id, gradeset=gradesets[user_id])
+            for user_id in batch
+        ])
+
+
+def grade_shard(shard_id):
+    '''
+    Compute the grades of the students in the OfflineComputedGradeShard with
+    id `shard_id`, save them and mark the shard completed, in one transaction.
+
+    Returns (nstudents, seconds) for the shard.  Students who can't be graded
+    are logged and keep their previous offline grades.
+    '''
+    tstart = time.time()
+    shard = models.OfflineComputedGradeShard.objects.get(id=shard_id)
+    if shard.completed is not None:
+        return shard.nstudents, shard.seconds
+
+    course = get_course_by_id(shard.course_id)
+    students = _enrolled_students(shard.course_id).filter(
+        id__gte=shard.first_user_id,
+        id__lte=shard.last_user_id,
+    ).prefetch_related("groups").order_by('id')
+
+    enc = MyEncoder()
+    gradesets = {}
+    nstudents = 0
+    for student, gradeset, err_msg in grades.iterate_grades_for(course, students, keep_raw_scores=True):
+        nstudents += 1
+        if not err_msg:
+            gradesets[student.id] = enc.encode(gradeset)
+
+    with transaction.commit_on_success():
+        _save_gradesets(shard.course_id, gradesets)
+        shard.completed = timezone.now()
+        shard.nstudents = nstudents
+        shard.seconds = int(time.time() - tstart)
+        shard.save()
+
+    return shard.nstudents, shard.seconds
+
+
+def _grade_shard_or_log(shard_id):
+    '''
+    grade_shard, returning None if it fails, so that the other shards carry on.
+    '''
+    try:
+        return grade_shard(shard_id)
+    except Exception:  # pylint: disable=W0703
+        log.exception("Error grading offline grade shard %s", shard_id)
+        return None
+
+
+def _init_grading_process():
+    '''
+    Runs in each process of parallel_offline_grade_calculation's pool, so
+    that it doesn't share the cache and Mongo connections it inherited.
+
+    The modulestores and contentstores, with their Mongo connections and
+    metadata inheritance caches, are dropped so that they are made again by
+    the process.  Every configured cache is closed, as well as the default
+    one, so that any client that was already connected reconnects.
+    '''
+    for store in modulestore_django._MODULESTORES.values():  # pylint: disable=W0212
+        metadata_cache = getattr(store, 'metadata_inheritance_cache_subsystem', None)
+        if hasattr(metadata_cache, 'close'):
+            metadata_cache.close()
+    modulestore_django.clear_existing_modulestores()
+    contentstore_django._CONTENTSTORE.clear()  # pylint: disable=W0212
+
+    for backend in [cache] + [get_cache(alias) for alias in settings.CACHES]:
+        if hasattr(backend, 'close'):
+            backend.close()
+
+
+def _finish_calculation(course_id):
+    '''
+    If all the shards of `course_id`'s calculation are completed, log the
+    calculation in an OfflineComputedGradeLog and delete the shards.
+
+    Returns the OfflineComputedGradeLog, or None if some shards are left.
+    '''
+    shards = list(models.OfflineComputedGradeShard.objects.filter(course_id=course_id))
+    if any(shard.completed is None for shard in shards):
+        return None
+
+    started = min(shard.created for shard in shards) if shards else timezone.now()
+    nstudents = sum(shard.nstudents for shard in shards)
+    grading_seconds = sum(shard.seconds for shard in shards)
+    dt = int((timezone.now() - started).total_seconds())
+
+    with transaction.commit_on_success():
+        ocgl = models.OfflineComputedGradeLog(course_id=course_id, seconds=dt, nstudents=nstudents)
+        ocgl.save()
+        models.OfflineComputedGradeShard.objects.filter(id__in=[shard.id for shard in shards]).delete()
+
+    print "%d students in %d seconds, %d seconds of grading in %d shards" % (
+        nstudents, dt, grading_seconds, len(shards)
+    )
+    return ocgl
+
+
+def _print_shard_result(result):
+    """ Report the result of _grade_shard_or_log """
+    if result is not None:
+        print "%d students graded in %d seconds" % result
+
+
+def parallel_offline_grade_calculation(course_id, shard_size=DEFAULT_SHARD_SIZE, processes=None, use_celery=False):
+    '''
+    Compute grades for all students for a specified course, and save results to
+    the DB, like offline_grade_calculation but `shard_size` students at a time,
+    with the shards graded in parallel: by a pool of `processes` worker processes
+    (by default, one per cpu), or by celery workers if `use_celery`.
+
+    Each shard is checkpointed as it is completed, so running this again after
+    an interruption only grades the shards that are left.  Once every shard is
+    completed, an OfflineComputedGradeLog is written.  Returns it, or None if
+    some shards failed.
+    '''
+    shards = _plan_shards(course_id, shard_size)
+    pending = [shard.id for shard in shards if shard.completed is None]
+    print "%d shards, %d to grade" % (len(shards), len(pending))
+
+    if use_celery and pending:
+        # imported here, since instructor.tasks imports this module
+        from celery import group
+        from instructor.tasks import compute_offline_grade_shard
+        group(compute_offline_grade_shard.s(shard_id) for shard_id in pending).apply_async().join(propagate=False)
+    elif processes == 1:
+        for shard_id in pending:
+            _print_shard_result(_grade_shard_or_log(shard_id))
+    elif pending:
+        # The processes must open their own database connections.
+        connection.close()
+        pool = multiprocessing.Pool(processes, initializer=_init_grading_process)
+        try:
+            for result in pool.imap_unordered(_grade_shard_or_log, pending):
+                _print_shard_result(result)
+        finally:
+            pool.close()
+            pool.join()
+
+    ocgl = _finish_calculation(course_id)
+    if ocgl is None:
+        log.error("Some grade shards of %s failed, run again to retry them", course_id)
+    else:
+        print ocgl
+        print "All Done!"
+    return ocgl
+
+
 def offline_grades_available(course_id):
     '''
     Returns False if no offline grades available for specified course.
@@ -0,0 +1,17 @@
+"""
+Celery tasks of the instructor app
+"""
+from celery import task
+
+from instructor.offline_gradecalc import grade_shard
+
+
+@task  # pylint: disable=E1102
+def compute_offline_grade_shard(shard_id):
+    """
+    Compute and save the offline grades of one OfflineComputedGradeShard (see
+    instructor.offline_gradecalc.parallel_offline_grade_calculation).
+
+    Returns (nstudents, seconds) for the shard.
+    """
+    return grade_shard(shard_id)
@@ -7,12 +7,14 @@ import json
 import requests
 from urllib import quote
 from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
 from nose.tools import raises
 from mock import Mock, patch
 from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
 from django.http import HttpRequest, HttpResponse
+from django.core.files.uploadedfile import SimpleUploadedFile
 
 from django.contrib.auth.models import User
 from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
@@ -118,6 +120,7 @@ class TestInstructorAPIDenyLevels(ModuleStoreTestCase, LoginEnrollmentTestCase):
             'get_grading_config',
             'get_students_features',
             'get_distribution',
+            'get_problem_grade_histogram',
             'get_student_progress_url',
             'reset_student_attempts',
             'rescore_problem',
@@ -270,6 +273,82 @@ class TestInstructorAPIEnrollment(ModuleStoreTestCase, LoginEnrollmentTestCase):
         res_json = json.loads(response.content)
         self.assertEqual(res_json, expected)
 
+    def test_enroll_from_csv(self):
+        url = reverse('students_update_enrollment', kwargs={'course_id': self.course.id})
+        csv_file = SimpleUploadedFile(
+            'students.csv',
+            "name,email\r\nRobot,{}\r\nNobody,{}\r\n".format(
+                self.notenrolled_student.email, self.notregistered_email
+            )
+        )
+        response = self.client.post(url + '?action=enroll', {'emails_csv': csv_file})
+        self.assertEqual(response.status_code, 200)
+
+        res_json = json.loads(response.content)
+        self.assertEqual(
+            [result['email'] for result in res_json['results']],
+            [self.notenrolled_student.email, self.notregistered_email]
+        )
+        self.assertTrue(CourseEnrollment.is_enrolled(self.notenrolled_student, self.course.id))
+
+    def test_enroll_post_with_csv(self):
+        url = reverse('students_update_enrollment', kwargs={'course_id': self.course.id})
+        csv_file = SimpleUploadedFile('students.csv', "{}\r\n".format(self.notregistered_email))
+        response = self.client.post(url, {
+            'action': 'enroll',
+            'emails': self.notenrolled_student.email,
+            'auto_enroll': 'true',
+            'emails_csv': csv_file,
+        })
+        self.assertEqual(response.status_code, 200)
+
+        res_json = json.loads(response.content)
+        self.assertTrue(res_json['auto_enroll'])
+        self.assertEqual(
+            [result['email'] for result in res_json['results']],
+            [self.notenrolled_student.email, self.notregistered_email]
+        )
+        self.assertTrue(CourseEnrollment.is_enrolled(self.notenrolled_student, self.course.id))
+        self.assertTrue(res_json['results'][1]['after']['auto_enroll'])
+
+    def test_enroll_post_with_non_utf8_csv(self):
+        url = reverse('students_update_enrollment', kwargs={'course_id': self.course.id})
+        csv_file = SimpleUploadedFile('students.csv', u"r\xe9sum\xe9@example.com\r\n".encode('latin-1'))
+        response = self.client.post(url, {'action': 'enroll', 'emails_csv': csv_file})
+        self.assertEqual(response.status_code, 400)
+
+    def test_no_emails(self):
+        url = reverse('students_update_enrollment', kwargs={'course_id': self.course.id})
+        response = self.client.get(url, {'emails': '', 'action': 'enroll'})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(BULK_ENROLLMENT_ASYNC_THRESHOLD=1)
+    def test_enroll_in_background(self):
+        url = reverse('students_update_enrollment', kwargs={'course_id': self.course.id})
+        emails = [self.notenrolled_student.email, self.notregistered_email]
+        with patch.object(instructor_task.api, 'submit_bulk_update_enrollment') as submit:
+            submit.return_value = Mock(task_id='robot-task-id')
+            response = self.client.post(url, {'emails': ','.join(emails), 'action': 'enroll'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(submit.call_args[0][1:], (self.course.id, 'enroll', emails, False))
+        self.assertEqual(json.loads(response.content), {
+            'action': 'enroll',
+            'auto_enroll': False,
+            'results': [],
+            'task': 'created',
+            'task_id': 'robot-task-id',
+            'total': 2,
+        })
+
+    @override_settings(BULK_ENROLLMENT_ASYNC_THRESHOLD=1)
+    def test_no_background_tasks(self):
+        url = reverse('students_update_enrollment', kwargs={'course_id': self.course.id})
+        emails = [self.notenrolled_student.email, self.notregistered_email]
+        with patch.dict(settings.MITX_FEATURES, {'ENABLE_INSTRUCTOR_BACKGROUND_TASKS': False}):
+            response = self.client.post(url, {'emails': ','.join(emails), 'action': 'enroll'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['results']), 2)
+
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
 class TestInstructorAPILevelsAccess(ModuleStoreTestCase, LoginEnrollmentTestCase):
@@ -421,6 +500,7 @@ class TestInstructorAPILevelsDataDump(ModuleStoreTestCase, LoginEnrollmentTestCa
     Test endpoints that show data without side effects.
     """
     def setUp(self):
+        cache.clear()
         self.instructor = AdminFactory.create()
         self.course = CourseFactory.create()
         self.client.login(username=self.instructor.username, password='test')
@@ -496,6 +576,30 @@ class TestInstructorAPILevelsDataDump(ModuleStoreTestCase, LoginEnrollmentTestCa
         self.assertEqual(res_json['feature_results']['data']['no_data'], 0)
         self.assertEqual(res_json['feature_results']['choices_display_names']['no_data'], 'No Data')
 
+    def test_get_problem_grade_histogram(self):
+        """ Test that the histogram reflects student grades on the problem. """
+        problem_urlname = 'robot-some-problem-urlname'
+        for index, student in enumerate(self.students):
+            StudentModule.objects.create(
+                student=student,
+                course_id=self.course.id,
+                module_state_key=_msk_from_problem_urlname(self.course.id, problem_urlname),
+                grade=float(index % 2),
+                max_grade=1,
+            )
+
+        url = reverse('get_problem_grade_histogram', kwargs={'course_id': self.course.id})
+        response = self.client.get(url, {'problem_urlname': problem_urlname})
+        self.assertEqual(response.status_code, 200)
+        res_json = json.loads(response.content)
+        self.assertEqual(res_json['histogram'], [[0.0, 3], [1.0, 3]])
+
+    def test_get_problem_grade_histogram_noparams(self):
+        """ Test that the endpoint 400's without the required query params. """
+        url = reverse('get_problem_grade_histogram', kwargs={'course_id': self.course.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 400)
+
     def test_get_student_progress_url(self):
         """ Test that progress_url is in the successful response. """
         url = reverse('get_student_progress_url', kwargs={'course_id': self.course.id})
@@ -4,14 +4,19 @@ Unit tests for instructor.enrollment methods.
 
 import json
 from abc import ABCMeta
+from contextlib import contextmanager
+from mock import patch
 from django.contrib.auth.models import User
+from django.db import connection
 from courseware.models import StudentModule
 from django.test import TestCase
 from student.tests.factories import UserFactory
 
 from student.models import CourseEnrollment, CourseEnrollmentAllowed
+import instructor.enrollment
 from instructor.enrollment import (EmailEnrollmentState,
                                    enroll_email, unenroll_email,
+                                   bulk_update_enrollment,
                                    reset_student_attempts)
 
 
@@ -272,6 +277,123 @@ class TestInstructorUnenrollDB(TestEnrollmentChangeBase):
         return self._run_state_change_test(before_ideal, after_ideal, action)
 
 
+class TestBulkUpdateEnrollment(TestCase):
+    """ Test instructor.enrollment.bulk_update_enrollment """
+    def setUp(self):
+        self.course_id = 'robot:/a/fake/c::rse/id'
+
+    def _states(self, emails):
+        """ The current state of each of `emails`, as dicts """
+        return [EmailEnrollmentState(self.course_id, email).to_dict() for email in emails]
+
+    def _count_queries(self, func):
+        """ Returns how many queries calling `func` makes """
+        connection.use_debug_cursor = True
+        start = len(connection.queries)
+        try:
+            func()
+        finally:
+            connection.use_debug_cursor = None
+        return len(connection.queries) - start
+
+    def test_enroll(self):
+        enrolled = UserFactory()
+        CourseEnrollment.enroll(enrolled, self.course_id)
+        unenrolled = UserFactory()
+        CourseEnrollment.enroll(unenrolled, self.course_id)
+        CourseEnrollment.unenroll(unenrolled, self.course_id)
+        not_enrolled = UserFactory()
+        emails = [enrolled.email, unenrolled.email, not_enrolled.email, 'robot-not-registered@edx.org']
+
+        results = list(bulk_update_enrollment(self.course_id, emails, 'enroll', auto_enroll=True))
+
+        self.assertEqual([email for email, _, _ in results], emails)
+        self.assertEqual([after.to_dict() for _, _, after in results], self._states(emails))
+        for user in (enrolled, unenrolled, not_enrolled):
+            self.assertTrue(CourseEnrollment.is_enrolled(user, self.course_id))
+        self.assertEqual(self._states(emails[3:]), [
+            {'user': False, 'enrollment': False, 'allowed': True, 'auto_enroll': True}
+        ])
+
+    def test_unenroll(self):
+        enrolled = UserFactory()
+        CourseEnrollment.enroll(enrolled, self.course_id)
+        CourseEnrollmentAllowed.objects.create(email='robot-not-registered@edx.org', course_id=self.course_id)
+        emails = [enrolled.email, 'robot-not-registered@edx.org']
+
+        results = list(bulk_update_enrollment(self.course_id, emails, 'unenroll'))
+
+        self.assertEqual([before.enrollment for _, before, _ in results], [True, False])
+        self.assertEqual([before.allowed for _, before, _ in results], [False, True])
+        self.assertEqual(self._states(emails), [
+            {'user': True, 'enrollment': False, 'allowed': False, 'auto_enroll': False},
+            {'user': False, 'enrollment': False, 'allowed': False, 'auto_enroll': False},
+        ])
+
+    def test_repeated_emails(self):
+        user = UserFactory()
+        results = list(bulk_update_enrollment(self.course_id, [user.email, user.email.upper()], 'enroll'))
+        self.assertEqual([email for email, _, _ in results], [user.email])
+
+    def test_unrecognized_action(self):
+        with self.assertRaises(ValueError):
+            bulk_update_enrollment(self.course_id, ['robot@edx.org'], 'robot')
+
+    @patch('instructor.enrollment.BULK_ENROLLMENT_CHUNK_SIZE', 2)
+    def test_chunks(self):
+        users = [UserFactory() for _ in range(5)]
+        results = list(bulk_update_enrollment(self.course_id, [user.email for user in users], 'enroll'))
+        self.assertEqual([email for email, _, _ in results], [user.email for user in users])
+        for user in users:
+            self.assertTrue(CourseEnrollment.is_enrolled(user, self.course_id))
+
+    def test_number_of_queries(self):
+        # The number of queries doesn't depend on the number of emails
+        few = [UserFactory().email for _ in range(2)] + ['robot-1@edx.org']
+        many = [UserFactory().email for _ in range(6)] + ['robot-2@edx.org', 'robot-3@edx.org']
+        for action in ('enroll', 'unenroll'):
+            self.assertEqual(
+                self._count_queries(lambda: list(bulk_update_enrollment(self.course_id, few, action))),
+                self._count_queries(lambda: list(bulk_update_enrollment(self.course_id, many, action))),
+            )
+
+    @patch('instructor.enrollment.BULK_ENROLLMENT_CHUNK_SIZE', 2)
+    def test_dashboards_invalidated_after_commit(self):
+        users = [UserFactory() for _ in range(3)]
+        events = []
+
+        @contextmanager
+        def recording_transaction():
+            """ Records when each chunk's transaction begins and ends """
+            events.append('begin')
+            yield
+            events.append('commit')
+
+        with patch('instructor.enrollment.transaction.commit_on_success', recording_transaction):
+            with patch('instructor.enrollment.invalidate_dashboards', lambda user_ids: events.append('invalidate')):
+                list(bulk_update_enrollment(self.course_id, [user.email for user in users], 'enroll'))
+        self.assertEqual(events, ['begin', 'commit', 'invalidate'] * 2)
+
+    def test_error_in_chunk(self):
+        users = [UserFactory() for _ in range(3)]
+        bad_email = users[1].email
+        enroll = instructor.enrollment.BULK_ENROLLMENT_ACTIONS['enroll']
+
+        def enroll_unless_bad(course_id, emails, user_ids, auto_enroll):
+            """ Fails for any group of emails containing bad_email """
+            if bad_email in emails:
+                raise Exception("robot error")
+            enroll(course_id, emails, user_ids, auto_enroll)
+
+        with patch.dict(instructor.enrollment.BULK_ENROLLMENT_ACTIONS, {'enroll': enroll_unless_bad}):
+            results = list(bulk_update_enrollment(self.course_id, [user.email for user in users], 'enroll'))
+
+        self.assertEqual(results[1], (bad_email, None, None))
+        self.assertTrue(CourseEnrollment.is_enrolled(users[0], self.course_id))
+        self.assertFalse(CourseEnrollment.is_enrolled(users[1], self.course_id))
+        self.assertTrue(CourseEnrollment.is_enrolled(users[2], self.course_id))
+
+
 class TestInstructorEnrollmentStudentModule(TestCase):
     """ Test student module manipulations. """
     def setUp(self):
@@ -4,7 +4,7 @@ from django.test.client import Client, RequestFactory
 from django.test.utils import override_settings
 from mock import patch, MagicMock
 
-from courseware.models import XModuleUserStateSummaryField
+from courseware.models import XModuleCounter, XModuleUserStateSummaryField
 from courseware.tests.factories import UserStateSummaryFactory
 from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
 import instructor.hint_manager as view
@@ -108,6 +108,16 @@ class HintManagerTest(ModuleStoreTestCase):
                                       ]}
         self.assertTrue(out['all_hints'] == expected)
 
+    def test_gethints_vote_counts(self):
+        """
+        Votes tallied in the counters are added to the stored votes.
+        """
+        XModuleCounter.incr(self.problem_id, view.HINT_VOTES, '3', 2)
+        request = RequestFactory()
+        post = request.post(self.url, {'field': 'hints'})
+        out = view.get_hints(post, self.course_id, 'hints')
+        self.assertTrue(out['all_hints'][self.problem_id][0][1]['3'] == ['Hint 3', 14])
+
     def test_deletehints(self):
         """
         Checks that delete_hints deletes the right stuff.
@@ -128,11 +138,14 @@ class HintManagerTest(ModuleStoreTestCase):
         post = request.post(self.url, {'field': 'hints',
                                        'op': 'change votes',
                                        1: [self.problem_id, '1.0', '1', 5]})
+        XModuleCounter.incr(self.problem_id, view.HINT_VOTES, '1', 7)
         view.change_votes(post, self.course_id, 'hints')
         problem_hints = XModuleUserStateSummaryField.objects.get(field_name='hints', usage_id=self.problem_id).value
         # hints[answer][hint_pk (string)] = [hint text, vote count]
         print json.loads(problem_hints)['1.0']['1']
         self.assertTrue(json.loads(problem_hints)['1.0']['1'][1] == 5)
+        # The new vote count replaces the tallied votes.
+        self.assertFalse(XModuleCounter.objects.filter(usage_id=self.problem_id, key='1').exists())
 
     def test_addhint(self):
         """
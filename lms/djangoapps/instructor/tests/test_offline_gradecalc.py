@@ -0,0 +1,88 @@
+"""
+Tests of the parallel offline grade calculation in instructor.offline_gradecalc
+"""
+import json
+
+from mock import patch
+from django.test.utils import override_settings
+
+from courseware import grades
+from courseware.models import OfflineComputedGrade, OfflineComputedGradeLog, OfflineComputedGradeShard
+from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
+from student.models import CourseEnrollment
+from student.tests.factories import UserFactory
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+from instructor import offline_gradecalc
+from instructor.offline_gradecalc import parallel_offline_grade_calculation
+
+
+@override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
+class TestParallelOfflineGradeCalculation(ModuleStoreTestCase):
+    """ Test parallel_offline_grade_calculation """
+    def setUp(self):
+        self.course = CourseFactory.create()
+        self.students = [UserFactory() for _ in range(5)]
+        for student in self.students:
+            CourseEnrollment.enroll(student, self.course.id)
+
+    def _assert_all_graded(self, ocgl):
+        """ Check that the calculation finished, with a gradeset for every student """
+        self.assertEqual(ocgl, OfflineComputedGradeLog.objects.get(course_id=self.course.id))
+        self.assertEqual(ocgl.nstudents, len(self.students))
+        self.assertFalse(OfflineComputedGradeShard.objects.filter(course_id=self.course.id).exists())
+        for student in self.students:
+            gradeset = json.loads(OfflineComputedGrade.objects.get(user=student, course_id=self.course.id).gradeset)
+            self.assertIn('percent', gradeset)
+
+    def test_calculation(self):
+        self._assert_all_graded(parallel_offline_grade_calculation(self.course.id, shard_size=2, processes=1))
+
+    def test_process_pool(self):
+        # The test database is only copied into the forked processes, so check
+        # what they report back rather than what they save.
+        results = []
+        with patch.object(offline_gradecalc, '_print_shard_result', results.append):
+            parallel_offline_grade_calculation(self.course.id, shard_size=2, processes=2)
+        self.assertEqual(sorted(nstudents for nstudents, _seconds in results), [1, 2, 2])
+
+    def test_process_initializer(self):
+        store = modulestore()
+        with patch.object(offline_gradecalc, 'cache') as cache:
+            offline_gradecalc._init_grading_process()  # pylint: disable=W0212
+        cache.close.assert_called_with()
+        self.assertIsNot(modulestore(), store)
+
+    def test_celery(self):
+        self._assert_all_graded(parallel_offline_grade_calculation(self.course.id, shard_size=2, use_celery=True))
+
+    def test_updates_existing_grades(self):
+        OfflineComputedGrade.objects.create(user=self.students[0], course_id=self.course.id, gradeset='{}')
+        self._assert_all_graded(parallel_offline_grade_calculation(self.course.id, shard_size=2, processes=1))
+        self.assertEqual(OfflineComputedGrade.objects.filter(course_id=self.course.id).count(), len(self.students))
+
+    def test_resume(self):
+        # An interrupted calculation that completed its first shard
+        shards = offline_gradecalc._plan_shards(self.course.id, 2)  # pylint: disable=W0212
+        offline_gradecalc.grade_shard(shards[0].id)
+        late_student = UserFactory()
+        CourseEnrollment.enroll(late_student, self.course.id)
+        self.students.append(late_student)
+
+        with patch.object(grades, 'iterate_grades_for', wraps=grades.iterate_grades_for) as iterate_grades_for:
+            ocgl = parallel_offline_grade_calculation(self.course.id, shard_size=2, processes=1)
+
+        self._assert_all_graded(ocgl)
+        graded = sum(len(call[0][1]) for call in iterate_grades_for.call_args_list)
+        self.assertEqual(graded, len(self.students) - 2)
+
+    def test_failed_shard(self):
+        with patch.object(offline_gradecalc, 'grade_shard', side_effect=Exception("robot error")):
+            ocgl = parallel_offline_grade_calculation(self.course.id, shard_size=2, processes=1)
+        self.assertIsNone(ocgl)
+        self.assertEqual(OfflineComputedGradeShard.objects.filter(course_id=self.course.id).count(), 3)
+
+        # Running again picks the failed shards up
+        self._assert_all_graded(parallel_offline_grade_calculation(self.course.id, shard_size=2, processes=1))
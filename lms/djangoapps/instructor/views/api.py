@@ -27,12 +27,12 @@ from django_comment_common.models import (Role,
                                           FORUM_ROLE_MODERATOR,
                                           FORUM_ROLE_COMMUNITY_TA)
 
-from courseware.models import StudentModule
+from courseware.models import StudentModule, StudentModuleGradeHistogram
 import instructor_task.api
 from instructor_task.api_helper import AlreadyRunningError
 import instructor.enrollment as enrollment
-from instructor.enrollment import enroll_email, unenroll_email
-from instructor.views.tools import strip_if_string
+from instructor.enrollment import bulk_update_enrollment
+from instructor.views.tools import strip_if_string, emails_from_csv
 import instructor.access as access
 import analytics.basic
 import analytics.distributions
@@ -136,19 +136,23 @@ def require_level(level):
 @ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @require_level('staff')
-@require_query_params(action="enroll or unenroll", emails="stringified list of emails")
+@common_exceptions_400
 def students_update_enrollment(request, course_id):
     """
     Enroll or unenroll students by email.
     Requires staff access.
 
-    Query Parameters:
+    Parameters, which may be POSTed, since long lists of emails don't fit
+    in a query string:
     - action in ['enroll', 'unenroll']
     - emails is string containing a list of emails separated by anything split_input_list can handle.
     - auto_enroll is a boolean (defaults to false)
         If auto_enroll is false, students will be allowed to enroll.
         If auto_enroll is true, students will be enroled as soon as they register.
 
+    Emails can also be POSTed as a csv file, `emails_csv` (see
+    instructor.views.tools.emails_from_csv), instead of or as well as `emails`.
+
     Returns an analog to this JSON structure: {
         "action": "enroll",
         "auto_enroll": false,
@@ -170,35 +174,61 @@ def students_update_enrollment(request, course_id):
             }
         ]
     }
-    """
-    action = request.GET.get('action')
-    emails_raw = request.GET.get('emails')
-    emails = _split_input_list(emails_raw)
-    auto_enroll = request.GET.get('auto_enroll') in ['true', 'True', True]
 
-    results = []
-    for email in emails:
+    If there are more than settings.BULK_ENROLLMENT_ASYNC_THRESHOLD emails,
+    and background tasks are enabled, the change is made by a background
+    task instead, and this returns no
+    results yet: {
+        "action": "enroll",
+        "auto_enroll": false,
+        "results": [],
+        "task": "created",
+        "task_id": "2519ff31-22d9-4a62-91e2-55495895b355",
+        "total": 20000
+    }
+    The progress of the task can be followed with instructor_task_status.
+    """
+    action = request.REQUEST.get('action')
+    emails = _split_input_list(request.REQUEST.get('emails', ''))
+    if 'emails_csv' in request.FILES:
         try:
-            if action == 'enroll':
-                before, after = enroll_email(course_id, email, auto_enroll)
-            elif action == 'unenroll':
-                before, after = unenroll_email(course_id, email)
-            else:
-                return HttpResponseBadRequest("Unrecognized action '{}'".format(action))
+            emails += emails_from_csv(request.FILES['emails_csv'])
+        except UnicodeDecodeError:
+            return HttpResponseBadRequest("The csv file of emails must be encoded in utf-8")
+    auto_enroll = request.REQUEST.get('auto_enroll') in ['true', 'True', True]
+
+    if action not in ['enroll', 'unenroll']:
+        return HttpResponseBadRequest("Unrecognized action '{}'".format(action))
+    if not emails:
+        return HttpResponseBadRequest("No emails given")
+
+    if (len(emails) > settings.BULK_ENROLLMENT_ASYNC_THRESHOLD and
+            settings.MITX_FEATURES.get('ENABLE_INSTRUCTOR_BACKGROUND_TASKS')):
+        instructor_task_entry = instructor_task.api.submit_bulk_update_enrollment(
+            request, course_id, action, emails, auto_enroll
+        )
+        return JsonResponse({
+            'action': action,
+            'auto_enroll': auto_enroll,
+            'results': [],
+            'task': 'created',
+            'task_id': instructor_task_entry.task_id,
+            'total': len(emails),
+        })
 
+    results = []
+    for email, before, after in bulk_update_enrollment(course_id, emails, action, auto_enroll):
+        # bulk_update_enrollment logs errors, so that one error doesn't cause a 500.
+        if before is None:
             results.append({
                 'email': email,
-                'before': before.to_dict(),
-                'after': after.to_dict(),
+                'error': True,
             })
-        # catch and log any exceptions
-        # so that one error doesn't cause a 500.
-        except Exception as exc:  # pylint: disable=W0703
-            log.exception("Error while #{}ing student")
-            log.exception(exc)
+        else:
             results.append({
                 'email': email,
-                'error': True,
+                'before': before.to_dict(),
+                'after': after.to_dict(),
             })
 
     response_payload = {
@@ -352,9 +382,8 @@ def get_students_features(request, course_id, csv=False):  # pylint: disable=W06
     query_features = ['username', 'name', 'email', 'language', 'location', 'year_of_birth', 'gender',
                       'level_of_education', 'mailing_address', 'goals']
 
-    student_data = analytics.basic.enrolled_students_features(course_id, query_features)
-
     if not csv:
+        student_data = analytics.basic.enrolled_students_features(course_id, query_features)
         response_payload = {
             'course_id': course_id,
             'students': student_data,
@@ -364,8 +393,9 @@ def get_students_features(request, course_id, csv=False):  # pylint: disable=W06
         }
         return JsonResponse(response_payload)
     else:
-        header, datarows = analytics.csvs.format_dictlist(student_data, query_features)
-        return analytics.csvs.create_csv_response("enrolled_profiles.csv", header, datarows)
+        student_data = analytics.basic.iter_enrolled_students_features(course_id, query_features)
+        header, datarows = analytics.csvs.iter_dictlist(student_data, query_features)
+        return analytics.csvs.create_streaming_csv_response("enrolled_profiles.csv", header, datarows)
 
 
 @ensure_csrf_cookie
@@ -403,7 +433,7 @@ def get_distribution(request, course_id):
 
     p_dist = None
     if not feature is None:
-        p_dist = analytics.distributions.profile_distribution(course_id, feature)
+        p_dist = analytics.distributions.cached_profile_distribution(course_id, feature)
         response_payload['feature_results'] = {
             'feature': p_dist.feature,
             'feature_display_name': p_dist.feature_display_name,
@@ -417,6 +447,30 @@ def get_distribution(request, course_id):
     return JsonResponse(response_payload)
 
 
+@ensure_csrf_cookie
+@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@require_level('staff')
+@require_query_params(problem_urlname="problem urlname to get the grade histogram of")
+def get_problem_grade_histogram(request, course_id):
+    """
+    Respond with json of the distribution of student grades on a problem.
+
+    Takes query parameter problem_urlname and returns e.g. {
+        'histogram': [[0.0, 12], [1.0, 30], ...]
+    }
+    Reads from the precomputed StudentModuleGradeHistogram table.
+    """
+    problem_urlname = request.GET.get('problem_urlname')
+    module_state_key = _msk_from_problem_urlname(course_id, problem_urlname)
+
+    response_payload = {
+        'course_id': course_id,
+        'problem_urlname': problem_urlname,
+        'histogram': StudentModuleGradeHistogram.histogram(module_state_key),
+    }
+    return JsonResponse(response_payload)
+
+
 @ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @common_exceptions_400
@@ -18,6 +18,8 @@ urlpatterns = patterns('',  # nopep8
         'instructor.views.api.get_students_features', name="get_students_features"),
     url(r'^get_distribution$',
         'instructor.views.api.get_distribution', name="get_distribution"),
+    url(r'^get_problem_grade_histogram$',
+        'instructor.views.api.get_problem_grade_histogram', name="get_problem_grade_histogram"),
     url(r'^get_student_progress_url$',
         'instructor.views.api.get_student_progress_url', name="get_student_progress_url"),
     url(r'^reset_student_attempts$',
@@ -2,6 +2,7 @@
 Instructor Dashboard Views
 """
 
+from django.conf import settings
 from django.utils.translation import ugettext as _
 from django_future.csrf import ensure_csrf_cookie
 from django.views.decorators.cache import cache_control
@@ -108,6 +109,9 @@ def _section_membership(course_id, access):
         'list_forum_members_url': reverse('list_forum_members', kwargs={'course_id': course_id}),
         'update_forum_role_membership_url': reverse('update_forum_role_membership', kwargs={'course_id': course_id}),
     }
+    if settings.MITX_FEATURES.get('ENABLE_INSTRUCTOR_BACKGROUND_TASKS'):
+        # to follow the large enrollment changes that run in the background
+        section_data['instructor_task_status_url'] = reverse('instructor_task_status')
     return section_data
 
 
@@ -1,7 +1,34 @@
 """
 Tools for the instructor dashboard
 """
+import csv
+
+
 def strip_if_string(value):
     if isinstance(value, basestring):
         return value.strip()
     return value
+
+
+def emails_from_csv(csv_file):
+    """
+    Returns the emails in `csv_file`, an uploaded utf-8 csv file: those in the
+    column headed "email", if there is one, or else in the first column.
+    Cells without an "@", such as other headers, are skipped.
+
+    Raises UnicodeDecodeError if the file isn't utf-8.
+    """
+    # splitlines copes with any kind of line endings, which csv.reader doesn't
+    rows = [row for row in csv.reader(csv_file.read().splitlines()) if row]
+    column = 0
+    if rows:
+        header = [cell.strip().lower() for cell in rows[0]]
+        if 'email' in header:
+            column = header.index('email')
+    emails = []
+    for row in rows:
+        if len(row) > column:
+            cell = row[column].decode('utf-8').strip()
+            if '@' in cell:
+                emails.append(cell)
+    return emails
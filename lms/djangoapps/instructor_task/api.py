@@ -14,10 +14,12 @@ from xmodule.modulestore.django import modulestore
 from instructor_task.models import InstructorTask
 from instructor_task.tasks import (rescore_problem,
                                    reset_problem_attempts,
-                                   delete_problem_state)
+                                   delete_problem_state,
+                                   bulk_update_enrollment)
 
 from instructor_task.api_helper import (check_arguments_for_rescoring,
                                         encode_problem_and_student_input,
+                                        encode_bulk_enrollment_input,
                                         submit_task)
 
 
@@ -162,3 +164,31 @@ def submit_delete_problem_state_for_all_students(request, course_id, problem_url
     task_class = delete_problem_state
     task_input, task_key = encode_problem_and_student_input(problem_url)
     return submit_task(request, task_type, task_class, course_id, task_input, task_key)
+
+
+def submit_bulk_update_enrollment(request, course_id, action, emails, auto_enroll=False):
+    """
+    Request students to be enrolled or unenrolled by email as a background task.
+
+    `action` is 'enroll' or 'unenroll', and `emails` is a list of the students'
+    emails.  Emails of people who haven't registered are allowed to enroll
+    instead (automatically once they register, if `auto_enroll`).  See
+    instructor.enrollment.bulk_update_enrollment.
+
+    ValueError is raised if the action is unrecognized, or AlreadyRunningError
+    if the same change is already being made.
+
+    This method makes sure the InstructorTask entry is committed.
+    When called from any view that is wrapped by TransactionMiddleware,
+    and thus in a "commit-on-success" transaction, an autocommit buried within here
+    will cause any pending transaction to be committed by a successful
+    save here.  Any future database operations will take place in a
+    separate transaction.
+    """
+    if action not in ('enroll', 'unenroll'):
+        raise ValueError("Unrecognized action '{}'".format(action))
+
+    task_type = 'bulk_update_enrollment'
+    task_class = bulk_update_enrollment
+    task_input, task_key = encode_bulk_enrollment_input(action, emails, auto_enroll)
+    return submit_task(request, task_type, task_class, course_id, task_input, task_key, extra_args=[emails])
@@ -232,7 +232,23 @@ def encode_problem_and_student_input(problem_url, student=None):
     return task_input, task_key
 
 
-def submit_task(request, task_type, task_class, course_id, task_input, task_key):
+def encode_bulk_enrollment_input(action, emails, auto_enroll):
+    """
+    Encode a bulk enrollment change into task_input and task_key values.
+
+    The emails themselves are too many to fit in the task_input, so only their
+    number is kept there, and they are passed to the task as an argument.
+    """
+    task_input = {'action': action, 'auto_enroll': auto_enroll, 'total': len(emails)}
+    task_key_stub = u"{action}_{auto_enroll}_{emails}".format(
+        action=action, auto_enroll=auto_enroll, emails=u",".join(sorted(emails))
+    )
+    task_key = hashlib.md5(task_key_stub.encode('utf-8')).hexdigest()
+
+    return task_input, task_key
+
+
+def submit_task(request, task_type, task_class, course_id, task_input, task_key, extra_args=()):
     """
     Helper method to submit a task.
 
@@ -241,6 +257,7 @@ def submit_task(request, task_type, task_class, course_id, task_input, task_key)
     it can be stored in the resulting InstructorTask entry.  Arguments are extracted from
     the `request` provided by the originating server request.  Then the task is submitted to run
     asynchronously, using the specified `task_class` and using the task_id constructed for it.
+    Any `extra_args` are passed to the task after the usual arguments.
 
     `AlreadyRunningError` is raised if the task is already running.
 
@@ -257,7 +274,7 @@ def submit_task(request, task_type, task_class, course_id, task_input, task_key)
 
     # submit task:
     task_id = instructor_task.task_id
-    task_args = [instructor_task.id, _get_xmodule_instance_args(request)]
+    task_args = [instructor_task.id, _get_xmodule_instance_args(request)] + list(extra_args)
     task_class.apply_async(task_args, task_id=task_id)
 
     return instructor_task
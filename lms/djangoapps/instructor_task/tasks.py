@@ -2,8 +2,8 @@
 This file contains tasks that are designed to perform background operations on the
 running state of a course.
 
-At present, these tasks all operate on StudentModule objects in one way or another,
-so they share a visitor architecture.  Each task defines an "update function" that
+Apart from bulk_update_enrollment, these tasks all operate on StudentModule objects
+in one way or another, so they share a visitor architecture.  Each task defines an "update function" that
 takes a module_descriptor, a particular StudentModule object, and xmodule_instance_args.
 
 A task may optionally specify a "filter function" that takes a query for StudentModule
@@ -23,7 +23,8 @@ from celery import task
 from instructor_task.tasks_helper import (update_problem_module_state,
                                           rescore_problem_module_state,
                                           reset_attempts_module_state,
-                                          delete_problem_module_state)
+                                          delete_problem_module_state,
+                                          update_enrollments)
 
 
 @task
@@ -95,3 +96,24 @@ def delete_problem_state(entry_id, xmodule_instance_args):
     return update_problem_module_state(entry_id,
                                        update_fcn, action_name, filter_fcn=None,
                                        xmodule_instance_args=xmodule_instance_args)
+
+
+@task
+def bulk_update_enrollment(entry_id, xmodule_instance_args, emails):  # pylint: disable=W0613
+    """Enrolls or unenrolls students in a course by email.
+
+    `entry_id` is the id value of the InstructorTask entry that corresponds to this task.
+    The entry contains the `course_id` that identifies the course, as well as the
+    `task_input`, which contains task-specific input.
+
+    The task_input should be a dict with the following entries:
+
+      'action': 'enroll' or 'unenroll'.  (required)
+
+      'auto_enroll': whether emails that aren't registered yet should be enrolled as
+          soon as they register.
+
+    `emails` is the list of the students' emails, which is too long for the task_input.
+    `xmodule_instance_args` isn't used, since no xmodules are instantiated.
+    """
+    return update_enrollments(entry_id, emails)
@@ -25,6 +25,7 @@ from track.views import task_track
 from courseware.models import StudentModule
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
+from instructor.enrollment import bulk_update_enrollment, BULK_ENROLLMENT_CHUNK_SIZE
 from instructor_task.models import InstructorTask, PROGRESS
 
 # define different loggers for use within tasks and on client side
@@ -236,6 +237,100 @@ def update_problem_module_state(entry_id, update_fcn, action_name, filter_fcn,
     return task_progress
 
 
+def _perform_enrollment_update(course_id, action, emails, auto_enroll):
+    """
+    Enrolls or unenrolls students by email with bulk_update_enrollment,
+    updating the task's progress after each chunk of emails.
+
+    The return value is a dict containing the task's results, with the same
+    keys as _perform_module_state_update's, where 'updated' counts the emails
+    that were changed without error.
+    """
+    start_time = time()
+    action_name = action + 'ed'
+    num_updated = 0
+    num_attempted = 0
+    # bulk_update_enrollment skips repeated emails
+    num_total = len(set(email.lower() for email in emails))
+
+    def get_task_progress():
+        """Return a dict containing info about current task"""
+        current_time = time()
+        progress = {'action_name': action_name,
+                    'attempted': num_attempted,
+                    'updated': num_updated,
+                    'total': num_total,
+                    'duration_ms': int((current_time - start_time) * 1000),
+                    }
+        return progress
+
+    task_progress = get_task_progress()
+    _get_current_task().update_state(state=PROGRESS, meta=task_progress)
+    with dog_stats_api.timer('instructor_tasks.enrollment.time.overall', tags=['action:{name}'.format(name=action_name)]):
+        for _email, _before, after in bulk_update_enrollment(course_id, emails, action, auto_enroll):
+            num_attempted += 1
+            if after is not None:
+                num_updated += 1
+            # update task status once per chunk:
+            if num_attempted % BULK_ENROLLMENT_CHUNK_SIZE == 0:
+                task_progress = get_task_progress()
+                _get_current_task().update_state(state=PROGRESS, meta=task_progress)
+
+    return get_task_progress()
+
+
+def update_enrollments(entry_id, emails):
+    """
+    Enrolls or unenrolls the students with `emails` in a course, as asked by
+    the InstructorTask entry with primary key `entry_id`.
+
+    The entry's task_input holds the 'action' ('enroll' or 'unenroll') and
+    'auto_enroll'.  Like update_problem_module_state, this records the
+    result or the failure of the task in the entry, and returns the task's
+    result.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    task_id = entry.task_id
+    course_id = entry.course_id
+    task_input = json.loads(entry.task_input)
+    action = task_input['action']
+    auto_enroll = task_input.get('auto_enroll', False)
+
+    fmt = 'Starting to update enrollments as task "{task_id}": course "{course_id}" action "{action}": {total} emails'
+    TASK_LOG.info(fmt.format(task_id=task_id, course_id=course_id, action=action, total=len(emails)))
+
+    task_progress = None
+    try:
+        request_task_id = _get_current_task().request.id
+        if task_id != request_task_id:
+            fmt = 'Requested task "{task_id}" did not match actual task "{actual_id}"'
+            message = fmt.format(task_id=task_id, actual_id=request_task_id)
+            TASK_LOG.error(message)
+            raise UpdateProblemModuleStateError(message)
+
+        # bulk_update_enrollment commits each chunk by itself, so that the
+        # progress reported is of changes that others can see
+        task_progress = _perform_enrollment_update(course_id, action, emails, auto_enroll)
+        entry.task_output = InstructorTask.create_output_for_success(task_progress)
+        entry.task_state = SUCCESS
+        entry.save_now()
+
+    except Exception:
+        # try to write out the failure to the entry before failing
+        _, exception, traceback = exc_info()
+        traceback_string = format_exc(traceback) if traceback is not None else ''
+        TASK_LOG.warning("background task (%s) failed: %s %s", task_id, exception, traceback_string)
+        entry.task_output = InstructorTask.create_output_for_failure(exception, traceback_string)
+        entry.task_state = FAILURE
+        entry.save_now()
+        raise
+
+    fmt = 'Finishing task "{task_id}": course "{course_id}" action "{action}": final: {progress}'
+    TASK_LOG.info(fmt.format(task_id=task_id, course_id=course_id, action=action, progress=task_progress))
+    return task_progress
+
+
 def _get_task_id_from_xmodule_args(xmodule_instance_args):
     """Gets task_id from `xmodule_instance_args` dict, or returns default value if missing."""
     return xmodule_instance_args.get('task_id', UNKNOWN_TASK_ID) if xmodule_instance_args is not None else UNKNOWN_TASK_ID
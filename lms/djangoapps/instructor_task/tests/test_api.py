@@ -1,6 +1,7 @@
 """
 Test for LMS instructor background task queue management
 """
+import json
 
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
@@ -11,7 +12,10 @@ from instructor_task.api import (get_running_instructor_tasks,
                                  submit_rescore_problem_for_all_students,
                                  submit_rescore_problem_for_student,
                                  submit_reset_problem_attempts_for_all_students,
-                                 submit_delete_problem_state_for_all_students)
+                                 submit_delete_problem_state_for_all_students,
+                                 submit_bulk_update_enrollment)
+
+from student.models import CourseEnrollment, CourseEnrollmentAllowed
 
 from instructor_task.api_helper import AlreadyRunningError
 from instructor_task.models import InstructorTask, PROGRESS
@@ -136,3 +140,27 @@ class InstructorTaskSubmitTest(InstructorTaskModuleTestCase):
 
     def test_submit_delete_all(self):
         self._test_submit_task(submit_delete_problem_state_for_all_students)
+
+    def test_submit_bulk_update_enrollment(self):
+        emails = [self.student.email, 'robot-not-registered@edx.org']
+        request = self.create_task_request(self.instructor.username)
+        instructor_task = submit_bulk_update_enrollment(request, self.course.id, 'enroll', emails)
+
+        # the task has already run, since celery runs tasks eagerly in tests:
+        instructor_task = InstructorTask.objects.get(id=instructor_task.id)
+        self.assertEqual(json.loads(instructor_task.task_output)['updated'], 2)
+        self.assertTrue(CourseEnrollment.is_enrolled(self.student, self.course.id))
+        self.assertTrue(CourseEnrollmentAllowed.objects.filter(
+            course_id=self.course.id, email='robot-not-registered@edx.org'
+        ).exists())
+
+        instructor_task.task_state = PROGRESS
+        instructor_task.save()
+        with self.assertRaises(AlreadyRunningError):
+            submit_bulk_update_enrollment(request, self.course.id, 'enroll', emails)
+
+    def test_submit_bulk_update_enrollment_bad_action(self):
+        with self.assertRaises(ValueError):
+            submit_bulk_update_enrollment(
+                self.create_task_request(self.instructor.username), self.course.id, 'robot', [self.student.email]
+            )
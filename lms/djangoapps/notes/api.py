@@ -3,12 +3,14 @@ from django.http import HttpResponse, Http404
 from django.core.exceptions import ValidationError
 
 from notes.models import Note
+from notes.search import count_notes, search_notes
 from notes.utils import notes_enabled_for_course
 from courseware.courses import get_course_with_access
 
 import json
 import logging
 import collections
+from itertools import islice
 
 log = logging.getLogger(__name__)
 
@@ -116,12 +118,17 @@ def _get_course(request, course_id):
 
 def index(request, course_id):
     '''
-    Returns a list of annotation objects.
+    Returns a list of annotation objects, in order of creation.
+
+    Takes optional `limit` and `after` (the id of the last note already
+    fetched) query parameters, like search.
     '''
-    MAX_LIMIT = API_SETTINGS.get('MAX_NOTE_LIMIT')
+    limit = _get_limit(request)
+    after = _get_int(request, 'after')
 
     notes = Note.objects.order_by('id').filter(course_id=course_id,
-                                               user=request.user)[:MAX_LIMIT]
+                                               user=request.user,
+                                               id__gt=after)[:limit]
 
     return ApiResponse(http_response=HttpResponse(), data=[note.as_dict() for note in notes])
 
@@ -203,42 +210,66 @@ def delete(request, course_id, note_id):
     return ApiResponse(http_response=HttpResponse('', status=204), data=None)
 
 
-def search(request, course_id):
+def _get_int(request, name):
     '''
-    Returns a subset of  annotation objects based on a search query.
+    Returns the value of query parameter `name` as a non-negative integer,
+    or 0 if it is missing or invalid.
+    '''
+    value = request.GET.get(name, '')
+    return int(value) if value.isdigit() else 0
+
+
+def _get_limit(request):
+    '''
+    Returns the `limit` query parameter, capped to MAX_NOTE_LIMIT, which is
+    also what a missing or zero limit means.
     '''
     MAX_LIMIT = API_SETTINGS.get('MAX_NOTE_LIMIT')
+    limit = _get_int(request, 'limit')
+    if limit == 0 or limit > MAX_LIMIT:
+        limit = MAX_LIMIT
+    return limit
+
 
+def search(request, course_id):
+    '''
+    Returns a subset of  annotation objects based on a search query.
+
+    Query parameters (all optional):
+        uri: only notes on this uri
+        q: only notes matching this full-text query (see notes.search)
+        limit: the most notes to return (up to MAX_NOTE_LIMIT)
+        after: only notes after the note with this id, i.e. the 'next' of the
+            previous page.  This is cheaper than `offset`, which is still
+            supported.
+
+    Returns {'total': number of matching notes, 'rows': the notes,
+    'next': the `after` of the next page, or None if this is the last one}.
+    '''
     # search parameters
-    offset = request.GET.get('offset', '')
-    limit = request.GET.get('limit', '')
+    offset = _get_int(request, 'offset')
+    limit = _get_limit(request)
+    after = _get_int(request, 'after')
     uri = request.GET.get('uri', '')
+    query = request.GET.get('q', '').strip()
 
-    # validate search parameters
-    if offset.isdigit():
-        offset = int(offset)
-    else:
-        offset = 0
-
-    if limit.isdigit():
-        limit = int(limit)
-        if limit == 0 or limit > MAX_LIMIT:
-            limit = MAX_LIMIT
+    # retrieve notes, and one more to know whether there's a next page
+    total = count_notes(course_id, request.user, uri, query)
+    if query:
+        matches = search_notes(course_id, request.user, query, uri, after, batch_size=offset + limit + 1)
+        rows = list(islice(matches, offset, offset + limit + 1))
     else:
-        limit = MAX_LIMIT
-
-    # set filters
-    filters = {'course_id': course_id, 'user': request.user}
-    if uri != '':
-        filters['uri'] = uri
+        filters = {'course_id': course_id, 'user': request.user}
+        if uri != '':
+            filters['uri'] = uri
+        notes = Note.objects.order_by('id').filter(**filters)
+        rows = list(notes.filter(id__gt=after)[offset:offset + limit + 1])
 
-    # retrieve notes
-    notes = Note.objects.order_by('id').filter(**filters)
-    total = notes.count()
-    rows = notes[offset:offset + limit]
+    next_after = rows[limit - 1].id if len(rows) > limit else None
     result = {
         'total': total,
-        'rows': [note.as_dict() for note in rows]
+        'rows': [note.as_dict() for note in rows[:limit]],
+        'next': next_after,
     }
 
     return ApiResponse(http_response=HttpResponse(), data=result)
@@ -0,0 +1,40 @@
+'''
+Build or repair the full-text index of notes (see notes.search).
+
+The index is normally kept up to date as notes are saved, but it has to be
+built once for existing notes, and can drift if notes are changed with
+queryset updates that bypass model signals.
+'''
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from notes.models import Note
+from notes.search import index_note
+
+LOG = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''
+    Re-index every note in the given courses, or in all courses if none are
+    given.
+    '''
+
+    args = '[<course_id> <course_id> ...]'
+    help = 'Rebuilds the full-text index of the notes in the given courses (default: all).'
+
+    def handle(self, *args, **options):
+        notes = Note.objects.order_by('id')
+        if args:
+            notes = notes.filter(course_id__in=args)
+
+        num_indexed = 0
+        for note in notes.iterator():
+            index_note(note)
+            num_indexed += 1
+            if num_indexed % 1000 == 0:
+                LOG.info("Indexed %d notes", num_indexed)
+
+        LOG.info("Finished indexing %d notes", num_indexed)
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
 from django.core.exceptions import ValidationError
@@ -65,7 +67,7 @@ class Note(models.Model):
         """
         return {
             'id': self.pk,
-            'user_id': self.user.pk,
+            'user_id': self.user_id,
             'uri': self.uri,
             'text': self.text,
             'quote': self.quote,
@@ -79,3 +81,38 @@ class Note(models.Model):
             'created': str(self.created),
             'updated': str(self.updated)
         }
+
+
+class NoteTerm(models.Model):
+    """
+    A word of a note's text, quote or tags, in the inverted index that
+    notes.search looks notes up with.  `position` is the word's position in
+    the note, counting the text, quote and each tag in turn with a gap in
+    between, so that phrases don't match across them.
+
+    The user and course are copied from the note, so that lookups don't
+    need to join it (the migration indexes user, course_id and term).
+    """
+    note = models.ForeignKey(Note, db_index=True)
+    user = models.ForeignKey(User)
+    course_id = models.CharField(max_length=255)
+    term = models.CharField(max_length=64, db_index=True)
+    position = models.IntegerField()
+
+
+@receiver(post_save, sender=Note)
+def index_note_on_save(sender, instance, **kwargs):  # pylint: disable=W0613
+    """Re-index a note whenever it is saved."""
+    # imported here, since notes.search imports these models
+    from notes.search import index_note
+    index_note(instance)
+
+
+@receiver(post_delete, sender=Note)
+def drop_note_totals_on_delete(sender, instance, **kwargs):  # pylint: disable=W0613
+    """
+    Drop the cached totals of a deleted note's owner.  Its terms are deleted
+    along with it.
+    """
+    from notes.search import invalidate_totals
+    invalidate_totals(instance.course_id, instance.user_id)
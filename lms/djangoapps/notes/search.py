@@ -0,0 +1,217 @@
+"""
+Full-text search of a student's notes in a course.
+
+Each note's text, quote and tags are split into lowercased words, kept as
+NoteTerm rows (an inverted index), which are rewritten whenever the note is
+saved and deleted along with it.
+
+A query is a list of clauses separated by spaces, all of which a note must
+match:
+
+    word        notes containing the word
+    wor*        notes containing a word starting with "wor"
+    "a phrase"  notes containing the words in that order
+
+Totals of the notes matching a uri and query are cached per student and
+course, and dropped whenever one of their notes changes.
+"""
+import re
+
+from django.core.cache import get_cache, InvalidCacheBackendError
+
+from notes.models import Note, NoteTerm
+
+# Longest word that is indexed; longer ones are cut to this length, in the
+# index and in queries.
+MAX_TERM_LENGTH = 64
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+CLAUSE_RE = re.compile(r'"([^"]*)"?|(\S+)', re.UNICODE)
+
+
+def _get_cache():
+    """
+    Return the cache that totals are kept in.
+    """
+    try:
+        return get_cache('notes')
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+
+def words(text):
+    """
+    Returns the lowercased words of `text`, as they are indexed.
+    """
+    return [word[:MAX_TERM_LENGTH] for word in WORD_RE.findall(text.lower())]
+
+
+def note_terms(note):
+    """
+    Returns the (term, position) pairs of `note`'s text, quote and tags.
+    """
+    fields = [note.text, note.quote] + note.tags.split(',')
+    terms = []
+    position = 0
+    for field in fields:
+        for word in words(field):
+            terms.append((word, position))
+            position += 1
+        # leave a gap, so that phrases don't span fields
+        position += 1
+    return terms
+
+
+def index_note(note):
+    """
+    Replace the index entries of `note` with its current terms.
+    """
+    NoteTerm.objects.filter(note=note).delete()
+    NoteTerm.objects.bulk_create([
+        NoteTerm(note_id=note.id, user_id=note.user_id, course_id=note.course_id, term=term, position=position)
+        for term, position in note_terms(note)
+    ])
+    invalidate_totals(note.course_id, note.user_id)
+
+
+def parse_query(query):
+    """
+    Returns the clauses of `query`, as a list of (kind, value) pairs, where
+    kind is 'term', 'prefix' or 'phrase'.  The value of a phrase is a list
+    of words.  Punctuation is ignored, as it is when indexing.
+    """
+    clauses = []
+    for phrase, clause in CLAUSE_RE.findall(query):
+        if clause:
+            clause_words = words(clause)
+            if clause.endswith('*') and len(clause_words) == 1:
+                clauses.append(('prefix', clause_words[0]))
+                continue
+        else:
+            clause_words = words(phrase)
+        if len(clause_words) == 1:
+            clauses.append(('term', clause_words[0]))
+        elif clause_words:
+            clauses.append(('phrase', clause_words))
+    return clauses
+
+
+def _phrase_note_ids(terms, phrase):
+    """
+    Returns the ids of the notes among `terms` (a NoteTerm queryset) that
+    contain the words of `phrase` next to each other, in order.
+    """
+    positions = {}
+    for note_id, term, position in terms.filter(term__in=set(phrase)).values_list('note_id', 'term', 'position'):
+        positions.setdefault((note_id, term), set()).add(position)
+
+    note_ids = set()
+    for (note_id, term), starts in positions.iteritems():
+        if term != phrase[0] or note_id in note_ids:
+            continue
+        for start in starts:
+            if all(start + i in positions.get((note_id, word), ()) for i, word in enumerate(phrase)):
+                note_ids.add(note_id)
+                break
+    return note_ids
+
+
+def _matching_notes(course_id, user, clauses, uri=''):
+    """
+    Returns the queryset of `user`'s notes in `course_id` (on `uri`, if
+    given) that contain every term, prefix and phrase word of `clauses`,
+    in id order.  Whether a phrase's words are next to each other is left
+    to `_phrase_note_ids`.
+    """
+    terms = NoteTerm.objects.filter(user=user, course_id=course_id)
+    notes = Note.objects.filter(course_id=course_id, user=user).order_by('id')
+    if uri:
+        notes = notes.filter(uri=uri)
+    for kind, value in clauses:
+        if kind == 'term':
+            lookups = [{'term': value}]
+        elif kind == 'prefix':
+            lookups = [{'term__startswith': value}]
+        else:
+            lookups = [{'term': word} for word in set(value)]
+        for lookup in lookups:
+            notes = notes.filter(id__in=terms.filter(**lookup).values('note_id'))
+    return notes
+
+
+def search_notes(course_id, user, query, uri='', after=0, batch_size=100):
+    """
+    Yields `user`'s notes in `course_id` (on `uri`, if given) that match
+    `query`, in id order, starting after the note with id `after`.  An
+    empty query matches nothing.
+
+    Notes are read `batch_size` at a time, so that a caller that only
+    wants a page of them should pass the page's size.
+    """
+    clauses = parse_query(query)
+    if not clauses:
+        return
+    notes = _matching_notes(course_id, user, clauses, uri)
+    phrases = [value for kind, value in clauses if kind == 'phrase']
+    terms = NoteTerm.objects.filter(user=user, course_id=course_id)
+    while True:
+        batch = list(notes.filter(id__gt=after)[:batch_size])
+        note_ids = set(note.id for note in batch)
+        for phrase in phrases:
+            if not note_ids:
+                break
+            note_ids &= _phrase_note_ids(terms.filter(note__in=note_ids), phrase)
+        for note in batch:
+            if note.id in note_ids:
+                yield note
+        if len(batch) < batch_size:
+            return
+        after = batch[-1].id
+
+
+def search_note_ids(course_id, user, query):
+    """
+    Returns the set of ids of `user`'s notes in `course_id` that match
+    `query`.
+    """
+    return set(note.id for note in search_notes(course_id, user, query))
+
+
+def _totals_key(course_id, user_id):
+    """ The cache key of the totals of a student's notes in a course """
+    return u'notes.totals.{0}.{1}'.format(course_id, user_id)
+
+
+def invalidate_totals(course_id, user_id):
+    """
+    Drop the cached totals of the notes of the user with id `user_id` in
+    `course_id`.
+    """
+    _get_cache().delete(_totals_key(course_id, user_id))
+
+
+def count_notes(course_id, user, uri='', query=''):
+    """
+    Returns how many notes `user` has in `course_id` (on `uri`, if given)
+    that match `query` (all of them, if it's empty), counting them only if
+    that isn't cached.
+    """
+    key = _totals_key(course_id, user.id)
+    totals = _get_cache().get(key) or {}
+    total_key = (uri, query) if query else uri
+    if total_key not in totals:
+        if not query:
+            notes = Note.objects.filter(course_id=course_id, user=user)
+            if uri:
+                notes = notes.filter(uri=uri)
+            totals[total_key] = notes.count()
+        else:
+            clauses = parse_query(query)
+            if not clauses:
+                totals[total_key] = 0
+            elif any(kind == 'phrase' for kind, _ in clauses):
+                totals[total_key] = sum(1 for _ in search_notes(course_id, user, query, uri, batch_size=1000))
+            else:
+                totals[total_key] = _matching_notes(course_id, user, clauses, uri).count()
+        _get_cache().set(key, totals)
+    return totals[total_key]
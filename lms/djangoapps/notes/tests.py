@@ -11,7 +11,7 @@ from django.core.exceptions import ValidationError
 import collections
 import json
 
-from . import utils, api, models
+from . import utils, api, models, search
 
 
 class UtilsTest(TestCase):
@@ -339,6 +339,121 @@ class ApiTest(TestCase):
                 self.assertTrue('id' in row)
 
 
+    def test_search_query(self):
+        self.login()
+        notes = self.create_notes(3)
+        notes[1].text = 'The wrath of Achilles'
+        notes[1].save()
+
+        for query, expected in (('achilles', [notes[1]]),
+                                ('ACHIL*', [notes[1]]),
+                                ('"wrath of achilles"', [notes[1]]),
+                                ('foo bar', notes[::2]),
+                                ('hector', [])):
+            resp = self.client.get(self.url('notes_api_search'), {'q': query})
+            self.assertEqual(resp.status_code, 200)
+            content = json.loads(resp.content)
+            self.assertEqual(content['total'], len(expected))
+            self.assertEqual([row['id'] for row in content['rows']], [note.id for note in expected])
+
+    def test_search_pages(self):
+        self.login()
+        notes = self.create_notes(5)
+
+        for params in ({}, {'q': 'foo'}):
+            ids = []
+            after = ''
+            while after is not None:
+                resp = self.client.get(self.url('notes_api_search'), dict(params, limit=2, after=after or ''))
+                content = json.loads(resp.content)
+                self.assertEqual(content['total'], 5)
+                ids.extend(row['id'] for row in content['rows'])
+                after = content['next']
+            self.assertEqual(ids, [note.id for note in notes])
+
+    def test_index_after(self):
+        self.login()
+        notes = self.create_notes(3)
+
+        resp = self.client.get(self.url('notes_api_notes'), {'after': notes[0].id, 'limit': 1})
+        content = json.loads(resp.content)
+        self.assertEqual([row['id'] for row in content], [notes[1].id])
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user('student', 'student@test.com', 'abc')
+        self.course_id = 'HarvardX/CB22x/The_Ancient_Greek_Hero'
+
+    def create_note(self, text, quote='', tags=''):
+        return models.Note.objects.create(
+            user=self.student, course_id=self.course_id, uri='/', text=text, quote=quote, tags=tags,
+            range_start=0, range_start_offset=0, range_end=100, range_end_offset=0
+        )
+
+    def search(self, query):
+        return search.search_note_ids(self.course_id, self.student, query)
+
+    def test_parse_query(self):
+        self.assertEqual(search.parse_query('Wrath "of the  Achilles" hero* "kleos"'), [
+            ('term', 'wrath'),
+            ('phrase', ['of', 'the', 'achilles']),
+            ('prefix', 'hero'),
+            ('term', 'kleos'),
+        ])
+        self.assertEqual(search.parse_query(' , "" '), [])
+
+    def test_terms_and_prefixes(self):
+        note = self.create_note('Sing, goddess, the wrath', quote='of Achilles', tags='epic,homer')
+        other = self.create_note('The heroes of Troy')
+        self.assertEqual(self.search('wrath'), set([note.id]))
+        self.assertEqual(self.search('achilles homer'), set([note.id]))
+        self.assertEqual(self.search('the'), set([note.id, other.id]))
+        self.assertEqual(self.search('hero*'), set([other.id]))
+        self.assertEqual(self.search('wrath troy'), set())
+        self.assertEqual(self.search(''), set())
+
+    def test_phrases(self):
+        note = self.create_note('the wrath of Achilles', quote='hero of Troy')
+        self.assertEqual(self.search('"wrath of achilles"'), set([note.id]))
+        self.assertEqual(self.search('"achilles of wrath"'), set())
+        # phrases don't span fields
+        self.assertEqual(self.search('"achilles hero"'), set())
+
+    def test_index_follows_changes(self):
+        note = self.create_note('the wrath of Achilles')
+        note.text = 'the return of Odysseus'
+        note.save()
+        self.assertEqual(self.search('achilles'), set())
+        self.assertEqual(self.search('odysseus'), set([note.id]))
+
+        note.delete()
+        self.assertEqual(self.search('odysseus'), set())
+        self.assertFalse(models.NoteTerm.objects.exists())
+
+    def test_search_notes_in_batches(self):
+        notes = [self.create_note(text) for text in (
+            'the wrath of Achilles', 'wrath of the Achilles', 'the wrath of Achilles', 'the wrath of Achilles',
+        )]
+        matches = search.search_notes(self.course_id, self.student, '"wrath of achilles"', batch_size=2)
+        self.assertEqual([note.id for note in matches], [notes[0].id, notes[2].id, notes[3].id])
+        matches = search.search_notes(self.course_id, self.student, 'achilles', after=notes[1].id, batch_size=1)
+        self.assertEqual([note.id for note in matches], [notes[2].id, notes[3].id])
+
+    def test_count_notes(self):
+        self.create_note('the wrath of Achilles')
+        self.create_note('wrath of the Achilles')
+        self.assertEqual(search.count_notes(self.course_id, self.student, query='wrath achilles'), 2)
+        self.assertEqual(search.count_notes(self.course_id, self.student, query='"wrath of achilles"'), 1)
+        self.assertEqual(search.count_notes(self.course_id, self.student, uri='/other', query='wrath'), 0)
+        self.assertEqual(search.count_notes(self.course_id, self.student, query=','), 0)
+
+    def test_other_students_notes(self):
+        self.create_note('the wrath of Achilles')
+        other_student = User.objects.create_user('student2', 'student2@test.com', 'abc')
+        self.assertEqual(search.search_note_ids(self.course_id, other_student, 'achilles'), set())
+
+
 class NoteTest(TestCase):
     def setUp(self):
         self.password = 'abc'
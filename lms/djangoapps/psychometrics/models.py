@@ -4,8 +4,17 @@
 # this data is collected in real time
 #
 
+import calendar
+import datetime
+import json
+import re
+
 from django.db import models
 from courseware.models import StudentModule
+from pytz import UTC
+
+# checktimes used to be stored as the repr() of a list of datetimes
+LEGACY_CHECKTIME_RE = re.compile(r'datetime\.datetime\(([\d,\s]+)')
 
 
 class PsychometricData(models.Model):
@@ -20,13 +29,15 @@ class PsychometricData(models.Model):
     and for capa problems, category = "problem".
 
     checktimes is extracted from tracking logs, or added by capa module via psychometrics callback.
+    It is stored as a JSON list of integer UTC unix timestamps; use get_checktimes,
+    set_checktimes and add_checktime rather than accessing it directly.
     """
 
     studentmodule = models.ForeignKey(StudentModule, db_index=True, unique=True)   # contains student, module_state_key, course_id
 
     done = models.BooleanField(default=False)
     attempts = models.IntegerField(default=0)			# extracted from studentmodule.state
-    checktimes = models.TextField(null=True, blank=True)  	# internally stored as list of datetime objects
+    checktimes = models.TextField(null=True, blank=True)  	# JSON list of unix timestamps
 
     # keep in mind
     # grade = studentmodule.grade
@@ -35,6 +46,54 @@ class PsychometricData(models.Model):
     # course_id = studentmodule.course_id
     # location = studentmodule.module_state_key
 
+    @staticmethod
+    def parse_checktimes(checktimes):
+        """
+        Return the list of unix timestamps stored in a checktimes string.
+
+        Understands both the JSON format and the legacy repr() of a list of
+        datetimes (without eval'ing it). Unparseable values give [].
+        """
+        if not checktimes:
+            return []
+        try:
+            return [int(timestamp) for timestamp in json.loads(checktimes)]
+        except (ValueError, TypeError):
+            pass
+        timestamps = []
+        for match in LEGACY_CHECKTIME_RE.finditer(checktimes):
+            try:
+                parts = [int(part) for part in match.group(1).split(',') if part.strip()]
+                timestamps.append(calendar.timegm(datetime.datetime(*parts).utctimetuple()))
+            except (ValueError, TypeError):
+                continue
+        return timestamps
+
+    def get_checktimes(self):
+        """
+        Return the times of checks as a list of unix timestamps.
+        """
+        return self.parse_checktimes(self.checktimes)
+
+    def set_checktimes(self, checktimes):
+        """
+        Store `checktimes`, a list of datetimes or unix timestamps.
+        """
+        timestamps = []
+        for checktime in checktimes:
+            if isinstance(checktime, datetime.datetime):
+                if checktime.tzinfo is not None:
+                    checktime = checktime.astimezone(UTC)
+                checktime = calendar.timegm(checktime.utctimetuple())
+            timestamps.append(int(checktime))
+        self.checktimes = json.dumps(timestamps, separators=(',', ':'))
+
+    def add_checktime(self, checktime):
+        """
+        Append the datetime `checktime` to the stored check times.
+        """
+        self.set_checktimes(self.get_checktimes() + [checktime])
+
     def __unicode__(self):
         sm = self.studentmodule
         return "[PsychometricData] %s url=%s, grade=%s, max=%s, attempts=%s, ct=%s" % (sm.student,
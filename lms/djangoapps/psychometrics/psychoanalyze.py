@@ -6,6 +6,7 @@
 from __future__ import division
 
 import datetime
+import hashlib
 import logging
 import json
 import math
@@ -13,7 +14,8 @@ import numpy as np
 from scipy.optimize import curve_fit
 
 from django.conf import settings
-from django.db.models import Sum, Max
+from django.core.cache import cache
+from django.db.models import Count
 from psychometrics.models import PsychometricData
 from courseware.models import StudentModule
 from pytz import UTC
@@ -25,6 +27,9 @@ log = logging.getLogger("mitx.psychometrics")
 
 db = getattr(settings, 'DATABASE_FOR_PSYCHOMETRICS', 'default')
 
+# how long generated plots are cached for a problem, in seconds
+PLOTS_CACHE_TIMEOUT = getattr(settings, 'PSYCHOMETRICS_PLOTS_CACHE_TIMEOUT', 5 * 60)
+
 #-----------------------------------------------------------------------------
 # fit functions
 
@@ -53,6 +58,22 @@ class StatVar(object):
         self.min = None
         self.max = None
 
+    @classmethod
+    def from_array(cls, xdata, unit=1):
+        """
+        Build a StatVar from a numpy array in one pass, ignoring NaNs.
+        """
+        stat = cls(unit)
+        xdata = np.asarray(xdata, dtype=float)
+        xdata = xdata[~np.isnan(xdata)]
+        if len(xdata):
+            stat.sum = xdata.sum()
+            stat.sum2 = (xdata ** 2).sum()
+            stat.cnt = len(xdata)
+            stat.min = xdata.min()
+            stat.max = xdata.max()
+        return stat
+
     def add(self, x):
         if x is None:
             return
@@ -103,6 +124,9 @@ def make_histogram(ydata, bins=None):
     Generate histogram of ydata using bins provided, or by default bins
     from 0 to 100 by 10.  bins should be ordered in increasing order.
 
+    Each value is counted in the largest bin which is strictly below it;
+    values not above the first bin are dropped.
+
     returns dict with keys being bins, and values being counts.
     special: hist['bins'] = bins
     '''
@@ -110,12 +134,11 @@ def make_histogram(ydata, bins=None):
         bins = range(0, 100, 10)
 
     nbins = len(bins)
-    hist = dict(zip(bins, [0] * nbins))
-    for y in ydata:
-        for b in bins[::-1]:  # in reverse order
-            if y > b:
-                hist[b] += 1
-                break
+    ydata = np.asarray(ydata, dtype=float)
+    ydata = ydata[~np.isnan(ydata)]
+    index = np.searchsorted(np.asarray(bins, dtype=float), ydata, side='left') - 1
+    counts = np.bincount(index[index >= 0], minlength=nbins)
+    hist = dict(zip(bins, [int(c) for c in counts[:nbins]]))
     # hist['bins'] = bins
     return hist
 
@@ -128,18 +151,88 @@ def problems_with_psychometric_data(course_id):
     Does this for a given course_id.
     '''
     pmdset = PsychometricData.objects.using(db).filter(studentmodule__course_id=course_id)
-    plist = [p['studentmodule__module_state_key'] for p in pmdset.values('studentmodule__module_state_key').distinct()]
-    problems = dict((p, pmdset.filter(studentmodule__module_state_key=p).count()) for p in plist)
+    counts = pmdset.values('studentmodule__module_state_key').annotate(count=Count('id'))
+    problems = dict((p['studentmodule__module_state_key'], p['count']) for p in counts)
 
     return problems
 
 #-----------------------------------------------------------------------------
 
 
+def load_problem_data(problem):
+    """
+    Load the psychometric data for a problem with a single query.
+
+    Returns a dict of numpy arrays, one entry per student:
+        attempts: number of attempts
+        grades: grade (NaN when ungraded)
+        max_grades: max grade (NaN when unknown)
+        checktimes: list of arrays of check unix timestamps
+    """
+    rows = PsychometricData.objects.using(db).filter(
+        studentmodule__module_state_key=problem
+    ).values_list('attempts', 'checktimes', 'studentmodule__grade', 'studentmodule__max_grade')
+    rows = list(rows)
+
+    def as_float_array(values):
+        return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+    return {
+        'attempts': np.array([row[0] for row in rows], dtype=int),
+        'grades': as_float_array([row[2] for row in rows]),
+        'max_grades': as_float_array([row[3] for row in rows]),
+        'checktimes': [np.array(PsychometricData.parse_checktimes(row[1]), dtype=float) for row in rows],
+    }
+
+
+def check_time_differences(checktimes, max_minutes=20):
+    """
+    Given a list of arrays of check timestamps (one per student), return an
+    array of the time differences in minutes between successive checks,
+    ignoring differences of `max_minutes` or more.
+    """
+    diffs = [np.diff(times) / 60.0 for times in checktimes if len(times) >= 2]
+    if not diffs:
+        return np.array([], dtype=float)
+    dtset = np.concatenate(diffs)
+    return dtset[dtset < max_minutes]
+
+
+def irt_curve(attempts, max_attempts):
+    """
+    Cumulative fraction of students who finished within 1, 2, ... max_attempts
+    attempts, given the array of their attempt counts.
+    """
+    counts = np.bincount(attempts.clip(0, max_attempts), minlength=max_attempts + 1)[1:max_attempts + 1]
+    return np.cumsum(counts) / float(len(attempts))
+
+
+def _plots_cache_key(problem):
+    """
+    Cache key for the plots of a problem (location urls may be longer than memcached keys allow).
+    """
+    return 'psychometrics.plots.{0}'.format(hashlib.md5(problem.encode('utf-8')).hexdigest())
+
+
 def generate_plots_for_problem(problem):
+    """
+    Return (msg, plots) describing the psychometrics of a problem.
 
-    pmdset = PsychometricData.objects.using(db).filter(studentmodule__module_state_key=problem)
-    nstudents = pmdset.count()
+    Results are cached per problem, and the cache is invalidated when new
+    psychometric data is recorded for the problem.
+    """
+    cache_key = _plots_cache_key(problem)
+    result = cache.get(cache_key)
+    if result is None:
+        result = _generate_plots_for_problem(problem)
+        cache.set(cache_key, result, PLOTS_CACHE_TIMEOUT)
+    return result
+
+
+def _generate_plots_for_problem(problem):
+
+    data = load_problem_data(problem)
+    nstudents = len(data['attempts'])
     msg = ""
     plots = []
 
@@ -147,11 +240,12 @@ def generate_plots_for_problem(problem):
         msg += "%s nstudents=%d --> skipping, too few" % (problem, nstudents)
         return msg, plots
 
-    max_grade = pmdset[0].studentmodule.max_grade
+    max_grade = data['max_grades'][0]
+    if np.isnan(max_grade):
+        max_grade = None
 
-    agdat = pmdset.aggregate(Sum('attempts'), Max('attempts'))
-    max_attempts = agdat['attempts__max']
-    total_attempts = agdat['attempts__sum']  # not used yet
+    attempts = data['attempts']
+    max_attempts = int(attempts.max())
 
     msg += "max attempts = %d" % max_attempts
 
@@ -159,10 +253,8 @@ def generate_plots_for_problem(problem):
     dataset = {'xdat': xdat}
 
     # compute grade statistics
-    grades = [pmd.studentmodule.grade for pmd in pmdset]
-    gsv = StatVar()
-    for g in grades:
-        gsv += g
+    grades = data['grades']
+    gsv = StatVar.from_array(grades)
     msg += "<br><p><font color='blue'>Grade distribution: %s</font></p>" % gsv
 
     # generate grade histogram
@@ -197,23 +289,8 @@ def generate_plots_for_problem(problem):
         msg += "<br/>Not generating histogram: max_grade=%s" % max_grade
 
     # histogram of time differences between checks
-    # Warning: this is inefficient - doesn't scale to large numbers of students
-    dtset = []  # time differences in minutes
-    dtsv = StatVar()
-    for pmd in pmdset:
-        try:
-            checktimes = eval(pmd.checktimes)  # update log of attempt timestamps
-        except:
-            continue
-        if len(checktimes) < 2:
-            continue
-        ct0 = checktimes[0]
-        for ct in checktimes[1:]:
-            dt = (ct - ct0).total_seconds() / 60.0
-            if dt < 20:  # ignore if dt too long
-                dtset.append(dt)
-                dtsv += dt
-            ct0 = ct
+    dtset = check_time_differences(data['checktimes'])
+    dtsv = StatVar.from_array(dtset)
     if dtsv.cnt > 2:
         msg += "<br/><p><font color='brown'>Time differences between checks: %s</font></p>" % dtsv
         bins = np.linspace(0, 1.5 * dtsv.sdv(), 30)
@@ -234,16 +311,10 @@ def generate_plots_for_problem(problem):
     # one IRT plot curve for each grade received (TODO: this assumes integer grades)
     for grade in range(1, int(max_grade) + 1):
         yset = {}
-        gset = pmdset.filter(studentmodule__grade=grade)
-        ngset = gset.count()
-        if ngset == 0:
+        gattempts = attempts[grades == grade]
+        if len(gattempts) == 0:
             continue
-        ydat = []
-        ylast = 0
-        for x in xdat:
-            y = gset.filter(attempts=x).count() / ngset
-            ydat.append(y + ylast)
-            ylast = y + ylast
+        ydat = list(irt_curve(gattempts, max_attempts))
         yset['ydat'] = ydat
 
         if len(ydat) > 3:  # try to fit to logistic function if enough data points
@@ -305,48 +376,52 @@ def make_psychometrics_data_update_handler(course_id, user, module_state_key):
     """
     Construct and return a procedure which may be called to update
     the PsychometricData instance for the given StudentModule instance.
+
+    Nothing is loaded from the database until the procedure is first called,
+    so building modules which are never checked costs no queries.
     """
-    sm, status = StudentModule.objects.get_or_create(
-                       course_id=course_id,
-                       student=user,
-                       module_state_key=module_state_key,
-                       defaults={'state': '{}', 'module_type': 'problem'},
-                 )
-
-    try:
-        pmd = PsychometricData.objects.using(db).get(studentmodule=sm)
-    except PsychometricData.DoesNotExist:
-        pmd = PsychometricData(studentmodule=sm)
+    loaded = {}
+
+    def load():
+        """
+        Fetch (creating if needed) the StudentModule and PsychometricData.
+        """
+        if not loaded:
+            sm, status = StudentModule.objects.get_or_create(
+                course_id=course_id,
+                student=user,
+                module_state_key=module_state_key,
+                defaults={'state': '{}', 'module_type': 'problem'},
+            )
+
+            try:
+                pmd = PsychometricData.objects.using(db).get(studentmodule=sm)
+            except PsychometricData.DoesNotExist:
+                pmd = PsychometricData(studentmodule=sm)
+
+            loaded['sm'] = sm
+            loaded['pmd'] = pmd
+        return loaded['sm'], loaded['pmd']
 
     def psychometrics_data_update_handler(state):
         """
         This function may be called each time a problem is successfully checked
         (eg on save_problem_check events in capa_module).
 
-        state = instance state (a nice, uniform way to interface - for more future psychometric feature extraction)
+        state = instance state (a nice, uniform way to interface - for more future psychometric feature extraction),
+        including 'done' and 'attempts'.  The StudentModule's saved state isn't read, as it may
+        not have been written yet.
         """
-        try:
-            state = json.loads(sm.state)
-            done = state['done']
-        except:
-            log.exception("Oops, failed to eval state for %s (state=%s)" % (sm, sm.state))
-            return
+        sm, pmd = load()
+        pmd.done = bool(state.get('done', False))
+        pmd.attempts = state.get('attempts', 0)
 
-        pmd.done = done
-        try:
-            pmd.attempts = state.get('attempts', 0)
-        except:
-            log.exception("no attempts for %s (state=%s)" % (sm, sm.state))
-
-        try:
-            checktimes = eval(pmd.checktimes)  # update log of attempt timestamps
-        except:
-            checktimes = []
-        checktimes.append(datetime.datetime.now(UTC))
-        pmd.checktimes = checktimes
+        pmd.add_checktime(datetime.datetime.now(UTC))
         try:
             pmd.save()
         except:
             log.exception("Error in updating psychometrics data for %s" % sm)
+        else:
+            cache.delete(_plots_cache_key(module_state_key))
 
     return psychometrics_data_update_handler
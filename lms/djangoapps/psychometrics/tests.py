@@ -0,0 +1,116 @@
+"""
+Tests of the psychometrics data and analysis
+"""
+import calendar
+import datetime
+import json
+
+import numpy as np
+from mock import patch
+from pytz import UTC
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from courseware.tests.factories import StudentModuleFactory
+from psychometrics import psychoanalyze
+from psychometrics.models import PsychometricData
+
+LOCATION = 'i4x://MITx/999/problem/Problem_1'
+
+
+class ChecktimesTest(TestCase):
+    """
+    Tests of how PsychometricData stores checktimes
+    """
+    def test_json(self):
+        self.assertEqual(PsychometricData.parse_checktimes('[1373733000,1373733060]'), [1373733000, 1373733060])
+
+    def test_legacy(self):
+        checktimes = repr([datetime.datetime(2013, 7, 13, 16, 30), datetime.datetime(2013, 7, 13, 16, 31, 5)])
+        self.assertEqual(PsychometricData.parse_checktimes(checktimes), [
+            calendar.timegm((2013, 7, 13, 16, 30, 0)),
+            calendar.timegm((2013, 7, 13, 16, 31, 5)),
+        ])
+
+    def test_unparseable(self):
+        for checktimes in (None, '', 'robot', '{"a": 1}'):
+            self.assertEqual(PsychometricData.parse_checktimes(checktimes), [])
+
+    def test_set_and_add(self):
+        pmd = PsychometricData()
+        pmd.set_checktimes([datetime.datetime(2013, 7, 13, 16, 30, tzinfo=UTC), 1373733060])
+        pmd.add_checktime(datetime.datetime(2013, 7, 13, 16, 32, tzinfo=UTC))
+        self.assertEqual(json.loads(pmd.checktimes), [1373733000, 1373733060, 1373733120])
+
+
+class AnalysisTest(TestCase):
+    """
+    Tests of the computations of psychoanalyze
+    """
+    def test_make_histogram(self):
+        hist = psychoanalyze.make_histogram([5, 10, 15, 95, 100, 0, float('nan')])
+        self.assertEqual(hist[0], 2)
+        self.assertEqual(hist[10], 1)
+        self.assertEqual(hist[90], 2)
+        self.assertEqual(sum(hist.values()), 5)
+
+    def test_make_histogram_bins(self):
+        self.assertEqual(psychoanalyze.make_histogram([0.5, 1.5, 1.7, 3], [0, 1, 2]), {0: 1, 1: 2, 2: 1})
+
+    def test_check_time_differences(self):
+        checktimes = [
+            np.array([0, 60, 180, 3600], dtype=float),
+            np.array([100], dtype=float),
+            np.array([0, 30], dtype=float),
+        ]
+        diffs = psychoanalyze.check_time_differences(checktimes)
+        self.assertEqual(list(diffs), [1.0, 2.0, 0.5])
+
+    def test_check_time_differences_none(self):
+        self.assertEqual(len(psychoanalyze.check_time_differences([np.array([1.0])])), 0)
+
+    def test_irt_curve(self):
+        curve = psychoanalyze.irt_curve(np.array([1, 1, 2, 4]), 3)
+        self.assertEqual(list(curve), [0.5, 0.75, 1.0])
+
+
+class PlotsCacheTest(TestCase):
+    """
+    Tests of the cache of generated plots, and of the handler that records
+    psychometric data
+    """
+    def setUp(self):
+        cache.clear()
+        self.student_module = StudentModuleFactory.create(module_state_key=LOCATION, state='{}')
+        self.handler = psychoanalyze.make_psychometrics_data_update_handler(
+            self.student_module.course_id, self.student_module.student, LOCATION
+        )
+
+    def test_cache_key(self):
+        key = psychoanalyze._plots_cache_key(LOCATION * 10)  # pylint: disable=W0212
+        self.assertLess(len(key), 250)
+        self.assertNotEqual(key, psychoanalyze._plots_cache_key(LOCATION))  # pylint: disable=W0212
+
+    def test_plots_cached_until_data_recorded(self):
+        with patch.object(psychoanalyze, '_generate_plots_for_problem', return_value=('', [])) as generate:
+            psychoanalyze.generate_plots_for_problem(LOCATION)
+            psychoanalyze.generate_plots_for_problem(LOCATION)
+            self.assertEqual(generate.call_count, 1)
+
+            self.handler({'done': True, 'attempts': 1})
+            psychoanalyze.generate_plots_for_problem(LOCATION)
+            self.assertEqual(generate.call_count, 2)
+
+    def test_handler_reads_passed_state(self):
+        # The saved state is stale when the module's state is written at the end of the request
+        self.student_module.state = json.dumps({'done': False, 'attempts': 1})
+        self.student_module.save()
+
+        self.handler({'done': True, 'attempts': 3})
+        self.handler({'done': True, 'attempts': 4})
+
+        pmd = PsychometricData.objects.get(studentmodule=self.student_module)
+        self.assertTrue(pmd.done)
+        self.assertEqual(pmd.attempts, 4)
+        self.assertEqual(len(pmd.get_checktimes()), 2)
@@ -342,6 +342,19 @@ TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat']
 COURSE_LISTINGS = {}
 SUBDOMAIN_BRANDING = {}
 
+# Seconds to cache the course summaries that course listings are made from.
+# They are also dropped whenever a course changes (see course_summaries),
+# which needs a 'course_summaries' cache that Studio shares.
+COURSE_SUMMARY_CACHE_TIMEOUT = 3600
+
+# Seconds to cache each student's enrollments and certificate statuses for
+# the dashboard.  They are also dropped whenever either changes.
+DASHBOARD_CACHE_TIMEOUT = 600
+
+# Instructors enrolling or unenrolling more students than this at once have it
+# done by a background task (see instructor_task).
+BULK_ENROLLMENT_ASYNC_THRESHOLD = 1000
+
 
 ############################### XModule Store ##################################
 MODULESTORE = {
@@ -374,6 +387,15 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Pre-forked sandbox workers.  With a size of 0, a new sandboxed Python is
+    # started for every execution.
+    'pool': {
+        # How many workers each LMS process may run.
+        'size': 0,
+        # How many jobs a worker runs before it is replaced.
+        'max_jobs': 100,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -543,14 +565,18 @@ TEMPLATE_LOADERS = (
 
 MIDDLEWARE_CLASSES = (
     'request_cache.middleware.RequestCache',
+    # Keeps users' groups and access decisions for the length of a request
+    'courseware.middleware.AccessCacheMiddleware',
     'django_comment_client.middleware.AjaxExceptionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # Serves /c4x/ assets; before the session and authentication middleware
+    # so that unlocked assets are served without loading either
+    'contentserver.middleware.StaticContentServer',
     'django.contrib.sessions.middleware.SessionMiddleware',
 
     # Instead of AuthenticationMiddleware, we use a cached backed version
     #'django.contrib.auth.middleware.AuthenticationMiddleware',
     'cache_toolbox.middleware.CacheBackedAuthenticationMiddleware',
-    'contentserver.middleware.StaticContentServer',
 
     'django.contrib.messages.middleware.MessageMiddleware',
     'track.middleware.TrackMiddleware',
@@ -562,7 +588,11 @@ MIDDLEWARE_CLASSES = (
     # Detects user-requested locale from 'accept-language' header in http request
     'django.middleware.locale.LocaleMiddleware',
 
+    # Sends the history of the student state changed by a request once it's committed
+    'courseware.middleware.StudentModuleHistoryMiddleware',
     'django.middleware.transaction.TransactionMiddleware',
+    # Saves the student state changed by a request before it's committed
+    'courseware.middleware.FieldDataCacheMiddleware',
     # 'debug_toolbar.middleware.DebugToolbarMiddleware',
 
     'django_comment_client.utils.ViewNameMiddleware',
@@ -858,6 +888,9 @@ INSTALLED_APPS = (
     # Different Course Modes
     'course_modes',
 
+    # Cached course summaries for course listings
+    'course_summaries',
+
     # Student Identity Verification
     'verify_student',
 )
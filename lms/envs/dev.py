@@ -76,7 +76,15 @@ CACHES = {
         'LOCATION': '/var/tmp/mongo_metadata_inheritance',
         'TIMEOUT': 300,
         'KEY_FUNCTION': 'util.memcache.safe_key',
-    }
+    },
+
+    # Shared by the LMS and Studio, so that Studio edits drop the summaries
+    # that LMS course listings are made from (see course_summaries).
+    'course_summaries': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/tmp/course_summaries',
+        'KEY_FUNCTION': 'util.memcache.safe_key',
+    },
 }
 
 
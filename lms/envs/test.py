@@ -139,7 +139,22 @@ CACHES = {
         'LOCATION': '/var/tmp/mongo_metadata_inheritance',
         'TIMEOUT': 300,
         'KEY_FUNCTION': 'util.memcache.safe_key',
-    }
+    },
+
+    # Course summaries, dashboards, note totals and Foldit leaderboards outlive the
+    # modulestore and database, which are emptied between tests, so don't keep them.
+    'course_summaries': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'notes': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'foldit': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
 }
 
 # Dummy secret key for dev
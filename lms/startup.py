@@ -17,3 +17,15 @@ def run():
     Executed during django startup
     """
     autostartup()
+
+    configure_sandbox_pool()
+
+
+def configure_sandbox_pool():
+    """
+    Hand capa's sandboxed code to a pool of pre-forked workers, if configured.
+    """
+    pool_settings = settings.CODE_JAIL.get('pool')
+    if pool_settings and pool_settings.get('size'):
+        from capa.safe_exec import configure_pool
+        configure_pool(pool_settings['size'], max_jobs=pool_settings.get('max_jobs', 100))